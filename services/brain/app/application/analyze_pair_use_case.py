@@ -54,7 +54,7 @@ class AnalyzePairUseCase:
         pair: str, 
         bot_type: BotType = BotType.GRID,
         timeframe: str = '4h',
-        days: int = 40
+        days: Optional[int] = None
     ) -> TradingDecision:
         """
         Ejecuta el análisis de un par específico.
@@ -63,7 +63,7 @@ class AnalyzePairUseCase:
             pair: Par de trading (ej: 'ETH/USDT')
             bot_type: Tipo de bot para el cual tomar la decisión
             timeframe: Marco temporal para los datos
-            days: Número de días de historial
+            days: Número de días de historial (None = el mínimo que necesitan los indicadores)
             
         Returns:
             Decisión de trading
@@ -69,7 +69,7 @@ class AnalyzeTrendUseCase:
             self.logger.info(f"📈 ========== ANÁLISIS TREND PARA {pair} ==========")
             
             # Obtener datos de mercado (timeframe 1d para tendencia)
-            market_data = await self.market_data_repo.fetch_market_data(pair, timeframe='1d', days=200)
+            market_data = await self.market_data_repo.fetch_market_data(pair, timeframe='1d')
             if not market_data:
                 self.logger.warning(f"⚠️ No se pudieron obtener datos para {pair}")
                 return None
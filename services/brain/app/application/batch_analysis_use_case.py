@@ -7,8 +7,9 @@ Ejecuta análisis batch de todos los pares soportados.
 
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime, date, timezone
 
 from app.domain.interfaces import (
     MarketDataRepository, 
@@ -16,11 +17,25 @@ from app.domain.interfaces import (
     RecipeRepository,
     NotificationService
 )
-from app.domain.entities import TradingDecision, TrendDecision, BotType, DecisionType
-from app.config import SUPPORTED_PAIRS
+from app.domain.entities import (
+    TradingDecision, TrendDecision, BotType, DecisionType, AnalysisWatermark, last_closed_candle
+)
+from app.config import (
+    SUPPORTED_PAIRS, BATCH_MAX_CONCURRENCY, BATCH_PAIR_TIMEOUT,
+    ANALYSIS_TIMEFRAME, ANALYSIS_DAYS, TREND_TIMEFRAME, TREND_DAYS
+)
+
+if TYPE_CHECKING:
+    from app.application.pair_universe_use_case import PairUniverseUseCase
 
 logger = logging.getLogger(__name__)
 
+# Timeframe de las velas que analiza cada estrategia
+STRATEGY_TIMEFRAMES: Dict[BotType, str] = {
+    BotType.GRID: ANALYSIS_TIMEFRAME,
+    BotType.TREND: TREND_TIMEFRAME,
+}
+
 
 class BatchAnalysisUseCase:
     """
@@ -32,7 +47,10 @@ class BatchAnalysisUseCase:
         market_data_repo: MarketDataRepository,
         decision_repo: DecisionRepository,
         recipe_repo: RecipeRepository,
-        notification_service: NotificationService
+        notification_service: NotificationService,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+        pair_timeout: float = BATCH_PAIR_TIMEOUT,
+        pair_universe: Optional['PairUniverseUseCase'] = None
     ):
         """
         Inicializa el caso de uso.
@@ -42,53 +60,96 @@ class BatchAnalysisUseCase:
             decision_repo: Repositorio de decisiones
             recipe_repo: Repositorio de recetas
             notification_service: Servicio de notificaciones
+            max_concurrency: Número máximo de pares analizados a la vez
+            pair_timeout: Tiempo máximo en segundos para analizar un par
+            pair_universe: Selección de pares de cada ciclo (por defecto,
+                SUPPORTED_PAIRS con todas las estrategias)
         """
         self.market_data_repo = market_data_repo
         self.decision_repo = decision_repo
         self.recipe_repo = recipe_repo
         self.notification_service = notification_service
+        self.max_concurrency = max(1, max_concurrency)
+        self.pair_timeout = pair_timeout
+        # Cada par corre en su propio hilo: un timeout no puede detenerlo, así
+        # que su hueco de concurrencia sigue ocupado hasta que termine
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='brain-pair')
+        self.pair_universe = pair_universe
+        self._history_pruned_on: Optional[date] = None
+        # Entradas del último análisis guardado de cada (par, estrategia)
+        self._watermarks: Dict[Tuple[str, BotType], AnalysisWatermark] = {}
+        # Última vela usada por cada (par, estrategia) en el ciclo en curso
+        self._observed_candles: Dict[Tuple[str, BotType], int] = {}
         self.logger = logging.getLogger(__name__)
     
-    async def execute(self) -> Dict[str, Any]:
+    @property
+    def timeframes(self) -> List[str]:
+        """Timeframes analizados (uno o varios por estrategia)."""
+        return sorted(set(STRATEGY_TIMEFRAMES.values()))
+    
+    def close(self) -> None:
+        """
+        Detiene el executor de pares: cancela los pares en cola y no espera a
+        los que siguen en curso (p. ej. tras un timeout) para no bloquear el
+        apagado.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def execute(self, only_changed: bool = False) -> Dict[str, Any]:
         """
         Ejecuta el análisis batch de todos los pares.
         
+        Args:
+            only_changed: Solo analiza los (par, estrategia) cuya última vela
+                cerrada o sentimiento cambió desde su último análisis guardado
+        
         Returns:
             Resultado del análisis batch
         """
         start_time = datetime.utcnow()
         self.logger.info("🚀 ========== INICIANDO ANÁLISIS BATCH ==========")
-        self.logger.info(f"📊 Analizando {len(SUPPORTED_PAIRS)} pares: {', '.join(SUPPORTED_PAIRS)}")
+        self.logger.info(f"⚙️ Concurrencia máxima: {self.max_concurrency} pares, timeout por par: {self.pair_timeout}s")
         
         try:
-            # Procesar cada par para ambas estrategias
+            universe = await self._select_universe()
+            sentiment_watermark = await self.market_data_repo.get_sentiment_watermark()
+            pending = self._pending_analyses(universe, start_time, sentiment_watermark, only_changed)
+            pairs = [pair for pair in universe if pending[pair]]
+            skipped_analyses = sum(len(universe[pair]) - len(pending[pair]) for pair in universe)
+            if skipped_analyses:
+                self.logger.info(f"♻️ {skipped_analyses} análisis sin vela ni sentimiento nuevo: se omiten")
+            if len(pairs) > 20:
+                self.logger.info(f"📊 Analizando {len(pairs)} pares: {', '.join(pairs[:20])}...")
+            else:
+                self.logger.info(f"📊 Analizando {len(pairs)} pares: {', '.join(pairs) or '-'}")
+            
+            # Procesar los pares en paralelo con concurrencia acotada; cada par
+            # ejecuta sus estrategias en orden para reutilizar las mismas velas
+            self._observed_candles = {}
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            pair_results = await asyncio.gather(
+                *(self._analyze_pair_bounded(pair, semaphore, pending[pair]) for pair in pairs)
+            )
+            
             decisions: List[Any] = []  # Puede contener TradingDecision o TrendDecision
-            successful_pairs = 0
-            failed_pairs = 0
+            for pair_result in pair_results:
+                decisions.extend(pair_result['decisions'])
+            
+            # Todas las decisiones del batch se guardan en una única transacción
+            decisions_saved = await self._save_decisions(decisions)
+            if decisions_saved:
+                self._record_watermarks(
+                    sentiment_watermark, {r['pair'] for r in pair_results if r['status'] == 'success'}
+                )
+            else:
+                for pair_result in pair_results:
+                    if pair_result['status'] == 'success':
+                        pair_result.update(status='error', error="Error guardando decisiones")
             
-            for pair in SUPPORTED_PAIRS:
-                try:
-                    self.logger.info(f"📈 Analizando {pair}...")
-                    
-                    # ========== ANÁLISIS GRID ==========
-                    grid_decision = await self._analyze_grid(pair)
-                    if grid_decision:
-                        decisions.append(grid_decision)
-                        successful_pairs += 1
-                    
-                    # ========== ANÁLISIS TREND ==========
-                    trend_decision = await self._analyze_trend(pair)
-                    if trend_decision:
-                        decisions.append(trend_decision)
-                        successful_pairs += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"❌ Error analizando {pair}: {e}")
-                    failed_pairs += 1
-                    await self.notification_service.notify_error(
-                        f"Error analizando {pair}", 
-                        {"pair": pair, "error": str(e)}
-                    )
+            await self._prune_history_daily(start_time)
+            
+            successful_pairs = sum(1 for r in pair_results if r['status'] == 'success')
+            failed_pairs = len(pair_results) - successful_pairs
             
             # El brain es estateless, no necesita notificar estado del servicio
             # Solo notifica cambios de decisiones individuales
@@ -97,19 +158,31 @@ class BatchAnalysisUseCase:
             duration = (end_time - start_time).total_seconds()
             
             self.logger.info("🎯 ========== ANÁLISIS BATCH COMPLETADO ==========")
-            self.logger.info(f"✅ Pares exitosos: {successful_pairs}/{len(SUPPORTED_PAIRS)}")
-            self.logger.info(f"❌ Pares fallidos: {failed_pairs}/{len(SUPPORTED_PAIRS)}")
+            self.logger.info(f"✅ Pares exitosos: {successful_pairs}/{len(pairs)}")
+            self.logger.info(f"❌ Pares fallidos: {failed_pairs}/{len(pairs)}")
             self.logger.info(f"⏱️ Duración: {duration:.2f}s")
             
             return {
                 "status": "completed",
                 "timestamp": start_time.isoformat(),
                 "duration_seconds": duration,
-                "total_pairs": len(SUPPORTED_PAIRS),
+                "total_pairs": len(universe),
+                "analyzed_pairs": len(pairs),
+                "skipped_analyses": skipped_analyses,
                 "successful_pairs": successful_pairs,
                 "failed_pairs": failed_pairs,
                 "decisions_made": len(decisions),
-                "decisions": [decision.to_dict() for decision in decisions]
+                "decisions_saved": decisions_saved,
+                "decisions": [decision.to_dict() for decision in decisions],
+                "pair_results": {
+                    r['pair']: {
+                        "status": r['status'],
+                        "decisions": len(r['decisions']),
+                        "duration_seconds": r['duration_seconds'],
+                        "error": r.get('error')
+                    }
+                    for r in pair_results
+                }
             }
             
         except Exception as e:
@@ -119,16 +192,235 @@ class BatchAnalysisUseCase:
                 {"error": str(e), "timestamp": start_time.isoformat()}
             )
             
+            # Tamaño del universo seleccionado (en modo dinámico, no solo los pares fijos)
+            total_pairs = len(SUPPORTED_PAIRS) if self.pair_universe is None else len(self.pair_universe.pairs)
             return {
                 "status": "error",
                 "timestamp": start_time.isoformat(),
                 "error": str(e),
-                "total_pairs": len(SUPPORTED_PAIRS),
+                "total_pairs": total_pairs,
                 "successful_pairs": 0,
-                "failed_pairs": len(SUPPORTED_PAIRS),
+                "failed_pairs": total_pairs,
                 "decisions_made": 0
             }
     
+    async def _select_universe(self) -> Dict[str, List[BotType]]:
+        """
+        Pares del ciclo y estrategias de cada uno.
+        
+        Returns:
+            Estrategias por par
+        """
+        if self.pair_universe is None:
+            return {pair: list(STRATEGY_TIMEFRAMES) for pair in SUPPORTED_PAIRS}
+        return await self.pair_universe.execute()
+    
+    def _pending_analyses(
+        self,
+        universe: Dict[str, List[BotType]],
+        now: datetime,
+        sentiment_watermark: Optional[str],
+        only_changed: bool
+    ) -> Dict[str, List[BotType]]:
+        """
+        Estrategias a analizar por par.
+        
+        Args:
+            universe: Estrategias de cada par del ciclo
+            now: Instante del ciclo (UTC)
+            sentiment_watermark: Marca de agua actual del sentimiento
+            only_changed: Omitir los análisis cuyas entradas no cambiaron
+            
+        Returns:
+            Estrategias pendientes de cada par del ciclo
+        """
+        now_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        pending: Dict[str, List[BotType]] = {}
+        for pair, strategies in universe.items():
+            pending[pair] = []
+            for bot_type in strategies:
+                timeframe = STRATEGY_TIMEFRAMES[bot_type]
+                watermark = self._watermarks.get((pair, bot_type))
+                if (
+                    only_changed
+                    and watermark is not None
+                    and watermark.is_current(last_closed_candle(timeframe, now_ms), sentiment_watermark)
+                ):
+                    continue
+                pending[pair].append(bot_type)
+        return pending
+    
+    def _record_watermarks(self, sentiment_watermark: Optional[str], pairs: Set[str]) -> None:
+        """
+        Registra las entradas de los análisis guardados en este ciclo.
+        
+        Args:
+            sentiment_watermark: Marca de agua del sentimiento al iniciar el ciclo
+            pairs: Pares analizados con éxito (un par con timeout puede terminar
+                después y registrar su vela sin que su decisión se guardara)
+        """
+        for key, candle_timestamp in list(self._observed_candles.items()):
+            if key[0] in pairs:
+                self._watermarks[key] = AnalysisWatermark(candle_timestamp, sentiment_watermark)
+    
+    async def _save_decisions(self, decisions: List[Any]) -> bool:
+        """
+        Guarda las decisiones del batch en una transacción y notifica las que
+        cambiaron respecto a la decisión vigente.
+        
+        Args:
+            decisions: Decisiones generadas en el batch
+            
+        Returns:
+            True si se guardaron correctamente
+        """
+        if not decisions:
+            return True
+        
+        changed = await self.decision_repo.save_decisions(decisions)
+        if changed is None:
+            self.logger.error(f"❌ Error guardando las {len(decisions)} decisiones del batch")
+            await self.notification_service.notify_error(
+                "Error guardando decisiones del batch",
+                {"decisions": len(decisions)}
+            )
+            return False
+        
+        for decision in changed:
+            # Notificar cambio de decisión
+            await self.notification_service.notify_decision_change(decision)
+        return True
+    
+    async def _prune_history_daily(self, now: datetime) -> None:
+        """
+        Depura el historial de decisiones como mucho una vez al día.
+        
+        Args:
+            now: Instante del ciclo actual
+        """
+        if self._history_pruned_on == now.date():
+            return
+        
+        pruned = await self.decision_repo.prune_decision_history(now)
+        if pruned:
+            self._history_pruned_on = now.date()
+    
+    async def _analyze_pair_bounded(
+        self,
+        pair: str,
+        semaphore: asyncio.Semaphore,
+        strategies: Optional[List[BotType]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analiza un par respetando el límite de concurrencia y el timeout por par.
+        
+        Los errores quedan aislados: un par que falla o excede el timeout no
+        afecta al resto del batch. El par corre en un hilo del executor con su
+        propio event loop; si excede el timeout se descarta su resultado, pero
+        el hueco del semáforo se libera solo cuando el hilo termina.
+        
+        Args:
+            pair: Par de trading
+            semaphore: Semáforo que limita los pares en vuelo
+            strategies: Estrategias a analizar (por defecto, todas)
+            
+        Returns:
+            Resultado del par con sus decisiones, estado y duración
+        """
+        def release(work: asyncio.Future) -> None:
+            semaphore.release()
+            if not work.cancelled():
+                work.exception()  # Un par descartado por timeout también puede fallar después
+        
+        await semaphore.acquire()
+        start = datetime.utcnow()
+        result: Dict[str, Any] = {'pair': pair, 'decisions': [], 'status': 'success'}
+        self.logger.info(f"📈 Analizando {pair}...")
+        work = asyncio.get_running_loop().run_in_executor(self._executor, self._run_pair, pair, strategies)
+        work.add_done_callback(release)
+        try:
+            result['decisions'] = await asyncio.wait_for(asyncio.shield(work), timeout=self.pair_timeout)
+            if not result['decisions']:
+                result['status'] = 'failed'
+        except asyncio.CancelledError:
+            if not work.cancelled():
+                raise
+            # El executor se cerró con el par aún en cola
+            self.logger.warning(f"🛑 Análisis de {pair} cancelado: el servicio se está deteniendo")
+            result.update(status='error', error="Cancelado al detener el servicio")
+        except asyncio.TimeoutError:
+            self.logger.error(f"⏱️ Timeout analizando {pair} ({self.pair_timeout}s)")
+            result.update(status='timeout', error=f"Timeout tras {self.pair_timeout}s")
+            await self.notification_service.notify_error(
+                f"Timeout analizando {pair}",
+                {"pair": pair, "timeout_seconds": self.pair_timeout}
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Error analizando {pair}: {e}")
+            result.update(status='error', error=str(e))
+            await self.notification_service.notify_error(
+                f"Error analizando {pair}", 
+                {"pair": pair, "error": str(e)}
+            )
+        result['duration_seconds'] = (datetime.utcnow() - start).total_seconds()
+        return result
+    
+    def _run_pair(self, pair: str, strategies: Optional[List[BotType]] = None) -> List[Any]:
+        """Analiza un par en un hilo del executor, con su propio event loop."""
+        return asyncio.run(self._analyze_pair(pair, strategies))
+    
+    async def _analyze_pair(self, pair: str, strategies: Optional[List[BotType]] = None) -> List[Any]:
+        """
+        Ejecuta las estrategias de un par dentro del ciclo batch.
+        
+        Args:
+            pair: Par de trading
+            strategies: Estrategias a analizar (por defecto, todas)
+            
+        Returns:
+            Decisiones generadas para el par
+        """
+        observed: Dict[BotType, int] = {}
+        decisions = await self.analyze_pair(pair, strategies, observed)
+        for bot_type, candle_timestamp in observed.items():
+            self._observed_candles[(pair, bot_type)] = candle_timestamp
+        return decisions
+    
+    async def analyze_pair(
+        self,
+        pair: str,
+        strategies: Optional[List[BotType]] = None,
+        observed: Optional[Dict[BotType, int]] = None
+    ) -> List[Any]:
+        """
+        Ejecuta las estrategias GRID y TREND para un par sin guardar las decisiones.
+        
+        Args:
+            pair: Par de trading
+            strategies: Estrategias a analizar (por defecto, todas)
+            observed: Si se indica, se rellena con la apertura de la última vela
+                usada por cada estrategia con decisión válida
+            
+        Returns:
+            Decisiones generadas para el par
+        """
+        strategies = list(STRATEGY_TIMEFRAMES) if strategies is None else strategies
+        decisions: List[Any] = []
+        
+        # ========== ANÁLISIS GRID ==========
+        if BotType.GRID in strategies:
+            grid_decision = await self._analyze_grid(pair, observed)
+            if grid_decision:
+                decisions.append(grid_decision)
+        
+        # ========== ANÁLISIS TREND ==========
+        if BotType.TREND in strategies:
+            trend_decision = await self._analyze_trend(pair, observed)
+            if trend_decision:
+                decisions.append(trend_decision)
+        
+        return decisions
+    
     def _make_decision(
         self, 
         pair: str, 
@@ -208,19 +500,26 @@ class BatchAnalysisUseCase:
                 error_message=str(e)
             )
     
-    async def _analyze_grid(self, pair: str) -> Optional[TradingDecision]:
+    async def _analyze_grid(
+        self,
+        pair: str,
+        observed: Optional[Dict[BotType, int]] = None
+    ) -> Optional[TradingDecision]:
         """
         Analiza un par para la estrategia GRID.
         
         Args:
             pair: Par de trading
+            observed: Vela usada por estrategia (ver analyze_pair)
             
         Returns:
             Decisión de GRID o None si hay error
         """
         try:
             # Obtener datos de mercado
-            market_data = await self.market_data_repo.fetch_market_data(pair)
+            market_data = await self.market_data_repo.fetch_market_data(
+                pair, timeframe=STRATEGY_TIMEFRAMES[BotType.GRID], days=ANALYSIS_DAYS or None
+            )
             if not market_data:
                 self.logger.warning(f"⚠️ No se pudieron obtener datos para {pair} (GRID)")
                 return None
@@ -243,35 +542,36 @@ class BatchAnalysisUseCase:
             # Tomar decisión basada en indicadores y umbrales
             decision = self._make_decision(pair, indicators, thresholds)
             
-            # Guardar decisión
-            saved = await self.decision_repo.save_decision(decision)
-            if saved:
-                # Notificar cambio de decisión
-                await self.notification_service.notify_decision_change(decision)
-                
-                self.logger.info(f"✅ {pair} GRID: {decision.decision.value} - {decision.reason}")
-                return decision
-            else:
-                self.logger.error(f"❌ Error guardando decisión GRID para {pair}")
-                return None
+            # La decisión se guarda junto al resto del batch en execute()
+            if decision.success and observed is not None:
+                observed[BotType.GRID] = market_data.latest_timestamp
+            self.logger.info(f"✅ {pair} GRID: {decision.decision.value} - {decision.reason}")
+            return decision
                 
         except Exception as e:
             self.logger.error(f"❌ Error analizando GRID para {pair}: {e}")
             return None
     
-    async def _analyze_trend(self, pair: str) -> Optional[TrendDecision]:
+    async def _analyze_trend(
+        self,
+        pair: str,
+        observed: Optional[Dict[BotType, int]] = None
+    ) -> Optional[TrendDecision]:
         """
         Analiza un par para la estrategia TREND.
         
         Args:
             pair: Par de trading
+            observed: Vela usada por estrategia (ver analyze_pair)
             
         Returns:
             Decisión de TREND o None si hay error
         """
         try:
-            # Obtener datos de mercado (timeframe 1d para tendencia)
-            market_data = await self.market_data_repo.fetch_market_data(pair, timeframe='1d', days=200)
+            # Obtener datos de mercado (timeframe diario para tendencia)
+            market_data = await self.market_data_repo.fetch_market_data(
+                pair, timeframe=STRATEGY_TIMEFRAMES[BotType.TREND], days=TREND_DAYS or None
+            )
             if not market_data:
                 self.logger.warning(f"⚠️ No se pudieron obtener datos para {pair} (TREND)")
                 return None
@@ -306,17 +606,11 @@ class BatchAnalysisUseCase:
                 trend_signals
             )
             
-            # Guardar decisión
-            saved = await self.decision_repo.save_decision(decision)
-            if saved:
-                # Notificar cambio de decisión
-                await self.notification_service.notify_decision_change(decision)
-                
-                self.logger.info(f"✅ {pair} TREND: {decision.decision.value} - {decision.reason}")
-                return decision
-            else:
-                self.logger.error(f"❌ Error guardando decisión TREND para {pair}")
-                return None
+            # La decisión se guarda junto al resto del batch en execute()
+            if decision.success and observed is not None:
+                observed[BotType.TREND] = market_data.latest_timestamp
+            self.logger.info(f"✅ {pair} TREND: {decision.decision.value} - {decision.reason}")
+            return decision
                 
         except Exception as e:
             self.logger.error(f"❌ Error analizando TREND para {pair}: {e}")
@@ -0,0 +1,213 @@
+"""
+Caso de Uso: Análisis Bajo Demanda
+==================================
+
+Sirve la decisión y los indicadores de un par en el momento (Telegram,
+dashboards) sin esperar al ciclo batch y sin guardar nada.
+
+Los resultados se cachean por (par, estrategia) con la clave
+(timeframe, última vela cerrada, versión de la receta, sentimiento): mientras
+no cierre una vela nueva, cambie la receta o llegue sentimiento nuevo, las
+consultas no llaman al exchange. Las consultas simultáneas de la misma clave
+comparten un único cálculo.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.application.batch_analysis_use_case import STRATEGY_TIMEFRAMES, BatchAnalysisUseCase
+from app.config import BATCH_PAIR_TIMEOUT, SUPPORTED_PAIRS
+from app.domain.entities import BotType, last_closed_candle
+from app.domain.interfaces import MarketDataRepository, RecipeRepository
+
+logger = logging.getLogger(__name__)
+
+# (timeframe, apertura de la última vela cerrada, versión de la receta, sentimiento)
+CacheKey = Tuple[str, int, str, Optional[str]]
+
+
+class OnDemandAnalysisUseCase:
+    """
+    Caso de uso para consultar el análisis de uno o varios pares al momento.
+    """
+
+    def __init__(
+        self,
+        batch_analysis_use_case: BatchAnalysisUseCase,
+        market_data_repo: MarketDataRepository,
+        recipe_repo: RecipeRepository,
+        timeout: float = BATCH_PAIR_TIMEOUT
+    ):
+        """
+        Inicializa el caso de uso.
+
+        Args:
+            batch_analysis_use_case: Caso de uso batch (reglas de decisión de cada estrategia)
+            market_data_repo: Repositorio de datos de mercado
+            recipe_repo: Repositorio de recetas
+            timeout: Tiempo máximo en segundos para analizar un par
+        """
+        self.batch_analysis_use_case = batch_analysis_use_case
+        self.market_data_repo = market_data_repo
+        self.recipe_repo = recipe_repo
+        self.timeout = timeout
+        self._results: Dict[Tuple[str, BotType], Tuple[CacheKey, Dict[str, Any]]] = {}
+        self._in_flight: Dict[Tuple[str, BotType, CacheKey], asyncio.Future] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def resolve_pair(raw_pair: str, pairs: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Normaliza un par recibido por la API ('eth-usdt', 'ETHUSDT', 'ETH/USDT').
+
+        Args:
+            raw_pair: Par tal como llega en la petición
+            pairs: Pares válidos (por defecto, SUPPORTED_PAIRS)
+
+        Returns:
+            Par soportado o None si no existe
+        """
+        normalized = raw_pair.strip().upper().replace('-', '/').replace('_', '/')
+        for pair in (SUPPORTED_PAIRS if pairs is None else pairs):
+            if normalized in (pair, pair.replace('/', '')):
+                return pair
+        return None
+
+    async def execute(self, pair: str, strategies: Optional[List[BotType]] = None) -> Dict[str, Any]:
+        """
+        Obtiene el análisis de un par.
+
+        Args:
+            pair: Par soportado (ver `resolve_pair`)
+            strategies: Estrategias a consultar (por defecto, todas)
+
+        Returns:
+            Análisis del par por estrategia
+        """
+        results = await self.execute_many([pair], strategies)
+        return results[pair]
+
+    async def execute_many(
+        self,
+        pairs: List[str],
+        strategies: Optional[List[BotType]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene el análisis de varios pares a la vez.
+
+        Args:
+            pairs: Pares soportados
+            strategies: Estrategias a consultar (por defecto, todas)
+
+        Returns:
+            Análisis por par
+        """
+        strategies = list(STRATEGY_TIMEFRAMES) if strategies is None else strategies
+        now = datetime.utcnow()
+        now_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        sentiment = await self.market_data_repo.get_sentiment_watermark()
+
+        requests = [(pair, bot_type) for pair in pairs for bot_type in strategies]
+        analyses = await asyncio.gather(
+            *(self._get_analysis(pair, bot_type, sentiment, now_ms) for pair, bot_type in requests)
+        )
+
+        results: Dict[str, Dict[str, Any]] = {
+            pair: {'pair': pair, 'timestamp': now.isoformat(), 'analyses': {}} for pair in pairs
+        }
+        for (pair, bot_type), analysis in zip(requests, analyses):
+            results[pair]['analyses'][bot_type.value] = analysis
+        return results
+
+    async def _get_analysis(
+        self,
+        pair: str,
+        bot_type: BotType,
+        sentiment: Optional[str],
+        now_ms: int
+    ) -> Dict[str, Any]:
+        """
+        Devuelve el análisis cacheado o lo calcula (una vez por clave).
+
+        Args:
+            pair: Par de trading
+            bot_type: Estrategia
+            sentiment: Marca de agua actual del sentimiento
+            now_ms: Instante de la consulta (ms)
+
+        Returns:
+            Análisis de la estrategia con el indicador `cached`
+        """
+        recipe = await self.recipe_repo.get_recipe(pair, bot_type)
+        if recipe is None:
+            return {'status': 'error', 'error': f"No hay receta {bot_type.value} para {pair}", 'cached': False}
+
+        timeframe = STRATEGY_TIMEFRAMES[bot_type]
+        key: CacheKey = (timeframe, last_closed_candle(timeframe, now_ms), recipe.version, sentiment)
+
+        cached = self._results.get((pair, bot_type))
+        if cached is not None and cached[0] == key:
+            self.stats['hits'] += 1
+            return {**cached[1], 'cached': True}
+
+        flight_key = (pair, bot_type, key)
+        future = self._in_flight.get(flight_key)
+        if future is None:
+            self.stats['misses'] += 1
+            future = asyncio.ensure_future(self._compute(pair, bot_type, key))
+            self._in_flight[flight_key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(flight_key, None))
+        else:
+            self.stats['coalesced'] += 1
+
+        # Si un cliente se desconecta no se cancela el cálculo compartido
+        result = await asyncio.shield(future)
+        return {**result, 'cached': False}
+
+    async def _compute(self, pair: str, bot_type: BotType, key: CacheKey) -> Dict[str, Any]:
+        """
+        Analiza una estrategia de un par y guarda el resultado en la caché.
+
+        Solo se cachea si el análisis usó la última vela cerrada y el
+        sentimiento es conocido; si no, la siguiente consulta lo recalcula.
+
+        Args:
+            pair: Par de trading
+            bot_type: Estrategia
+            key: Clave de caché de la consulta
+
+        Returns:
+            Análisis de la estrategia
+        """
+        timeframe, expected_candle, recipe_version, sentiment = key
+        observed: Dict[BotType, int] = {}
+        try:
+            decisions = await asyncio.wait_for(
+                self.batch_analysis_use_case.analyze_pair(pair, [bot_type], observed), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.logger.error(f"⏱️ Timeout en análisis bajo demanda de {pair} ({bot_type.value})")
+            return {'status': 'error', 'error': f"Timeout tras {self.timeout}s"}
+        except Exception as e:
+            self.logger.error(f"❌ Error en análisis bajo demanda de {pair} ({bot_type.value}): {e}")
+            return {'status': 'error', 'error': str(e)}
+
+        if not decisions:
+            return {'status': 'error', 'error': f"No se pudo analizar {pair} ({bot_type.value})"}
+
+        decision = decisions[0]
+        candle_timestamp = observed.get(bot_type)
+        result = {
+            'status': 'success' if decision.success else 'error',
+            'timeframe': timeframe,
+            'candle_timestamp': candle_timestamp,
+            'recipe_version': recipe_version,
+            'decision': decision.to_dict()
+        }
+        if candle_timestamp is not None and candle_timestamp >= expected_candle and sentiment is not None:
+            self._results[(pair, bot_type)] = (key, result)
+        self.logger.info(f"🔎 Análisis bajo demanda {pair} {bot_type.value}: {decision.decision.value}")
+        return result
@@ -0,0 +1,168 @@
+"""
+Caso de Uso: Universo de Pares
+==============================
+
+Decide qué pares analiza cada ciclo batch.
+
+En modo estático son los pares de las recetas maestras. En modo dinámico se
+eligen en cada ciclo a partir de una única consulta masiva de tickers:
+
+1. Pares spot de la moneda de cotización, sin stablecoins ni tokens apalancados.
+2. Los `top_n` con más volumen de 24h.
+3. Pre-filtro barato con las estadísticas de 24h (volumen, spread, rango y
+   variación): descarta los pares que la regla GRID pausaría de todos modos o
+   que no se pueden operar, antes de descargar velas o calcular indicadores.
+
+Los pares de las recetas maestras se analizan siempre con todas sus
+estrategias; el resto solo con GRID (receta por defecto).
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from app.application.batch_analysis_use_case import STRATEGY_TIMEFRAMES
+from app.config import (
+    SUPPORTED_PAIRS, UNIVERSE_MODE, UNIVERSE_QUOTE, UNIVERSE_TOP_N, UNIVERSE_MIN_QUOTE_VOLUME,
+    UNIVERSE_MAX_SPREAD, UNIVERSE_MIN_RANGE, UNIVERSE_MAX_ABS_CHANGE, UNIVERSE_EXCLUDED_BASES
+)
+from app.domain.entities import BotType, TickerStats
+from app.domain.interfaces import MarketDataRepository
+
+logger = logging.getLogger(__name__)
+
+# Sufijos de los tokens apalancados de Binance (ETHUP, BTCDOWN, ...)
+LEVERAGED_SUFFIXES = ('UP', 'DOWN', 'BULL', 'BEAR')
+
+
+class PairUniverseUseCase:
+    """
+    Caso de uso para seleccionar los pares de cada ciclo.
+    """
+
+    def __init__(
+        self,
+        market_data_repo: MarketDataRepository,
+        mode: str = UNIVERSE_MODE,
+        quote: str = UNIVERSE_QUOTE,
+        top_n: int = UNIVERSE_TOP_N,
+        min_quote_volume: float = UNIVERSE_MIN_QUOTE_VOLUME,
+        max_spread: float = UNIVERSE_MAX_SPREAD,
+        min_range: float = UNIVERSE_MIN_RANGE,
+        max_abs_change: float = UNIVERSE_MAX_ABS_CHANGE,
+        excluded_bases: Optional[List[str]] = None,
+        core_pairs: Optional[List[str]] = None
+    ):
+        """
+        Inicializa el caso de uso.
+
+        Args:
+            market_data_repo: Repositorio de datos de mercado
+            mode: 'static' (solo `core_pairs`) o 'dynamic'
+            quote: Moneda de cotización del universo dinámico
+            top_n: Pares con más volumen que pasan al pre-filtro
+            min_quote_volume: Volumen de 24h mínimo en la moneda de cotización
+            max_spread: Spread relativo máximo
+            min_range: Rango de 24h mínimo relativo al precio
+            max_abs_change: Variación de 24h máxima en valor absoluto (%)
+            excluded_bases: Monedas base excluidas (por defecto, UNIVERSE_EXCLUDED_BASES)
+            core_pairs: Pares analizados siempre (por defecto, SUPPORTED_PAIRS)
+        """
+        self.market_data_repo = market_data_repo
+        self.mode = mode
+        self.quote = quote
+        self.top_n = top_n
+        self.min_quote_volume = min_quote_volume
+        self.max_spread = max_spread
+        self.min_range = min_range
+        self.max_abs_change = max_abs_change
+        self.excluded_bases = set(UNIVERSE_EXCLUDED_BASES if excluded_bases is None else excluded_bases)
+        self.core_pairs = list(SUPPORTED_PAIRS if core_pairs is None else core_pairs)
+        # Última selección: se reutiliza si falla la consulta de tickers
+        self._universe: Dict[str, List[BotType]] = self._core_universe()
+        self.stats: Dict[str, int] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def pairs(self) -> List[str]:
+        """Pares de la última selección."""
+        return list(self._universe)
+
+    async def execute(self) -> Dict[str, List[BotType]]:
+        """
+        Selecciona los pares del ciclo.
+
+        Returns:
+            Estrategias a analizar por par
+        """
+        if self.mode != 'dynamic':
+            return self._core_universe()
+
+        tickers = await self.market_data_repo.fetch_tickers(self.quote)
+        if not tickers:
+            self.logger.warning(f"⚠️ Sin tickers {self.quote}: se mantiene el universo anterior ({len(self._universe)} pares)")
+            return dict(self._universe)
+
+        candidates = [ticker for ticker in tickers if self._is_tradable(ticker)]
+        candidates.sort(key=lambda ticker: ticker.quote_volume, reverse=True)
+        top = candidates[:self.top_n]
+        survivors = [ticker.pair for ticker in top if self._passes_prefilter(ticker)]
+
+        universe = self._core_universe()
+        for pair in survivors:
+            universe.setdefault(pair, [BotType.GRID])
+
+        self.stats = {
+            'tickers': len(tickers),
+            'candidates': len(candidates),
+            'top': len(top),
+            'survivors': len(survivors),
+            'pairs': len(universe)
+        }
+        self.logger.info(
+            f"🌐 Universo {self.quote}: {len(tickers)} tickers → {len(top)} por volumen → "
+            f"{len(survivors)} tras el pre-filtro → {len(universe)} pares a analizar"
+        )
+        self._universe = universe
+        return dict(universe)
+
+    def _core_universe(self) -> Dict[str, List[BotType]]:
+        """Pares de las recetas maestras con todas las estrategias."""
+        return {pair: list(STRATEGY_TIMEFRAMES) for pair in self.core_pairs}
+
+    def _is_tradable(self, ticker: TickerStats) -> bool:
+        """
+        Descarta stablecoins, monedas fiat y tokens apalancados.
+
+        Args:
+            ticker: Estadísticas del par
+
+        Returns:
+            True si el par es candidato
+        """
+        base, _, quote = ticker.pair.partition('/')
+        if quote != self.quote or base in self.excluded_bases:
+            return False
+        # BTCUP, ETHDOWN... pero no JUP
+        return not any(base.endswith(suffix) and len(base) - len(suffix) >= 3 for suffix in LEVERAGED_SUFFIXES)
+
+    def _passes_prefilter(self, ticker: TickerStats) -> bool:
+        """
+        Pre-filtro con las estadísticas de 24h.
+
+        Un dato ausente no descarta el par: la decisión la toma el análisis.
+
+        Args:
+            ticker: Estadísticas del par
+
+        Returns:
+            True si merece el análisis completo
+        """
+        if ticker.quote_volume < self.min_quote_volume:
+            return False
+        if ticker.spread is not None and ticker.spread > self.max_spread:
+            return False
+        if ticker.range_fraction is not None and ticker.range_fraction < self.min_range:
+            return False
+        if ticker.change_percent is not None and abs(ticker.change_percent) > self.max_abs_change:
+            return False
+        return True
@@ -3,14 +3,17 @@ Caso de Uso: Ciclo de Vida del Servicio
 =======================================
 
 Gestiona el ciclo de vida del servicio brain de forma estateless.
-Solo ejecuta análisis cada hora sin mantener estado propio.
+Los análisis se programan al cierre de cada vela de los timeframes analizados
+y, entre cierres, a intervalos regulares para recoger sentimiento nuevo.
 """
 
 import logging
 import asyncio
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
+from app.config import ANALYSIS_INTERVAL, ANALYSIS_SETTLE_SECONDS
+from app.domain.entities import next_candle_close
 from app.domain.interfaces import NotificationService
 from app.application.batch_analysis_use_case import BatchAnalysisUseCase
 
@@ -26,7 +29,9 @@ class ServiceLifecycleUseCase:
     def __init__(
         self,
         notification_service: NotificationService,
-        batch_analysis_use_case: BatchAnalysisUseCase
+        batch_analysis_use_case: BatchAnalysisUseCase,
+        poll_interval: float = ANALYSIS_INTERVAL,
+        settle_seconds: float = ANALYSIS_SETTLE_SECONDS
     ):
         """
         Inicializa el caso de uso.
@@ -34,9 +39,13 @@ class ServiceLifecycleUseCase:
         Args:
             notification_service: Servicio de notificaciones
             batch_analysis_use_case: Caso de uso para análisis batch
+            poll_interval: Espera máxima entre comprobaciones (sentimiento nuevo)
+            settle_seconds: Margen tras el cierre de vela para que el exchange la publique
         """
         self.notification_service = notification_service
         self.batch_analysis_use_case = batch_analysis_use_case
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
         self._analysis_task: Optional[asyncio.Task] = None
         self._stop_event = asyncio.Event()
     
@@ -134,35 +143,58 @@ class ServiceLifecycleUseCase:
     
     async def _analysis_loop(self):
         """
-        Bucle principal de análisis que se ejecuta cada hora (estateless).
+        Bucle principal de análisis alineado con el cierre de las velas.
+        
+        Despierta al cierre de la próxima vela (más el margen de publicación)
+        o, si llega antes, tras `poll_interval`; en cada despertar solo se
+        re-analizan los pares y estrategias cuya vela o sentimiento cambió.
         """
         logger.info("🔄 Bucle de análisis iniciado (estateless)")
         
-        # Importar configuración de análisis
-        from config import ANALYSIS_INTERVAL
-        
-        # Ejecutar primer análisis inmediatamente
+        # Ejecutar primer análisis completo inmediatamente
         logger.info("🚀 Ejecutando primer análisis al iniciar...")
         await self._execute_analysis_cycle()
         
         # Bucle principal
         while not self._stop_event.is_set():
+            delay = self.seconds_until_next_check(datetime.utcnow())
             try:
-                logger.info(f"⏳ Esperando {ANALYSIS_INTERVAL} segundos hasta el próximo ciclo...")
-                await asyncio.wait_for(self._stop_event.wait(), timeout=ANALYSIS_INTERVAL)
+                logger.info(f"⏳ Próxima comprobación en {delay:.0f} segundos...")
+                await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
             except asyncio.TimeoutError:
-                logger.info("⏰ Timeout alcanzado, ejecutando próximo ciclo de análisis...")
-                # Ejecutar análisis después del timeout
-                await self._execute_analysis_cycle()
+                await self._execute_analysis_cycle(only_changed=True)
             if self._stop_event.is_set():
                 logger.info("🛑 Bucle de análisis detenido por solicitud")
                 break
         
         logger.info("🔄 Bucle de análisis terminado")
     
-    async def _execute_analysis_cycle(self):
+    def seconds_until_next_check(self, now: datetime) -> float:
         """
-        Ejecuta un ciclo de análisis completo (estateless).
+        Segundos hasta el próximo despertar del bucle de análisis.
+        
+        Args:
+            now: Instante actual (UTC)
+            
+        Returns:
+            Espera hasta el cierre de vela más próximo (más el margen) o hasta
+            `poll_interval`, lo que llegue antes
+        """
+        now_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        settle_ms = int(self.settle_seconds * 1000)
+        # Una vela que cerró hace menos del margen aún no se ha analizado
+        next_check_ms = min(
+            next_candle_close(timeframe, now_ms - settle_ms) for timeframe in self.batch_analysis_use_case.timeframes
+        ) + settle_ms
+        return max(0.0, min((next_check_ms - now_ms) / 1000, self.poll_interval))
+    
+    async def _execute_analysis_cycle(self, only_changed: bool = False):
+        """
+        Ejecuta un ciclo de análisis (estateless).
+        
+        Args:
+            only_changed: Solo re-analizar los pares y estrategias con vela o
+                sentimiento nuevo
         """
         try:
             current_time = datetime.utcnow()
@@ -172,10 +204,13 @@ class ServiceLifecycleUseCase:
             
             # Ejecutar análisis batch real
             logger.info("📊 Ejecutando análisis batch...")
-            result = await self.batch_analysis_use_case.execute()
+            result = await self.batch_analysis_use_case.execute(only_changed=only_changed)
             
             if result['status'] == 'completed':
-                logger.info(f"✅ Análisis completado: {result['successful_pairs']} exitosos, {result['failed_pairs']} fallidos")
+                logger.info(
+                    f"✅ Análisis completado: {result['successful_pairs']} exitosos, {result['failed_pairs']} fallidos, "
+                    f"{result['skipped_analyses']} sin cambios"
+                )
             else:
                 logger.error(f"❌ Error en análisis batch: {result.get('error', 'Error desconocido')}")
             
@@ -0,0 +1,123 @@
+"""
+Caso de Uso: Barrido de Umbrales
+================================
+
+Busca, para cada par, los umbrales GRID que mejor se comportan sobre su
+historial y genera las recetas ajustadas correspondientes.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from app.domain.entities import BotType, ThresholdSweepResult, TradingRecipe
+from app.domain.interfaces import MarketDataRepository, RecipeRepository, ThresholdSweeper
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD_KEYS = ('adx_threshold', 'bollinger_bandwidth_threshold', 'sentiment_threshold')
+
+
+class SweepThresholdsUseCase:
+    """
+    Caso de uso para optimizar los umbrales de las recetas GRID.
+    """
+
+    def __init__(
+        self,
+        market_data_repo: MarketDataRepository,
+        recipe_repo: RecipeRepository,
+        sweeper: ThresholdSweeper
+    ):
+        """
+        Inicializa el caso de uso.
+
+        Args:
+            market_data_repo: Repositorio de datos de mercado
+            recipe_repo: Repositorio de recetas
+            sweeper: Motor de barrido de umbrales
+        """
+        self.market_data_repo = market_data_repo
+        self.recipe_repo = recipe_repo
+        self.sweeper = sweeper
+        self.logger = logging.getLogger(__name__)
+
+    async def execute(
+        self,
+        pair: str,
+        timeframe: str = '4h',
+        days: int = 1095,
+        top: int = 20
+    ) -> Optional[ThresholdSweepResult]:
+        """
+        Barre los umbrales de un par.
+
+        Args:
+            pair: Par de trading
+            timeframe: Marco temporal de las velas
+            days: Días de historial
+            top: Combinaciones a conservar en el ranking
+
+        Returns:
+            Ranking del par o None si no hay historial
+        """
+        market_data = await self.market_data_repo.fetch_market_history(pair, timeframe, days)
+        if market_data is None or not len(market_data):
+            self.logger.warning(f"⚠️ Sin historial para barrer umbrales de {pair}")
+            return None
+
+        # Bloquea hasta que el pool termina: fuera del event loop
+        return await asyncio.to_thread(self.sweeper.sweep, market_data, top)
+
+    async def execute_all(self, timeframe: str = '4h', days: int = 1095, top: int = 20) -> List[ThresholdSweepResult]:
+        """
+        Barre los umbrales de todos los pares con receta GRID.
+
+        Args:
+            timeframe: Marco temporal de las velas
+            days: Días de historial
+            top: Combinaciones a conservar en cada ranking
+
+        Returns:
+            Rankings de los pares con historial disponible
+        """
+        recipes = [recipe for recipe in await self.recipe_repo.get_all_recipes() if recipe.bot_type == BotType.GRID]
+        results = []
+        for recipe in recipes:
+            result = await self.execute(recipe.pair, timeframe, days, top)
+            if result is not None:
+                results.append(result)
+        return results
+
+    async def tuned_recipe(self, result: ThresholdSweepResult) -> Optional[TradingRecipe]:
+        """
+        Receta GRID del par con los umbrales de la mejor combinación.
+
+        Conserva el nombre, la configuración de grilla y el resto de
+        condiciones de la receta vigente.
+
+        Args:
+            result: Ranking del barrido
+
+        Returns:
+            Receta ajustada o None si ninguna combinación cumple los filtros
+        """
+        best = result.best
+        if best is None:
+            self.logger.warning(f"⚠️ Ninguna combinación válida para {result.pair}")
+            return None
+
+        current = await self.recipe_repo.get_recipe(result.pair, BotType.GRID)
+        conditions = dict(current.conditions) if current else {}
+        conditions.update({key: best[key] for key in THRESHOLD_KEYS})
+        return TradingRecipe(
+            pair=result.pair,
+            name=current.name if current else f"Receta {result.pair}",
+            conditions=conditions,
+            grid_config=current.grid_config if current else {},
+            description=(
+                f"Umbrales del barrido sobre {result.candles} velas de {result.timeframe} "
+                f"(puntuación {best['score']:+.4f}, {best['flips_per_30d']:.1f} cambios/30d)"
+            ),
+            bot_type=BotType.GRID
+        )
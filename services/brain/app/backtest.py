@@ -0,0 +1,75 @@
+"""
+Backtest de Recetas GRID (línea de comandos)
+============================================
+
+Reproduce las recetas GRID vigentes sobre el historial de Binance y el
+sentimiento de la base de datos, e imprime un informe por par.
+
+Uso (desde services/brain):
+    python -m app.backtest                      # Todas las recetas GRID, 3 años
+    python -m app.backtest --pair ETH/USDT --days 365 --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List
+
+from app.application.backtest_recipe_use_case import BacktestRecipeUseCase
+from app.config import ANALYSIS_TIMEFRAME
+from app.domain.entities import BacktestResult
+from app.infrastructure.market_data_repository import BinanceMarketDataRepository
+from app.infrastructure.recipe_backtest import VectorizedRecipeBacktester
+from app.infrastructure.recipe_repository import InMemoryRecipeRepository
+
+
+def _print_report(results: List[BacktestResult]) -> None:
+    """Imprime una tabla con una fila por par."""
+    header = f"{'Par':<12}{'Velas':>7}{'Operar':>9}{'Cambios':>9}{'/30d':>7}{'Racha':>8}{'P&L proxy':>12}{'Siempre':>12}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(
+            f"{result.pair:<12}{result.evaluated_candles:>7}{result.operate_fraction:>9.1%}"
+            f"{result.flips:>9}{result.flips_per_30d:>7.2f}{result.avg_operate_run:>8.1f}"
+            f"{result.pnl_proxy:>+12.4f}{result.pnl_proxy_always_on:>+12.4f}"
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    use_case = BacktestRecipeUseCase(
+        market_data_repo=BinanceMarketDataRepository(),
+        recipe_repo=InMemoryRecipeRepository(),
+        backtester=VectorizedRecipeBacktester()
+    )
+
+    if args.pair:
+        result = await use_case.execute(args.pair, args.timeframe, args.days)
+        results = [result] if result else []
+    else:
+        results = await use_case.execute_all(args.timeframe, args.days)
+
+    if not results:
+        print("Sin resultados: revisa el par, la receta y la conexión con Binance", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2, ensure_ascii=False))
+    else:
+        _print_report(results)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtest de recetas GRID del brain")
+    parser.add_argument('--pair', help="Par a evaluar (por defecto, todos los de las recetas GRID)")
+    parser.add_argument('--timeframe', default=ANALYSIS_TIMEFRAME)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--json', action='store_true', help="Salida JSON en lugar de tabla")
+    parser.add_argument('--log-level', default='WARNING')
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, cli_args.log_level.upper()), format='%(levelname)s %(message)s')
+    sys.exit(asyncio.run(main(cli_args)))
@@ -9,9 +9,81 @@ import os
 from typing import Dict, Any
 
 # Configuración de análisis
-ANALYSIS_INTERVAL = int(os.getenv('BRAIN_ANALYSIS_INTERVAL', 3600))  # 1 hora en segundos
-ANALYSIS_TIMEFRAME = os.getenv('BRAIN_ANALYSIS_TIMEFRAME', '4h')
-ANALYSIS_DAYS = int(os.getenv('BRAIN_ANALYSIS_DAYS', 40))
+# El brain despierta al cierre de cada vela de los timeframes analizados (más
+# SETTLE_SECONDS para que el exchange la publique) y, entre cierres, cada
+# ANALYSIS_INTERVAL segundos para recoger sentimiento nuevo. Solo se re-analizan
+# los (par, estrategia) cuya vela o sentimiento cambió.
+ANALYSIS_INTERVAL = int(os.getenv('BRAIN_ANALYSIS_INTERVAL', 900))  # 15 minutos en segundos
+ANALYSIS_SETTLE_SECONDS = float(os.getenv('BRAIN_ANALYSIS_SETTLE_SECONDS', 20))
+ANALYSIS_TIMEFRAME = os.getenv('BRAIN_ANALYSIS_TIMEFRAME', '4h')  # GRID
+TREND_TIMEFRAME = os.getenv('BRAIN_TREND_TIMEFRAME', '1d')
+# Historial descargado: 0 = las velas mínimas que necesitan los indicadores
+# (ver lookback_planner); un valor fija los días manualmente
+ANALYSIS_DAYS = int(os.getenv('BRAIN_ANALYSIS_DAYS', 0))
+TREND_DAYS = int(os.getenv('BRAIN_TREND_DAYS', 0))
+# Peso máximo de la historia no descargada en EMA/RMA (ADX, RSI, MACD)
+LOOKBACK_TOLERANCE = float(os.getenv('BRAIN_LOOKBACK_TOLERANCE', 0.01))
+
+# Configuración del análisis batch concurrente
+BATCH_MAX_CONCURRENCY = int(os.getenv('BRAIN_BATCH_MAX_CONCURRENCY', 8))  # Pares analizados a la vez
+BATCH_PAIR_TIMEOUT = float(os.getenv('BRAIN_BATCH_PAIR_TIMEOUT', 120))  # Segundos máximos por par
+
+# Configuración de la caché incremental de velas
+# Resolución que se descarga del exchange; el resto de timeframes se re-muestrea
+# a partir de ella (debe dividir exactamente a los timeframes analizados).
+# Con una base más fina hay que subir CANDLE_CACHE_MAX_CANDLES en proporción.
+BASE_TIMEFRAME = os.getenv('BRAIN_BASE_TIMEFRAME', '4h')
+CANDLE_CACHE_MAX_CANDLES = int(os.getenv('BRAIN_CANDLE_CACHE_MAX_CANDLES', 2000))
+CANDLE_FETCH_PAGE_LIMIT = int(os.getenv('BRAIN_CANDLE_FETCH_PAGE_LIMIT', 1000))
+
+# Configuración del motor de indicadores incremental
+# Estado persistido entre reinicios (vacío para desactivarlo)
+INDICATOR_STATE_FILE = os.getenv('BRAIN_INDICATOR_STATE_FILE', 'brain_indicator_state.json')
+# Escritura del estado como mucho cada N segundos (y siempre al detener el servicio)
+INDICATOR_STATE_SAVE_INTERVAL = float(os.getenv('BRAIN_INDICATOR_STATE_SAVE_INTERVAL', 60))
+# Calentamientos en un pool de procesos: 0 = un proceso por núcleo, 1 = sin pool
+INDICATOR_WORKERS = int(os.getenv('BRAIN_INDICATOR_WORKERS', 0))
+INDICATOR_POOL_MIN_CANDLES = int(os.getenv('BRAIN_INDICATOR_POOL_MIN_CANDLES', 100))
+
+# Caché compartida de sentimiento: igual al intervalo del pipeline de noticias,
+# que es cuando pueden aparecer puntuaciones nuevas
+SENTIMENT_CACHE_TTL = float(os.getenv('BRAIN_SENTIMENT_CACHE_TTL', 3600))
+
+# Historial de decisiones: resolución completa durante RAW_DAYS, después una
+# decisión por día (más los cambios) y se elimina pasados RETENTION_DAYS
+DECISION_HISTORY_RAW_DAYS = int(os.getenv('BRAIN_DECISION_HISTORY_RAW_DAYS', 30))
+DECISION_HISTORY_RETENTION_DAYS = int(os.getenv('BRAIN_DECISION_HISTORY_RETENTION_DAYS', 365))
+
+# Barrido de umbrales GRID (python -m app.sweep)
+SWEEP_WORKERS = int(os.getenv('BRAIN_SWEEP_WORKERS', 0))  # 0 = un proceso por núcleo
+SWEEP_FLIP_COST = float(os.getenv('BRAIN_SWEEP_FLIP_COST', 0.002))  # Coste relativo de rearmar la grilla en cada cambio
+SWEEP_MIN_OPERATE_FRACTION = float(os.getenv('BRAIN_SWEEP_MIN_OPERATE_FRACTION', 0.10))  # Descarta recetas que casi nunca operan
+
+# Archivo de recetas ajustadas (salida del barrido) que sustituye los umbrales
+# GRID de las recetas maestras (vacío para desactivarlo)
+RECIPES_FILE = os.getenv('BRAIN_RECIPES_FILE', '')
+
+# Universo de pares: 'static' analiza SUPPORTED_PAIRS; 'dynamic' elige en cada
+# ciclo los UNIVERSE_TOP_N pares de UNIVERSE_QUOTE con más volumen (una sola
+# consulta de tickers), descarta con las estadísticas de 24h los que no pueden
+# operar en GRID y analiza el resto con la receta por defecto si no tienen
+# receta maestra. Los pares de las recetas maestras se analizan siempre.
+UNIVERSE_MODE = os.getenv('BRAIN_UNIVERSE_MODE', 'static').lower()
+UNIVERSE_QUOTE = os.getenv('BRAIN_UNIVERSE_QUOTE', 'USDT')
+UNIVERSE_TOP_N = int(os.getenv('BRAIN_UNIVERSE_TOP_N', 300))
+UNIVERSE_MIN_QUOTE_VOLUME = float(os.getenv('BRAIN_UNIVERSE_MIN_QUOTE_VOLUME', 5_000_000))  # Volumen 24h mínimo
+UNIVERSE_MAX_SPREAD = float(os.getenv('BRAIN_UNIVERSE_MAX_SPREAD', 0.002))  # Spread relativo máximo
+UNIVERSE_MIN_RANGE = float(os.getenv('BRAIN_UNIVERSE_MIN_RANGE', 0.02))  # Rango 24h mínimo (mercado plano = sin volatilidad)
+UNIVERSE_MAX_ABS_CHANGE = float(os.getenv('BRAIN_UNIVERSE_MAX_ABS_CHANGE', 15.0))  # Variación 24h máxima en % (tendencia fuerte)
+# Stablecoins y monedas fiat cotizadas contra USDT (no tienen rango para una grilla)
+UNIVERSE_EXCLUDED_BASES = [
+    base.strip().upper()
+    for base in os.getenv(
+        'BRAIN_UNIVERSE_EXCLUDED_BASES',
+        'USDC,FDUSD,TUSD,BUSD,DAI,USDP,USDD,PYUSD,USDE,EUR,EURI,AEUR,GBP,TRY,BRL'
+    ).split(',')
+    if base.strip()
+]
 
 # Configuración de logging
 LOG_LEVEL = os.getenv('BRAIN_LOG_LEVEL', 'INFO')
@@ -109,6 +181,22 @@ TREND_MASTER_RECIPES = {
     }
 }
 
+# Receta GRID para los pares del universo dinámico sin receta maestra
+# (umbrales conservadores; el barrido de umbrales puede ajustarlos por par)
+DEFAULT_GRID_RECIPE = {
+    'name': 'Receta GRID por defecto',
+    'conditions': {
+        'adx_threshold': 25,
+        'bollinger_bandwidth_threshold': 0.035,
+        'sentiment_threshold': -0.20,
+    },
+    'grid_config': {
+        'price_range_percent': 10.0,
+        'grid_levels': 30
+    },
+    'description': 'Plantilla para pares sin receta maestra (universo dinámico)'
+}
+
 # Pares soportados
 SUPPORTED_PAIRS = list(MASTER_RECIPES.keys())
 
@@ -142,8 +230,48 @@ def get_config() -> Dict[str, Any]:
     return {
         'analysis': {
             'interval': ANALYSIS_INTERVAL,
+            'settle_seconds': ANALYSIS_SETTLE_SECONDS,
             'timeframe': ANALYSIS_TIMEFRAME,
-            'days': ANALYSIS_DAYS
+            'days': ANALYSIS_DAYS,
+            'trend_timeframe': TREND_TIMEFRAME,
+            'trend_days': TREND_DAYS,
+            'lookback_tolerance': LOOKBACK_TOLERANCE,
+            'max_concurrency': BATCH_MAX_CONCURRENCY,
+            'pair_timeout': BATCH_PAIR_TIMEOUT
+        },
+        'candle_cache': {
+            'base_timeframe': BASE_TIMEFRAME,
+            'max_candles': CANDLE_CACHE_MAX_CANDLES,
+            'page_limit': CANDLE_FETCH_PAGE_LIMIT
+        },
+        'indicators': {
+            'state_file': INDICATOR_STATE_FILE,
+            'state_save_interval': INDICATOR_STATE_SAVE_INTERVAL,
+            'workers': INDICATOR_WORKERS,
+            'pool_min_candles': INDICATOR_POOL_MIN_CANDLES
+        },
+        'sentiment_cache': {
+            'ttl': SENTIMENT_CACHE_TTL
+        },
+        'decision_history': {
+            'raw_days': DECISION_HISTORY_RAW_DAYS,
+            'retention_days': DECISION_HISTORY_RETENTION_DAYS
+        },
+        'sweep': {
+            'workers': SWEEP_WORKERS,
+            'flip_cost': SWEEP_FLIP_COST,
+            'min_operate_fraction': SWEEP_MIN_OPERATE_FRACTION,
+            'recipes_file': RECIPES_FILE
+        },
+        'universe': {
+            'mode': UNIVERSE_MODE,
+            'quote': UNIVERSE_QUOTE,
+            'top_n': UNIVERSE_TOP_N,
+            'min_quote_volume': UNIVERSE_MIN_QUOTE_VOLUME,
+            'max_spread': UNIVERSE_MAX_SPREAD,
+            'min_range': UNIVERSE_MIN_RANGE,
+            'max_abs_change': UNIVERSE_MAX_ABS_CHANGE,
+            'excluded_bases': UNIVERSE_EXCLUDED_BASES
         },
         'logging': {
             'level': LOG_LEVEL,
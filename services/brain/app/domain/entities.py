@@ -5,11 +5,82 @@ Entidades del Dominio Brain
 Define las entidades principales del sistema brain.
 """
 
+import hashlib
+import json
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 
+import numpy as np
+
+
+# Duración de cada timeframe de Binance en milisegundos
+TIMEFRAME_MS: Dict[str, int] = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """
+    Convierte un timeframe de ccxt a milisegundos.
+
+    Args:
+        timeframe: Marco temporal ('4h', '1d', ...)
+
+    Returns:
+        Duración de una vela en milisegundos
+    """
+    try:
+        return TIMEFRAME_MS[timeframe]
+    except KeyError:
+        raise ValueError(f"Timeframe no soportado: {timeframe}")
+
+
+def last_closed_candle(timeframe: str, now_ms: int) -> int:
+    """
+    Apertura de la última vela cerrada en `now_ms`.
+
+    Las velas de Binance hasta 1d están alineadas con la época (UTC).
+
+    Args:
+        timeframe: Marco temporal ('4h', '1d', ...)
+        now_ms: Instante de referencia (ms)
+
+    Returns:
+        Timestamp de apertura (ms)
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    return (now_ms // tf_ms - 1) * tf_ms
+
+
+def next_candle_close(timeframe: str, now_ms: int) -> int:
+    """
+    Cierre de la vela en curso en `now_ms`.
+
+    Args:
+        timeframe: Marco temporal ('4h', '1d', ...)
+        now_ms: Instante de referencia (ms)
+
+    Returns:
+        Timestamp del cierre (ms)
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    return (now_ms // tf_ms + 1) * tf_ms
+
 
 class DecisionType(Enum):
     """Decisiones de trading posibles."""
@@ -40,6 +111,81 @@ class TrendPositionState(Enum):
     EN_POSICION = "EN_POSICION"
 
 
+@dataclass
+class MarketData:
+    """
+    Datos de mercado en formato columnar.
+
+    Cada columna (OHLCV e indicadores) es un array de NumPy alineado con
+    `timestamps` (int64, milisegundos). Leer la última fila no crea copias ni
+    objetos intermedios por vela.
+    """
+    pair: str
+    timeframe: str
+    timestamps: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Número de filas y columnas."""
+        return len(self), len(self.columns)
+
+    @property
+    def latest_timestamp(self) -> Optional[int]:
+        """Timestamp (ms) de la última vela o None si no hay datos."""
+        return int(self.timestamps[-1]) if len(self) else None
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        """
+        Obtiene una columna completa.
+
+        Args:
+            name: Nombre de la columna (ej: 'close', 'ADX_14')
+
+        Returns:
+            Array de la columna o None si no existe
+        """
+        return self.columns.get(name)
+
+    def latest(self, name: str) -> Optional[float]:
+        """
+        Obtiene el último valor de una columna.
+
+        Args:
+            name: Nombre de la columna
+
+        Returns:
+            Último valor o None si la columna no existe o es NaN
+        """
+        values = self.columns.get(name)
+        if values is None or not len(values):
+            return None
+        value = values[-1]
+        return None if np.isnan(value) else float(value)
+
+    def with_columns(self, **columns: np.ndarray) -> 'MarketData':
+        """
+        Devuelve unos datos de mercado con columnas añadidas o reemplazadas.
+
+        Los arrays existentes se comparten, no se copian.
+
+        Args:
+            **columns: Columnas nuevas alineadas con `timestamps`
+
+        Returns:
+            Nuevo MarketData
+        """
+        return MarketData(
+            pair=self.pair,
+            timeframe=self.timeframe,
+            timestamps=self.timestamps,
+            columns={**self.columns, **columns}
+        )
+
+
 @dataclass
 class MarketIndicators:
     """Indicadores de mercado calculados."""
@@ -181,6 +327,154 @@ class TradingDecision:
         }
 
 
+@dataclass
+class DecisionHistoryPage:
+    """
+    Página del historial de decisiones (paginación keyset).
+
+    `next_cursor` se pasa tal cual a la siguiente consulta; es None cuando no
+    hay más decisiones.
+    """
+    decisions: List[TradingDecision]
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AnalysisWatermark:
+    """
+    Entradas con las que se analizó por última vez un (par, estrategia).
+
+    Si la última vela cerrada y el sentimiento no cambiaron, volver a
+    analizar daría la misma decisión.
+    """
+    candle_timestamp: int  # Apertura de la última vela analizada (ms)
+    sentiment: Optional[str]  # Marca de agua del sentimiento (opaca)
+
+    def is_current(self, expected_candle: int, sentiment: Optional[str]) -> bool:
+        """
+        Indica si el análisis sigue vigente.
+
+        Args:
+            expected_candle: Apertura de la última vela cerrada (ms)
+            sentiment: Marca de agua actual del sentimiento (None = desconocida)
+
+        Returns:
+            True si la vela y el sentimiento no cambiaron
+        """
+        return (
+            sentiment is not None
+            and self.sentiment == sentiment
+            and self.candle_timestamp >= expected_candle
+        )
+
+
+@dataclass(frozen=True)
+class TickerStats:
+    """Estadísticas de 24h de un par, tal como llegan en la consulta masiva de tickers."""
+    pair: str
+    last: float
+    quote_volume: float  # Volumen en la moneda de cotización (ej: USDT)
+    high: Optional[float] = None
+    low: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    change_percent: Optional[float] = None
+
+    @property
+    def spread(self) -> Optional[float]:
+        """Spread relativo entre la mejor compra y la mejor venta."""
+        if not self.bid or not self.ask:
+            return None
+        return (self.ask - self.bid) / ((self.ask + self.bid) / 2)
+
+    @property
+    def range_fraction(self) -> Optional[float]:
+        """Rango de precios de 24h relativo al último precio."""
+        if self.high is None or self.low is None or not self.last:
+            return None
+        return (self.high - self.low) / self.last
+
+
+@dataclass
+class BacktestResult:
+    """
+    Resultado de reproducir una receta GRID sobre un historial.
+
+    Las fracciones se calculan sobre las velas con indicadores válidos (sin el
+    periodo de calentamiento). `pnl_proxy` es la suma del rendimiento aproximado
+    de una grilla en las velas operadas; `pnl_proxy_always_on` es la misma
+    métrica operando siempre, como referencia.
+    """
+    pair: str
+    recipe_name: str
+    timeframe: str
+    start: datetime
+    end: datetime
+    candles: int
+    evaluated_candles: int
+    operate_fraction: float
+    pause_fraction: float
+    flips: int
+    flips_per_30d: float
+    avg_operate_run: float
+    pnl_proxy: float
+    pnl_proxy_always_on: float
+    thresholds: Dict[str, float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el resultado a diccionario para informes."""
+        return {
+            'pair': self.pair,
+            'recipe_name': self.recipe_name,
+            'timeframe': self.timeframe,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'candles': self.candles,
+            'evaluated_candles': self.evaluated_candles,
+            'operate_fraction': self.operate_fraction,
+            'pause_fraction': self.pause_fraction,
+            'flips': self.flips,
+            'flips_per_30d': self.flips_per_30d,
+            'avg_operate_run': self.avg_operate_run,
+            'pnl_proxy': self.pnl_proxy,
+            'pnl_proxy_always_on': self.pnl_proxy_always_on,
+            'thresholds': self.thresholds
+        }
+
+
+@dataclass
+class ThresholdSweepResult:
+    """
+    Resultado de barrer combinaciones de umbrales GRID para un par.
+
+    `ranking` contiene las mejores combinaciones, de mejor a peor: los tres
+    umbrales, las métricas del backtest y la puntuación
+    (`pnl_proxy - flip_cost * flips`).
+    """
+    pair: str
+    timeframe: str
+    candles: int
+    combinations: int
+    elapsed_seconds: float
+    ranking: List[Dict[str, float]]
+
+    @property
+    def best(self) -> Optional[Dict[str, float]]:
+        """Mejor combinación o None si ninguna cumple los filtros."""
+        return self.ranking[0] if self.ranking else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el resultado a diccionario para informes."""
+        return {
+            'pair': self.pair,
+            'timeframe': self.timeframe,
+            'candles': self.candles,
+            'combinations': self.combinations,
+            'elapsed_seconds': self.elapsed_seconds,
+            'ranking': self.ranking
+        }
+
+
 @dataclass
 class TradingRecipe:
     """Receta de trading para un par específico."""
@@ -191,6 +485,14 @@ class TradingRecipe:
     description: str
     bot_type: BotType = BotType.GRID
 
+    @property
+    def version(self) -> str:
+        """Huella de la receta: cambia cuando cambian sus condiciones o su configuración."""
+        payload = json.dumps(
+            {'conditions': self.conditions, 'grid_config': self.grid_config}, sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
     def get_thresholds(self) -> TradingThresholds:
         """Obtiene los umbrales de la receta."""
         return TradingThresholds(
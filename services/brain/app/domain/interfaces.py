@@ -12,9 +12,14 @@ from datetime import datetime
 from .entities import (
     TradingDecision, 
     TrendDecision,
+    MarketData,
     MarketIndicators, 
     TradingRecipe, 
-    BotType
+    BotType,
+    DecisionHistoryPage,
+    BacktestResult,
+    ThresholdSweepResult,
+    TickerStats
 )
 
 
@@ -26,23 +31,70 @@ class MarketDataRepository(ABC):
         self, 
         pair: str, 
         timeframe: str = '4h', 
-        days: int = 40
-    ) -> Optional[Dict[str, Any]]:
+        days: Optional[int] = None
+    ) -> Optional[MarketData]:
         """
         Obtiene datos históricos de mercado para un par específico.
         
+        Args:
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal ('4h', '1h', '1d')
+            days: Número de días de historial (None = el mínimo que necesitan los indicadores)
+            
+        Returns:
+            Datos de mercado en formato columnar o None si hay error
+        """
+        pass
+    
+    @abstractmethod
+    async def fetch_market_history(
+        self,
+        pair: str,
+        timeframe: str = '4h',
+        days: int = 1095
+    ) -> Optional[MarketData]:
+        """
+        Obtiene un historial largo de velas y sentimiento para backtesting.
+        
         Args:
             pair: Par de trading (ej: 'ETH/USDT')
             timeframe: Marco temporal ('4h', '1h', '1d')
             days: Número de días de historial
             
         Returns:
-            Datos de mercado o None si hay error
+            Datos de mercado (OHLCV y sentiment_promedio) o None si hay error
+        """
+        pass
+    
+    @abstractmethod
+    async def fetch_tickers(self, quote: str = 'USDT') -> List[TickerStats]:
+        """
+        Obtiene las estadísticas de 24h de todos los pares spot activos de una
+        moneda de cotización con una sola consulta.
+        
+        Args:
+            quote: Moneda de cotización (ej: 'USDT')
+            
+        Returns:
+            Estadísticas por par (lista vacía si hay error)
+        """
+        pass
+    
+    @abstractmethod
+    async def get_sentiment_watermark(self) -> Optional[str]:
+        """
+        Obtiene una marca de agua del sentimiento que usan los análisis.
+        
+        Cambia cuando se puntúan noticias nuevas en la ventana de sentimiento;
+        mientras no cambie, el sentimiento de los análisis es el mismo.
+        
+        Returns:
+            Marca de agua opaca o None si no se pudo obtener
         """
         pass
     
     @abstractmethod
-    async def calculate_indicators(self, market_data: Dict[str, Any]) -> Optional[MarketIndicators]:
+    async def calculate_indicators(self, market_data: MarketData) -> Optional[MarketIndicators]:
         """
         Calcula indicadores técnicos a partir de datos de mercado.
         
@@ -71,6 +123,23 @@ class DecisionRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def save_decisions(
+        self,
+        decisions: List[Union[TradingDecision, TrendDecision]]
+    ) -> Optional[List[Union[TradingDecision, TrendDecision]]]:
+        """
+        Guarda un lote de decisiones en una única transacción y publica los
+        cambios de decisión a los bots.
+        
+        Args:
+            decisions: Decisiones a guardar (una por par y estrategia)
+            
+        Returns:
+            Decisiones que cambiaron la decisión vigente, o None si hubo un error
+        """
+        pass
+    
     @abstractmethod
     async def get_latest_decision(self, pair: str, bot_type: BotType) -> Optional[Union[TradingDecision, TrendDecision]]:
         """
@@ -104,6 +173,43 @@ class DecisionRepository(ABC):
             Lista de decisiones (TradingDecision o TrendDecision) ordenadas por timestamp descendente
         """
         pass
+    
+    @abstractmethod
+    async def get_decision_history_page(
+        self,
+        pair: str,
+        bot_type: BotType,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> DecisionHistoryPage:
+        """
+        Obtiene una página del historial de decisiones, de la más reciente a la más antigua.
+        
+        Args:
+            pair: Par de trading
+            bot_type: Tipo de bot
+            limit: Tamaño de la página
+            cursor: Cursor devuelto por la página anterior (None para la primera)
+            since: Fecha mínima de las decisiones (opcional)
+            
+        Returns:
+            Página con las decisiones y el cursor de la siguiente
+        """
+        pass
+    
+    @abstractmethod
+    async def prune_decision_history(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Aplica la retención y el submuestreo del historial de decisiones.
+        
+        Args:
+            now: Instante de referencia (por defecto, ahora en UTC)
+            
+        Returns:
+            Filas eliminadas por retención y por submuestreo
+        """
+        pass
 
 
 class RecipeRepository(ABC):
@@ -235,4 +341,45 @@ class LLMService(ABC):
         Returns:
             Razón generada por el LLM
         """
-        pass 
\ No newline at end of file
+        pass
+
+
+class RecipeBacktester(ABC):
+    """Interfaz del motor de backtesting de recetas."""
+    
+    @abstractmethod
+    def run(self, market_data: MarketData, recipe: TradingRecipe) -> BacktestResult:
+        """
+        Reproduce una receta sobre un historial completo.
+        
+        Args:
+            market_data: Historial de velas y sentimiento
+            recipe: Receta a evaluar
+            
+        Returns:
+            Resultado del backtest
+        """
+        pass
+
+
+class ThresholdSweeper(ABC):
+    """Interfaz del barrido de umbrales de recetas GRID."""
+    
+    @abstractmethod
+    def sweep(self, market_data: MarketData, top: int = 20) -> ThresholdSweepResult:
+        """
+        Evalúa todas las combinaciones de umbrales sobre un historial.
+        
+        Args:
+            market_data: Historial de velas y sentimiento
+            top: Número de combinaciones a conservar en el ranking
+            
+        Returns:
+            Ranking de combinaciones del par
+        """
+        pass
+    
+    @abstractmethod
+    def close(self):
+        """Libera los procesos de trabajo."""
+        pass
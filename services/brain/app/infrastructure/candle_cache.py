@@ -0,0 +1,257 @@
+"""
+Caché Incremental de Velas OHLCV
+================================
+
+Mantiene en memoria el historial de velas cerradas por (par, timeframe) y
+solo descarga del exchange el delta desde la última vela cerrada conocida.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.domain.entities import TIMEFRAME_MS, timeframe_to_ms  # noqa: F401 (reexportados)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _CandleSeries:
+    """Serie de velas cerradas de un (par, timeframe)."""
+    candles: List[List[float]] = field(default_factory=list)
+    # Timestamp más antiguo que ya se solicitó al exchange
+    history_start: Optional[int] = None
+    # Huecos que el exchange confirmó que no tienen datos (mantenimientos)
+    known_gaps: Set[Tuple[int, int]] = field(default_factory=set)
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        return int(self.candles[0][0]) if self.candles else None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return int(self.candles[-1][0]) if self.candles else None
+
+
+class CandleCache:
+    """
+    Caché de velas OHLCV cerradas por (par, timeframe).
+
+    - La primera consulta descarga el historial completo solicitado.
+    - Las siguientes solo piden las velas posteriores a la última cerrada y
+      no llaman al exchange si todavía no ha cerrado ninguna vela nueva.
+    - La vela en formación nunca se almacena ni se devuelve.
+    - Los huecos internos de la serie se vuelven a pedir una sola vez.
+
+    Es segura entre hilos: cada (par, timeframe) se sincroniza bajo su propio
+    lock, así que pares distintos pueden descargarse en paralelo.
+    """
+
+    def __init__(
+        self,
+        exchange_provider: Callable[[], Any],
+        max_candles: int = 2000,
+        page_limit: int = 1000
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            exchange_provider: Función que devuelve el cliente ccxt
+            max_candles: Máximo de velas retenidas por (par, timeframe)
+            page_limit: Máximo de velas por llamada a fetch_ohlcv
+        """
+        self._exchange_provider = exchange_provider
+        self._max_candles = max_candles
+        self._page_limit = page_limit
+        self._series: Dict[Tuple[str, str], _CandleSeries] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get_closed_candles(self, pair: str, timeframe: str, since: int) -> List[List[float]]:
+        """
+        Obtiene las velas cerradas desde `since`, sincronizando solo el delta.
+
+        Args:
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal ('4h', '1d', ...)
+            since: Timestamp en ms de la primera vela requerida
+
+        Returns:
+            Lista de velas [timestamp, open, high, low, close, volume]
+        """
+        with self._lock_for((pair, timeframe)):
+            return self._sync_series(pair, timeframe, since)
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        """Obtiene (o crea) el lock de un (par, timeframe)."""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _sync_series(self, pair: str, timeframe: str, since: int) -> List[List[float]]:
+        """
+        Sincroniza la serie de un (par, timeframe) con el exchange.
+
+        Args:
+            pair: Par de trading
+            timeframe: Marco temporal
+            since: Timestamp en ms de la primera vela requerida
+
+        Returns:
+            Velas cerradas desde `since`
+        """
+        exchange = self._exchange_provider()
+        tf_ms = timeframe_to_ms(timeframe)
+        now = exchange.milliseconds()
+        series = self._series.setdefault((pair, timeframe), _CandleSeries())
+
+        if series.history_start is None:
+            # Arranque en frío
+            self.logger.info(f"📥 Descargando historial de {pair} ({timeframe}) desde cero")
+            self._merge(series, self._fetch_range(exchange, pair, timeframe, since, now), now, tf_ms)
+            series.history_start = since
+        else:
+            if since < series.history_start:
+                # Se pide más historia: solo se descarga el tramo anterior que falta
+                until = series.first_ts if series.first_ts is not None else now
+                self.logger.info(f"⏪ Ampliando historial de {pair} ({timeframe})")
+                self._merge(series, self._fetch_range(exchange, pair, timeframe, since, until), now, tf_ms)
+                series.history_start = since
+
+            next_open = series.last_ts + tf_ms if series.last_ts is not None else since
+            # Solo hay algo nuevo si la vela que abre en next_open ya cerró
+            if now >= next_open + tf_ms:
+                new_candles = self._fetch_range(exchange, pair, timeframe, next_open, now)
+                added = self._merge(series, new_candles, now, tf_ms)
+                self.logger.info(f"♻️ {pair} ({timeframe}): {added} velas nuevas desde caché incremental")
+            else:
+                self.logger.debug(f"♻️ {pair} ({timeframe}): sin velas nuevas, usando caché")
+
+        self._repair_gaps(exchange, pair, timeframe, series, now, tf_ms)
+
+        return [candle for candle in series.candles if candle[0] >= since]
+
+    def invalidate(self, pair: Optional[str] = None, timeframe: Optional[str] = None) -> None:
+        """
+        Descarta series de la caché.
+
+        Args:
+            pair: Par a descartar (todos si es None)
+            timeframe: Timeframe a descartar (todos si es None)
+        """
+        for key in list(self._series):
+            if (pair is None or key[0] == pair) and (timeframe is None or key[1] == timeframe):
+                with self._lock_for(key):
+                    self._series.pop(key, None)
+
+    def _fetch_range(
+        self,
+        exchange: Any,
+        pair: str,
+        timeframe: str,
+        since: int,
+        until: int
+    ) -> List[List[float]]:
+        """
+        Descarga velas desde `since` hasta `until`, paginando si hace falta.
+
+        Una página más corta que `page_limit` solo termina la descarga si llega
+        hasta la vela en curso: si el exchange aplica un límite menor por
+        petición, se sigue paginando en lugar de truncar el historial.
+
+        Args:
+            exchange: Cliente ccxt
+            pair: Par de trading
+            timeframe: Marco temporal
+            since: Timestamp inicial en ms
+            until: Timestamp final en ms
+
+        Returns:
+            Velas descargadas en orden cronológico
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        candles: List[List[float]] = []
+        cursor = since
+        while cursor < until:
+            page = exchange.fetch_ohlcv(pair, timeframe, cursor, self._page_limit)
+            if not page:
+                break
+            candles.extend(page)
+            last_ts = int(page[-1][0])
+            if last_ts < cursor:
+                break
+            if len(page) < self._page_limit and last_ts + 2 * tf_ms > until:
+                break
+            cursor = last_ts + 1
+        return candles
+
+    def _merge(
+        self,
+        series: _CandleSeries,
+        candles: List[List[float]],
+        now: int,
+        tf_ms: int
+    ) -> int:
+        """
+        Fusiona velas nuevas en la serie descartando la vela en formación.
+
+        Args:
+            series: Serie destino
+            candles: Velas a fusionar
+            now: Timestamp actual del exchange en ms
+            tf_ms: Duración de la vela en ms
+
+        Returns:
+            Número de velas nuevas añadidas
+        """
+        if not candles:
+            return 0
+
+        by_ts = {int(candle[0]): candle for candle in series.candles}
+        before = len(by_ts)
+        for candle in candles:
+            ts = int(candle[0])
+            if ts + tf_ms <= now:
+                by_ts[ts] = [ts] + [float(value) for value in candle[1:6]]
+
+        series.candles = [by_ts[ts] for ts in sorted(by_ts)][-self._max_candles:]
+        return len(by_ts) - before
+
+    def _repair_gaps(
+        self,
+        exchange: Any,
+        pair: str,
+        timeframe: str,
+        series: _CandleSeries,
+        now: int,
+        tf_ms: int
+    ) -> None:
+        """
+        Vuelve a pedir los huecos internos de la serie.
+
+        Un hueco que el exchange tampoco puede rellenar se recuerda para no
+        repetir la consulta en cada ciclo.
+
+        Args:
+            exchange: Cliente ccxt
+            pair: Par de trading
+            timeframe: Marco temporal
+            series: Serie a reparar
+            now: Timestamp actual del exchange en ms
+            tf_ms: Duración de la vela en ms
+        """
+        gaps = []
+        for previous, current in zip(series.candles, series.candles[1:]):
+            gap = (int(previous[0]) + tf_ms, int(current[0]))
+            if gap[1] > gap[0] and gap not in series.known_gaps:
+                gaps.append(gap)
+
+        for gap_start, gap_end in gaps:
+            self.logger.warning(f"🩹 Reparando hueco en {pair} ({timeframe}): {gap_start} → {gap_end}")
+            candles = [
+                candle for candle in self._fetch_range(exchange, pair, timeframe, gap_start, gap_end)
+                if gap_start <= candle[0] < gap_end
+            ]
+            if not self._merge(series, candles, now, tf_ms):
+                series.known_gaps.add((gap_start, gap_end))
@@ -0,0 +1,146 @@
+"""
+Almacén Multi-Timeframe de Velas
+================================
+
+Descarga una única resolución base por par y construye el resto de
+timeframes (1d, 1w, ...) re-muestreando sobre los mismos límites que usa
+Binance para abrir y cerrar sus velas.
+"""
+
+import logging
+from typing import Dict, List
+
+from app.infrastructure.candle_cache import CandleCache, timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Binance abre las velas semanales el lunes a las 00:00 UTC; la época Unix
+# (1970-01-01) fue jueves, así que el primer lunes cae 4 días después.
+_WEEK_ORIGIN_MS = 4 * 86_400_000
+
+
+def bucket_start(timestamp: int, timeframe: str) -> int:
+    """
+    Calcula la apertura de la vela de `timeframe` que contiene `timestamp`.
+
+    Args:
+        timestamp: Timestamp en ms
+        timeframe: Marco temporal destino ('4h', '1d', '1w', ...)
+
+    Returns:
+        Timestamp en ms de apertura de la vela alineada con el exchange
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    if timeframe == '1w':
+        return timestamp - (timestamp - _WEEK_ORIGIN_MS) % tf_ms
+    return timestamp - timestamp % tf_ms
+
+
+def resample_ohlcv(
+    candles: List[List[float]],
+    base_timeframe: str,
+    target_timeframe: str
+) -> List[List[float]]:
+    """
+    Re-muestrea velas cerradas de `base_timeframe` a `target_timeframe`.
+
+    Solo se emiten velas destino completas: las que empiezan dentro del
+    historial disponible y cuyo cierre ya está cubierto por velas base
+    cerradas. La vela destino en formación se descarta.
+
+    Args:
+        candles: Velas base [timestamp, open, high, low, close, volume]
+        base_timeframe: Timeframe de las velas base
+        target_timeframe: Timeframe destino (múltiplo del base)
+
+    Returns:
+        Velas re-muestreadas en orden cronológico
+    """
+    base_ms = timeframe_to_ms(base_timeframe)
+    target_ms = timeframe_to_ms(target_timeframe)
+    if target_ms % base_ms != 0:
+        raise ValueError(f"{target_timeframe} no es múltiplo de {base_timeframe}")
+    if not candles:
+        return []
+
+    first_ts = int(candles[0][0])
+    closed_until = int(candles[-1][0]) + base_ms
+
+    buckets: Dict[int, List[float]] = {}
+    for ts, open_, high, low, close, volume in candles:
+        start = bucket_start(int(ts), target_timeframe)
+        bar = buckets.get(start)
+        if bar is None:
+            buckets[start] = [start, open_, high, low, close, volume]
+        else:
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += volume
+
+    return [
+        buckets[start] for start in sorted(buckets)
+        if start >= first_ts and start + target_ms <= closed_until
+    ]
+
+
+class MultiTimeframeCandleStore:
+    """
+    Almacén de velas que sirve cualquier timeframe a partir de una serie base.
+
+    Todas las estrategias leen de aquí, de modo que cada par solo genera una
+    descarga incremental por ciclo independientemente de cuántos timeframes
+    se analicen.
+    """
+
+    def __init__(self, candle_cache: CandleCache, base_timeframe: str = '4h'):
+        """
+        Inicializa el almacén.
+
+        Args:
+            candle_cache: Caché incremental de velas del exchange
+            base_timeframe: Resolución que se descarga del exchange
+        """
+        self._candle_cache = candle_cache
+        self.base_timeframe = base_timeframe
+        self._base_ms = timeframe_to_ms(base_timeframe)
+        self.logger = logging.getLogger(__name__)
+
+    def is_derivable(self, timeframe: str) -> bool:
+        """
+        Indica si `timeframe` se puede construir a partir de la serie base.
+
+        Args:
+            timeframe: Marco temporal destino
+
+        Returns:
+            True si es múltiplo exacto de la resolución base
+        """
+        return timeframe_to_ms(timeframe) % self._base_ms == 0
+
+    def get_candles(self, pair: str, timeframe: str, since: int) -> List[List[float]]:
+        """
+        Obtiene velas cerradas de `timeframe` desde `since`.
+
+        Args:
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal solicitado
+            since: Timestamp en ms de la primera vela requerida
+
+        Returns:
+            Lista de velas [timestamp, open, high, low, close, volume]
+        """
+        if timeframe == self.base_timeframe:
+            return self._candle_cache.get_closed_candles(pair, timeframe, since)
+
+        if not self.is_derivable(timeframe):
+            # Timeframes más finos que la base se siguen pidiendo directamente
+            self.logger.debug(f"{timeframe} no derivable de {self.base_timeframe}, descarga directa")
+            return self._candle_cache.get_closed_candles(pair, timeframe, since)
+
+        base_candles = self._candle_cache.get_closed_candles(pair, self.base_timeframe, since)
+        resampled = resample_ohlcv(base_candles, self.base_timeframe, timeframe)
+        self.logger.debug(
+            f"🧱 {pair}: {len(resampled)} velas {timeframe} construidas desde {len(base_candles)} velas {self.base_timeframe}"
+        )
+        return resampled
@@ -6,26 +6,76 @@ Implementación concreta del repositorio de decisiones de trading.
 """
 
 import logging
-from typing import Dict, Any, Optional, List, Union
-from datetime import datetime
+from typing import Dict, Any, Optional, List, Union, Sequence, Tuple
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app.domain.interfaces import DecisionRepository
-from app.domain.entities import TradingDecision, TrendDecision, BotType, DecisionType, MarketIndicators, TradingThresholds
+from app.domain.entities import (
+    TradingDecision, TrendDecision, BotType, DecisionType, MarketIndicators, TradingThresholds, DecisionHistoryPage
+)
+from app.config import DECISION_HISTORY_RAW_DAYS, DECISION_HISTORY_RETENTION_DAYS
 from shared.database.session import SessionLocal
-from shared.database.models import EstrategiaStatus
+from shared.database.models import EstrategiaStatus, DecisionHistory
+from shared.database.decision_bus import DecisionBus, DecisionChange, get_decision_bus
 
 logger = logging.getLogger(__name__)
 
+# Constructores de INSERT con soporte de ON CONFLICT DO UPDATE por dialecto
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# Columnas de `estrategia_status` que también se guardan en el historial
+HISTORY_COLUMNS = (
+    'par', 'estrategia', 'decision', 'adx_actual', 'volatilidad_actual', 'sentiment_promedio',
+    'sma30_actual', 'sma150_actual', 'sentiment_7d_avg', 'timestamp'
+)
+
+# Filas borradas por sentencia al submuestrear
+PRUNE_DELETE_BATCH = 1000
+
+
+def downsample_history(rows: Sequence[Tuple[int, str, datetime]]) -> List[int]:
+    """
+    Selecciona las filas del historial que sobran al reducirlo a resolución diaria.
+    
+    Se conserva la última decisión de cada día (UTC) y toda decisión distinta de
+    la anterior, de modo que los cambios no se pierden. Aplicarlo de nuevo sobre
+    el resultado no elimina nada más.
+    
+    Args:
+        rows: Filas (id, decision, timestamp) de un par y estrategia en orden temporal
+        
+    Returns:
+        Ids de las filas a eliminar
+    """
+    drop = []
+    for index, (row_id, decision, timestamp) in enumerate(rows):
+        is_change = index == 0 or rows[index - 1][1] != decision
+        is_last_of_day = index == len(rows) - 1 or rows[index + 1][2].date() != timestamp.date()
+        if not (is_change or is_last_of_day):
+            drop.append(row_id)
+    return drop
+
 
 class DatabaseDecisionRepository(DecisionRepository):
     """
     Implementación del repositorio de decisiones usando base de datos.
     """
     
-    def __init__(self):
-        """Inicializa el repositorio."""
+    def __init__(self, decision_bus: Optional[DecisionBus] = None):
+        """
+        Inicializa el repositorio.
+        
+        Args:
+            decision_bus: Bus donde se publican los cambios de decisión
+                (por defecto, el del proceso según la base de datos)
+        """
+        self.decision_bus = decision_bus or get_decision_bus()
         self.logger = logging.getLogger(__name__)
     
     async def save_decision(self, decision: Union[TradingDecision, TrendDecision]) -> bool:
@@ -39,90 +89,152 @@ class DatabaseDecisionRepository(DecisionRepository):
         Returns:
             True si se guardó correctamente
         """
+        return await self.save_decisions([decision]) is not None
+    
+    async def save_decisions(
+        self,
+        decisions: List[Union[TradingDecision, TrendDecision]]
+    ) -> Optional[List[Union[TradingDecision, TrendDecision]]]:
+        """
+        Guarda o actualiza un lote de decisiones en una única transacción.
+        
+        Usa `INSERT ... ON CONFLICT (par, estrategia) DO UPDATE` (PostgreSQL y
+        SQLite), de modo que el lote completo cuesta una sola sentencia y un
+        solo commit independientemente del número de pares. En la misma
+        transacción se añaden las decisiones al historial y se publican en el
+        bus las que cambian la decisión vigente.
+        
+        Args:
+            decisions: Decisiones a guardar
+            
+        Returns:
+            Decisiones que cambiaron la decisión vigente, o None si hubo un error
+        """
+        if not decisions:
+            return []
+        
+        # Si un lote trae dos decisiones para la misma clave, gana la última
+        by_key = {}
+        for decision in decisions:
+            row = self._decision_to_row(decision)
+            by_key[(row['par'], row['estrategia'])] = (decision, row)
+        rows = [row for _, row in by_key.values()]
+        
         try:
             db = SessionLocal()
             
             try:
-                # Determinar el tipo de estrategia basado en el tipo de decisión
-                if isinstance(decision, TrendDecision):
-                    estrategia = "TREND"
-                    # Campos específicos para TREND
-                    trend_fields = {
-                        'golden_cross': decision.golden_cross,
-                        'death_cross': decision.death_cross,
-                        'trend_strength_ok': decision.trend_strength_ok,
-                        'sentiment_ok': decision.sentiment_ok
-                    }
-                else:
-                    estrategia = decision.bot_type.value
-                    trend_fields = {}
-                
-                # Buscar decisión existente para el par y estrategia
-                existing_decision = db.query(EstrategiaStatus).filter(
-                    EstrategiaStatus.par == decision.pair,
-                    EstrategiaStatus.estrategia == estrategia
-                ).first()
+                current = {
+                    (pair, strategy): value
+                    for pair, strategy, value in db.query(
+                        EstrategiaStatus.par, EstrategiaStatus.estrategia, EstrategiaStatus.decision
+                    ).filter(EstrategiaStatus.par.in_({pair for pair, _ in by_key}))
+                }
+                changed = [
+                    (decision, row, current.get(key)) for key, (decision, row) in by_key.items()
+                    if current.get(key) != row['decision']
+                ]
                 
-                if existing_decision:
-                    # Actualizar decisión existente usando update()
-                    db.query(EstrategiaStatus).filter(
-                        EstrategiaStatus.par == decision.pair,
-                        EstrategiaStatus.estrategia == estrategia
-                    ).update({
-                        'decision': decision.decision.value,
-                        'razon': decision.reason,
-                        'adx_actual': decision.indicators.adx,
-                        'volatilidad_actual': decision.indicators.volatility,
-                        'sentiment_promedio': decision.indicators.sentiment,
-                        'sma30_actual': decision.indicators.sma30,
-                        'sma150_actual': decision.indicators.sma150,
-                        'sentiment_7d_avg': decision.indicators.sentiment_7d_avg,
-                        'umbral_adx': decision.thresholds.adx_threshold,
-                        'umbral_volatilidad': decision.thresholds.volatility_threshold,
-                        'umbral_sentimiento': decision.thresholds.sentiment_threshold,
-                        'umbral_adx_trend': decision.thresholds.adx_trend_threshold,
-                        'umbral_sentiment_trend': decision.thresholds.sentiment_trend_threshold,
-                        'timestamp': decision.timestamp,
-                        **trend_fields
-                    })
-                    
-                    db.commit()
-                    self.logger.info(f"✅ Decisión actualizada para {decision.pair}: {decision.decision.value}")
-                else:
-                    # Crear nueva decisión
-                    db_decision = EstrategiaStatus(
-                        par=decision.pair,
-                        estrategia=estrategia,
-                        decision=decision.decision.value,
-                        razon=decision.reason,
-                        adx_actual=decision.indicators.adx,
-                        volatilidad_actual=decision.indicators.volatility,
-                        sentiment_promedio=decision.indicators.sentiment,
-                        sma30_actual=decision.indicators.sma30,
-                        sma150_actual=decision.indicators.sma150,
-                        sentiment_7d_avg=decision.indicators.sentiment_7d_avg,
-                        umbral_adx=decision.thresholds.adx_threshold,
-                        umbral_volatilidad=decision.thresholds.volatility_threshold,
-                        umbral_sentimiento=decision.thresholds.sentiment_threshold,
-                        umbral_adx_trend=decision.thresholds.adx_trend_threshold,
-                        umbral_sentiment_trend=decision.thresholds.sentiment_trend_threshold,
-                        timestamp=decision.timestamp,
-                        **trend_fields
+                dialect = db.get_bind().dialect.name
+                if dialect in UPSERT_INSERTS:
+                    stmt = UPSERT_INSERTS[dialect](EstrategiaStatus).values(rows)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['par', 'estrategia'],
+                        set_={
+                            **{column: stmt.excluded[column] for column in rows[0] if column not in ('par', 'estrategia')},
+                            'updated_at': datetime.utcnow()
+                        }
                     )
-                    
-                    db.add(db_decision)
-                    db.commit()
-                    db.refresh(db_decision)
-                    self.logger.info(f"✅ Nueva decisión creada para {decision.pair}: {decision.decision.value}")
+                    db.execute(stmt)
+                else:
+                    # Motores sin upsert nativo: merge fila a fila en la misma transacción
+                    for row in rows:
+                        updated = db.query(EstrategiaStatus).filter(
+                            EstrategiaStatus.par == row['par'],
+                            EstrategiaStatus.estrategia == row['estrategia']
+                        ).update(row)
+                        if not updated:
+                            db.add(EstrategiaStatus(**row))
                 
-                return True
+                db.execute(
+                    DecisionHistory.__table__.insert(),
+                    [{column: row[column] for column in HISTORY_COLUMNS} for row in rows]
+                )
+                # Solo los cambios; se entregan al hacer commit
+                self.decision_bus.publish(db, [
+                    DecisionChange(
+                        par=row['par'],
+                        estrategia=row['estrategia'],
+                        decision=row['decision'],
+                        previous_decision=previous,
+                        timestamp=row['timestamp'].isoformat()
+                    )
+                    for _, row, previous in changed
+                ])
+                db.commit()
+                self.logger.info(
+                    f"✅ {len(rows)} decisiones guardadas en una transacción ({len(changed)} cambios)"
+                )
+                return [decision for decision, _, _ in changed]
                 
+            except Exception:
+                db.rollback()
+                raise
             finally:
                 db.close()
                 
         except Exception as e:
-            self.logger.error(f"❌ Error guardando decisión para {decision.pair}: {e}")
-            return False
+            pairs = ', '.join(sorted({row['par'] for row in rows}))
+            self.logger.error(f"❌ Error guardando decisiones para {pairs}: {e}")
+            return None
+    
+    @staticmethod
+    def _decision_to_row(decision: Union[TradingDecision, TrendDecision]) -> Dict[str, Any]:
+        """
+        Convierte una decisión en la fila de `estrategia_status`.
+        
+        Todas las filas tienen las mismas columnas para poder insertarse en una
+        única sentencia; las señales de TREND quedan en False para GRID.
+        
+        Args:
+            decision: Decisión a convertir
+            
+        Returns:
+            Valores de la fila
+        """
+        # Determinar el tipo de estrategia basado en el tipo de decisión
+        if isinstance(decision, TrendDecision):
+            estrategia = "TREND"
+            # Campos específicos para TREND
+            trend_fields = {
+                'golden_cross': decision.golden_cross,
+                'death_cross': decision.death_cross,
+                'trend_strength_ok': decision.trend_strength_ok,
+                'sentiment_ok': decision.sentiment_ok
+            }
+        else:
+            estrategia = decision.bot_type.value
+            trend_fields = dict.fromkeys(('golden_cross', 'death_cross', 'trend_strength_ok', 'sentiment_ok'), False)
+        
+        return {
+            'par': decision.pair,
+            'estrategia': estrategia,
+            'decision': decision.decision.value,
+            'razon': decision.reason,
+            'adx_actual': decision.indicators.adx,
+            'volatilidad_actual': decision.indicators.volatility,
+            'sentiment_promedio': decision.indicators.sentiment,
+            'sma30_actual': decision.indicators.sma30,
+            'sma150_actual': decision.indicators.sma150,
+            'sentiment_7d_avg': decision.indicators.sentiment_7d_avg,
+            'umbral_adx': decision.thresholds.adx_threshold,
+            'umbral_volatilidad': decision.thresholds.volatility_threshold,
+            'umbral_sentimiento': decision.thresholds.sentiment_threshold,
+            'umbral_adx_trend': decision.thresholds.adx_trend_threshold,
+            'umbral_sentiment_trend': decision.thresholds.sentiment_trend_threshold,
+            'timestamp': decision.timestamp,
+            **trend_fields
+        }
     
     async def get_latest_decision(self, pair: str, bot_type: BotType) -> Optional[TradingDecision]:
         """
@@ -178,28 +290,144 @@ class DatabaseDecisionRepository(DecisionRepository):
         Returns:
             Lista de decisiones ordenadas por timestamp descendente
         """
+        page = await self.get_decision_history_page(pair, bot_type, limit=limit)
+        return page.decisions
+    
+    async def get_decision_history_page(
+        self,
+        pair: str,
+        bot_type: BotType,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> DecisionHistoryPage:
+        """
+        Obtiene una página del historial de decisiones, de la más reciente a la más antigua.
+        
+        Paginación keyset sobre (timestamp, id) con el índice
+        (par, estrategia, timestamp): el coste de cada página no depende de
+        cuántas decisiones haya antes.
+        
+        Args:
+            pair: Par de trading
+            bot_type: Tipo de bot
+            limit: Tamaño de la página
+            cursor: Cursor devuelto por la página anterior (None para la primera)
+            since: Fecha mínima de las decisiones (opcional)
+            
+        Returns:
+            Página con las decisiones y el cursor de la siguiente
+        """
         try:
             db = SessionLocal()
             
             try:
-                # Buscar decisiones
-                db_decisions = db.query(EstrategiaStatus).filter(
-                    EstrategiaStatus.par == pair,
-                    EstrategiaStatus.estrategia == bot_type.value
-                ).order_by(desc(EstrategiaStatus.timestamp)).limit(limit).all()
+                query = db.query(DecisionHistory).filter(
+                    DecisionHistory.par == pair,
+                    DecisionHistory.estrategia == bot_type.value
+                )
+                if since is not None:
+                    query = query.filter(DecisionHistory.timestamp >= since)
+                if cursor:
+                    cursor_timestamp, cursor_id = self._decode_cursor(cursor)
+                    query = query.filter(or_(
+                        DecisionHistory.timestamp < cursor_timestamp,
+                        and_(DecisionHistory.timestamp == cursor_timestamp, DecisionHistory.id < cursor_id)
+                    ))
+                
+                # Se pide una fila de más para saber si hay otra página
+                db_decisions = query.order_by(
+                    desc(DecisionHistory.timestamp), desc(DecisionHistory.id)
+                ).limit(limit + 1).all()
+                
+                next_cursor = None
+                if len(db_decisions) > limit:
+                    db_decisions = db_decisions[:limit]
+                    next_cursor = self._encode_cursor(db_decisions[-1])
                 
-                # Convertir a entidades de dominio
                 decisions = [self._db_to_domain(db_decision) for db_decision in db_decisions]
                 
                 self.logger.debug(f"✅ Historial obtenido para {pair}: {len(decisions)} decisiones")
-                return decisions
+                return DecisionHistoryPage(decisions=decisions, next_cursor=next_cursor)
                 
             finally:
                 db.close()
                 
         except Exception as e:
             self.logger.error(f"❌ Error obteniendo historial para {pair}: {e}")
-            return []
+            return DecisionHistoryPage(decisions=[])
+    
+    @staticmethod
+    def _encode_cursor(db_decision: DecisionHistory) -> str:
+        """Cursor keyset de una fila del historial: '<timestamp ISO>|<id>'."""
+        return f"{db_decision.timestamp.isoformat()}|{db_decision.id}"
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Inverso de `_encode_cursor`; lanza ValueError si el cursor no es válido."""
+        timestamp, _, row_id = cursor.rpartition('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    
+    async def prune_decision_history(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Aplica la retención y el submuestreo del historial de decisiones.
+        
+        - Las decisiones con más de DECISION_HISTORY_RETENTION_DAYS se eliminan.
+        - Las de más de DECISION_HISTORY_RAW_DAYS se reducen a la última de cada
+          día más los cambios de decisión (ver `downsample_history`).
+        
+        Args:
+            now: Instante de referencia (por defecto, ahora en UTC)
+            
+        Returns:
+            Filas eliminadas por retención ('expired') y por submuestreo ('downsampled')
+        """
+        now = now or datetime.utcnow()
+        retention_cutoff = now - timedelta(days=DECISION_HISTORY_RETENTION_DAYS)
+        raw_cutoff = now - timedelta(days=DECISION_HISTORY_RAW_DAYS)
+        
+        try:
+            db = SessionLocal()
+            
+            try:
+                expired = db.query(DecisionHistory).filter(
+                    DecisionHistory.timestamp < retention_cutoff
+                ).delete(synchronize_session=False)
+                
+                downsampled = 0
+                keys = db.query(DecisionHistory.par, DecisionHistory.estrategia).filter(
+                    DecisionHistory.timestamp < raw_cutoff
+                ).distinct().all()
+                for pair, strategy in keys:
+                    rows = db.query(DecisionHistory.id, DecisionHistory.decision, DecisionHistory.timestamp).filter(
+                        DecisionHistory.par == pair,
+                        DecisionHistory.estrategia == strategy,
+                        DecisionHistory.timestamp < raw_cutoff
+                    ).order_by(DecisionHistory.timestamp, DecisionHistory.id).all()
+                    
+                    drop = downsample_history(rows)
+                    for start in range(0, len(drop), PRUNE_DELETE_BATCH):
+                        db.query(DecisionHistory).filter(
+                            DecisionHistory.id.in_(drop[start:start + PRUNE_DELETE_BATCH])
+                        ).delete(synchronize_session=False)
+                    downsampled += len(drop)
+                
+                db.commit()
+                if expired or downsampled:
+                    self.logger.info(
+                        f"🧹 Historial de decisiones: {expired} expiradas, {downsampled} submuestreadas"
+                    )
+                return {'expired': expired, 'downsampled': downsampled}
+                
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+                
+        except Exception as e:
+            self.logger.error(f"❌ Error depurando historial de decisiones: {e}")
+            return {}
     
     async def get_all_latest_decisions(self) -> List[TradingDecision]:
         """
@@ -244,12 +472,14 @@ class DatabaseDecisionRepository(DecisionRepository):
             self.logger.error(f"❌ Error obteniendo últimas decisiones: {e}")
             return []
     
-    def _db_to_domain(self, db_decision: EstrategiaStatus) -> TradingDecision:
+    def _db_to_domain(self, db_decision: Union[EstrategiaStatus, DecisionHistory]) -> TradingDecision:
         """
         Convierte un objeto de base de datos a entidad de dominio.
         
+        Las filas del historial no guardan razón ni umbrales; quedan vacíos.
+        
         Args:
-            db_decision: Objeto de base de datos
+            db_decision: Fila de `estrategia_status` o de `decision_history`
             
         Returns:
             Entidad de dominio
@@ -278,13 +508,16 @@ class DatabaseDecisionRepository(DecisionRepository):
             adx=float(adx_value) if adx_value is not None else 0.0,
             volatility=float(volatility_value) if volatility_value is not None else 0.0,
             sentiment=float(sentiment_value) if sentiment_value is not None else None,
+            sma30=cast(Any, db_decision.sma30_actual),
+            sma150=cast(Any, db_decision.sma150_actual),
+            sentiment_7d_avg=cast(Any, db_decision.sentiment_7d_avg),
             timestamp=timestamp_value
         )
         
         # Crear umbrales - usar type casting para resolver linter
-        umbral_adx_value = cast(Any, db_decision.umbral_adx)
-        umbral_volatilidad_value = cast(Any, db_decision.umbral_volatilidad)
-        umbral_sentimiento_value = cast(Any, db_decision.umbral_sentimiento)
+        umbral_adx_value = cast(Any, getattr(db_decision, 'umbral_adx', None))
+        umbral_volatilidad_value = cast(Any, getattr(db_decision, 'umbral_volatilidad', None))
+        umbral_sentimiento_value = cast(Any, getattr(db_decision, 'umbral_sentimiento', None))
         
         thresholds = TradingThresholds(
             adx_threshold=float(umbral_adx_value) if umbral_adx_value is not None else 0.0,
@@ -295,7 +528,7 @@ class DatabaseDecisionRepository(DecisionRepository):
         
         # Crear decisión - usar type casting para resolver linter
         par_value = cast(Any, db_decision.par)
-        razon_value = cast(Any, db_decision.razon)
+        razon_value = cast(Any, getattr(db_decision, 'razon', None))
         
         decision = TradingDecision(
             pair=str(par_value),
@@ -0,0 +1,277 @@
+"""
+Kernels Vectorizados de Indicadores
+===================================
+
+Implementaciones en NumPy puro de los indicadores que usa el brain, con la
+semántica de pandas-ta 0.3.14b. Todas las funciones operan sobre el último
+eje, así que aceptan una serie (tiempo,) o una matriz (pares × tiempo) y
+calculan todos los pares en una sola pasada.
+
+Las filas pueden venir rellenadas con NaN a la izquierda cuando un par tiene
+menos historial: el resultado equivale a aplicar pandas-ta sobre la parte
+válida de cada fila.
+"""
+
+from typing import Dict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Tamaño de bloque de la recurrencia lineal: acota la matriz de decaimiento
+# (bloque × bloque) sin perder vectorización
+_BLOCK = 256
+
+
+def _linear_recurrence(x: np.ndarray, decay: float) -> np.ndarray:
+    """
+    Resuelve y[t] = decay * y[t-1] + x[t] (con y[-1] = 0) sobre el último eje.
+
+    Cada bloque de `_BLOCK` velas se resuelve con un producto matricial contra
+    una matriz triangular de potencias de `decay`.
+
+    Args:
+        x: Entradas (..., tiempo) sin NaN
+        decay: Factor de decaimiento en [0, 1)
+
+    Returns:
+        Serie filtrada con la misma forma que `x`
+    """
+    length = x.shape[-1]
+    steps = np.arange(_BLOCK)
+    lags = steps[:, None] - steps[None, :]
+    weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0.0)
+    carry_weights = decay ** (steps + 1)
+
+    out = np.empty_like(x)
+    carry = np.zeros(x.shape[:-1])
+    for start in range(0, length, _BLOCK):
+        block = x[..., start:start + _BLOCK]
+        size = block.shape[-1]
+        y = block @ weights[:size, :size].T + carry[..., None] * carry_weights[:size]
+        out[..., start:start + size] = y
+        carry = y[..., -1]
+    return out
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    """Índice del primer valor no NaN de cada fila (longitud si no hay ninguno)."""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), x.shape[-1])
+
+
+def sma(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    Media móvil simple (`rolling(length).mean()`).
+
+    Args:
+        x: Serie (..., tiempo)
+        length: Periodos de la media
+
+    Returns:
+        SMA con NaN en las primeras `length - 1` posiciones válidas
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= length:
+        out[..., length - 1:] = sliding_window_view(x, length, axis=-1).mean(axis=-1)
+    return out
+
+
+def rolling_std(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    Desviación estándar poblacional móvil (`rolling(length).std(ddof=0)`).
+
+    Args:
+        x: Serie (..., tiempo)
+        length: Periodos de la ventana
+
+    Returns:
+        Desviación estándar móvil
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= length:
+        out[..., length - 1:] = sliding_window_view(x, length, axis=-1).std(axis=-1)
+    return out
+
+
+def ema(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    EMA de pandas-ta: semilla con la SMA de los primeros `length` valores y
+    luego `ewm(span=length, adjust=False)`.
+
+    Args:
+        x: Serie (..., tiempo), opcionalmente con NaN a la izquierda
+        length: Periodos de la EMA
+
+    Returns:
+        EMA con NaN hasta la vela de semilla
+    """
+    x = np.asarray(x, dtype=np.float64)
+    alpha = 2.0 / (length + 1)
+    time = np.arange(x.shape[-1])
+    seed_at = _first_valid(x)[..., None] + length - 1
+
+    # La semilla se inyecta como entrada para que la recurrencia arranque en ella
+    inputs = np.where(time > seed_at, alpha * np.nan_to_num(x), 0.0)
+    window_mean = sma(np.nan_to_num(x), length)
+    seed = np.take_along_axis(window_mean, np.minimum(seed_at, x.shape[-1] - 1), axis=-1)
+    inputs = np.where(time == seed_at, seed, inputs)
+
+    out = _linear_recurrence(inputs, 1.0 - alpha)
+    out[time < seed_at] = np.nan
+    return out
+
+
+def rma(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    RMA de pandas-ta: `ewm(alpha=1/length, min_periods=length)` ajustada.
+
+    Los NaN no cuentan como observación pero envejecen los pesos, igual que
+    pandas con `ignore_na=False`.
+
+    Args:
+        x: Serie (..., tiempo)
+        length: Periodos de la media
+
+    Returns:
+        RMA con NaN hasta acumular `length` observaciones
+    """
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    decay = 1.0 - 1.0 / length
+    numerator = _linear_recurrence(np.where(valid, x, 0.0), decay)
+    denominator = _linear_recurrence(valid.astype(np.float64), decay)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = numerator / denominator
+    out[np.cumsum(valid, axis=-1) < length] = np.nan
+    return out
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    """Desplaza una posición hacia el futuro (`shift(1)`) rellenando con NaN."""
+    out = np.full(x.shape, np.nan)
+    out[..., 1:] = x[..., :-1]
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> np.ndarray:
+    """
+    ADX de pandas-ta (RMA del DX con ATR también por RMA).
+
+    Args:
+        high: Máximos (..., tiempo)
+        low: Mínimos (..., tiempo)
+        close: Cierres (..., tiempo)
+        length: Periodos
+
+    Returns:
+        Columna ADX
+    """
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    prev_high, prev_low, prev_close = _shift(high), _shift(low), _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+    true_range[np.isnan(prev_close)] = np.nan
+
+    up = high - prev_high
+    down = prev_low - low
+    dm_pos = np.where((up > down) & (up > 0), up, 0.0)
+    dm_neg = np.where((down > up) & (down > 0), down, 0.0)
+    dm_pos[np.isnan(up)] = np.nan
+    dm_neg[np.isnan(down)] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100.0 / rma(true_range, length)
+        di_pos = k * rma(dm_pos, length)
+        di_neg = k * rma(dm_neg, length)
+        dx = 100.0 * np.abs(di_pos - di_neg) / (di_pos + di_neg)
+    dx[~np.isfinite(dx)] = np.nan
+    return rma(dx, length)
+
+
+def bb_width(close: np.ndarray, length: int = 20, std: float = 2.0) -> np.ndarray:
+    """
+    Ancho de las Bandas de Bollinger: (Banda Superior - Banda Inferior) / Banda Media.
+
+    Args:
+        close: Cierres (..., tiempo)
+        length: Periodos de la banda media
+        std: Número de desviaciones estándar
+
+    Returns:
+        Columna bb_width (NaN donde la banda media es cero)
+    """
+    middle = sma(close, length)
+    deviation = std * rolling_std(close, length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = ((middle + deviation) - (middle - deviation)) / middle
+    width[~np.isfinite(width)] = np.nan
+    return width
+
+
+def rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    """
+    RSI de pandas-ta (RMA de subidas y bajadas).
+
+    Args:
+        close: Cierres (..., tiempo)
+        length: Periodos
+
+    Returns:
+        Columna RSI en [0, 100]
+    """
+    close = np.asarray(close, dtype=np.float64)
+    change = close - _shift(close)
+    gain = rma(np.where(change < 0, 0.0, change), length)
+    loss = rma(np.where(change > 0, 0.0, change), length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * gain / (gain + np.abs(loss))
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """
+    MACD de pandas-ta: línea, señal (EMA de la línea desde su primer valor) e histograma.
+
+    Args:
+        close: Cierres (..., tiempo)
+        fast: Periodos de la EMA rápida
+        slow: Periodos de la EMA lenta
+        signal: Periodos de la señal
+
+    Returns:
+        Diccionario con MACD, MACDs y MACDh
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    suffix = f"{fast}_{slow}_{signal}"
+    return {
+        f'MACD_{suffix}': line,
+        f'MACDs_{suffix}': signal_line,
+        f'MACDh_{suffix}': line - signal_line,
+    }
+
+
+def compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcula todos los indicadores del brain en una sola pasada.
+
+    Args:
+        high: Máximos (..., tiempo)
+        low: Mínimos (..., tiempo)
+        close: Cierres (..., tiempo)
+
+    Returns:
+        Columnas ADX_14, bb_width, SMA_30, SMA_150, RSI_14, MACD_12_26_9,
+        MACDs_12_26_9, MACDh_12_26_9, EMA_21 y EMA_50 con la forma de `close`
+    """
+    indicators = {
+        'ADX_14': adx(high, low, close, length=14),
+        'bb_width': bb_width(close, length=20, std=2.0),
+        'SMA_30': sma(close, 30),
+        'SMA_150': sma(close, 150),
+        'RSI_14': rsi(close, length=14),
+    }
+    indicators.update(macd(close))
+    indicators['EMA_21'] = ema(close, 21)
+    indicators['EMA_50'] = ema(close, 50)
+    return indicators
@@ -0,0 +1,112 @@
+"""
+Pool de Procesos para Indicadores
+=================================
+
+El calentamiento del motor incremental (recorrer cientos de velas en Python
+puro) retiene el GIL: ejecutado en un hilo frena el bucle de eventos de
+FastAPI (`/health`, parada del servicio) y usa un solo núcleo aunque se
+analicen cientos de pares.
+
+Este pool lo ejecuta en procesos aparte:
+
+- Los procesos se crean con `spawn` (el brain usa hilos) y, al arrancar,
+  importan NumPy y el motor y ejecutan un calentamiento de prueba, así la
+  primera tarea real no paga las importaciones.
+- Las velas viajan como arrays float64/int64 contiguos (pickle copia el
+  buffer de una vez) y los indicadores vuelven en una única matriz.
+- Quien llama espera el resultado en su hilo sin retener el GIL.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.infrastructure.streaming_indicators import StreamingIndicatorEngine, warm_indicator_series
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker() -> None:
+    """Inicializa un proceso: importaciones y calentamiento del motor."""
+    candles = np.linspace(100.0, 101.0, 200)
+    warm_indicator_series(np.arange(200, dtype=np.int64), candles + 1, candles - 1, candles, 200)
+
+
+def _ping() -> int:
+    """Tarea vacía para arrancar los procesos por adelantado."""
+    return os.getpid()
+
+
+class IndicatorProcessPool:
+    """
+    Calentamiento de indicadores en un pool de procesos.
+
+    El pool se crea en el primer uso (o en `warm_up`) y se reutiliza hasta
+    `close()`.
+    """
+
+    def __init__(self, workers: int = 0):
+        """
+        Inicializa el pool.
+
+        Args:
+            workers: Procesos de trabajo (0 = uno por núcleo)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def warm_up(self) -> None:
+        """Arranca todos los procesos y espera a que terminen de importar."""
+        executor = self._get_executor()
+        wait([executor.submit(_ping) for _ in range(self.workers)])
+        self.logger.info(f"🔥 Pool de indicadores listo ({self.workers} procesos)")
+
+    def warm_series(
+        self,
+        timestamps: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        max_rows: int
+    ) -> Tuple[StreamingIndicatorEngine, np.ndarray]:
+        """
+        Calienta un motor en un proceso del pool (bloquea el hilo que llama).
+
+        Returns:
+            Motor al día y matriz (indicadores, velas) de las últimas `max_rows` velas
+        """
+        future = self._get_executor().submit(
+            warm_indicator_series,
+            np.ascontiguousarray(timestamps, dtype=np.int64),
+            np.ascontiguousarray(high, dtype=np.float64),
+            np.ascontiguousarray(low, dtype=np.float64),
+            np.ascontiguousarray(close, dtype=np.float64),
+            max_rows
+        )
+        return future.result()
+
+    def close(self) -> None:
+        """Detiene los procesos del pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Crea el pool la primera vez."""
+        with self._lock:
+            if self._executor is None:
+                # spawn: el brain llama al pool desde hilos (asyncio.to_thread)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
@@ -0,0 +1,89 @@
+"""
+Planificador de Historial para Indicadores
+==========================================
+
+Calcula cuántas velas cerradas hacen falta para que los indicadores de la
+última vela sean válidos, en lugar de pedir un número fijo de días por
+timeframe:
+
+- Indicadores de ventana (SMA, Bollinger): basta con la ventana completa.
+- Indicadores recursivos (EMA, RMA de ADX/RSI, MACD): además del periodo de
+  calentamiento, las velas necesarias para que el peso de la historia no
+  descargada quede por debajo de `tolerance` (decay^n <= tolerance).
+
+El resultado no depende del timeframe: 4h y 1d necesitan las mismas velas,
+solo cambia cuántos días cubren.
+"""
+
+import math
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from app.domain.entities import last_closed_candle, timeframe_to_ms
+from app.infrastructure.streaming_indicators import INDICATOR_NAMES
+
+
+class IndicatorLookback(NamedTuple):
+    """Requisitos de historial de un indicador."""
+    warmup: int                     # Velas hasta el primer valor (no NaN)
+    decay: Optional[float] = None   # Factor de olvido de la etapa recursiva más lenta
+
+
+# Mismos periodos que StreamingIndicatorEngine (verificado en los tests)
+INDICATOR_LOOKBACK: Dict[str, IndicatorLookback] = {
+    'ADX_14': IndicatorLookback(28, 1 - 1 / 14),
+    'bb_width': IndicatorLookback(20),
+    'SMA_30': IndicatorLookback(30),
+    'SMA_150': IndicatorLookback(150),
+    'RSI_14': IndicatorLookback(15, 1 - 1 / 14),
+    'MACD_12_26_9': IndicatorLookback(26, 1 - 2 / 27),
+    'MACDs_12_26_9': IndicatorLookback(34, 1 - 2 / 27),
+    'MACDh_12_26_9': IndicatorLookback(34, 1 - 2 / 27),
+    'EMA_21': IndicatorLookback(21, 1 - 2 / 22),
+    'EMA_50': IndicatorLookback(50, 1 - 2 / 51),
+}
+
+
+def indicator_bars(name: str, tolerance: float) -> int:
+    """
+    Velas mínimas para un indicador.
+
+    Args:
+        name: Nombre de la columna (ej: 'ADX_14')
+        tolerance: Peso máximo de la historia no descargada en los recursivos
+
+    Returns:
+        Número de velas cerradas
+    """
+    lookback = INDICATOR_LOOKBACK[name]
+    if lookback.decay is None:
+        return lookback.warmup
+    return lookback.warmup + math.ceil(math.log(tolerance) / math.log(lookback.decay))
+
+
+def required_bars(indicators: Iterable[str] = INDICATOR_NAMES, tolerance: float = 0.01) -> int:
+    """
+    Velas mínimas para que todos los indicadores sean válidos en la última vela.
+
+    Args:
+        indicators: Columnas de indicadores requeridas
+        tolerance: Peso máximo de la historia no descargada en los recursivos
+
+    Returns:
+        Número de velas cerradas
+    """
+    return max(indicator_bars(name, tolerance) for name in indicators)
+
+
+def lookback_since(timeframe: str, now_ms: int, bars: int) -> int:
+    """
+    Apertura de la primera vela de las últimas `bars` velas cerradas.
+
+    Args:
+        timeframe: Marco temporal ('4h', '1d', ...)
+        now_ms: Instante de referencia (ms)
+        bars: Velas cerradas requeridas
+
+    Returns:
+        Timestamp en ms para `since`
+    """
+    return last_closed_candle(timeframe, now_ms) - (bars - 1) * timeframe_to_ms(timeframe)
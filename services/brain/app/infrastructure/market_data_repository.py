@@ -5,20 +5,36 @@ Repositorio de Datos de Mercado
 Implementación concreta del repositorio de datos de mercado.
 """
 
+import asyncio
 import logging
+import threading
 import pandas as pd
 import numpy as np
-import pandas_ta as ta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import ccxt
 
 from app.domain.interfaces import MarketDataRepository
-from app.domain.entities import MarketIndicators
+from app.domain.entities import MarketData, MarketIndicators, TickerStats
+from app.infrastructure.candle_cache import CandleCache, timeframe_to_ms
+from app.infrastructure.candle_store import MultiTimeframeCandleStore
+from app.infrastructure.indicator_pool import IndicatorProcessPool
+from app.infrastructure.lookback_planner import lookback_since, required_bars
+from app.infrastructure.streaming_indicators import StreamingIndicatorCache
+from app.infrastructure.sentiment_cache import SentimentCache, align_daily_sentiment, DAY_MS, SENTIMENT_WINDOW
+from app.config import (
+    BASE_TIMEFRAME, CANDLE_CACHE_MAX_CANDLES, CANDLE_FETCH_PAGE_LIMIT, INDICATOR_STATE_FILE,
+    INDICATOR_STATE_SAVE_INTERVAL, INDICATOR_WORKERS, INDICATOR_POOL_MIN_CANDLES, LOOKBACK_TOLERANCE,
+    SENTIMENT_CACHE_TTL
+)
 from shared.config.settings import settings
+from shared.exchange import get_exchange_gateway
 
 logger = logging.getLogger(__name__)
 
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+_EPOCH = pd.Timestamp('1970-01-01')
+
 
 class BinanceMarketDataRepository(MarketDataRepository):
     """
@@ -28,87 +44,137 @@ class BinanceMarketDataRepository(MarketDataRepository):
     def __init__(self):
         """Inicializa el repositorio."""
         self._exchange = None
+        self._exchange_lock = threading.Lock()
+        self._candle_cache = CandleCache(
+            exchange_provider=self._get_exchange,
+            max_candles=CANDLE_CACHE_MAX_CANDLES,
+            page_limit=CANDLE_FETCH_PAGE_LIMIT
+        )
+        self._candle_store = MultiTimeframeCandleStore(self._candle_cache, BASE_TIMEFRAME)
+        self._indicator_pool = IndicatorProcessPool(INDICATOR_WORKERS) if INDICATOR_WORKERS != 1 else None
+        self._indicator_cache = StreamingIndicatorCache(
+            state_file=INDICATOR_STATE_FILE,
+            max_rows=CANDLE_CACHE_MAX_CANDLES,
+            pool=self._indicator_pool,
+            pool_min_candles=INDICATOR_POOL_MIN_CANDLES,
+            save_interval=INDICATOR_STATE_SAVE_INTERVAL
+        )
+        # Velas mínimas para que todos los indicadores de la última vela sean válidos
+        self._lookback_bars = required_bars(tolerance=LOOKBACK_TOLERANCE)
+        self._sentiment_cache = SentimentCache(ttl=SENTIMENT_CACHE_TTL)
+        self._sentiment_watermark: Optional[str] = None
         self.logger = logging.getLogger(__name__)
     
+    def warm_up(self) -> None:
+        """Arranca el pool de indicadores antes del primer análisis (bloqueante)."""
+        if self._indicator_pool is None:
+            return
+        try:
+            self._indicator_pool.warm_up()
+        except Exception as e:
+            self.logger.error(f"Error arrancando el pool de indicadores: {e}")
+
+    def close(self) -> None:
+        """Guarda el estado de indicadores pendiente y detiene el pool."""
+        self._indicator_cache.flush()
+        if self._indicator_pool is not None:
+            self._indicator_pool.close()
+
     def _get_exchange(self):
         """
         Obtiene la instancia del exchange Binance.
         
         Returns:
-            Cliente ccxt configurado para Binance
+            Cliente ccxt de Binance detrás del gateway de peticiones
         """
-        if self._exchange is None:
-            try:
-                self._exchange = ccxt.binance({
-                    'apiKey': settings.BINANCE_API_KEY,
-                    'secret': settings.BINANCE_API_SECRET,
-                    'sandbox': False,
-                    'enableRateLimit': True,
-                })
-            except Exception as e:
-                self.logger.error(f"Error creando cliente Binance: {e}")
-                raise
+        with self._exchange_lock:
+            if self._exchange is None:
+                try:
+                    # Las peticiones pasan por el gateway compartido (presupuesto de peso de Binance)
+                    gateway = get_exchange_gateway('binance', lambda: ccxt.binance({
+                        'apiKey': settings.BINANCE_API_KEY,
+                        'secret': settings.BINANCE_API_SECRET,
+                        'sandbox': False,
+                    }))
+                    self._exchange = gateway.client()
+                except Exception as e:
+                    self.logger.error(f"Error creando cliente Binance: {e}")
+                    raise
         return self._exchange
     
     async def fetch_market_data(
         self, 
         pair: str, 
         timeframe: str = '4h', 
-        days: int = 40
-    ) -> Optional[Dict[str, Any]]:
+        days: Optional[int] = None
+    ) -> Optional[MarketData]:
         """
         Obtiene datos históricos de mercado para un par específico.
         
         Args:
             pair: Par de trading (ej: 'ETH/USDT')
             timeframe: Marco temporal ('4h', '1h', '1d')
-            days: Número de días de historial
+            days: Número de días de historial (None = el mínimo que necesitan los indicadores)
             
+        Returns:
+            Datos de mercado o None si hay error
+        """
+        # ccxt y la consulta de sentimiento son bloqueantes: se ejecutan
+        # en un hilo para que varios pares puedan analizarse en paralelo
+        return await asyncio.to_thread(self._fetch_market_data_sync, pair, timeframe, days)
+
+    def _fetch_market_data_sync(self, pair: str, timeframe: str, days: Optional[int]) -> Optional[MarketData]:
+        """
+        Implementación bloqueante de fetch_market_data.
+
+        Args:
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal ('4h', '1h', '1d')
+            days: Número de días de historial (None = el mínimo que necesitan los indicadores)
+
         Returns:
             Datos de mercado o None si hay error
         """
         try:
-            self.logger.info(f"📊 Obteniendo datos para {pair} ({timeframe}, {days} días)...")
-            
             exchange = self._get_exchange()
             
             # Calcular timestamp de inicio
-            since = exchange.milliseconds() - (days * 24 * 60 * 60 * 1000)
+            if days:
+                self.logger.info(f"📊 Obteniendo datos para {pair} ({timeframe}, {days} días)...")
+                since = exchange.milliseconds() - days * DAY_MS
+            else:
+                self.logger.info(f"📊 Obteniendo datos para {pair} ({timeframe}, {self._lookback_bars} velas)...")
+                since = lookback_since(timeframe, exchange.milliseconds(), self._lookback_bars)
             
-            # Obtener datos históricos
-            ohlcv = exchange.fetch_ohlcv(pair, timeframe, since)
+            # Obtener velas cerradas: se descarga solo el delta de la serie base
+            # y el timeframe pedido se re-muestrea a partir de ella
+            ohlcv = self._candle_store.get_candles(pair, timeframe, since)
             
             if not ohlcv:
                 self.logger.warning(f"No se obtuvieron datos para {pair}")
                 return None
             
-            # Crear DataFrame
-            column_names = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            df = pd.DataFrame(data=ohlcv, columns=pd.Index(column_names))
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
-            # Convertir a float64 para pandas-ta
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(np.float64)
+            # Una sola matriz float64; cada columna OHLCV es una vista sin copia
+            candles = np.asarray(ohlcv, dtype=np.float64)
+            market_data = MarketData(
+                pair=pair,
+                timeframe=timeframe,
+                timestamps=candles[:, 0].astype(np.int64),
+                columns={name: candles[:, i + 1] for i, name in enumerate(OHLCV_COLUMNS)}
+            )
             
-            self.logger.info(f"✅ Obtenidos {len(df)} registros para {pair}")
+            self.logger.info(f"✅ Obtenidos {len(market_data)} registros para {pair}")
+            if not days and len(market_data) < self._lookback_bars:
+                self.logger.warning(
+                    f"⚠️ {pair} ({timeframe}): {len(market_data)}/{self._lookback_bars} velas, "
+                    f"algunos indicadores no serán válidos"
+                )
             
             # Calcular indicadores técnicos
-            df = self._calculate_technical_indicators(df)
+            market_data = market_data.with_columns(**self._calculate_technical_indicators(market_data))
             
             # Obtener datos de sentimiento
-            df = await self._fetch_sentiment_data(df)
-            
-            # Convertir a diccionario
-            market_data = {
-                'pair': pair,
-                'timeframe': timeframe,
-                'data': df.to_dict('records'),
-                'columns': df.columns.tolist(),
-                'index': df.index.tolist(),
-                'shape': df.shape
-            }
+            market_data = market_data.with_columns(sentiment_promedio=self._fetch_sentiment_data(market_data))
             
             return market_data
             
@@ -116,51 +182,151 @@ class BinanceMarketDataRepository(MarketDataRepository):
             self.logger.error(f"Error obteniendo datos para {pair}: {e}")
             return None
     
-    async def calculate_indicators(self, market_data: Dict[str, Any]) -> Optional[MarketIndicators]:
+    async def fetch_market_history(
+        self,
+        pair: str,
+        timeframe: str = '4h',
+        days: int = 1095
+    ) -> Optional[MarketData]:
         """
-        Calcula indicadores técnicos a partir de datos de mercado.
+        Obtiene un historial largo (ej: años) para backtesting.
+        
+        A diferencia de `fetch_market_data`, no pasa por la caché de velas del
+        análisis en vivo (limitada a CANDLE_CACHE_MAX_CANDLES) ni calcula
+        indicadores: solo devuelve OHLCV y la columna `sentiment_promedio`.
         
         Args:
-            market_data: Datos de mercado
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal ('4h', '1h', '1d')
+            days: Número de días de historial
             
         Returns:
-            Indicadores calculados o None si hay error
+            Datos de mercado o None si hay error
         """
+        return await asyncio.to_thread(self._fetch_market_history_sync, pair, timeframe, days)
+    
+    def _fetch_market_history_sync(self, pair: str, timeframe: str, days: int) -> Optional[MarketData]:
+        """Implementación bloqueante de fetch_market_history."""
         try:
-            if not market_data or 'data' not in market_data:
-                return None
+            self.logger.info(f"📚 Descargando historial de {pair} ({timeframe}, {days} días)...")
             
-            # Recrear DataFrame
-            df = pd.DataFrame(market_data['data'])
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index('timestamp', inplace=True)
+            exchange = self._get_exchange()
+            since = exchange.milliseconds() - days * DAY_MS
             
-            # Obtener valores actuales (última fila)
-            if df.empty:
+            # Caché de un solo uso: pagina, descarta la vela en formación y repara huecos
+            history_cache = CandleCache(
+                exchange_provider=self._get_exchange,
+                max_candles=days * DAY_MS // timeframe_to_ms(timeframe) + 1,
+                page_limit=CANDLE_FETCH_PAGE_LIMIT
+            )
+            ohlcv = history_cache.get_closed_candles(pair, timeframe, since)
+            
+            if not ohlcv:
+                self.logger.warning(f"No se obtuvo historial para {pair}")
                 return None
             
-            latest = df.iloc[-1]
+            candles = np.asarray(ohlcv, dtype=np.float64)
+            market_data = MarketData(
+                pair=pair,
+                timeframe=timeframe,
+                timestamps=candles[:, 0].astype(np.int64),
+                columns={name: candles[:, i + 1] for i, name in enumerate(OHLCV_COLUMNS)}
+            )
+            
+            # Sentimiento de todo el rango en una consulta (sin la caché del ciclo)
+            candle_days = market_data.timestamps // DAY_MS
+            daily = self._load_daily_sentiment(int(candle_days[0]), int(candle_days[-1]))
+            market_data = market_data.with_columns(
+                sentiment_promedio=align_daily_sentiment(market_data.timestamps, daily)
+            )
+            
+            self.logger.info(f"✅ Historial de {pair}: {len(market_data)} velas, {len(daily)} días con sentimiento")
+            return market_data
+            
+        except Exception as e:
+            self.logger.error(f"Error descargando historial para {pair}: {e}")
+            return None
+    
+    async def fetch_tickers(self, quote: str = 'USDT') -> List[TickerStats]:
+        """
+        Obtiene las estadísticas de 24h de todos los pares spot de `quote`.
+        
+        Una sola llamada a /ticker/24hr sin símbolos (peso 80 en Binance) en
+        lugar de una por par; los mercados se cargan una vez y ccxt los cachea.
+        
+        Args:
+            quote: Moneda de cotización (ej: 'USDT')
+            
+        Returns:
+            Estadísticas por par (lista vacía si hay error)
+        """
+        return await asyncio.to_thread(self._fetch_tickers_sync, quote)
+    
+    def _fetch_tickers_sync(self, quote: str) -> List[TickerStats]:
+        """Implementación bloqueante de fetch_tickers."""
+        try:
+            exchange = self._get_exchange()
+            markets = exchange.load_markets()
+            spot_pairs = {
+                symbol for symbol, market in markets.items()
+                if market.get('spot') and market.get('active', True) and market.get('quote') == quote
+            }
             
-            # Extraer indicadores con manejo de None
-            adx_value = float(latest.get('ADX_14', 0)) if pd.notna(latest.get('ADX_14')) else 0.0
+            tickers = exchange.fetch_tickers()
+            stats = [
+                TickerStats(
+                    pair=symbol,
+                    last=float(ticker['last']),
+                    quote_volume=float(ticker.get('quoteVolume') or 0.0),
+                    high=ticker.get('high'),
+                    low=ticker.get('low'),
+                    bid=ticker.get('bid'),
+                    ask=ticker.get('ask'),
+                    change_percent=ticker.get('percentage')
+                )
+                for symbol, ticker in tickers.items()
+                if symbol in spot_pairs and ticker.get('last')
+            ]
+            self.logger.info(f"📋 Tickers {quote}: {len(stats)} pares spot activos")
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"Error obteniendo tickers {quote}: {e}")
+            return []
+    
+    async def calculate_indicators(self, market_data: MarketData) -> Optional[MarketIndicators]:
+        """
+        Calcula indicadores técnicos a partir de datos de mercado.
+        
+        Args:
+            market_data: Datos de mercado
+            
+        Returns:
+            Indicadores calculados o None si hay error
+        """
+        try:
+            if market_data is None or not len(market_data):
+                return None
+            
+            # Valores actuales (última fila), leídos directamente de cada columna
+            adx_value = market_data.latest('ADX_14') or 0.0
             
             # Métrica única de volatilidad: Ancho de las Bandas de Bollinger (bb_width)
-            bb_width_value = float(latest.get('bb_width', 0)) if pd.notna(latest.get('bb_width')) else 0.0
+            bb_width_value = market_data.latest('bb_width') or 0.0
             
             # Logging para debugging
-            self.logger.info(f"📊 Volatilidad (bb_width) para {market_data.get('pair', 'unknown')}: {bb_width_value:.6f}")
+            self.logger.info(f"📊 Volatilidad (bb_width) para {market_data.pair}: {bb_width_value:.6f}")
             
-            sentiment_value = float(latest.get('sentiment_promedio', 0)) if pd.notna(latest.get('sentiment_promedio')) else None
-            rsi_value = float(latest.get('RSI_14', 0)) if pd.notna(latest.get('RSI_14')) else 0.0
-            macd_value = float(latest.get('MACD_12_26_9', 0)) if pd.notna(latest.get('MACD_12_26_9')) else 0.0
-            ema21_value = float(latest.get('EMA_21', 0)) if pd.notna(latest.get('EMA_21')) else 0.0
-            ema50_value = float(latest.get('EMA_50', 0)) if pd.notna(latest.get('EMA_50')) else 0.0
+            sentiment_value = market_data.latest('sentiment_promedio')
+            rsi_value = market_data.latest('RSI_14') or 0.0
+            macd_value = market_data.latest('MACD_12_26_9') or 0.0
+            ema21_value = market_data.latest('EMA_21') or 0.0
+            ema50_value = market_data.latest('EMA_50') or 0.0
             
             # Indicadores específicos para TREND
-            sma30_value = float(latest.get('SMA_30', 0)) if pd.notna(latest.get('SMA_30')) else 0.0
-            sma150_value = float(latest.get('SMA_150', 0)) if pd.notna(latest.get('SMA_150')) else 0.0
-            sentiment_7d_avg_value = float(latest.get('sentiment_promedio', 0)) if pd.notna(latest.get('sentiment_promedio')) else None
+            sma30_value = market_data.latest('SMA_30') or 0.0
+            sma150_value = market_data.latest('SMA_150') or 0.0
+            sentiment_7d_avg_value = market_data.latest('sentiment_promedio')
             
             indicators = MarketIndicators(
                 adx=adx_value,
@@ -176,7 +342,7 @@ class BinanceMarketDataRepository(MarketDataRepository):
                 timestamp=datetime.utcnow()
             )
             
-            self.logger.info(f"✅ Indicadores calculados para {market_data.get('pair', 'unknown')}")
+            self.logger.info(f"✅ Indicadores calculados para {market_data.pair}")
             
             return indicators
             
@@ -184,141 +350,185 @@ class BinanceMarketDataRepository(MarketDataRepository):
             self.logger.error(f"Error calculando indicadores: {e}")
             return None
     
-    def _calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_technical_indicators(self, market_data: MarketData) -> Dict[str, np.ndarray]:
         """
-        Calcula indicadores técnicos en el DataFrame usando pandas-ta.
+        Calcula indicadores técnicos con el motor incremental.
+        
+        Solo las velas cerradas posteriores al último ciclo se procesan; el
+        resto de valores se reutiliza del estado del (par, timeframe).
         
         Args:
-            df: DataFrame con datos OHLCV
+            market_data: Datos de mercado con columnas OHLCV
             
         Returns:
-            DataFrame con indicadores añadidos
+            Columnas de indicadores alineadas con las velas
         """
         try:
-            # ADX (Average Directional Index) - pandas-ta devuelve múltiples columnas
-            adx_data = ta.adx(df['high'], df['low'], df['close'], length=14)
-            if adx_data is not None:
-                df['ADX_14'] = adx_data['ADX_14']  # Solo la columna ADX
-            
-            # Bandas de Bollinger usando pandas-ta
-            df.ta.bbands(length=20, std=2, append=True)
-            
-            # Calcular bb_width (Ancho de las Bandas de Bollinger)
-            # Fórmula: (Banda Superior - Banda Inferior) / Banda Media
-            df['bb_width'] = (df['BBU_20_2.0'] - df['BBL_20_2.0']) / df['BBM_20_2.0']
-            
-            # Indicadores específicos para TREND
-            # SMA (Simple Moving Average) de 30 y 150 periodos
-            df['SMA_30'] = ta.sma(df['close'], length=30)
-            df['SMA_150'] = ta.sma(df['close'], length=150)
-            
-            # RSI
-            df['RSI_14'] = ta.rsi(df['close'], length=14)
-            
-            # MACD
-            macd_data = ta.macd(df['close'])
-            if macd_data is not None:
-                df['MACD_12_26_9'] = macd_data['MACD_12_26_9']
-                df['MACDs_12_26_9'] = macd_data['MACDs_12_26_9']
-                df['MACDh_12_26_9'] = macd_data['MACDh_12_26_9']
-            
-            # EMA
-            df['EMA_21'] = ta.ema(df['close'], length=21)
-            df['EMA_50'] = ta.ema(df['close'], length=50)
-            
-            # Manejar posibles divisiones por cero
-            df['bb_width'] = df['bb_width'].replace([np.inf, -np.inf], np.nan)
+            indicators = self._indicator_cache.get_indicators(
+                market_data.pair,
+                market_data.timeframe,
+                market_data.timestamps,
+                market_data.columns['high'],
+                market_data.columns['low'],
+                market_data.columns['close']
+            )
+            self.logger.debug("✅ Indicadores técnicos calculados de forma incremental")
+            return indicators
             
-            self.logger.debug("✅ Indicadores técnicos calculados con pandas-ta")
+        except Exception as e:
+            self.logger.error(f"Error calculando indicadores técnicos: {e}")
+            return {}
+    
+    def _fetch_sentiment_data(self, market_data: MarketData) -> np.ndarray:
+        """
+        Obtiene datos de sentimiento de la caché compartida del ciclo.
+        
+        Args:
+            market_data: Datos de mercado con las velas a las que asociar el sentimiento
             
-            return df
+        Returns:
+            Columna sentiment_promedio alineada con las velas (NaN si no hay datos)
+        """
+        empty = np.full(len(market_data), np.nan)
+        try:
+            # Días UTC (desde la época) que cubren las velas
+            candle_days = market_data.timestamps // DAY_MS
+            daily = self._sentiment_cache.get_daily(
+                int(candle_days[0]), int(candle_days[-1]), self._load_daily_sentiment
+            )
             
+            if daily:
+                return align_daily_sentiment(market_data.timestamps, daily)
+            else:
+                self.logger.warning("⚠️ No se encontraron datos de sentimiento")
+                return empty
+                
         except Exception as e:
-            self.logger.error(f"Error calculando indicadores técnicos: {e}")
-            return df
+            self.logger.error(f"Error obteniendo datos de sentimiento: {e}")
+            return empty
     
-    async def _fetch_sentiment_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _load_daily_sentiment(self, start_day: int, end_day: int) -> Dict[int, float]:
         """
-        Obtiene datos de sentimiento de la base de datos.
+        Carga de la base de datos el sentimiento medio diario de un rango de días.
         
         Args:
-            df: DataFrame con datos de precios
+            start_day: Primer día UTC (días desde la época)
+            end_day: Último día UTC (días desde la época), incluido
             
         Returns:
-            DataFrame con datos de sentimiento agregados
+            Sentimiento medio por día (solo días con noticias analizadas)
         """
+        from shared.database.session import SessionLocal
+        from shared.database.models import Noticia, SentimentRollup
+        
+        self.logger.info("📰 Obteniendo datos de sentimiento de la base de datos...")
+        
+        start_date = (_EPOCH + pd.Timedelta(days=start_day)).to_pydatetime()
+        end_date = (_EPOCH + pd.Timedelta(days=end_day + 1)).to_pydatetime()
+        
+        # Crear sesión de base de datos
+        db = SessionLocal()
+        
         try:
-            from shared.database.session import SessionLocal
-            from sqlalchemy import text
+            # Agregados diarios mantenidos por el servicio de noticias:
+            # escaneo por rango del índice (granularity, bucket_start)
+            sentiment_data = db.query(
+                SentimentRollup.bucket_start,
+                SentimentRollup.sentiment_mean,
+                SentimentRollup.news_count
+            ).filter(
+                SentimentRollup.granularity == 'day',
+                SentimentRollup.bucket_start >= start_date,
+                SentimentRollup.bucket_start < end_date
+            ).all()
+            
+            if not sentiment_data:
+                # Sin agregados todavía (el servicio de noticias aún no los
+                # construyó): media diaria desde noticias por el índice de
+                # published_at_utc
+                scored = db.query(Noticia.published_at_utc, Noticia.sentiment_score).filter(
+                    Noticia.published_at_utc >= start_date,
+                    Noticia.published_at_utc < end_date,
+                    Noticia.sentiment_score != None
+                ).all()
+                by_day: Dict[datetime, list] = {}
+                for published_at, score in scored:
+                    by_day.setdefault(published_at.replace(hour=0, minute=0, second=0, microsecond=0), []).append(score)
+                sentiment_data = [(day, sum(scores) / len(scores), len(scores)) for day, scores in by_day.items()]
+            
+            # Sentimiento diario por día UTC (días desde la época)
+            daily = {
+                (pd.Timestamp(fecha) - _EPOCH).days: sentiment_daily
+                for fecha, sentiment_daily, num_noticias in sentiment_data
+                if sentiment_daily is not None and num_noticias
+            }
             
-            self.logger.info("📰 Obteniendo datos de sentimiento de la base de datos...")
+            self.logger.info(f"✅ Datos de sentimiento agregados: {len(daily)} días")
             
-            # Crear sesión de base de datos
-            db = SessionLocal()
+            return daily
+            
+        finally:
+            db.close()
+    
+    async def get_sentiment_watermark(self) -> Optional[str]:
+        """
+        Obtiene una marca de agua del sentimiento de la ventana de análisis.
+        
+        Si cambió desde la última consulta, la caché de sentimiento se
+        invalida para que el siguiente análisis lea los datos nuevos.
+        
+        Returns:
+            Marca de agua opaca o None si hay error
+        """
+        return await asyncio.to_thread(self._get_sentiment_watermark_sync)
+    
+    def _get_sentiment_watermark_sync(self) -> Optional[str]:
+        """
+        Implementación bloqueante de get_sentiment_watermark.
+        
+        Una consulta agregada sobre los últimos SENTIMENT_WINDOW días: los
+        agregados diarios del servicio de noticias o, si aún no existen, las
+        noticias puntuadas.
+        
+        Returns:
+            Marca de agua opaca o None si hay error
+        """
+        from sqlalchemy import func
+        from shared.database.session import SessionLocal
+        from shared.database.models import Noticia, SentimentRollup
+        
+        today = pd.Timestamp.utcnow().tz_localize(None).normalize()
+        start_date = (today - pd.Timedelta(days=SENTIMENT_WINDOW - 1)).to_pydatetime()
+        
+        db = SessionLocal()
+        try:
+            buckets, news_count, updated_at = db.query(
+                func.count(SentimentRollup.id),
+                func.sum(SentimentRollup.news_count),
+                func.max(SentimentRollup.updated_at)
+            ).filter(
+                SentimentRollup.granularity == 'day',
+                SentimentRollup.bucket_start >= start_date
+            ).one()
+            
+            if buckets:
+                watermark = f"rollup|{start_date.date()}|{buckets}|{news_count}|{updated_at}"
+            else:
+                scored, last_id = db.query(func.count(Noticia.id), func.max(Noticia.id)).filter(
+                    Noticia.published_at_utc >= start_date,
+                    Noticia.sentiment_score != None
+                ).one()
+                watermark = f"news|{start_date.date()}|{scored}|{last_id}"
+            
+            if watermark != self._sentiment_watermark:
+                if self._sentiment_watermark is not None:
+                    self.logger.info("📰 Sentimiento nuevo: se invalida la caché de sentimiento")
+                    self._sentiment_cache.clear()
+                self._sentiment_watermark = watermark
+            return watermark
             
-            try:
-                # Obtener fechas de inicio y fin del DataFrame
-                start_date = df.index.min()
-                end_date = df.index.max()
-                
-                # Query para obtener datos de sentimiento
-                query = text("""
-                    SELECT 
-                        DATE(CAST(published_at AS TIMESTAMP)) as fecha,
-                        AVG(sentiment_score) as sentiment_daily,
-                        COUNT(*) as num_noticias
-                    FROM noticias 
-                    WHERE CAST(published_at AS TIMESTAMP) BETWEEN :start_date AND :end_date
-                    GROUP BY DATE(CAST(published_at AS TIMESTAMP))
-                    ORDER BY fecha
-                """)
-                
-                result = db.execute(query, {
-                    'start_date': start_date,
-                    'end_date': end_date
-                })
-                
-                sentiment_data = result.fetchall()
-                
-                if sentiment_data:
-                    # Crear DataFrame de sentimiento
-                    sentiment_df = pd.DataFrame(sentiment_data, columns=pd.Index(['fecha', 'sentiment_daily', 'num_noticias']))
-                    sentiment_df['fecha'] = pd.to_datetime(sentiment_df['fecha'])
-                    sentiment_df['date_only'] = sentiment_df['fecha'].dt.date
-                    
-                    # Preparar DataFrame de precios con columna auxiliar de fecha
-                    df_reset = df.reset_index()
-                    df_reset['date_only'] = df_reset['timestamp'].dt.date if 'timestamp' in df_reset.columns else df_reset['index'].dt.date
-                    
-                    # Hacer merge por fecha
-                    df_merged = pd.merge(
-                        df_reset,
-                        sentiment_df[['date_only', 'sentiment_daily', 'num_noticias']],
-                        on='date_only',
-                        how='left'
-                    )
-                    
-                    # Calcular promedio móvil de sentimiento (7 días)
-                    df_merged['sentiment_promedio'] = df_merged['sentiment_daily'].rolling(window=7, min_periods=1).mean()
-                    
-                    # Restaurar índice
-                    df_merged.set_index('timestamp' if 'timestamp' in df_merged.columns else 'index', inplace=True)
-                    df_merged.drop(['date_only'], axis=1, inplace=True)
-                    
-                    self.logger.info(f"✅ Datos de sentimiento agregados: {len(sentiment_data)} días")
-                    
-                    return df_merged
-                else:
-                    self.logger.warning("⚠️ No se encontraron datos de sentimiento")
-                    # Agregar columna vacía
-                    df['sentiment_promedio'] = None
-                    return df
-                    
-            finally:
-                db.close()
-                
         except Exception as e:
-            self.logger.error(f"Error obteniendo datos de sentimiento: {e}")
-            # Agregar columna vacía en caso de error
-            df['sentiment_promedio'] = None
-            return df 
\ No newline at end of file
+            self.logger.error(f"Error obteniendo marca de agua de sentimiento: {e}")
+            return None
+        finally:
+            db.close()
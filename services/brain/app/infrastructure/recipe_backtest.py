@@ -0,0 +1,182 @@
+"""
+Backtest Vectorizado de Recetas GRID
+====================================
+
+Reproduce sobre todo un historial, de una sola vez, la regla de decisión GRID
+de `AnalyzePairUseCase._make_decision`:
+
+    OPERAR si ADX < umbral_adx y bb_width > umbral_volatilidad y
+    (sin sentimiento o sentimiento > umbral_sentimiento); si no, PAUSAR.
+
+Los indicadores salen de los kernels NumPy (`indicator_kernels`) y el
+sentimiento de la misma columna `sentiment_promedio` que usa el análisis en
+vivo. La decisión tomada al cierre de una vela se aplica a la siguiente, así
+que el resultado no mira al futuro.
+
+Los umbrales admiten arrays que difunden contra el eje temporal, de modo que
+muchas recetas pueden evaluarse con una única operación sobre (recetas × tiempo).
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Union
+
+import numpy as np
+
+from app.domain.entities import BacktestResult, MarketData, TradingRecipe
+from app.domain.interfaces import RecipeBacktester
+from app.infrastructure.candle_cache import timeframe_to_ms
+from app.infrastructure.indicator_kernels import compute_indicators
+from app.infrastructure.sentiment_cache import DAY_MS
+
+OPERATE = 1
+PAUSE = 0
+NO_DATA = -1  # Velas de calentamiento sin ADX o bb_width
+
+Threshold = Union[float, np.ndarray]
+
+
+def grid_decisions(
+    adx: np.ndarray,
+    bb_width: np.ndarray,
+    sentiment: np.ndarray,
+    adx_threshold: Threshold,
+    volatility_threshold: Threshold,
+    sentiment_threshold: Threshold
+) -> np.ndarray:
+    """
+    Regla GRID vectorizada.
+
+    Args:
+        adx: ADX_14 por vela
+        bb_width: Ancho de Bollinger por vela
+        sentiment: sentiment_promedio por vela (NaN = sin datos, condición cumplida)
+        adx_threshold: Umbral de ADX (escalar o array, ej: (recetas, 1))
+        volatility_threshold: Umbral de bb_width
+        sentiment_threshold: Umbral de sentimiento
+
+    Returns:
+        Array int8 con OPERATE, PAUSE o NO_DATA por vela
+    """
+    sentiment_ok = np.isnan(sentiment) | (sentiment > sentiment_threshold)
+    operate = (adx < adx_threshold) & (bb_width > volatility_threshold) & sentiment_ok
+    valid = ~(np.isnan(adx) | np.isnan(bb_width))
+    return np.where(valid, np.where(operate, OPERATE, PAUSE), NO_DATA).astype(np.int8)
+
+
+def grid_pnl_proxy(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Rendimiento aproximado de una grilla durante cada vela.
+
+    La grilla gana con la oscilación que se revierte dentro de la vela
+    (rango menos movimiento neto) y pierde con el movimiento direccional, que
+    deja el inventario del lado equivocado:
+
+        ((high - low) - |close - open|) - |close - open|, relativo a open
+
+    Es positivo en mercados laterales y negativo en tendencias: mide si la
+    receta opera en el régimen adecuado, no el P&L real de las órdenes.
+
+    Args:
+        open_, high, low, close: Columnas OHLC
+
+    Returns:
+        Rendimiento relativo por vela
+    """
+    net_move = np.abs(close - open_)
+    return (high - low - 2.0 * net_move) / open_
+
+
+def evaluate_decisions(decisions: np.ndarray, pnl: np.ndarray, candle_ms: int) -> Dict[str, np.ndarray]:
+    """
+    Métricas de una o varias series de decisiones sobre el último eje.
+
+    Args:
+        decisions: Decisiones (..., tiempo) de `grid_decisions`
+        pnl: Rendimiento por vela (tiempo,) de `grid_pnl_proxy`
+        candle_ms: Duración de una vela en ms
+
+    Returns:
+        Diccionario de arrays con la forma de los ejes iniciales de `decisions`
+    """
+    valid = decisions != NO_DATA
+    operate = decisions == OPERATE
+
+    evaluated = valid.sum(axis=-1)
+    operate_candles = operate.sum(axis=-1)
+    safe_evaluated = np.maximum(evaluated, 1)
+
+    flips = (valid[..., 1:] & valid[..., :-1] & (decisions[..., 1:] != decisions[..., :-1])).sum(axis=-1)
+    run_starts = operate[..., 0].astype(np.int64) + (operate[..., 1:] & ~operate[..., :-1]).sum(axis=-1)
+    evaluated_days = evaluated * candle_ms / DAY_MS
+
+    # La decisión al cierre de la vela t se aplica durante la vela t+1
+    next_pnl = np.nan_to_num(pnl[1:])
+    return {
+        'evaluated_candles': evaluated,
+        'operate_fraction': operate_candles / safe_evaluated,
+        'pause_fraction': (evaluated - operate_candles) / safe_evaluated,
+        'flips': flips,
+        'flips_per_30d': np.where(evaluated_days > 0, flips * 30.0 / np.maximum(evaluated_days, 1e-12), 0.0),
+        'avg_operate_run': operate_candles / np.maximum(run_starts, 1),
+        'pnl_proxy': (operate[..., :-1] * next_pnl).sum(axis=-1),
+        'pnl_proxy_always_on': (valid[..., :-1] * next_pnl).sum(axis=-1),
+    }
+
+
+def run_recipe_backtest(market_data: MarketData, recipe: TradingRecipe) -> BacktestResult:
+    """
+    Reproduce una receta GRID sobre un historial completo.
+
+    Args:
+        market_data: Velas OHLC (y opcionalmente `sentiment_promedio`)
+        recipe: Receta a evaluar
+
+    Returns:
+        Resultado del backtest
+    """
+    columns = market_data.columns
+    indicators = compute_indicators(columns['high'], columns['low'], columns['close'])
+    sentiment = market_data.column('sentiment_promedio')
+    if sentiment is None:
+        sentiment = np.full(len(market_data), np.nan)
+
+    thresholds = recipe.get_thresholds()
+    decisions = grid_decisions(
+        indicators['ADX_14'],
+        indicators['bb_width'],
+        sentiment,
+        thresholds.adx_threshold,
+        thresholds.volatility_threshold,
+        thresholds.sentiment_threshold
+    )
+    pnl = grid_pnl_proxy(columns['open'], columns['high'], columns['low'], columns['close'])
+    metrics = evaluate_decisions(decisions, pnl, timeframe_to_ms(market_data.timeframe))
+
+    return BacktestResult(
+        pair=market_data.pair,
+        recipe_name=recipe.name,
+        timeframe=market_data.timeframe,
+        start=datetime.fromtimestamp(market_data.timestamps[0] / 1000, tz=timezone.utc).replace(tzinfo=None),
+        end=datetime.fromtimestamp(market_data.timestamps[-1] / 1000, tz=timezone.utc).replace(tzinfo=None),
+        candles=len(market_data),
+        evaluated_candles=int(metrics['evaluated_candles']),
+        operate_fraction=float(metrics['operate_fraction']),
+        pause_fraction=float(metrics['pause_fraction']),
+        flips=int(metrics['flips']),
+        flips_per_30d=float(metrics['flips_per_30d']),
+        avg_operate_run=float(metrics['avg_operate_run']),
+        pnl_proxy=float(metrics['pnl_proxy']),
+        pnl_proxy_always_on=float(metrics['pnl_proxy_always_on']),
+        thresholds={
+            'adx_threshold': thresholds.adx_threshold,
+            'bollinger_bandwidth_threshold': thresholds.volatility_threshold,
+            'sentiment_threshold': thresholds.sentiment_threshold
+        }
+    )
+
+
+class VectorizedRecipeBacktester(RecipeBacktester):
+    """Backtester de recetas GRID sobre los kernels NumPy."""
+
+    def run(self, market_data: MarketData, recipe: TradingRecipe) -> BacktestResult:
+        return run_recipe_backtest(market_data, recipe)
@@ -5,25 +5,64 @@ Repositorio de Recetas
 Implementación concreta del repositorio de recetas de trading.
 """
 
+import json
 import logging
+import os
 from typing import Dict, Any, Optional, List
 
+from app.config import RECIPES_FILE
 from app.domain.interfaces import RecipeRepository
 from app.domain.entities import TradingRecipe, BotType
 
 logger = logging.getLogger(__name__)
 
 
+def write_recipes_file(path: str, recipes: List[TradingRecipe]) -> None:
+    """
+    Escribe recetas GRID en el formato de `MASTER_RECIPES` (clave = par).
+
+    El archivo se puede cargar con `BRAIN_RECIPES_FILE`.
+
+    Args:
+        path: Ruta del archivo JSON
+        recipes: Recetas a escribir
+    """
+    payload = {
+        recipe.pair: {
+            'name': recipe.name,
+            'conditions': recipe.conditions,
+            'grid_config': recipe.grid_config,
+            'description': recipe.description
+        }
+        for recipe in recipes
+    }
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+
 class InMemoryRecipeRepository(RecipeRepository):
     """
     Implementación en memoria del repositorio de recetas.
     En el futuro, esto podría ser reemplazado por una base de datos.
     """
     
-    def __init__(self):
-        """Inicializa el repositorio con las recetas maestras."""
+    def __init__(self, recipes_file: str = RECIPES_FILE, default_grid_recipe: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa el repositorio con las recetas maestras.
+        
+        Args:
+            recipes_file: Archivo de recetas GRID ajustadas que sustituye a las
+                maestras (vacío para usar solo las maestras)
+            default_grid_recipe: Plantilla (formato de `MASTER_RECIPES`) para los
+                pares sin receta GRID, ej: los del universo dinámico
+        """
         self.logger = logging.getLogger(__name__)
+        self._default_grid_recipe = default_grid_recipe
         self._recipes = self._load_master_recipes()
+        if recipes_file:
+            self._load_recipes_file(recipes_file)
     
     def _load_master_recipes(self) -> Dict[str, TradingRecipe]:
         """
@@ -107,6 +146,35 @@ class InMemoryRecipeRepository(RecipeRepository):
         self.logger.info(f"✅ Cargadas {len(recipes)} recetas maestras (GRID: {len(grid_recipes)}, TREND: {len(trend_recipes)})")
         return recipes
     
+    def _load_recipes_file(self, path: str) -> None:
+        """
+        Aplica un archivo de recetas GRID (ej: salida de `python -m app.sweep`).
+
+        Las condiciones del archivo se combinan con las de la receta maestra del
+        par; los pares sin receta maestra se añaden. Si el archivo no se puede
+        leer se mantienen las recetas maestras.
+
+        Args:
+            path: Ruta del archivo JSON
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+
+            for pair, entry in data.items():
+                master = self._recipes.get(f"{pair}_{BotType.GRID.value}")
+                self._recipes[f"{pair}_{BotType.GRID.value}"] = TradingRecipe(
+                    pair=pair,
+                    name=entry.get('name', master.name if master else f"Receta {pair}"),
+                    conditions={**(master.conditions if master else {}), **entry.get('conditions', {})},
+                    grid_config=entry.get('grid_config', master.grid_config if master else {}),
+                    description=entry.get('description', master.description if master else ''),
+                    bot_type=BotType.GRID
+                )
+            self.logger.info(f"✅ Cargadas {len(data)} recetas GRID desde {path}")
+        except Exception as e:
+            self.logger.error(f"❌ Error cargando recetas desde {path}, se usan las maestras: {e}")
+    
     async def get_recipe(self, pair: str, bot_type: BotType) -> Optional[TradingRecipe]:
         """
         Obtiene la receta para un par y tipo de bot específico.
@@ -122,12 +190,34 @@ class InMemoryRecipeRepository(RecipeRepository):
             if recipe:
                 self.logger.debug(f"✅ Receta encontrada para {pair} ({bot_type.value})")
                 return recipe
+            if bot_type == BotType.GRID and self._default_grid_recipe:
+                return self._recipe_from_template(pair)
             self.logger.warning(f"⚠️ No se encontró receta para {pair} ({bot_type.value})")
             return None
         except Exception as e:
             self.logger.error(f"❌ Error obteniendo receta para {pair}: {e}")
             return None
 
+    def _recipe_from_template(self, pair: str) -> TradingRecipe:
+        """
+        Receta GRID de un par sin receta propia a partir de la plantilla.
+        
+        Args:
+            pair: Par de trading
+            
+        Returns:
+            Receta con las condiciones y la configuración de la plantilla
+        """
+        template = self._default_grid_recipe
+        return TradingRecipe(
+            pair=pair,
+            name=f"{template.get('name', 'Receta GRID por defecto')} ({pair})",
+            conditions=dict(template.get('conditions', {})),
+            grid_config=dict(template.get('grid_config', {})),
+            description=template.get('description', ''),
+            bot_type=BotType.GRID
+        )
+
     async def get_all_recipes(self) -> List[TradingRecipe]:
         """
         Obtiene todas las recetas disponibles.
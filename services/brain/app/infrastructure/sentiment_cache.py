@@ -0,0 +1,128 @@
+"""
+Caché Compartida de Sentimiento
+===============================
+
+El sentimiento diario es el mismo para todos los pares, así que se carga una
+vez y se reutiliza en todos los análisis del ciclo. Las entradas se indexan
+por rango de días y caducan con el intervalo del pipeline de noticias, que es
+cuando pueden aparecer puntuaciones nuevas.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+# Ventana (en velas) del promedio móvil de sentimiento
+SENTIMENT_WINDOW = 7
+
+
+def align_daily_sentiment(timestamps: np.ndarray, daily: Dict[int, float]) -> np.ndarray:
+    """
+    Asocia el sentimiento diario a cada vela y lo suaviza con un promedio móvil.
+
+    Es la columna `sentiment_promedio` que usan tanto el análisis en vivo como
+    el backtest, así que ambos evalúan exactamente el mismo valor.
+
+    Args:
+        timestamps: Timestamps de apertura de las velas (ms)
+        daily: Sentimiento medio por día (días desde la época)
+
+    Returns:
+        Sentimiento por vela (NaN donde no hay datos en la ventana)
+    """
+    candle_days = timestamps // DAY_MS
+    sentiment_daily = np.array([daily.get(int(day), np.nan) for day in candle_days], dtype=np.float64)
+    return pd.Series(sentiment_daily).rolling(window=SENTIMENT_WINDOW, min_periods=1).mean().to_numpy()
+
+
+@dataclass
+class _SentimentEntry:
+    """Sentimiento diario cargado para un rango de días."""
+    start_day: int
+    end_day: int
+    daily: Dict[int, float]
+    loaded_at: float
+
+    def covers(self, start_day: int, end_day: int) -> bool:
+        return self.start_day <= start_day and end_day <= self.end_day
+
+
+class SentimentCache:
+    """
+    Caché del sentimiento diario indexada por rango de días (días desde la época).
+
+    - Un rango ya cargado sirve cualquier sub-rango sin volver a la base de datos.
+    - Las entradas caducan a los `ttl` segundos.
+    - Las cargas son exclusivas: si varios pares piden a la vez el mismo rango,
+      solo uno consulta la base de datos y el resto reutiliza el resultado.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa la caché.
+
+        Args:
+            ttl: Segundos de validez de cada entrada
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: List[_SentimentEntry] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get_daily(
+        self,
+        start_day: int,
+        end_day: int,
+        loader: Callable[[int, int], Dict[int, float]]
+    ) -> Dict[int, float]:
+        """
+        Obtiene el sentimiento diario medio entre dos días (ambos incluidos).
+
+        Args:
+            start_day: Primer día (días desde la época)
+            end_day: Último día (días desde la época)
+            loader: Función que consulta la base de datos para un rango de días
+
+        Returns:
+            Sentimiento medio por día; los días sin noticias no aparecen
+        """
+        with self._lock:
+            now = self._clock()
+            self._entries = [entry for entry in self._entries if now - entry.loaded_at < self._ttl]
+
+            entry = self._find(start_day, end_day)
+            if entry is None:
+                entry = _SentimentEntry(start_day, end_day, loader(start_day, end_day), now)
+                # Un rango más amplio hace innecesarios los que contiene
+                self._entries = [
+                    other for other in self._entries if not entry.covers(other.start_day, other.end_day)
+                ]
+                self._entries.append(entry)
+                self.logger.info(f"📰 Sentimiento cargado para {end_day - start_day + 1} días ({len(entry.daily)} con datos)")
+            else:
+                self.logger.debug(f"♻️ Sentimiento servido desde caché ({start_day} → {end_day})")
+
+        return {day: value for day, value in entry.daily.items() if start_day <= day <= end_day}
+
+    def _find(self, start_day: int, end_day: int) -> Optional[_SentimentEntry]:
+        """Busca una entrada vigente que cubra el rango."""
+        for entry in self._entries:
+            if entry.covers(start_day, end_day):
+                return entry
+        return None
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,576 @@
+"""
+Motor de Indicadores Incremental
+================================
+
+Calcula ADX_14, ancho de Bollinger (20, 2), SMA_30/SMA_150, EMA_21/EMA_50,
+RSI_14 y MACD (12, 26, 9) vela a vela, en O(1) por vela cerrada, con la misma
+semántica que pandas-ta 0.3.14b:
+
+- SMA: media móvil simple con `min_periods = length`.
+- EMA: semilla con la SMA de las primeras `length` velas y luego
+  `ewm(span=length, adjust=False)`.
+- RMA (ADX, ATR, RSI): `ewm(alpha=1/length, min_periods=length)` ajustada.
+- Bollinger: desviación estándar poblacional (ddof=0).
+
+El estado es serializable a JSON para no repetir el calentamiento tras un
+reinicio. El calentamiento de una serie completa puede delegarse en un pool
+de procesos (`indicator_pool`) para no retener el GIL del bucle de eventos.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.infrastructure.indicator_pool import IndicatorProcessPool
+
+logger = logging.getLogger(__name__)
+
+INDICATOR_NAMES = (
+    'ADX_14', 'bb_width', 'SMA_30', 'SMA_150', 'RSI_14',
+    'MACD_12_26_9', 'MACDs_12_26_9', 'MACDh_12_26_9', 'EMA_21', 'EMA_50'
+)
+
+
+class _RollingWindow:
+    """Ventana deslizante con media y desviación estándar poblacional en O(1)."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.values: Deque[float] = deque(maxlen=length)
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> None:
+        if not self.values:
+            # Desplazamiento para evitar cancelación numérica en la varianza
+            self._shift = value
+        if len(self.values) == self.length:
+            old = self.values[0] - self._shift
+            self._sum -= old
+            self._sumsq -= old * old
+        self.values.append(value)
+        centered = value - self._shift
+        self._sum += centered
+        self._sumsq += centered * centered
+        self._updates += 1
+        if self._updates % self.length == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recalcula las sumas desde la ventana para acotar el error acumulado."""
+        self._shift = self.values[0]
+        centered = [value - self._shift for value in self.values]
+        self._sum = math.fsum(centered)
+        self._sumsq = math.fsum(value * value for value in centered)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.length
+
+    def mean(self) -> Optional[float]:
+        if not self.full:
+            return None
+        return self._shift + self._sum / self.length
+
+    def pstdev(self) -> Optional[float]:
+        if not self.full:
+            return None
+        mean = self._sum / self.length
+        return math.sqrt(max(self._sumsq / self.length - mean * mean, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'length': self.length, 'values': list(self.values), 'updates': self._updates}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_RollingWindow':
+        window = cls(data['length'])
+        for value in data['values']:
+            window.update(value)
+        window._updates = data['updates']
+        return window
+
+
+class _Ema:
+    """EMA de pandas-ta: semilla SMA y suavizado con adjust=False."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+        elif self.count == self.length:
+            self.value = (self.seed_sum + x) / self.length
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'length': self.length, 'count': self.count, 'seed_sum': self.seed_sum, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_Ema':
+        ema = cls(data['length'])
+        ema.count, ema.seed_sum, ema.value = data['count'], data['seed_sum'], data['value']
+        return ema
+
+
+class _Rma:
+    """
+    RMA de pandas-ta: `ewm(alpha=1/length, min_periods=length)` con adjust=True.
+
+    Los valores ausentes (None) iniciales se ignoran; los intermedios solo
+    envejecen los pesos, igual que pandas con `ignore_na=False`.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.count = 0
+        self.num = 0.0
+        self.den = 0.0
+
+    def update(self, x: Optional[float]) -> Optional[float]:
+        self.num *= self.decay
+        self.den *= self.decay
+        if x is not None:
+            self.num += x
+            self.den += 1.0
+            self.count += 1
+        if self.count < self.length:
+            return None
+        return self.num / self.den
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'length': self.length, 'count': self.count, 'num': self.num, 'den': self.den}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_Rma':
+        rma = cls(data['length'])
+        rma.count, rma.num, rma.den = data['count'], data['num'], data['den']
+        return rma
+
+
+class StreamingIndicatorEngine:
+    """
+    Estado incremental de los indicadores de un (par, timeframe).
+
+    Cada llamada a `update` consume una vela cerrada y devuelve el valor de
+    todos los indicadores en esa vela (NaN mientras están calentando).
+    """
+
+    def __init__(self):
+        """Inicializa el motor sin historial."""
+        self.last_timestamp: Optional[int] = None
+        self._prev_high: Optional[float] = None
+        self._prev_low: Optional[float] = None
+        self._prev_close: Optional[float] = None
+        # ADX(14)
+        self._atr = _Rma(14)
+        self._dm_pos = _Rma(14)
+        self._dm_neg = _Rma(14)
+        self._adx = _Rma(14)
+        # Bollinger(20, 2) y SMAs
+        self._bb = _RollingWindow(20)
+        self._sma30 = _RollingWindow(30)
+        self._sma150 = _RollingWindow(150)
+        # RSI(14)
+        self._rsi_gain = _Rma(14)
+        self._rsi_loss = _Rma(14)
+        # MACD(12, 26, 9) y EMAs
+        self._macd_fast = _Ema(12)
+        self._macd_slow = _Ema(26)
+        self._macd_signal = _Ema(9)
+        self._ema21 = _Ema(21)
+        self._ema50 = _Ema(50)
+
+    def update(self, timestamp: int, high: float, low: float, close: float) -> Dict[str, float]:
+        """
+        Incorpora una vela cerrada.
+
+        Args:
+            timestamp: Apertura de la vela en ms
+            high: Máximo de la vela
+            low: Mínimo de la vela
+            close: Cierre de la vela
+
+        Returns:
+            Valores de INDICATOR_NAMES en esta vela (NaN si aún no disponibles)
+        """
+        values: Dict[str, Optional[float]] = {}
+
+        # ---- ADX ----
+        if self._prev_close is None:
+            true_range = dm_pos = dm_neg = None
+        else:
+            true_range = max(high - low, abs(high - self._prev_close), abs(self._prev_close - low))
+            up = high - self._prev_high
+            down = self._prev_low - low
+            dm_pos = up if up > down and up > 0 else 0.0
+            dm_neg = down if down > up and down > 0 else 0.0
+        atr = self._atr.update(true_range)
+        dm_pos_avg = self._dm_pos.update(dm_pos)
+        dm_neg_avg = self._dm_neg.update(dm_neg)
+        dx = None
+        if atr and dm_pos_avg is not None and dm_neg_avg is not None:
+            di_pos = 100.0 * dm_pos_avg / atr
+            di_neg = 100.0 * dm_neg_avg / atr
+            if di_pos + di_neg:
+                dx = 100.0 * abs(di_pos - di_neg) / (di_pos + di_neg)
+        if dx is not None or self._adx.count:
+            values['ADX_14'] = self._adx.update(dx)
+
+        # ---- Bollinger y SMAs ----
+        for window in (self._bb, self._sma30, self._sma150):
+            window.update(close)
+        middle = self._bb.mean()
+        if middle:
+            values['bb_width'] = 4.0 * self._bb.pstdev() / middle
+        values['SMA_30'] = self._sma30.mean()
+        values['SMA_150'] = self._sma150.mean()
+
+        # ---- RSI ----
+        if self._prev_close is not None:
+            change = close - self._prev_close
+            gain = self._rsi_gain.update(max(change, 0.0))
+            loss = self._rsi_loss.update(min(change, 0.0))
+            if gain is not None and loss is not None and gain + abs(loss):
+                values['RSI_14'] = 100.0 * gain / (gain + abs(loss))
+
+        # ---- MACD y EMAs ----
+        fast = self._macd_fast.update(close)
+        slow = self._macd_slow.update(close)
+        if fast is not None and slow is not None:
+            macd = fast - slow
+            signal = self._macd_signal.update(macd)
+            values['MACD_12_26_9'] = macd
+            values['MACDs_12_26_9'] = signal
+            values['MACDh_12_26_9'] = macd - signal if signal is not None else None
+        values['EMA_21'] = self._ema21.update(close)
+        values['EMA_50'] = self._ema50.update(close)
+
+        self._prev_high, self._prev_low, self._prev_close = high, low, close
+        self.last_timestamp = int(timestamp)
+
+        return {
+            name: float(values[name]) if values.get(name) is not None else math.nan
+            for name in INDICATOR_NAMES
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializa el estado del motor.
+
+        Returns:
+            Diccionario apto para JSON
+        """
+        return {
+            'last_timestamp': self.last_timestamp,
+            'prev': [self._prev_high, self._prev_low, self._prev_close],
+            'rma': {name: getattr(self, name).to_dict() for name in self._RMA_FIELDS},
+            'windows': {name: getattr(self, name).to_dict() for name in self._WINDOW_FIELDS},
+            'ema': {name: getattr(self, name).to_dict() for name in self._EMA_FIELDS},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingIndicatorEngine':
+        """
+        Reconstruye un motor a partir de su estado serializado.
+
+        Args:
+            data: Estado producido por `to_dict`
+
+        Returns:
+            Motor listo para seguir recibiendo velas
+        """
+        engine = cls()
+        engine.last_timestamp = data['last_timestamp']
+        engine._prev_high, engine._prev_low, engine._prev_close = data['prev']
+        for name, state in data['rma'].items():
+            setattr(engine, name, _Rma.from_dict(state))
+        for name, state in data['windows'].items():
+            setattr(engine, name, _RollingWindow.from_dict(state))
+        for name, state in data['ema'].items():
+            setattr(engine, name, _Ema.from_dict(state))
+        return engine
+
+    _RMA_FIELDS = ('_atr', '_dm_pos', '_dm_neg', '_adx', '_rsi_gain', '_rsi_loss')
+    _WINDOW_FIELDS = ('_bb', '_sma30', '_sma150')
+    _EMA_FIELDS = ('_macd_fast', '_macd_slow', '_macd_signal', '_ema21', '_ema50')
+
+
+def warm_indicator_series(
+    timestamps: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    max_rows: int
+) -> Tuple[StreamingIndicatorEngine, np.ndarray]:
+    """
+    Calienta un motor nuevo con una serie completa de velas.
+
+    Se ejecuta tanto en línea como en los procesos del pool de indicadores.
+
+    Args:
+        timestamps: Aperturas de las velas cerradas en ms
+        high: Máximos de las velas
+        low: Mínimos de las velas
+        close: Cierres de las velas
+        max_rows: Filas de indicadores a devolver (las últimas)
+
+    Returns:
+        Motor al día y matriz (INDICATOR_NAMES, velas) de las últimas `max_rows` velas
+    """
+    engine = StreamingIndicatorEngine()
+    start = max(0, len(timestamps) - max_rows)
+    rows = np.full((len(INDICATOR_NAMES), len(timestamps) - start), np.nan)
+    for i in range(len(timestamps)):
+        row = engine.update(int(timestamps[i]), float(high[i]), float(low[i]), float(close[i]))
+        if i >= start:
+            rows[:, i - start] = [row[name] for name in INDICATOR_NAMES]
+    return engine, rows
+
+
+@dataclass
+class _IndicatorSeries:
+    """Motor y columnas de indicadores ya calculadas de un (par, timeframe)."""
+    engine: StreamingIndicatorEngine = field(default_factory=StreamingIndicatorEngine)
+    timestamps: List[int] = field(default_factory=list)
+    rows: Dict[str, List[float]] = field(default_factory=lambda: {name: [] for name in INDICATOR_NAMES})
+
+
+class StreamingIndicatorCache:
+    """
+    Indicadores técnicos incrementales por (par, timeframe).
+
+    - La primera consulta calienta el motor recorriendo las velas recibidas.
+    - Las siguientes solo procesan las velas posteriores a la última vista.
+    - Si la serie de velas ya no continúa el estado (hueco reparado, parada
+      más larga que el historial), el motor se reconstruye desde cero.
+    - El estado de los motores se guarda en `state_file` para retomar tras
+      un reinicio sin recalentar; las filas anteriores a la reanudación
+      quedan como NaN. Se escribe como mucho cada `save_interval` segundos
+      (y en `flush()`), no tras cada par.
+    - Con un `pool`, los calentamientos de `pool_min_candles` velas o más
+      se ejecutan en otro proceso.
+
+    Es segura entre hilos: cada (par, timeframe) se actualiza bajo su propio lock.
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[str] = None,
+        max_rows: int = 2000,
+        pool: Optional['IndicatorProcessPool'] = None,
+        pool_min_candles: int = 100,
+        save_interval: float = 0.0
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            state_file: Fichero JSON donde persistir el estado (None para no persistir)
+            max_rows: Máximo de filas de indicadores retenidas por (par, timeframe)
+            pool: Pool de procesos para los calentamientos (None = en el hilo que llama)
+            pool_min_candles: Velas mínimas para enviar un calentamiento al pool
+            save_interval: Segundos mínimos entre escrituras de `state_file`
+        """
+        self._state_file = state_file or None
+        self._max_rows = max_rows
+        self._pool = pool
+        self._pool_min_candles = pool_min_candles
+        self._save_interval = save_interval
+        self._last_save = -math.inf
+        self._dirty = False
+        self._series: Dict[Tuple[str, str], _IndicatorSeries] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self._load_state()
+
+    def get_indicators(
+        self,
+        pair: str,
+        timeframe: str,
+        timestamps: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Obtiene las columnas de indicadores alineadas con las velas dadas.
+
+        Args:
+            pair: Par de trading (ej: 'ETH/USDT')
+            timeframe: Marco temporal de las velas
+            timestamps: Aperturas de las velas cerradas en ms (orden cronológico)
+            high: Máximos de las velas
+            low: Mínimos de las velas
+            close: Cierres de las velas
+
+        Returns:
+            Columnas INDICATOR_NAMES con la misma longitud que `timestamps`
+        """
+        key = (pair, timeframe)
+        with self._lock_for(key):
+            series = self._series.setdefault(key, _IndicatorSeries())
+            last_seen = series.engine.last_timestamp
+            start = self._resume_index(series, timestamps)
+            if start is None:
+                self.logger.info(f"🔥 Calentando indicadores de {pair} ({timeframe}) con {len(timestamps)} velas")
+                series = self._series[key] = self._warm_series(timestamps, high, low, close)
+                start = len(timestamps)
+
+            for i in range(start, len(timestamps)):
+                row = series.engine.update(int(timestamps[i]), float(high[i]), float(low[i]), float(close[i]))
+                series.timestamps.append(int(timestamps[i]))
+                for name in INDICATOR_NAMES:
+                    series.rows[name].append(row[name])
+
+            if len(series.timestamps) > self._max_rows:
+                del series.timestamps[:-self._max_rows]
+                for values in series.rows.values():
+                    del values[:-self._max_rows]
+
+            columns = self._aligned_columns(series, len(timestamps))
+            changed = series.engine.last_timestamp != last_seen
+
+        if changed:
+            self.logger.debug(f"📈 {pair} ({timeframe}): indicadores incrementales al día")
+            self._dirty = True
+            self._save_state()
+        return columns
+
+    def flush(self) -> None:
+        """Escribe el estado pendiente en `state_file` (ej: al detener el servicio)."""
+        if self._dirty:
+            self._save_state(force=True)
+
+    def _warm_series(
+        self,
+        timestamps: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray
+    ) -> _IndicatorSeries:
+        """
+        Construye el estado de un (par, timeframe) desde cero.
+
+        Returns:
+            Motor y filas de indicadores al día
+        """
+        warmed = None
+        if self._pool is not None and len(timestamps) >= self._pool_min_candles:
+            try:
+                warmed = self._pool.warm_series(timestamps, high, low, close, self._max_rows)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Pool de indicadores no disponible, calentando en línea: {e}")
+        engine, rows = warmed or warm_indicator_series(timestamps, high, low, close, self._max_rows)
+        return _IndicatorSeries(
+            engine=engine,
+            timestamps=[int(ts) for ts in timestamps[len(timestamps) - rows.shape[1]:]],
+            rows={name: rows[i].tolist() for i, name in enumerate(INDICATOR_NAMES)}
+        )
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        """Obtiene (o crea) el lock de un (par, timeframe)."""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _resume_index(series: _IndicatorSeries, timestamps: np.ndarray) -> Optional[int]:
+        """
+        Calcula desde qué vela hay que continuar el motor.
+
+        Args:
+            series: Estado actual del (par, timeframe)
+            timestamps: Velas recibidas
+
+        Returns:
+            Índice de la primera vela no procesada, o None si hay que recalentar
+        """
+        last_ts = series.engine.last_timestamp
+        if last_ts is None or not len(timestamps):
+            return None
+        start = int(np.searchsorted(timestamps, last_ts, side='right'))
+        # La última vela procesada debe seguir presente en la serie recibida
+        if start == 0 or int(timestamps[start - 1]) != last_ts:
+            return None
+        # Y las filas calculadas deben corresponder a las mismas velas
+        overlap = min(len(series.timestamps), start)
+        if overlap and not np.array_equal(series.timestamps[-overlap:], timestamps[start - overlap:start]):
+            return None
+        return start
+
+    @staticmethod
+    def _aligned_columns(series: _IndicatorSeries, length: int) -> Dict[str, np.ndarray]:
+        """Copia las últimas `length` filas de cada indicador (NaN donde no hay)."""
+        available = min(len(series.timestamps), length)
+        columns = {}
+        for name in INDICATOR_NAMES:
+            column = np.full(length, np.nan)
+            if available:
+                column[length - available:] = series.rows[name][-available:]
+            columns[name] = column
+        return columns
+
+    def _load_state(self) -> None:
+        """Restaura los motores desde `state_file` si existe."""
+        if not self._state_file or not os.path.exists(self._state_file):
+            return
+        try:
+            with open(self._state_file, 'r') as f:
+                data = json.load(f)
+            for key, state in data.items():
+                pair, timeframe = key.rsplit('|', 1)
+                self._series[(pair, timeframe)] = _IndicatorSeries(
+                    engine=StreamingIndicatorEngine.from_dict(state)
+                )
+            self.logger.info(f"📂 Estado de indicadores restaurado para {len(data)} series")
+        except Exception as e:
+            self.logger.error(f"Error cargando estado de indicadores: {e}")
+            self._series.clear()
+
+    def _save_state(self, force: bool = False) -> None:
+        """
+        Guarda el estado de todos los motores en `state_file`.
+
+        Args:
+            force: Escribir aunque no haya pasado `save_interval` desde la última vez
+        """
+        if not self._state_file:
+            return
+        try:
+            with self._save_lock:
+                now = time.monotonic()
+                if not force and now - self._last_save < self._save_interval:
+                    return
+                self._last_save = now
+                self._dirty = False
+                data = {}
+                for key in list(self._series):
+                    with self._lock_for(key):
+                        data[f"{key[0]}|{key[1]}"] = self._series[key].engine.to_dict()
+                tmp_file = f"{self._state_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_file, self._state_file)
+        except Exception as e:
+            self.logger.error(f"Error guardando estado de indicadores: {e}")
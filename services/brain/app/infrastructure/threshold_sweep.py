@@ -0,0 +1,249 @@
+"""
+Barrido Paralelo de Umbrales GRID
+=================================
+
+Evalúa miles de combinaciones de `adx_threshold`,
+`bollinger_bandwidth_threshold` y `sentiment_threshold` sobre el historial de
+un par con la regla vectorizada de `recipe_backtest`.
+
+- Los indicadores se calculan una sola vez por par y se publican en un bloque
+  de memoria compartida (ADX, bb_width, sentimiento y P&L proxy); los
+  procesos de trabajo lo leen sin copiarlo.
+- Las combinaciones se reparten en bloques: cada proceso evalúa su bloque
+  con una única operación (combinaciones × tiempo), así que el barrido escala
+  con el número de núcleos.
+- La puntuación descuenta un coste por cada cambio de decisión (rearmar la
+  grilla) y descarta las combinaciones que casi nunca operan.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import SWEEP_FLIP_COST, SWEEP_MIN_OPERATE_FRACTION, SWEEP_WORKERS
+from app.domain.entities import MarketData, ThresholdSweepResult
+from app.domain.interfaces import ThresholdSweeper
+from app.infrastructure.candle_cache import timeframe_to_ms
+from app.infrastructure.indicator_kernels import compute_indicators
+from app.infrastructure.recipe_backtest import evaluate_decisions, grid_decisions, grid_pnl_proxy
+
+logger = logging.getLogger(__name__)
+
+# Rejilla por defecto: 26 × 23 × 15 = 8970 combinaciones
+ADX_VALUES = np.arange(15.0, 40.5, 1.0)
+VOLATILITY_VALUES = np.round(np.arange(0.005, 0.0601, 0.0025), 4)
+SENTIMENT_VALUES = np.round(np.arange(-0.50, 0.201, 0.05), 2)
+
+# Combinaciones por tarea: acota la memoria de cada bloque (combinaciones × velas)
+CHUNK_SIZE = 256
+
+THRESHOLD_KEYS = ('adx_threshold', 'bollinger_bandwidth_threshold', 'sentiment_threshold')
+
+
+def threshold_grid(
+    adx_values: np.ndarray = ADX_VALUES,
+    volatility_values: np.ndarray = VOLATILITY_VALUES,
+    sentiment_values: np.ndarray = SENTIMENT_VALUES
+) -> np.ndarray:
+    """
+    Producto cartesiano de los valores de cada umbral.
+
+    Returns:
+        Array (combinaciones, 3) en el orden de THRESHOLD_KEYS
+    """
+    mesh = np.meshgrid(adx_values, volatility_values, sentiment_values, indexing='ij')
+    return np.stack([axis.ravel() for axis in mesh], axis=1).astype(np.float64)
+
+
+def sweep_series(market_data: MarketData) -> np.ndarray:
+    """
+    Series que necesita el barrido, calculadas una vez por par.
+
+    Returns:
+        Array (4, velas): ADX_14, bb_width, sentiment_promedio y P&L proxy
+    """
+    columns = market_data.columns
+    indicators = compute_indicators(columns['high'], columns['low'], columns['close'])
+    sentiment = market_data.column('sentiment_promedio')
+    if sentiment is None:
+        sentiment = np.full(len(market_data), np.nan)
+    pnl = grid_pnl_proxy(columns['open'], columns['high'], columns['low'], columns['close'])
+    return np.ascontiguousarray(np.stack([indicators['ADX_14'], indicators['bb_width'], sentiment, pnl]))
+
+
+def evaluate_combinations(series: np.ndarray, combinations: np.ndarray, candle_ms: int) -> Dict[str, np.ndarray]:
+    """
+    Métricas de backtest de un bloque de combinaciones.
+
+    Args:
+        series: Salida de `sweep_series`
+        combinations: Array (k, 3) de umbrales
+        candle_ms: Duración de una vela en ms
+
+    Returns:
+        Métricas de `evaluate_decisions`, un valor por combinación
+    """
+    adx, bb_width, sentiment, pnl = series
+    decisions = grid_decisions(
+        adx, bb_width, sentiment, combinations[:, 0:1], combinations[:, 1:2], combinations[:, 2:3]
+    )
+    return evaluate_decisions(decisions, pnl, candle_ms)
+
+
+def rank_combinations(
+    combinations: np.ndarray,
+    metrics: Dict[str, np.ndarray],
+    flip_cost: float,
+    min_operate_fraction: float,
+    top: int
+) -> List[Dict[str, float]]:
+    """
+    Ordena las combinaciones por puntuación (a igualdad, menos cambios primero).
+
+    Args:
+        combinations: Array (combinaciones, 3) de umbrales
+        metrics: Métricas por combinación
+        flip_cost: Coste descontado por cada cambio de decisión
+        min_operate_fraction: Fracción mínima de tiempo operando
+        top: Número de filas a devolver
+
+    Returns:
+        Filas con umbrales, métricas y puntuación, de mejor a peor
+    """
+    score = metrics['pnl_proxy'] - flip_cost * metrics['flips']
+    order = np.lexsort((metrics['flips'], -score))
+    order = order[metrics['operate_fraction'][order] >= min_operate_fraction][:top]
+
+    ranking = []
+    for index in order:
+        row = {key: float(combinations[index, i]) for i, key in enumerate(THRESHOLD_KEYS)}
+        row.update({
+            'score': float(score[index]),
+            'pnl_proxy': float(metrics['pnl_proxy'][index]),
+            'operate_fraction': float(metrics['operate_fraction'][index]),
+            'flips': int(metrics['flips'][index]),
+            'flips_per_30d': float(metrics['flips_per_30d'][index]),
+            'avg_operate_run': float(metrics['avg_operate_run'][index])
+        })
+        ranking.append(row)
+    return ranking
+
+
+def _merge(results: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatena las métricas de los bloques en el orden de las combinaciones."""
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+# Bloque compartido al que está conectado este proceso de trabajo
+_attached: Optional[Tuple[str, shared_memory.SharedMemory]] = None
+
+
+def _evaluate_chunk(
+    shm_name: str,
+    shape: Tuple[int, int],
+    combinations: np.ndarray,
+    candle_ms: int
+) -> Dict[str, np.ndarray]:
+    """Tarea de un proceso de trabajo: lee las series del bloque compartido."""
+    global _attached
+    if _attached is None or _attached[0] != shm_name:
+        if _attached is not None:
+            _attached[1].close()
+        _attached = (shm_name, shared_memory.SharedMemory(name=shm_name))
+    series = np.ndarray(shape, dtype=np.float64, buffer=_attached[1].buf)
+    return evaluate_combinations(series, combinations, candle_ms)
+
+
+class ParallelThresholdSweeper(ThresholdSweeper):
+    """
+    Barrido de umbrales sobre un pool de procesos.
+
+    El pool se crea en el primer barrido y se reutiliza para todos los pares
+    hasta `close()`. Con un único proceso el barrido se hace en línea.
+    """
+
+    def __init__(
+        self,
+        workers: int = SWEEP_WORKERS,
+        flip_cost: float = SWEEP_FLIP_COST,
+        min_operate_fraction: float = SWEEP_MIN_OPERATE_FRACTION,
+        combinations: Optional[np.ndarray] = None
+    ):
+        """
+        Inicializa el barrido.
+
+        Args:
+            workers: Procesos de trabajo (0 = uno por núcleo)
+            flip_cost: Coste descontado por cada cambio de decisión
+            min_operate_fraction: Fracción mínima de tiempo operando
+            combinations: Array (combinaciones, 3) de umbrales (por defecto, `threshold_grid()`)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.flip_cost = flip_cost
+        self.min_operate_fraction = min_operate_fraction
+        self.combinations = threshold_grid() if combinations is None else combinations
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.logger = logging.getLogger(__name__)
+
+    def sweep(self, market_data: MarketData, top: int = 20) -> ThresholdSweepResult:
+        start = time.perf_counter()
+        series = sweep_series(market_data)
+        candle_ms = timeframe_to_ms(market_data.timeframe)
+
+        if self.workers == 1:
+            metrics = _merge([evaluate_combinations(series, chunk, candle_ms) for chunk in self._chunks()])
+        else:
+            metrics = self._evaluate_parallel(series, candle_ms)
+
+        ranking = rank_combinations(self.combinations, metrics, self.flip_cost, self.min_operate_fraction, top)
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            f"🔬 Barrido {market_data.pair}: {len(self.combinations)} combinaciones en {elapsed:.2f}s "
+            f"({self.workers} procesos)"
+        )
+        return ThresholdSweepResult(
+            pair=market_data.pair,
+            timeframe=market_data.timeframe,
+            candles=len(market_data),
+            combinations=len(self.combinations),
+            elapsed_seconds=elapsed,
+            ranking=ranking
+        )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _evaluate_parallel(self, series: np.ndarray, candle_ms: int) -> Dict[str, np.ndarray]:
+        """Reparte las combinaciones entre los procesos sobre memoria compartida."""
+        if self._executor is None:
+            # spawn: el barrido puede lanzarse desde un hilo (asyncio.to_thread)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+
+        block = shared_memory.SharedMemory(create=True, size=series.nbytes)
+        try:
+            np.ndarray(series.shape, dtype=np.float64, buffer=block.buf)[:] = series
+            futures = [
+                self._executor.submit(_evaluate_chunk, block.name, series.shape, chunk, candle_ms)
+                for chunk in self._chunks()
+            ]
+            results = [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+        return _merge(results)
+
+    def _chunks(self) -> List[np.ndarray]:
+        """Bloques de combinaciones (al menos uno por proceso)."""
+        return np.array_split(self.combinations, max(self.workers, math.ceil(len(self.combinations) / CHUNK_SIZE)))
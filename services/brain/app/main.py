@@ -10,20 +10,25 @@ import logging
 import sys
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 # Configuración
-from app.config import get_config, ANALYSIS_INTERVAL, SUPPORTED_PAIRS
+from app.config import (
+    get_config, ANALYSIS_INTERVAL, ANALYSIS_SETTLE_SECONDS, SUPPORTED_PAIRS, UNIVERSE_MODE, DEFAULT_GRID_RECIPE
+)
 
 # Casos de uso
 from app.application.analyze_pair_use_case import AnalyzePairUseCase
 from app.application.analyze_trend_use_case import AnalyzeTrendUseCase
 from app.application.batch_analysis_use_case import BatchAnalysisUseCase
 from app.application.service_lifecycle_use_case import ServiceLifecycleUseCase
+from app.application.on_demand_analysis_use_case import OnDemandAnalysisUseCase
+from app.application.pair_universe_use_case import PairUniverseUseCase
+from app.domain.entities import BotType
 
 # Repositorios
 from app.infrastructure.market_data_repository import BinanceMarketDataRepository
@@ -49,7 +54,10 @@ logger = logging.getLogger(__name__)
 
 # Repositorios
 market_data_repo = BinanceMarketDataRepository()
-recipe_repo = InMemoryRecipeRepository()
+# En el universo dinámico, los pares sin receta maestra usan la receta GRID por defecto
+recipe_repo = InMemoryRecipeRepository(
+    default_grid_recipe=DEFAULT_GRID_RECIPE if UNIVERSE_MODE == 'dynamic' else None
+)
 decision_repo = DatabaseDecisionRepository()
 notification_service = HTTPNotificationService()
 
@@ -67,11 +75,14 @@ analyze_trend_use_case = AnalyzeTrendUseCase(
     notification_service=notification_service
 )
 
+pair_universe_use_case = PairUniverseUseCase(market_data_repo=market_data_repo)
+
 batch_analysis_use_case = BatchAnalysisUseCase(
     market_data_repo=market_data_repo,
     decision_repo=decision_repo,
     recipe_repo=recipe_repo,
-    notification_service=notification_service
+    notification_service=notification_service,
+    pair_universe=pair_universe_use_case
 )
 
 service_lifecycle_use_case = ServiceLifecycleUseCase(
@@ -79,6 +90,12 @@ service_lifecycle_use_case = ServiceLifecycleUseCase(
     batch_analysis_use_case=batch_analysis_use_case
 )
 
+on_demand_analysis_use_case = OnDemandAnalysisUseCase(
+    batch_analysis_use_case=batch_analysis_use_case,
+    market_data_repo=market_data_repo,
+    recipe_repo=recipe_repo
+)
+
 # ============================================================================
 # LIFECYCLE MANAGER
 # ============================================================================
@@ -91,13 +108,20 @@ async def lifespan(app: FastAPI):
         logger.info("🎯 ========== INICIANDO BRAIN SERVICE ==========")
         logger.info("🧠 Brain Service - Motor de Decisiones de Trading (Clean Architecture)")
         logger.info("📋 Configuración:")
-        logger.info(f"   📊 Pares soportados: {len(SUPPORTED_PAIRS)}")
-        logger.info(f"   🔢 Pares: {', '.join(SUPPORTED_PAIRS)}")
-        logger.info(f"   ⏰ Intervalo de análisis: {ANALYSIS_INTERVAL}s")
+        if UNIVERSE_MODE == 'dynamic':
+            logger.info(f"   🌐 Universo dinámico: top {pair_universe_use_case.top_n} pares {pair_universe_use_case.quote} por volumen")
+            logger.info(f"   🔢 Pares fijos: {', '.join(SUPPORTED_PAIRS)}")
+        else:
+            logger.info(f"   📊 Pares soportados: {len(SUPPORTED_PAIRS)}")
+            logger.info(f"   🔢 Pares: {', '.join(SUPPORTED_PAIRS)}")
+        logger.info(f"   ⏰ Análisis al cierre de vela (+{ANALYSIS_SETTLE_SECONDS:.0f}s) y comprobación de sentimiento cada {ANALYSIS_INTERVAL}s")
         logger.info(f"   📁 Log level: {config['logging']['level']}")
         logger.info("🧠 Recetas maestras cargadas para cada par")
         logger.info("🚀 Iniciando servicio brain...")
         
+        # Arrancar los procesos de indicadores antes del primer ciclo
+        await asyncio.to_thread(market_data_repo.warm_up)
+        
         # Iniciar el servicio brain
         startup_result = await service_lifecycle_use_case.start_service()
         if startup_result['status'] == 'started':
@@ -120,8 +144,10 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning(f"⚠️ Brain service: {stop_result['message']}")
         
-        # Cerrar servicios
+        # Cerrar servicios (el executor de pares antes de guardar indicadores y cerrar el pool)
+        batch_analysis_use_case.close()
         await notification_service.close()
+        market_data_repo.close()
         
     except Exception as e:
         logger.error(f"❌ Error al detener Brain Service: {e}")
@@ -147,12 +173,12 @@ app = FastAPI(
     
     * **Base de Datos**: Las decisiones se publican en la tabla `estrategia_status`
     * **Independiente**: Los bots consultan la BD para obtener decisiones
-    * **Sin APIs**: No expone endpoints para análisis individual
+    * **Consulta bajo demanda**: `/analysis/{pair}` para Telegram y dashboards (no guarda decisiones)
     * **Preparado para Redis**: Arquitectura lista para comunicación en tiempo real
     
     ## Análisis Automático
     
-    * **Frecuencia**: Cada 1 hora
+    * **Frecuencia**: Al cierre de cada vela y con sentimiento nuevo
     * **Modo**: Análisis batch de todos los pares simultáneamente
     * **Persistencia**: Decisiones guardadas en base de datos
     * **Notificación**: Preparado para Redis (no implementado aún)
@@ -161,6 +187,8 @@ app = FastAPI(
     
     * **GET /**: Información del servicio
     * **GET /health/**: Health check del servicio (incluye estado del brain)
+    * **GET /analysis/{pair}**: Decisión e indicadores actuales de un par (cacheados por vela)
+    * **GET /analysis/?pairs=...**: Lo mismo para varios pares
     """,
     version="1.0.0",
     contact={
@@ -202,17 +230,20 @@ async def root():
         "arquitectura": "Clean Architecture (Stateless)",
         "tipo": "Servicio de análisis continuo sin estado propio",
         "descripcion": "Servicio de análisis continuo independiente que toma decisiones de trading para estrategias GRID y TREND",
-        "pares_soportados": SUPPORTED_PAIRS,
-        "total_pares": len(SUPPORTED_PAIRS),
+        "universo": UNIVERSE_MODE,
+        "pares_soportados": pair_universe_use_case.pairs,
+        "total_pares": len(pair_universe_use_case.pairs),
         "estrategias": ["GRID", "TREND"],
-        "intervalo_analisis": f"{ANALYSIS_INTERVAL}s",
+        "intervalo_analisis": f"Cierre de vela +{ANALYSIS_SETTLE_SECONDS:.0f}s; sentimiento cada {ANALYSIS_INTERVAL}s",
         "modo": "Análisis continuo independiente para múltiples estrategias",
-        "frecuencia": f"Cada {ANALYSIS_INTERVAL}s",
+        "frecuencia": "Solo pares y estrategias con vela o sentimiento nuevo",
         "analisis_batch": "Activado - todos los pares simultáneamente",
         "comunicacion": "Base de datos - los bots consultan estrategia_status",
         "redis_ready": "Arquitectura preparada para comunicación en tiempo real",
         "endpoints": {
             "health": "/health/",
+            "analisis": "/analysis/{pair}",
+            "analisis_batch": "/analysis/?pairs=ETH/USDT,BTC/USDT",
             "documentacion": "/docs"
         },
         "configuracion": {
@@ -246,6 +277,70 @@ async def health_check():
         logger.error(f"❌ Error en health check: {e}")
         raise HTTPException(status_code=500, detail=f"Error en health check: {str(e)}")
 
+# ============================================================================
+# ANÁLISIS BAJO DEMANDA
+# ============================================================================
+
+def _parse_strategies(strategy: Optional[str]) -> Optional[List[BotType]]:
+    """Convierte el parámetro `strategy` (grid, trend o vacío para ambas)."""
+    if not strategy:
+        return None
+    try:
+        return [BotType(strategy.upper())]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Estrategia no soportada: {strategy}")
+
+
+@app.get("/analysis/")
+async def analyze_pairs(
+    pairs: Optional[str] = Query(None, description="Pares separados por comas (por defecto, los de las recetas maestras)"),
+    strategy: Optional[str] = Query(None, description="grid o trend (por defecto, ambas)")
+):
+    """
+    Decisión e indicadores actuales de varios pares.
+    
+    Returns:
+        Análisis por par y estrategia
+    """
+    known_pairs = pair_universe_use_case.pairs
+    # Sin `pairs` solo los de las recetas maestras: el universo dinámico puede tener cientos
+    requested = [raw for raw in pairs.split(',') if raw.strip()] if pairs else list(SUPPORTED_PAIRS)
+    resolved = []
+    for raw_pair in requested:
+        pair = OnDemandAnalysisUseCase.resolve_pair(raw_pair, known_pairs)
+        if pair is None:
+            raise HTTPException(status_code=404, detail=f"Par no soportado: {raw_pair}")
+        if pair not in resolved:
+            resolved.append(pair)
+    
+    results = await on_demand_analysis_use_case.execute_many(resolved, _parse_strategies(strategy))
+    return {
+        "status": "success",
+        "timestamp": datetime.utcnow().isoformat(),
+        "results": results
+    }
+
+
+@app.get("/analysis/{pair:path}")
+async def analyze_pair(
+    pair: str,
+    strategy: Optional[str] = Query(None, description="grid o trend (por defecto, ambas)")
+):
+    """
+    Decisión e indicadores actuales de un par (ETH/USDT, ETH-USDT o ETHUSDT).
+    
+    Returns:
+        Análisis del par por estrategia
+    """
+    resolved = OnDemandAnalysisUseCase.resolve_pair(pair, pair_universe_use_case.pairs)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail=f"Par no soportado: {pair}")
+    
+    result = await on_demand_analysis_use_case.execute(resolved, _parse_strategies(strategy))
+    if all(analysis['status'] != 'success' for analysis in result['analyses'].values()):
+        raise HTTPException(status_code=503, detail=result)
+    return result
+
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
@@ -0,0 +1,93 @@
+"""
+Barrido de Umbrales GRID (línea de comandos)
+============================================
+
+Evalúa miles de combinaciones de umbrales por par sobre el historial de
+Binance, imprime el ranking y escribe un archivo de recetas listo para cargar
+con `BRAIN_RECIPES_FILE`.
+
+Uso (desde services/brain):
+    python -m app.sweep                          # Todas las recetas GRID, 3 años
+    python -m app.sweep --pair ETH/USDT --workers 8 --output recetas.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List
+
+from app.application.sweep_thresholds_use_case import SweepThresholdsUseCase
+from app.config import ANALYSIS_TIMEFRAME, SWEEP_WORKERS
+from app.domain.entities import ThresholdSweepResult
+from app.infrastructure.market_data_repository import BinanceMarketDataRepository
+from app.infrastructure.recipe_repository import InMemoryRecipeRepository, write_recipes_file
+from app.infrastructure.threshold_sweep import ParallelThresholdSweeper
+
+
+def _print_ranking(result: ThresholdSweepResult) -> None:
+    """Imprime el ranking de un par."""
+    print(
+        f"\n{result.pair} — {result.combinations} combinaciones sobre {result.candles} velas "
+        f"de {result.timeframe} en {result.elapsed_seconds:.2f}s"
+    )
+    header = f"{'#':>3}{'ADX':>7}{'BBW':>9}{'Sent':>7}{'Puntos':>10}{'P&L':>10}{'Operar':>9}{'/30d':>7}{'Racha':>8}"
+    print(header)
+    print('-' * len(header))
+    for rank, row in enumerate(result.ranking, 1):
+        print(
+            f"{rank:>3}{row['adx_threshold']:>7.1f}{row['bollinger_bandwidth_threshold']:>9.4f}"
+            f"{row['sentiment_threshold']:>7.2f}{row['score']:>+10.4f}{row['pnl_proxy']:>+10.4f}"
+            f"{row['operate_fraction']:>9.1%}{row['flips_per_30d']:>7.2f}{row['avg_operate_run']:>8.1f}"
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    sweeper = ParallelThresholdSweeper(workers=args.workers)
+    use_case = SweepThresholdsUseCase(
+        market_data_repo=BinanceMarketDataRepository(),
+        recipe_repo=InMemoryRecipeRepository(),
+        sweeper=sweeper
+    )
+
+    try:
+        if args.pair:
+            result = await use_case.execute(args.pair, args.timeframe, args.days, args.top)
+            results: List[ThresholdSweepResult] = [result] if result else []
+        else:
+            results = await use_case.execute_all(args.timeframe, args.days, args.top)
+    finally:
+        sweeper.close()
+
+    if not results:
+        print("Sin resultados: revisa el par, la receta y la conexión con Binance", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            _print_ranking(result)
+
+    recipes = [recipe for recipe in [await use_case.tuned_recipe(result) for result in results] if recipe]
+    if recipes:
+        write_recipes_file(args.output, recipes)
+        print(f"\nRecetas ajustadas en {args.output} (cargar con BRAIN_RECIPES_FILE={args.output})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Barrido de umbrales de recetas GRID del brain")
+    parser.add_argument('--pair', help="Par a barrer (por defecto, todos los de las recetas GRID)")
+    parser.add_argument('--timeframe', default=ANALYSIS_TIMEFRAME)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--top', type=int, default=10, help="Combinaciones a mostrar por par")
+    parser.add_argument('--workers', type=int, default=SWEEP_WORKERS, help="Procesos (0 = uno por núcleo)")
+    parser.add_argument('--output', default='brain_recipes.json', help="Archivo de recetas ajustadas")
+    parser.add_argument('--json', action='store_true', help="Salida JSON en lugar de tabla")
+    parser.add_argument('--log-level', default='WARNING')
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, cli_args.log_level.upper()), format='%(levelname)s %(message)s')
+    sys.exit(asyncio.run(main(cli_args)))
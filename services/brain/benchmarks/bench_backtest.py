@@ -0,0 +1,96 @@
+"""
+Benchmark: backtest vectorizado de una receta GRID
+==================================================
+
+Mide cuánto tarda `run_recipe_backtest` en reproducir una receta sobre un
+historial sintético (por defecto, 3 años de velas de 4h) y cuánto cuesta
+evaluar muchas combinaciones de umbrales a la vez difundiendo los umbrales
+sobre el eje temporal.
+
+Uso (desde services/brain):
+    python -m benchmarks.bench_backtest --days 1095 --combos 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.domain.entities import BotType, MarketData, TradingRecipe
+from app.infrastructure.candle_cache import timeframe_to_ms
+from app.infrastructure.indicator_kernels import compute_indicators
+from app.infrastructure.recipe_backtest import evaluate_decisions, grid_decisions, grid_pnl_proxy, run_recipe_backtest
+from app.infrastructure.sentiment_cache import DAY_MS
+
+
+def _synthetic_history(days: int, timeframe: str, seed: int = 0) -> MarketData:
+    """Genera un historial OHLCV con sentimiento sintético."""
+    rng = np.random.default_rng(seed)
+    candle_ms = timeframe_to_ms(timeframe)
+    candles = days * DAY_MS // candle_ms
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, candles))) * 2000.0
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = close * rng.uniform(0.002, 0.02, candles)
+    high = np.maximum(open_, close) + spread * rng.uniform(0, 1, candles)
+    low = np.minimum(open_, close) - spread * rng.uniform(0, 1, candles)
+    sentiment = np.clip(np.cumsum(rng.normal(0, 0.02, candles)), -1, 1)
+    return MarketData(
+        pair='SYN/USDT',
+        timeframe=timeframe,
+        timestamps=np.arange(candles, dtype=np.int64) * candle_ms,
+        columns={'open': open_, 'high': high, 'low': low, 'close': close,
+                 'volume': np.ones(candles), 'sentiment_promedio': sentiment}
+    )
+
+
+def _measure(fn, repeat: int) -> float:
+    """Mejor tiempo en segundos de `repeat` ejecuciones."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--timeframe', default='4h')
+    parser.add_argument('--combos', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    market_data = _synthetic_history(args.days, args.timeframe)
+    recipe = TradingRecipe(
+        pair='SYN/USDT', name='Sintética', description='Receta de benchmark', grid_config={},
+        conditions={'adx_threshold': 25.0, 'bollinger_bandwidth_threshold': 0.02, 'sentiment_threshold': -0.2},
+        bot_type=BotType.GRID
+    )
+    single_time = _measure(lambda: run_recipe_backtest(market_data, recipe), args.repeat)
+
+    columns = market_data.columns
+    indicators = compute_indicators(columns['high'], columns['low'], columns['close'])
+    pnl = grid_pnl_proxy(columns['open'], columns['high'], columns['low'], columns['close'])
+    rng = np.random.default_rng(1)
+    adx_thr = rng.uniform(15, 35, (args.combos, 1))
+    vol_thr = rng.uniform(0.005, 0.05, (args.combos, 1))
+    sent_thr = rng.uniform(-0.5, 0.2, (args.combos, 1))
+    candle_ms = timeframe_to_ms(args.timeframe)
+
+    def sweep():
+        decisions = grid_decisions(indicators['ADX_14'], indicators['bb_width'], columns['sentiment_promedio'],
+                                   adx_thr, vol_thr, sent_thr)
+        evaluate_decisions(decisions, pnl, candle_ms)
+
+    sweep_time = _measure(sweep, max(1, args.repeat // 2))
+
+    print(f"Historial: {len(market_data)} velas de {args.timeframe} ({args.days} días)")
+    print(f"{'camino':<36}{'tiempo (ms)':>14}")
+    print(f"{'receta completa (indicadores + regla)':<36}{single_time * 1000:>14.1f}")
+    print(f"{f'{args.combos} combinaciones (solo regla)':<36}{sweep_time * 1000:>14.1f}")
+    print(f"Por combinación: {sweep_time / args.combos * 1e6:.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
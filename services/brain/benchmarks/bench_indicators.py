@@ -0,0 +1,130 @@
+"""
+Benchmark: indicadores por par vs kernels NumPy sobre (pares × tiempo)
+======================================================================
+
+Compara el coste de calcular los indicadores del brain para un batch de
+pares con:
+
+- pandas-ta par a par (si está instalado),
+- el motor incremental recorriendo todo el historial (arranque en frío),
+- los kernels vectorizados sobre una única matriz (pares × tiempo).
+
+También informa del error relativo máximo de los kernels frente a la
+referencia disponible.
+
+Uso (desde services/brain):
+    python -m benchmarks.bench_indicators --pairs 50 --candles 1200
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.indicator_kernels import compute_indicators
+from app.infrastructure.streaming_indicators import INDICATOR_NAMES, StreamingIndicatorEngine
+
+try:
+    import pandas_ta as ta
+except ImportError:
+    ta = None
+
+
+def _synthetic_batch(pairs: int, candles: int, seed: int = 0):
+    """Genera matrices high/low/close (pares × tiempo) sintéticas."""
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, (pairs, candles)), axis=1)) * rng.uniform(1, 3000, (pairs, 1))
+    spread = close * rng.uniform(0.001, 0.02, (pairs, candles))
+    high = close + spread * rng.uniform(0, 1, (pairs, candles))
+    low = close - spread * rng.uniform(0, 1, (pairs, candles))
+    return high, low, close
+
+
+def _pandas_ta(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Camino anterior: pandas-ta sobre Series, un par cada vez."""
+    rows = []
+    for h, l, c in zip(high, low, close):
+        h, l, c = pd.Series(h, copy=False), pd.Series(l, copy=False), pd.Series(c, copy=False)
+        bbands = ta.bbands(c, length=20, std=2)
+        macd = ta.macd(c)
+        rows.append({
+            'ADX_14': ta.adx(h, l, c, length=14)['ADX_14'].to_numpy(),
+            'bb_width': ((bbands['BBU_20_2.0'] - bbands['BBL_20_2.0']) / bbands['BBM_20_2.0']).to_numpy(),
+            'SMA_30': ta.sma(c, length=30).to_numpy(),
+            'SMA_150': ta.sma(c, length=150).to_numpy(),
+            'RSI_14': ta.rsi(c, length=14).to_numpy(),
+            'MACD_12_26_9': macd['MACD_12_26_9'].to_numpy(),
+            'MACDs_12_26_9': macd['MACDs_12_26_9'].to_numpy(),
+            'MACDh_12_26_9': macd['MACDh_12_26_9'].to_numpy(),
+            'EMA_21': ta.ema(c, length=21).to_numpy(),
+            'EMA_50': ta.ema(c, length=50).to_numpy(),
+        })
+    return {name: np.vstack([row[name] for row in rows]) for name in INDICATOR_NAMES}
+
+
+def _streaming(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Motor incremental recalentado desde cero para cada par."""
+    columns = {name: np.empty(close.shape) for name in INDICATOR_NAMES}
+    for row, (h, l, c) in enumerate(zip(high, low, close)):
+        engine = StreamingIndicatorEngine()
+        for t in range(c.shape[0]):
+            values = engine.update(t, h[t], l[t], c[t])
+            for name in INDICATOR_NAMES:
+                columns[name][row, t] = values[name]
+    return columns
+
+
+def _measure(fn: Callable, repeat: int, *arrays: np.ndarray):
+    """Devuelve (mejor tiempo en segundos, resultado)."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*arrays)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _max_relative_error(actual: Dict[str, np.ndarray], expected: Dict[str, np.ndarray]) -> float:
+    """Error relativo máximo entre dos juegos de columnas (ignorando NaN comunes)."""
+    worst = 0.0
+    for name in INDICATOR_NAMES:
+        both = np.isfinite(actual[name]) & np.isfinite(expected[name])
+        denominator = np.maximum(np.abs(expected[name][both]), 1e-12)
+        if both.any():
+            worst = max(worst, float(np.max(np.abs(actual[name][both] - expected[name][both]) / denominator)))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--candles', type=int, default=1200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    high, low, close = _synthetic_batch(args.pairs, args.candles)
+
+    kernel_time, kernels = _measure(compute_indicators, args.repeat, high, low, close)
+    streaming_time, streaming = _measure(_streaming, 1, high, low, close)
+    pandas_ta_time: Optional[float] = None
+    if ta is not None:
+        pandas_ta_time, reference = _measure(_pandas_ta, args.repeat, high, low, close)
+    else:
+        reference = streaming
+
+    print(f"Batch: {args.pairs} pares × {args.candles} velas")
+    print(f"{'camino':<28}{'tiempo (ms)':>14}")
+    if pandas_ta_time is not None:
+        print(f"{'pandas-ta por par':<28}{pandas_ta_time * 1000:>14.1f}")
+    print(f"{'motor incremental (frío)':<28}{streaming_time * 1000:>14.1f}")
+    print(f"{'kernels NumPy (batch)':<28}{kernel_time * 1000:>14.1f}")
+    reference_name = 'pandas-ta' if ta is not None else 'motor incremental'
+    print(f"Error relativo máximo vs {reference_name}: {_max_relative_error(kernels, reference):.2e}")
+    baseline = pandas_ta_time if pandas_ta_time is not None else streaming_time
+    print(f"Mejora: {baseline / kernel_time:.0f}x CPU")
+
+
+if __name__ == '__main__':
+    main()
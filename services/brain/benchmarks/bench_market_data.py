@@ -0,0 +1,96 @@
+"""
+Benchmark: DataFrame → dict → DataFrame vs MarketData columnar
+==============================================================
+
+Compara, por batch, el coste del antiguo transporte de datos de mercado
+(`df.to_dict('records')` y reconstrucción del DataFrame para leer la última
+fila) con el objeto columnar `MarketData`.
+
+Uso (desde services/brain):
+    python -m benchmarks.bench_market_data --pairs 50 --candles 1200
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from app.domain.entities import MarketData
+
+INDICATOR_COLUMNS = [
+    'ADX_14', 'bb_width', 'SMA_30', 'SMA_150', 'RSI_14', 'MACD_12_26_9',
+    'MACDs_12_26_9', 'MACDh_12_26_9', 'EMA_21', 'EMA_50', 'sentiment_promedio'
+]
+
+
+def _synthetic_candles(count: int, seed: int) -> np.ndarray:
+    """Genera velas OHLCV + columnas de indicadores sintéticas."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(count, dtype=np.int64) * 4 * 3_600_000
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    columns = [timestamps, close, close + 1, close - 1, close, rng.random(count)]
+    columns += [rng.random(count) for _ in INDICATOR_COLUMNS]
+    return np.column_stack(columns)
+
+
+def _legacy_round_trip(raw: np.ndarray) -> float:
+    """Camino anterior: DataFrame → to_dict('records') → DataFrame → iloc[-1]."""
+    names = ['timestamp', 'open', 'high', 'low', 'close', 'volume'] + INDICATOR_COLUMNS
+    df = pd.DataFrame(raw, columns=pd.Index(names))
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    payload = {'data': df.to_dict('records'), 'columns': df.columns.tolist(), 'index': df.index.tolist()}
+    rebuilt = pd.DataFrame(payload['data'])
+    latest = rebuilt.iloc[-1]
+    return float(latest['ADX_14'])
+
+
+def _columnar(raw: np.ndarray) -> float:
+    """Camino nuevo: vistas columnares y lectura directa de la última fila."""
+    names = ['open', 'high', 'low', 'close', 'volume'] + INDICATOR_COLUMNS
+    market_data = MarketData(
+        pair='BENCH/USDT',
+        timeframe='4h',
+        timestamps=raw[:, 0].astype(np.int64),
+        columns={name: raw[:, i + 1] for i, name in enumerate(names)}
+    )
+    return market_data.latest('ADX_14')
+
+
+def _measure(fn: Callable[[np.ndarray], float], datasets: List[np.ndarray], strategies: int):
+    """Ejecuta un batch completo y devuelve (segundos, pico de memoria en bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for raw in datasets:
+        for _ in range(strategies):
+            fn(raw)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--candles', type=int, default=1200)
+    parser.add_argument('--strategies', type=int, default=2, help='Lecturas por par (GRID + TREND)')
+    args = parser.parse_args()
+
+    datasets = [_synthetic_candles(args.candles, seed) for seed in range(args.pairs)]
+
+    legacy_time, legacy_peak = _measure(_legacy_round_trip, datasets, args.strategies)
+    columnar_time, columnar_peak = _measure(_columnar, datasets, args.strategies)
+
+    print(f"Batch: {args.pairs} pares × {args.strategies} estrategias × {args.candles} velas")
+    print(f"{'camino':<22}{'tiempo (ms)':>14}{'pico memoria (KiB)':>22}")
+    print(f"{'dict → DataFrame':<22}{legacy_time * 1000:>14.1f}{legacy_peak / 1024:>22.1f}")
+    print(f"{'MarketData columnar':<22}{columnar_time * 1000:>14.1f}{columnar_peak / 1024:>22.1f}")
+    print(f"Mejora: {legacy_time / columnar_time:.0f}x CPU, {legacy_peak / max(columnar_peak, 1):.0f}x memoria")
+
+
+if __name__ == '__main__':
+    main()
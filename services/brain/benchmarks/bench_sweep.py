@@ -0,0 +1,50 @@
+"""
+Benchmark: escalado del barrido de umbrales con el número de procesos
+=====================================================================
+
+Barre la rejilla de umbrales por defecto sobre un historial sintético con
+1, 2, 4, ... procesos (hasta el número de núcleos) y comprueba que el
+ranking es idéntico al del barrido en línea.
+
+Uso (desde services/brain):
+    python -m benchmarks.bench_sweep --days 1095 --max-workers 8
+"""
+
+import argparse
+import os
+
+from benchmarks.bench_backtest import _synthetic_history
+from app.infrastructure.threshold_sweep import ParallelThresholdSweeper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--timeframe', default='4h')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    market_data = _synthetic_history(args.days, args.timeframe)
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+
+    print(f"Historial: {len(market_data)} velas de {args.timeframe}")
+    print(f"{'procesos':>9}{'tiempo (s)':>12}{'aceleración':>13}")
+    baseline, reference = None, None
+    for workers in worker_counts:
+        sweeper = ParallelThresholdSweeper(workers=workers)
+        try:
+            sweeper.sweep(market_data, top=1)  # Arranque del pool
+            result = sweeper.sweep(market_data, top=20)
+        finally:
+            sweeper.close()
+        baseline = baseline or result.elapsed_seconds
+        reference = reference or result.ranking
+        assert result.ranking == reference, "El ranking en paralelo no coincide con el barrido en línea"
+        print(f"{workers:>9}{result.elapsed_seconds:>12.2f}{baseline / result.elapsed_seconds:>12.1f}x")
+    print(f"Combinaciones: {result.combinations}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Pruebas para el análisis batch concurrente.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+from app.application import batch_analysis_use_case as module
+from app.application.batch_analysis_use_case import STRATEGY_TIMEFRAMES, BatchAnalysisUseCase
+from app.application.service_lifecycle_use_case import ServiceLifecycleUseCase
+from app.domain.entities import BotType, last_closed_candle
+from app.domain.interfaces import DecisionRepository, MarketDataRepository, NotificationService, RecipeRepository
+
+
+class TestConcurrentBatch:
+    """Pruebas de concurrencia acotada, timeouts y aislamiento de errores."""
+
+    def setup_method(self):
+        self.notification = Mock(spec=NotificationService)
+        self.notification.notify_error = AsyncMock(return_value=True)
+        self.notification.notify_decision_change = AsyncMock(return_value=True)
+        self.decision_repo = Mock(spec=DecisionRepository)
+        # Solo la primera decisión del lote cambia respecto a la vigente
+        self.decision_repo.save_decisions = AsyncMock(side_effect=lambda decisions: decisions[:1])
+        self.decision_repo.prune_decision_history = AsyncMock(return_value={'expired': 0, 'downsampled': 0})
+        self.market_data_repo = Mock(spec=MarketDataRepository)
+        self.market_data_repo.get_sentiment_watermark = AsyncMock(return_value='wm-1')
+        self.use_case = BatchAnalysisUseCase(
+            market_data_repo=self.market_data_repo,
+            decision_repo=self.decision_repo,
+            recipe_repo=Mock(spec=RecipeRepository),
+            notification_service=self.notification,
+            max_concurrency=2,
+            pair_timeout=0.5
+        )
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _fake_analyze_pair(self, pair, strategies=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if pair == 'SLOW/USDT':
+                await asyncio.sleep(5)
+            if pair == 'BAD/USDT':
+                raise RuntimeError("exchange caído")
+            await asyncio.sleep(0.05)
+            decision = Mock()
+            decision.to_dict.return_value = {'pair': pair}
+            return [decision]
+        finally:
+            self.in_flight -= 1
+
+    def test_pairs_run_concurrently_with_isolated_failures(self, monkeypatch):
+        pairs = ['ETH/USDT', 'BTC/USDT', 'SLOW/USDT', 'BAD/USDT', 'AVAX/USDT']
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', pairs)
+        self.use_case._analyze_pair = self._fake_analyze_pair
+
+        result = asyncio.run(self.use_case.execute())
+
+        assert result['status'] == 'completed'
+        assert self.max_in_flight == 2
+        assert result['successful_pairs'] == 3
+        assert result['failed_pairs'] == 2
+        assert result['pair_results']['SLOW/USDT']['status'] == 'timeout'
+        assert result['pair_results']['BAD/USDT']['status'] == 'error'
+        assert self.notification.notify_error.await_count == 2
+
+    def test_timed_out_pair_keeps_its_slot_until_it_finishes(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['SLOW/USDT', 'ETH/USDT'])
+        self.use_case = BatchAnalysisUseCase(
+            market_data_repo=self.market_data_repo,
+            decision_repo=self.decision_repo,
+            recipe_repo=Mock(spec=RecipeRepository),
+            notification_service=self.notification,
+            max_concurrency=1,
+            pair_timeout=0.1
+        )
+        events = []
+
+        async def analyze_pair(pair, strategies=None):
+            events.append(f"start {pair}")
+            await asyncio.sleep(0.4 if pair == 'SLOW/USDT' else 0)
+            # El trabajo del par con timeout sigue escribiendo sus velas
+            self.use_case._observed_candles[(pair, BotType.GRID)] = 1
+            events.append(f"end {pair}")
+            decision = Mock()
+            decision.to_dict.return_value = {'pair': pair}
+            return [decision]
+
+        self.use_case._analyze_pair = analyze_pair
+        result = asyncio.run(self.use_case.execute())
+
+        assert result['pair_results']['SLOW/USDT']['status'] == 'timeout'
+        assert result['pair_results']['ETH/USDT']['status'] == 'success'
+        # El siguiente par no empieza hasta que el hilo del par lento termina
+        assert events == ['start SLOW/USDT', 'end SLOW/USDT', 'start ETH/USDT', 'end ETH/USDT']
+        # Sin decisión guardada, la vela del par lento no cuenta como analizada
+        assert ('SLOW/USDT', BotType.GRID) not in self.use_case._watermarks
+        assert ('ETH/USDT', BotType.GRID) in self.use_case._watermarks
+
+    def test_close_cancels_queued_pairs(self):
+        started = []
+
+        async def analyze_pair(pair, strategies=None):
+            started.append(pair)
+            await asyncio.sleep(0.2)
+            return []
+
+        self.use_case._analyze_pair = analyze_pair
+
+        async def run():
+            semaphore = asyncio.Semaphore(10)
+            tasks = [asyncio.create_task(self.use_case._analyze_pair_bounded(pair, semaphore))
+                     for pair in ('ETH/USDT', 'BTC/USDT', 'AVAX/USDT')]
+            await asyncio.sleep(0.05)
+            self.use_case.close()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(run())
+
+        # max_concurrency=2: el tercer par estaba en cola y no llega a empezar
+        assert sorted(started) == ['BTC/USDT', 'ETH/USDT']
+        assert [r['status'] for r in results] == ['failed', 'failed', 'error']
+
+    def test_batch_decisions_are_saved_in_one_call_and_only_changes_notified(self, monkeypatch):
+        pairs = ['ETH/USDT', 'BTC/USDT', 'AVAX/USDT']
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', pairs)
+        self.use_case._analyze_pair = self._fake_analyze_pair
+
+        result = asyncio.run(self.use_case.execute())
+
+        self.decision_repo.save_decisions.assert_awaited_once()
+        assert len(self.decision_repo.save_decisions.await_args.args[0]) == 3
+        assert self.notification.notify_decision_change.await_count == 1
+        assert result['decisions_saved'] is True
+
+    def test_failed_save_marks_pairs_as_errors(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['ETH/USDT', 'BTC/USDT'])
+        self.use_case._analyze_pair = self._fake_analyze_pair
+        self.decision_repo.save_decisions = AsyncMock(return_value=None)
+
+        result = asyncio.run(self.use_case.execute())
+
+        assert result['successful_pairs'] == 0
+        assert result['decisions_saved'] is False
+        self.notification.notify_decision_change.assert_not_awaited()
+        self.notification.notify_error.assert_awaited_once()
+
+
+class TestSkipUnchanged:
+    """Pruebas de la omisión de análisis sin vela ni sentimiento nuevo."""
+
+    def setup_method(self):
+        self.decision_repo = Mock(spec=DecisionRepository)
+        self.decision_repo.save_decisions = AsyncMock(return_value=[])
+        self.decision_repo.prune_decision_history = AsyncMock(return_value={'expired': 0, 'downsampled': 0})
+        self.market_data_repo = Mock(spec=MarketDataRepository)
+        self.market_data_repo.get_sentiment_watermark = AsyncMock(return_value='wm-1')
+        notification = Mock(spec=NotificationService)
+        notification.notify_error = AsyncMock(return_value=True)
+        self.use_case = BatchAnalysisUseCase(
+            market_data_repo=self.market_data_repo,
+            decision_repo=self.decision_repo,
+            recipe_repo=Mock(spec=RecipeRepository),
+            notification_service=notification
+        )
+        self.use_case._analyze_pair = self._fake_analyze_pair
+        self.analyzed = []
+        self.stale_pairs = set()
+
+    async def _fake_analyze_pair(self, pair, strategies=None):
+        # Registra la vela usada como lo hacen _analyze_grid y _analyze_trend
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        for bot_type in strategies:
+            self.analyzed.append((pair, bot_type))
+            candle = last_closed_candle(STRATEGY_TIMEFRAMES[bot_type], now_ms)
+            if pair in self.stale_pairs:
+                candle -= 1  # El exchange aún no publicó la última vela
+            self.use_case._observed_candles[(pair, bot_type)] = candle
+        decision = Mock()
+        decision.to_dict.return_value = {'pair': pair}
+        return [decision]
+
+    def test_unchanged_inputs_are_skipped(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['ETH/USDT', 'BTC/USDT'])
+
+        asyncio.run(self.use_case.execute())
+        assert len(self.analyzed) == 4
+
+        self.analyzed.clear()
+        result = asyncio.run(self.use_case.execute(only_changed=True))
+
+        assert self.analyzed == []
+        assert result['analyzed_pairs'] == 0
+        assert result['skipped_analyses'] == 4
+        assert self.decision_repo.save_decisions.await_count == 1
+
+    def test_new_sentiment_or_missing_candle_reanalyzes(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['ETH/USDT', 'BTC/USDT'])
+        self.stale_pairs = {'BTC/USDT'}
+        asyncio.run(self.use_case.execute())
+
+        # BTC se analizó con una vela anterior a la última cerrada
+        self.analyzed.clear()
+        asyncio.run(self.use_case.execute(only_changed=True))
+        assert self.analyzed == [('BTC/USDT', BotType.GRID), ('BTC/USDT', BotType.TREND)]
+
+        self.analyzed.clear()
+        self.market_data_repo.get_sentiment_watermark = AsyncMock(return_value='wm-2')
+        asyncio.run(self.use_case.execute(only_changed=True))
+        assert len(self.analyzed) == 4
+
+    def test_failed_save_is_retried(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['ETH/USDT'])
+        self.decision_repo.save_decisions = AsyncMock(return_value=None)
+        asyncio.run(self.use_case.execute())
+
+        self.analyzed.clear()
+        self.decision_repo.save_decisions = AsyncMock(return_value=[])
+        asyncio.run(self.use_case.execute(only_changed=True))
+        assert len(self.analyzed) == 2
+
+    def test_unknown_sentiment_never_skips(self, monkeypatch):
+        monkeypatch.setattr(module, 'SUPPORTED_PAIRS', ['ETH/USDT'])
+        self.market_data_repo.get_sentiment_watermark = AsyncMock(return_value=None)
+        asyncio.run(self.use_case.execute())
+
+        self.analyzed.clear()
+        asyncio.run(self.use_case.execute(only_changed=True))
+        assert len(self.analyzed) == 2
+
+
+class TestCandleCloseSchedule:
+    """Pruebas del despertar alineado con el cierre de vela."""
+
+    def setup_method(self):
+        batch = Mock(spec=BatchAnalysisUseCase)
+        batch.timeframes = ['1d', '4h']
+        self.lifecycle = ServiceLifecycleUseCase(
+            notification_service=Mock(spec=NotificationService),
+            batch_analysis_use_case=batch,
+            poll_interval=900,
+            settle_seconds=20
+        )
+
+    def test_wakes_after_next_close(self):
+        assert self.lifecycle.seconds_until_next_check(datetime(2024, 1, 1, 3, 59, 0)) == 80
+
+    def test_close_within_settle_margin_is_not_skipped(self):
+        assert self.lifecycle.seconds_until_next_check(datetime(2024, 1, 1, 4, 0, 5)) == 15
+
+    def test_poll_interval_caps_wait(self):
+        assert self.lifecycle.seconds_until_next_check(datetime(2024, 1, 1, 5, 0, 0)) == 900
@@ -0,0 +1,83 @@
+"""
+Pruebas para la caché incremental de velas OHLCV.
+"""
+from app.infrastructure.candle_cache import CandleCache
+
+H4 = 4 * 3_600_000
+
+
+class FakeExchange:
+    """Exchange simulado con velas de 4h y reloj controlable."""
+
+    def __init__(self, now: int, missing=()):
+        self.now = now
+        self.missing = set(missing)
+        self.flaky = set()
+        self.calls = []
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, pair, timeframe, since, limit):
+        self.calls.append(since)
+        start = since - since % H4 + (H4 if since % H4 else 0)
+        candles = []
+        ts = start
+        while ts <= self.now and len(candles) < limit:
+            if ts not in self.missing and ts not in self.flaky:
+                candles.append([ts, 1.0, 2.0, 0.5, 1.5, 10.0])
+            ts += H4
+        self.flaky.clear()
+        return candles
+
+
+class TestCandleCache:
+    """Pruebas de la caché de velas."""
+
+    def setup_method(self):
+        self.exchange = FakeExchange(now=100 * H4 + 10)
+        self.cache = CandleCache(lambda: self.exchange, page_limit=30)
+
+    def test_cold_load_paginates_and_drops_forming_candle(self):
+        candles = self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+
+        assert [c[0] for c in candles] == [i * H4 for i in range(100)]
+        assert len(self.exchange.calls) == 4
+
+    def test_no_fetch_until_a_new_candle_closes(self):
+        self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        self.exchange.calls.clear()
+
+        self.exchange.now += H4 // 2
+        self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        assert self.exchange.calls == []
+
+        self.exchange.now += H4
+        candles = self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        assert self.exchange.calls == [100 * H4]
+        assert candles[-1][0] == 100 * H4
+
+    def test_gap_is_repaired_once(self):
+        self.exchange.missing = {50 * H4}
+        self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        self.exchange.calls.clear()
+
+        # El exchange sigue sin la vela: el hueco se recuerda y no se repite
+        self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        assert self.exchange.calls == []
+
+    def test_gap_filled_when_exchange_has_data(self):
+        # La primera página llega sin la vela 10, la reparación la recupera
+        self.exchange.flaky = {10 * H4}
+
+        candles = self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+        assert [c[0] for c in candles] == [i * H4 for i in range(100)]
+
+    def test_exchange_page_cap_does_not_truncate_history(self):
+        # El exchange devuelve como mucho 20 velas aunque se pidan 30
+        fetch = self.exchange.fetch_ohlcv
+        self.exchange.fetch_ohlcv = lambda pair, timeframe, since, limit: fetch(pair, timeframe, since, min(limit, 20))
+
+        candles = self.cache.get_closed_candles('ETH/USDT', '4h', 0)
+
+        assert [c[0] for c in candles] == [i * H4 for i in range(100)]
@@ -0,0 +1,67 @@
+"""
+Pruebas para el almacén multi-timeframe de velas.
+"""
+from datetime import datetime, timezone
+
+from app.infrastructure.candle_cache import CandleCache
+from app.infrastructure.candle_store import MultiTimeframeCandleStore, bucket_start, resample_ohlcv
+
+H4 = 4 * 3_600_000
+D1 = 24 * 3_600_000
+
+
+def _ms(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _candles(start: int, count: int):
+    return [[start + i * H4, float(i), float(i) + 2, float(i) - 1, float(i) + 1, 1.0] for i in range(count)]
+
+
+class TestResample:
+    """Pruebas del re-muestreo alineado con Binance."""
+
+    def test_daily_buckets_are_exchange_aligned_and_complete(self):
+        # Empieza a las 08:00: el primer día está incompleto y se descarta
+        candles = _candles(_ms(2024, 1, 1, 8), 4 + 6 + 3)
+
+        daily = resample_ohlcv(candles, '4h', '1d')
+
+        assert len(daily) == 1
+        ts, open_, high, low, close, volume = daily[0]
+        assert ts == _ms(2024, 1, 2)
+        assert (open_, high, low, close, volume) == (4.0, 11.0, 3.0, 10.0, 6.0)
+
+    def test_weekly_bucket_opens_on_monday(self):
+        assert bucket_start(_ms(2024, 1, 10, 13), '1w') == _ms(2024, 1, 8)
+        assert bucket_start(_ms(2024, 1, 8), '1w') == _ms(2024, 1, 8)
+
+
+class FakeExchange:
+    """Exchange simulado que solo sirve velas de 4h."""
+
+    def __init__(self, now: int):
+        self.now = now
+        self.calls = []
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, pair, timeframe, since, limit):
+        assert timeframe == '4h'
+        self.calls.append(since)
+        start = since - since % H4 + (H4 if since % H4 else 0)
+        count = min(limit, (self.now - start) // H4 + 1)
+        return _candles(start, int(count))
+
+
+def test_one_base_series_serves_every_timeframe():
+    exchange = FakeExchange(now=_ms(2024, 3, 1, 1))
+    store = MultiTimeframeCandleStore(CandleCache(lambda: exchange), base_timeframe='4h')
+
+    four_hour = store.get_candles('ETH/USDT', '4h', _ms(2024, 2, 20))
+    daily = store.get_candles('ETH/USDT', '1d', _ms(2024, 2, 20))
+
+    assert len(exchange.calls) == 1
+    assert four_hour[-1][0] == _ms(2024, 2, 29, 20)
+    assert [c[0] for c in daily] == [_ms(2024, 2, d) for d in range(20, 30)]
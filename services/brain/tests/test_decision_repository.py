@@ -0,0 +1,223 @@
+"""
+Pruebas del guardado por lotes de decisiones (upsert en SQLite).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import (
+    BotType, DecisionType, MarketIndicators, TradingDecision, TradingThresholds, TrendDecision
+)
+from app.infrastructure import decision_repository as module
+from app.infrastructure.decision_repository import DatabaseDecisionRepository, downsample_history
+from shared.database.decision_bus import DecisionBus, PollingDecisionBus
+from shared.database.models import Base, EstrategiaStatus, DecisionHistory
+
+
+def make_grid_decision(pair, decision_type, timestamp):
+    return TradingDecision(
+        pair=pair,
+        decision=decision_type,
+        reason="test",
+        indicators=MarketIndicators(adx=20.0, volatility=0.03, sentiment=0.1),
+        thresholds=TradingThresholds(adx_threshold=30, volatility_threshold=0.025, sentiment_threshold=-0.2, bot_type=BotType.GRID),
+        bot_type=BotType.GRID,
+        timestamp=timestamp
+    )
+
+
+def make_trend_decision(pair, timestamp):
+    return TrendDecision(
+        pair=pair,
+        decision=DecisionType.MANTENER_ESPERA,
+        reason="test",
+        indicators=MarketIndicators(adx=20.0, volatility=0.03, sma30=10.0, sma150=9.0),
+        thresholds=TradingThresholds(adx_threshold=30, volatility_threshold=0.025, sentiment_threshold=-0.2, bot_type=BotType.TREND),
+        timestamp=timestamp,
+        golden_cross=True
+    )
+
+
+class RepositoryTestCase:
+    """Repositorio sobre una base SQLite en memoria."""
+
+    def setup_method(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.bus = DecisionBus()
+        self.published = []
+        self.bus.subscribe(self.published.append)
+        self.repo = DatabaseDecisionRepository(decision_bus=self.bus)
+
+
+class TestBulkDecisionUpsert(RepositoryTestCase):
+    """Un lote de decisiones es una sentencia y una transacción."""
+
+    def test_upsert_inserts_then_updates_in_single_statement(self, monkeypatch):
+        monkeypatch.setattr(module, 'SessionLocal', self.session_factory)
+        now = datetime.utcnow()
+        pairs = ['ETH/USDT', 'BTC/USDT', 'AVAX/USDT']
+
+        first = [make_grid_decision(pair, DecisionType.PAUSE, now) for pair in pairs]
+        first += [make_trend_decision(pair, now) for pair in pairs]
+        assert asyncio.run(self.repo.save_decisions(first)) is not None
+
+        self.statements.clear()
+        later = now + timedelta(hours=1)
+        second = [make_grid_decision(pair, DecisionType.OPERATE, later) for pair in pairs]
+        assert asyncio.run(self.repo.save_decisions(second)) is not None
+
+        writes = [s for s in self.statements if s.lstrip().upper().startswith('INSERT INTO ESTRATEGIA_STATUS')]
+        assert len(writes) == 1 and 'ON CONFLICT' in writes[0]
+
+        session = self.session_factory()
+        rows = session.query(EstrategiaStatus).all()
+        assert len(rows) == 6
+        grid = {row.par: row for row in rows if row.estrategia == 'GRID'}
+        assert {row.decision for row in grid.values()} == {DecisionType.OPERATE.value}
+        assert all(row.timestamp == later for row in grid.values())
+        assert all(row.golden_cross for row in rows if row.estrategia == 'TREND')
+        session.close()
+
+    def test_only_flips_are_returned_and_published(self, monkeypatch):
+        monkeypatch.setattr(module, 'SessionLocal', self.session_factory)
+        now = datetime.utcnow()
+        asyncio.run(self.repo.save_decisions([
+            make_grid_decision('ETH/USDT', DecisionType.PAUSE, now),
+            make_grid_decision('BTC/USDT', DecisionType.PAUSE, now)
+        ]))
+        self.published.clear()
+
+        changed = asyncio.run(self.repo.save_decisions([
+            make_grid_decision('ETH/USDT', DecisionType.OPERATE, now + timedelta(hours=1)),
+            make_grid_decision('BTC/USDT', DecisionType.PAUSE, now + timedelta(hours=1))
+        ]))
+
+        assert [decision.pair for decision in changed] == ['ETH/USDT']
+        assert [(c.par, c.estrategia, c.previous_decision, c.decision) for c in self.published] == [
+            ('ETH/USDT', 'GRID', DecisionType.PAUSE.value, DecisionType.OPERATE.value)
+        ]
+
+    def test_failed_save_publishes_nothing(self, monkeypatch):
+        monkeypatch.setattr(module, 'SessionLocal', self.session_factory)
+        Base.metadata.tables['decision_history'].drop(self.engine)
+
+        result = asyncio.run(self.repo.save_decisions([
+            make_grid_decision('ETH/USDT', DecisionType.OPERATE, datetime.utcnow())
+        ]))
+
+        assert result is None
+        assert self.published == []
+        session = self.session_factory()
+        assert session.query(EstrategiaStatus).count() == 0
+        session.close()
+
+
+class TestPollingDecisionBus:
+    """Bus de SQLite: otro proceso lee los cambios del archivo compartido."""
+
+    def test_poll_publishes_flips_saved_by_another_process(self, tmp_path, monkeypatch):
+        url = f"sqlite:///{tmp_path / 'oraculo.db'}"
+        brain_engine = create_engine(url)
+        Base.metadata.create_all(brain_engine)
+        monkeypatch.setattr(module, 'SessionLocal', sessionmaker(bind=brain_engine))
+        repo = DatabaseDecisionRepository(decision_bus=DecisionBus())
+
+        bus = PollingDecisionBus(create_engine(url))
+        changes, resyncs = [], []
+        bus.subscribe(changes.append, on_resync=lambda: resyncs.append(True))
+        now = datetime.utcnow()
+
+        asyncio.run(repo.save_decisions([make_grid_decision('ETH/USDT', DecisionType.PAUSE, now)]))
+        bus.poll()
+        assert resyncs == [True] and changes == []
+
+        asyncio.run(repo.save_decisions([
+            make_grid_decision('ETH/USDT', DecisionType.OPERATE, now + timedelta(hours=1)),
+            make_grid_decision('BTC/USDT', DecisionType.PAUSE, now + timedelta(hours=1))
+        ]))
+        bus.poll()
+        bus.poll()
+
+        assert [(c.par, c.previous_decision, c.decision) for c in changes] == [
+            ('ETH/USDT', DecisionType.PAUSE.value, DecisionType.OPERATE.value),
+            ('BTC/USDT', None, DecisionType.PAUSE.value)
+        ]
+
+
+class TestDecisionHistory(RepositoryTestCase):
+    """Historial de solo inserción con lectura keyset y retención."""
+
+    def save_hourly(self, monkeypatch, start, hours, decision_for_hour):
+        monkeypatch.setattr(module, 'SessionLocal', self.session_factory)
+        for hour in range(hours):
+            decision = make_grid_decision('ETH/USDT', decision_for_hour(hour), start + timedelta(hours=hour))
+            assert asyncio.run(self.repo.save_decisions([decision])) is not None
+
+    def test_every_save_is_appended_to_history(self, monkeypatch):
+        start = datetime(2026, 10, 1)
+        self.save_hourly(monkeypatch, start, 5, lambda hour: DecisionType.OPERATE)
+
+        session = self.session_factory()
+        assert session.query(EstrategiaStatus).count() == 1
+        assert session.query(DecisionHistory).count() == 5
+        session.close()
+
+        history = asyncio.run(self.repo.get_decisions_history('ETH/USDT', BotType.GRID, limit=3))
+        assert [d.timestamp for d in history] == [start + timedelta(hours=h) for h in (4, 3, 2)]
+
+    def test_keyset_pages_cover_history_once(self, monkeypatch):
+        start = datetime(2026, 10, 1)
+        self.save_hourly(monkeypatch, start, 10, lambda hour: DecisionType.OPERATE)
+
+        timestamps, cursor = [], None
+        while True:
+            page = asyncio.run(self.repo.get_decision_history_page('ETH/USDT', BotType.GRID, limit=4, cursor=cursor))
+            timestamps += [d.timestamp for d in page.decisions]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert timestamps == [start + timedelta(hours=h) for h in reversed(range(10))]
+
+    def test_prune_expires_and_downsamples(self, monkeypatch):
+        now = datetime(2026, 10, 16)
+        start = now - timedelta(days=400)
+        # 3 días al inicio (expiran) y 2 días con un cambio de decisión a mitad del segundo
+        self.save_hourly(monkeypatch, start, 72, lambda hour: DecisionType.OPERATE)
+        old_start = now - timedelta(days=100)
+        self.save_hourly(monkeypatch, old_start, 48,
+                         lambda hour: DecisionType.PAUSE if 30 <= hour < 40 else DecisionType.OPERATE)
+
+        result = asyncio.run(self.repo.prune_decision_history(now))
+
+        assert result['expired'] == 72
+        session = self.session_factory()
+        kept = session.query(DecisionHistory).order_by(DecisionHistory.timestamp).all()
+        session.close()
+        kept_hours = [int((row.timestamp - old_start).total_seconds() // 3600) for row in kept]
+        # Primera fila, cambio a PAUSE, vuelta a OPERATE y última de cada día
+        assert kept_hours == [0, 23, 30, 40, 47]
+        assert result['downsampled'] == 48 - 5
+
+        assert asyncio.run(self.repo.prune_decision_history(now)) == {'expired': 0, 'downsampled': 0}
+
+
+def test_downsample_keeps_changes_and_last_of_day():
+    day = datetime(2026, 1, 1)
+    rows = [
+        (1, 'A', day),
+        (2, 'A', day + timedelta(hours=1)),
+        (3, 'B', day + timedelta(hours=2)),
+        (4, 'B', day + timedelta(hours=3)),
+        (5, 'B', day + timedelta(hours=4)),
+        (6, 'B', day + timedelta(days=1)),
+    ]
+
+    assert downsample_history(rows) == [2, 4]
@@ -0,0 +1,180 @@
+"""
+Pruebas para el gateway compartido de peticiones a Binance.
+"""
+import time
+
+import pytest
+
+from shared.exchange import ExchangeGateway, RequestLane, request_weight
+
+
+class RateLimitExceeded(Exception):
+    """Mismo nombre que la excepción de ccxt para el 429."""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeExchange:
+    """Cliente ccxt mínimo que registra las llamadas."""
+
+    def __init__(self):
+        self.enableRateLimit = True
+        self.last_response_headers = {}
+        self.markets = None
+        self.calls = []
+        self.error = None
+
+    def fetch_open_orders(self, symbol=None):
+        self.calls.append(('fetch_open_orders', symbol))
+        if self.error:
+            raise self.error
+        return []
+
+    def load_markets(self, reload=False):
+        self.calls.append(('load_markets', reload))
+        self.markets = {'ETH/USDT': {}}
+        return self.markets
+
+    def create_order(self, symbol, type, side, amount, price=None):
+        self.calls.append(('create_order', symbol))
+        return {'id': str(len(self.calls))}
+
+    def milliseconds(self):
+        return 42
+
+
+class TestRequestWeights:
+    """Pruebas de la tabla de pesos por endpoint."""
+
+    def test_symbol_changes_weight(self):
+        assert request_weight('fetch_open_orders') == 80
+        assert request_weight('fetch_open_orders', ('ETH/USDT',)) == 6
+        assert request_weight('fetch_open_orders', (), {'symbol': 'ETH/USDT'}) == 6
+        assert request_weight('fetch_tickers') == 80
+        assert request_weight('fetch_tickers', (['ETH/USDT'],)) == 2
+
+    def test_order_book_weight_depends_on_limit(self):
+        assert request_weight('fetch_order_book', ('ETH/USDT',)) == 5
+        assert request_weight('fetch_order_book', ('ETH/USDT', 1000)) == 50
+
+    def test_unknown_methods_use_default_weight(self):
+        assert request_weight('fetch_deposits') == 5
+
+
+class TestExchangeGateway:
+    """Pruebas del cubo de peso, los carriles y la realimentación de Binance."""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.exchange = FakeExchange()
+        self.gateway = ExchangeGateway(self.exchange, weight_limit=1000, budget_fraction=1.0, clock=self.clock)
+
+    def test_disables_ccxt_rate_limiter(self):
+        assert self.exchange.enableRateLimit is False
+
+    def test_lanes_keep_their_reserve(self):
+        # Queda el 40 % del presupuesto
+        assert self.gateway.try_acquire(600, RequestLane.TRADING)
+
+        assert not self.gateway.try_acquire(5, RequestLane.STATS)         # Reserva 50 %
+        assert self.gateway.try_acquire(5, RequestLane.MARKET_DATA)       # Reserva 25 %
+        assert self.gateway.try_acquire(395, RequestLane.RISK)            # Sin reserva
+        assert not self.gateway.try_acquire(1, RequestLane.RISK)
+
+        self.clock.now += 60
+        assert self.gateway.available == pytest.approx(1000)
+        assert self.gateway.try_acquire(5, RequestLane.STATS)
+
+    def test_used_weight_header_syncs_budget(self):
+        self.exchange.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '900'}
+
+        self.gateway.client().fetch_open_orders('ETH/USDT')
+
+        assert self.gateway.stats['used_weight_1m'] == 900
+        assert self.gateway.available == pytest.approx(100)
+        assert not self.gateway.try_acquire(5, RequestLane.MARKET_DATA)
+
+    def test_stale_used_weight_header_never_raises_budget(self):
+        self.gateway.try_acquire(700, RequestLane.RISK)
+        # Cabecera de una respuesta anterior (u otro hilo) con menos peso usado
+        self.exchange.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '10'}
+
+        self.gateway.client().fetch_open_orders('ETH/USDT')
+
+        assert self.gateway.available == pytest.approx(1000 - 700 - 6)
+
+    def test_rate_limit_blocks_all_lanes_until_retry_after(self):
+        self.exchange.error = RateLimitExceeded("429 Too Many Requests")
+        self.exchange.error.headers = {'Retry-After': '30'}
+        # La cabecera compartida puede ser de otra respuesta: no se usa
+        self.exchange.last_response_headers = {'Retry-After': '5'}
+
+        with pytest.raises(RateLimitExceeded):
+            self.gateway.client().fetch_open_orders('ETH/USDT')
+
+        assert self.gateway.stats['rate_limited'] == 1
+        self.clock.now += 29
+        assert not self.gateway.try_acquire(1, RequestLane.RISK)
+        self.clock.now += 2
+        assert self.gateway.try_acquire(1, RequestLane.RISK)
+
+    def test_ip_ban_waits_until_time_in_message(self):
+        banned_until = int((time.time() + 120) * 1000)
+        self.exchange.error = RateLimitExceeded(
+            f'binance {{"code":-1003,"msg":"Way too much request weight used; IP banned until {banned_until}."}}'
+        )
+
+        with pytest.raises(RateLimitExceeded):
+            self.gateway.client().fetch_open_orders('ETH/USDT')
+
+        self.clock.now += 115
+        assert not self.gateway.try_acquire(1, RequestLane.RISK)
+        self.clock.now += 10
+        assert self.gateway.try_acquire(1, RequestLane.RISK)
+
+    def test_client_routes_requests_and_passes_other_attributes(self):
+        client = self.gateway.client()
+
+        client.fetch_open_orders()
+        assert client.milliseconds() == 42
+        client.load_markets()
+        client.load_markets()  # Mercados en memoria: sin petición ni peso
+
+        assert self.gateway.stats['requests'] == 2
+        assert self.gateway.stats['weight'] == 80 + 20
+        assert self.exchange.calls.count(('load_markets', False)) == 2
+
+    def test_order_slot_is_taken_after_waiting_for_weight(self):
+        # Sin peso libre: la orden espera a que se reponga el cubo
+        gateway = ExchangeGateway(FakeExchange(), weight_limit=60, budget_fraction=1.0, clock=self.clock,
+                                  order_limit=1, order_interval=10)
+        gateway.try_acquire(60, RequestLane.RISK)
+        gateway._condition.wait = lambda timeout: setattr(self.clock, 'now', self.clock.now + timeout)
+        start = self.clock.now
+
+        gateway.client().create_order('ETH/USDT', 'limit', 'buy', 1, 2000)
+
+        assert self.clock.now - start > 5
+        # La ventana de órdenes empieza al enviar, no al llegar a la cola
+        assert gateway._order_times[0] == self.clock.now
+
+    def test_new_orders_wait_for_order_window(self):
+        gateway = ExchangeGateway(FakeExchange(), budget_fraction=1.0, order_limit=3, order_interval=0.2)
+        client = gateway.client()
+
+        start = time.monotonic()
+        for _ in range(3):
+            client.create_order('ETH/USDT', 'limit', 'buy', 1, 2000)
+        assert time.monotonic() - start < 0.1
+
+        client.create_order('ETH/USDT', 'limit', 'buy', 1, 2000)
+        assert time.monotonic() - start >= 0.2
+        # Las consultas no cuentan para el límite de órdenes
+        client.fetch_open_orders('ETH/USDT')
+        assert len(gateway._order_times) == 1
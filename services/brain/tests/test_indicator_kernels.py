@@ -0,0 +1,94 @@
+"""
+Tests de paridad de los kernels vectorizados de indicadores.
+
+El motor incremental ya se valida contra las fórmulas de pandas-ta en
+test_streaming_indicators.py; aquí los kernels se comparan con él y, si
+pandas-ta está instalado, directamente con pandas-ta.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.indicator_kernels import compute_indicators
+from app.infrastructure.streaming_indicators import INDICATOR_NAMES, StreamingIndicatorEngine
+
+TOLERANCE = 1e-8
+
+
+def make_batch(pairs=4, n=700, seed=11):
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, (pairs, n)), axis=1)) * rng.uniform(1, 3000, (pairs, 1))
+    spread = close * rng.uniform(0.001, 0.02, (pairs, n))
+    high = close + spread * rng.uniform(0, 1, (pairs, n))
+    low = close - spread * rng.uniform(0, 1, (pairs, n))
+    return high, low, close
+
+
+def streaming_reference(high, low, close):
+    engine = StreamingIndicatorEngine()
+    rows = [engine.update(t, h, l, c) for t, (h, l, c) in enumerate(zip(high, low, close))]
+    return {name: np.array([row[name] for row in rows]) for name in INDICATOR_NAMES}
+
+
+def assert_row_parity(actual, expected, row):
+    for name in INDICATOR_NAMES:
+        np.testing.assert_array_equal(
+            np.isnan(actual[name][row]), np.isnan(expected[name]), err_msg=f"{name} fila {row}"
+        )
+        np.testing.assert_allclose(
+            actual[name][row], expected[name], rtol=TOLERANCE, equal_nan=True, err_msg=f"{name} fila {row}"
+        )
+
+
+class TestIndicatorKernels:
+    """Paridad de los kernels sobre matrices (pares × tiempo)."""
+
+    def test_batch_matches_per_pair_streaming(self):
+        high, low, close = make_batch()
+        indicators = compute_indicators(high, low, close)
+
+        for row in range(close.shape[0]):
+            assert_row_parity(indicators, streaming_reference(high[row], low[row], close[row]), row)
+
+    def test_left_padded_rows_match_their_valid_history(self):
+        high, low, close = make_batch(pairs=2, n=400)
+        # El segundo par solo tiene historial desde la vela 120
+        for array in (high, low, close):
+            array[1, :120] = np.nan
+
+        indicators = compute_indicators(high, low, close)
+
+        expected = streaming_reference(high[1, 120:], low[1, 120:], close[1, 120:])
+        for name in INDICATOR_NAMES:
+            assert np.isnan(indicators[name][1, :120]).all()
+            np.testing.assert_allclose(indicators[name][1, 120:], expected[name], rtol=TOLERANCE, equal_nan=True)
+
+    def test_one_dimensional_input(self):
+        high, low, close = make_batch(pairs=1)
+        indicators = compute_indicators(high[0], low[0], close[0])
+
+        assert indicators['ADX_14'].shape == close[0].shape
+        assert_row_parity({name: values[None] for name, values in indicators.items()},
+                          streaming_reference(high[0], low[0], close[0]), 0)
+
+    def test_matches_pandas_ta(self):
+        ta = pytest.importorskip('pandas_ta')
+        high, low, close = make_batch(pairs=2)
+        indicators = compute_indicators(high, low, close)
+
+        for row in range(close.shape[0]):
+            h, l, c = pd.Series(high[row]), pd.Series(low[row]), pd.Series(close[row])
+            bbands = ta.bbands(c, length=20, std=2)
+            macd = ta.macd(c)
+            expected = {
+                'ADX_14': ta.adx(h, l, c, length=14)['ADX_14'].to_numpy(),
+                'bb_width': ((bbands['BBU_20_2.0'] - bbands['BBL_20_2.0']) / bbands['BBM_20_2.0']).to_numpy(),
+                'SMA_30': ta.sma(c, length=30).to_numpy(), 'SMA_150': ta.sma(c, length=150).to_numpy(),
+                'RSI_14': ta.rsi(c, length=14).to_numpy(),
+                'MACD_12_26_9': macd['MACD_12_26_9'].to_numpy(),
+                'MACDs_12_26_9': macd['MACDs_12_26_9'].to_numpy(),
+                'MACDh_12_26_9': macd['MACDh_12_26_9'].to_numpy(),
+                'EMA_21': ta.ema(c, length=21).to_numpy(), 'EMA_50': ta.ema(c, length=50).to_numpy(),
+            }
+            assert_row_parity(indicators, expected, row)
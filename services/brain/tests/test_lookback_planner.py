@@ -0,0 +1,53 @@
+"""
+Pruebas del planificador de historial para indicadores.
+"""
+import numpy as np
+
+from app.domain.entities import last_closed_candle
+from app.infrastructure.lookback_planner import (
+    INDICATOR_LOOKBACK, indicator_bars, lookback_since, required_bars
+)
+from app.infrastructure.streaming_indicators import INDICATOR_NAMES, StreamingIndicatorEngine
+
+H4 = 4 * 3_600_000
+D1 = 24 * 3_600_000
+
+
+def run_engine(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    engine = StreamingIndicatorEngine()
+    rows = [engine.update(i * H4, c * 1.01, c * 0.99, c) for i, c in enumerate(close)]
+    return {name: np.array([row[name] for row in rows]) for name in INDICATOR_NAMES}
+
+
+class TestLookbackPlanner:
+    """Pruebas de las velas mínimas por indicador."""
+
+    def test_warmup_table_matches_engine(self):
+        columns = run_engine(300)
+
+        assert set(INDICATOR_LOOKBACK) == set(INDICATOR_NAMES)
+        for name, values in columns.items():
+            first_valid = int(np.argmax(~np.isnan(values))) + 1
+            assert INDICATOR_LOOKBACK[name].warmup == first_valid, name
+
+    def test_window_indicators_need_only_their_window(self):
+        assert indicator_bars('SMA_150', 0.01) == 150
+        assert required_bars(['ADX_14', 'bb_width'], tolerance=1.0) == 28
+
+    def test_recursive_indicators_converge_within_tolerance(self):
+        # EMA_50: 50 velas de semilla + log(0.01) / log(49/51)
+        assert indicator_bars('EMA_50', 0.01) == 50 + 116
+        assert required_bars(tolerance=0.01) == 166
+        assert required_bars(tolerance=0.001) > required_bars(tolerance=0.01)
+
+    def test_since_covers_exactly_the_required_closed_candles(self):
+        now = 1_000 * D1 + 5 * 3_600_000 + 123
+
+        since_4h = lookback_since('4h', now, 166)
+        since_1d = lookback_since('1d', now, 166)
+
+        assert (last_closed_candle('4h', now) - since_4h) // H4 + 1 == 166
+        assert (last_closed_candle('1d', now) - since_1d) // D1 + 1 == 166
+        assert since_1d % D1 == 0
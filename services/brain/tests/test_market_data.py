@@ -0,0 +1,33 @@
+"""
+Pruebas para la entidad columnar MarketData.
+"""
+import numpy as np
+
+from app.domain.entities import MarketData
+
+
+def _market_data():
+    candles = np.array([[0, 1.0, 2.0, 0.5, 1.5, 10.0], [1, 1.5, 3.0, 1.0, 2.5, 12.0]])
+    return MarketData(
+        pair='ETH/USDT',
+        timeframe='4h',
+        timestamps=candles[:, 0].astype(np.int64),
+        columns={name: candles[:, i + 1] for i, name in enumerate(('open', 'high', 'low', 'close', 'volume'))}
+    )
+
+
+def test_latest_reads_last_row_without_copies():
+    market_data = _market_data()
+
+    assert market_data.latest('close') == 2.5
+    assert market_data.latest_timestamp == 1
+    assert market_data.shape == (2, 5)
+    assert market_data.column('close').base is market_data.column('open').base
+
+
+def test_latest_maps_nan_and_missing_to_none():
+    market_data = _market_data().with_columns(ADX_14=np.array([20.0, np.nan]))
+
+    assert market_data.latest('ADX_14') is None
+    assert market_data.latest('RSI_14') is None
+    assert market_data.column('ADX_14')[0] == 20.0
@@ -0,0 +1,136 @@
+"""
+Pruebas para el análisis bajo demanda con caché y coalescencia.
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+from app.application.batch_analysis_use_case import STRATEGY_TIMEFRAMES, BatchAnalysisUseCase
+from app.application.on_demand_analysis_use_case import OnDemandAnalysisUseCase
+from app.domain.entities import BotType, TradingRecipe, last_closed_candle
+from app.domain.interfaces import MarketDataRepository, RecipeRepository
+
+
+class TestOnDemandAnalysis:
+    """Pruebas de caché por vela, coalescencia e invalidación."""
+
+    def setup_method(self):
+        self.market_data_repo = Mock(spec=MarketDataRepository)
+        self.market_data_repo.get_sentiment_watermark = AsyncMock(return_value='wm-1')
+        self.recipe = TradingRecipe(
+            pair='ETH/USDT',
+            name='Receta ETH',
+            conditions={'adx_threshold': 30},
+            grid_config={'levels': 30},
+            description='Prueba'
+        )
+        self.recipe_repo = Mock(spec=RecipeRepository)
+        self.recipe_repo.get_recipe = AsyncMock(side_effect=lambda pair, bot_type: self.recipe)
+        self.batch = Mock(spec=BatchAnalysisUseCase)
+        self.batch.analyze_pair = AsyncMock(side_effect=self._fake_analyze_pair)
+        self.candle_lag = 0
+        self.fail = False
+        self.use_case = OnDemandAnalysisUseCase(
+            batch_analysis_use_case=self.batch,
+            market_data_repo=self.market_data_repo,
+            recipe_repo=self.recipe_repo,
+            timeout=1.0
+        )
+
+    async def _fake_analyze_pair(self, pair, strategies, observed):
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("exchange caído")
+        bot_type = strategies[0]
+        timeframe = STRATEGY_TIMEFRAMES[bot_type]
+        expected = last_closed_candle(timeframe, int(time.time() * 1000))
+        observed[bot_type] = expected - self.candle_lag
+        decision = Mock()
+        decision.success = True
+        decision.decision.value = 'OPERATE'
+        decision.to_dict.return_value = {'pair': pair, 'decision': 'OPERATE'}
+        return [decision]
+
+    def _grid(self):
+        return self.use_case.execute('ETH/USDT', [BotType.GRID])
+
+    def test_second_request_is_served_from_cache(self):
+        first = asyncio.run(self._grid())
+        second = asyncio.run(self._grid())
+
+        assert self.batch.analyze_pair.await_count == 1
+        assert first['analyses']['GRID']['cached'] is False
+        assert second['analyses']['GRID']['cached'] is True
+        assert second['analyses']['GRID']['decision'] == {'pair': 'ETH/USDT', 'decision': 'OPERATE'}
+        assert second['analyses']['GRID']['recipe_version'] == self.recipe.version
+
+    def test_concurrent_requests_share_one_computation(self):
+        async def burst():
+            return await asyncio.gather(*(self._grid() for _ in range(5)))
+
+        results = asyncio.run(burst())
+
+        assert self.batch.analyze_pair.await_count == 1
+        assert self.use_case.stats['coalesced'] == 4
+        assert all(result['analyses']['GRID']['status'] == 'success' for result in results)
+
+    def test_new_sentiment_invalidates_cache(self):
+        asyncio.run(self._grid())
+        self.market_data_repo.get_sentiment_watermark.return_value = 'wm-2'
+        result = asyncio.run(self._grid())
+
+        assert self.batch.analyze_pair.await_count == 2
+        assert result['analyses']['GRID']['cached'] is False
+
+    def test_recipe_change_invalidates_cache(self):
+        asyncio.run(self._grid())
+        self.recipe = TradingRecipe(
+            pair='ETH/USDT',
+            name='Receta ETH',
+            conditions={'adx_threshold': 25},
+            grid_config={'levels': 30},
+            description='Prueba'
+        )
+        asyncio.run(self._grid())
+
+        assert self.batch.analyze_pair.await_count == 2
+
+    def test_stale_candle_and_unknown_sentiment_are_not_cached(self):
+        self.candle_lag = 1
+        asyncio.run(self._grid())
+        asyncio.run(self._grid())
+        assert self.batch.analyze_pair.await_count == 2
+
+        self.candle_lag = 0
+        self.market_data_repo.get_sentiment_watermark.return_value = None
+        asyncio.run(self._grid())
+        asyncio.run(self._grid())
+        assert self.batch.analyze_pair.await_count == 4
+
+    def test_errors_are_reported_and_not_cached(self):
+        self.fail = True
+        result = asyncio.run(self._grid())
+        assert result['analyses']['GRID']['status'] == 'error'
+
+        self.fail = False
+        result = asyncio.run(self._grid())
+        assert result['analyses']['GRID']['status'] == 'success'
+        assert self.batch.analyze_pair.await_count == 2
+
+    def test_batch_request_reads_sentiment_once(self):
+        results = asyncio.run(self.use_case.execute_many(['ETH/USDT', 'BTC/USDT']))
+
+        assert set(results) == {'ETH/USDT', 'BTC/USDT'}
+        assert set(results['BTC/USDT']['analyses']) == {'GRID', 'TREND'}
+        self.market_data_repo.get_sentiment_watermark.assert_awaited_once()
+
+
+class TestResolvePair:
+    """Pruebas de normalización de pares recibidos por la API."""
+
+    def test_accepts_common_spellings(self):
+        for raw in ('ETH/USDT', 'eth-usdt', 'ETHUSDT', ' eth_usdt '):
+            assert OnDemandAnalysisUseCase.resolve_pair(raw) == 'ETH/USDT'
+
+    def test_unknown_pair(self):
+        assert OnDemandAnalysisUseCase.resolve_pair('FOO/USDT') is None
@@ -0,0 +1,145 @@
+"""
+Pruebas para el universo dinámico de pares.
+"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from app.application.batch_analysis_use_case import BatchAnalysisUseCase
+from app.application.pair_universe_use_case import PairUniverseUseCase
+from app.domain.entities import BotType, TickerStats
+from app.domain.interfaces import DecisionRepository, MarketDataRepository, NotificationService, RecipeRepository
+from app.infrastructure.recipe_repository import InMemoryRecipeRepository
+
+
+def _ticker(pair, volume, last=100.0, high=104.0, low=98.0, bid=99.99, ask=100.01, change=2.0):
+    return TickerStats(
+        pair=pair, last=last, quote_volume=volume, high=high, low=low, bid=bid, ask=ask, change_percent=change
+    )
+
+
+class TestPairUniverse:
+    """Pruebas de selección por volumen y pre-filtro de tickers."""
+
+    def setup_method(self):
+        self.market_data_repo = Mock(spec=MarketDataRepository)
+        self.market_data_repo.fetch_tickers = AsyncMock(return_value=[
+            _ticker('ETH/USDT', 900e6),
+            _ticker('SOL/USDT', 800e6),
+            _ticker('USDC/USDT', 700e6),             # Stablecoin
+            _ticker('BTCUP/USDT', 600e6),            # Token apalancado
+            _ticker('JUP/USDT', 500e6),
+            _ticker('FLAT/USDT', 400e6, high=100.5, low=99.8),  # Rango 24h < 2%
+            _ticker('PUMP/USDT', 300e6, change=40.0),           # Tendencia fuerte
+            _ticker('WIDE/USDT', 200e6, bid=99.0, ask=101.0),   # Spread 2%
+            _ticker('THIN/USDT', 1e6),                          # Poco volumen (fuera del top N)
+            _ticker('LATE/USDT', 100e6),                        # Fuera del top N
+        ])
+        self.use_case = PairUniverseUseCase(
+            market_data_repo=self.market_data_repo,
+            mode='dynamic',
+            top_n=6,
+            core_pairs=['ETH/USDT', 'AVAX/USDT']
+        )
+
+    def test_dynamic_universe_keeps_survivors_and_core_pairs(self):
+        universe = asyncio.run(self.use_case.execute())
+
+        assert list(universe) == ['ETH/USDT', 'AVAX/USDT', 'SOL/USDT', 'JUP/USDT']
+        assert universe['ETH/USDT'] == [BotType.GRID, BotType.TREND]
+        assert universe['AVAX/USDT'] == [BotType.GRID, BotType.TREND]
+        assert universe['SOL/USDT'] == [BotType.GRID]
+        assert self.use_case.stats['top'] == 6
+        self.market_data_repo.fetch_tickers.assert_awaited_once_with('USDT')
+
+    def test_failed_ticker_request_keeps_previous_universe(self):
+        asyncio.run(self.use_case.execute())
+        self.market_data_repo.fetch_tickers.return_value = []
+
+        universe = asyncio.run(self.use_case.execute())
+
+        assert 'SOL/USDT' in universe
+        assert self.use_case.pairs == list(universe)
+
+    def test_static_mode_does_not_query_tickers(self):
+        self.use_case.mode = 'static'
+
+        universe = asyncio.run(self.use_case.execute())
+
+        assert list(universe) == ['ETH/USDT', 'AVAX/USDT']
+        self.market_data_repo.fetch_tickers.assert_not_awaited()
+
+
+class TestBatchWithUniverse:
+    """Pruebas del batch sobre el universo seleccionado."""
+
+    def test_batch_runs_only_the_strategies_of_each_pair(self):
+        market_data_repo = Mock(spec=MarketDataRepository)
+        market_data_repo.get_sentiment_watermark = AsyncMock(return_value='wm-1')
+        decision_repo = Mock(spec=DecisionRepository)
+        decision_repo.save_decisions = AsyncMock(return_value=[])
+        decision_repo.prune_decision_history = AsyncMock(return_value={'expired': 0, 'downsampled': 0})
+        universe = Mock(spec=PairUniverseUseCase)
+        universe.execute = AsyncMock(return_value={
+            'ETH/USDT': [BotType.GRID, BotType.TREND],
+            'SOL/USDT': [BotType.GRID]
+        })
+        use_case = BatchAnalysisUseCase(
+            market_data_repo=market_data_repo,
+            decision_repo=decision_repo,
+            recipe_repo=Mock(spec=RecipeRepository),
+            notification_service=Mock(spec=NotificationService),
+            pair_universe=universe
+        )
+        calls = {}
+
+        async def fake_analyze_pair(pair, strategies=None):
+            calls[pair] = strategies
+            return [Mock()]
+
+        use_case._analyze_pair = fake_analyze_pair
+        result = asyncio.run(use_case.execute())
+
+        assert calls == {'ETH/USDT': [BotType.GRID, BotType.TREND], 'SOL/USDT': [BotType.GRID]}
+        assert result['total_pairs'] == 2
+
+    def test_failed_cycle_reports_universe_size(self):
+        market_data_repo = Mock(spec=MarketDataRepository)
+        market_data_repo.get_sentiment_watermark = AsyncMock(side_effect=RuntimeError("BD caída"))
+        notification = Mock(spec=NotificationService)
+        notification.notify_error = AsyncMock(return_value=True)
+        universe = Mock(spec=PairUniverseUseCase)
+        universe.pairs = [f"COIN{i}/USDT" for i in range(150)]
+        universe.execute = AsyncMock(return_value={pair: [BotType.GRID] for pair in universe.pairs})
+        use_case = BatchAnalysisUseCase(
+            market_data_repo=market_data_repo,
+            decision_repo=Mock(spec=DecisionRepository),
+            recipe_repo=Mock(spec=RecipeRepository),
+            notification_service=notification,
+            pair_universe=universe
+        )
+
+        result = asyncio.run(use_case.execute())
+
+        assert result['status'] == 'error'
+        assert result['total_pairs'] == result['failed_pairs'] == 150
+
+
+class TestDefaultRecipe:
+    """Pruebas de la receta GRID por defecto."""
+
+    def test_pairs_without_master_recipe_use_template(self):
+        template = {'name': 'Por defecto', 'conditions': {'adx_threshold': 22}, 'grid_config': {'grid_levels': 20}}
+        repo = InMemoryRecipeRepository(recipes_file='', default_grid_recipe=template)
+
+        recipe = asyncio.run(repo.get_recipe('SOL/USDT', BotType.GRID))
+        master = asyncio.run(repo.get_recipe('ETH/USDT', BotType.GRID))
+
+        assert recipe.pair == 'SOL/USDT'
+        assert recipe.get_thresholds().adx_threshold == 22
+        assert master.conditions['adx_threshold'] == 30
+        assert asyncio.run(repo.get_recipe('SOL/USDT', BotType.TREND)) is None
+
+    def test_without_template_unknown_pairs_have_no_recipe(self):
+        repo = InMemoryRecipeRepository(recipes_file='')
+
+        assert asyncio.run(repo.get_recipe('SOL/USDT', BotType.GRID)) is None
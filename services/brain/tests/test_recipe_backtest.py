@@ -0,0 +1,138 @@
+"""
+Tests del backtest vectorizado de recetas GRID.
+
+La regla vectorizada debe coincidir vela a vela con
+`AnalyzePairUseCase._make_decision`, y las métricas deben aplicar cada
+decisión a la vela siguiente (sin mirar al futuro).
+"""
+
+from unittest.mock import Mock
+
+import numpy as np
+
+from app.application.analyze_pair_use_case import AnalyzePairUseCase
+from app.domain.entities import BotType, DecisionType, MarketData, MarketIndicators, TradingRecipe
+from app.domain.interfaces import DecisionRepository, MarketDataRepository, RecipeRepository
+from app.infrastructure.candle_cache import timeframe_to_ms
+from app.infrastructure.recipe_backtest import (
+    NO_DATA, OPERATE, PAUSE, evaluate_decisions, grid_decisions, grid_pnl_proxy, run_recipe_backtest
+)
+
+CANDLE_MS = timeframe_to_ms('4h')
+
+
+def make_recipe(adx=25.0, volatility=0.02, sentiment=-0.2):
+    return TradingRecipe(
+        pair='ETH/USDT',
+        name='Test',
+        conditions={'adx_threshold': adx, 'bollinger_bandwidth_threshold': volatility, 'sentiment_threshold': sentiment},
+        grid_config={},
+        description='Receta de test',
+        bot_type=BotType.GRID
+    )
+
+
+def make_market_data(n=600, seed=5, with_sentiment=True):
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, n))) * 2000.0
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = close * rng.uniform(0.002, 0.02, n)
+    columns = {
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': np.ones(n)
+    }
+    if with_sentiment:
+        columns['sentiment_promedio'] = rng.uniform(-0.6, 0.6, n)
+    return MarketData(
+        pair='ETH/USDT', timeframe='4h', timestamps=np.arange(n, dtype=np.int64) * CANDLE_MS, columns=columns
+    )
+
+
+class TestGridDecisions:
+    """Tests de la regla GRID vectorizada."""
+
+    def setup_method(self):
+        self.use_case = AnalyzePairUseCase(
+            market_data_repo=Mock(spec=MarketDataRepository),
+            decision_repo=Mock(spec=DecisionRepository),
+            recipe_repo=Mock(spec=RecipeRepository)
+        )
+        self.recipe = make_recipe()
+
+    def test_matches_live_rule(self):
+        rng = np.random.default_rng(3)
+        adx = rng.uniform(10, 40, 500)
+        bb_width = rng.uniform(0, 0.05, 500)
+        sentiment = rng.uniform(-0.5, 0.5, 500)
+        sentiment[::7] = np.nan
+
+        decisions = grid_decisions(adx, bb_width, sentiment, 25.0, 0.02, -0.2)
+
+        for i in range(500):
+            indicators = MarketIndicators(
+                adx=adx[i], volatility=bb_width[i], sentiment=None if np.isnan(sentiment[i]) else sentiment[i]
+            )
+            expected = self.use_case._make_decision(indicators, self.recipe)
+            assert decisions[i] == (OPERATE if expected == DecisionType.OPERATE else PAUSE)
+
+    def test_warmup_is_no_data(self):
+        adx = np.array([np.nan, 20.0, 20.0])
+        bb_width = np.array([0.03, np.nan, 0.03])
+        decisions = grid_decisions(adx, bb_width, np.full(3, np.nan), 25.0, 0.02, -0.2)
+        assert decisions.tolist() == [NO_DATA, NO_DATA, OPERATE]
+
+    def test_thresholds_broadcast_over_recipes(self):
+        adx = np.array([10.0, 20.0, 30.0])
+        bb_width = np.full(3, 0.03)
+        sentiment = np.zeros(3)
+        decisions = grid_decisions(adx, bb_width, sentiment, np.array([[15.0], [25.0]]), 0.02, -0.2)
+        assert decisions.shape == (2, 3)
+        assert decisions.tolist() == [[OPERATE, PAUSE, PAUSE], [OPERATE, OPERATE, PAUSE]]
+
+
+class TestEvaluateDecisions:
+    """Tests de las métricas del backtest."""
+
+    def test_metrics_apply_decision_to_next_candle(self):
+        decisions = np.array([NO_DATA, OPERATE, OPERATE, PAUSE, OPERATE, PAUSE], dtype=np.int8)
+        pnl = np.array([100.0, 1.0, 2.0, 4.0, 8.0, 16.0])
+
+        metrics = evaluate_decisions(decisions, pnl, CANDLE_MS)
+
+        assert metrics['evaluated_candles'] == 5
+        assert metrics['operate_fraction'] == 3 / 5
+        assert metrics['flips'] == 3
+        assert metrics['avg_operate_run'] == 1.5
+        # OPERAR en t=1, 2 y 4 cobra las velas 2, 3 y 5; la vela 0 de calentamiento no cuenta
+        assert metrics['pnl_proxy'] == 2.0 + 4.0 + 16.0
+        assert metrics['pnl_proxy_always_on'] == 2.0 + 4.0 + 8.0 + 16.0
+
+    def test_pnl_proxy_rewards_range_and_penalizes_trend(self):
+        pnl = grid_pnl_proxy(
+            np.array([100.0, 100.0]), np.array([102.0, 105.0]), np.array([98.0, 100.0]), np.array([100.0, 105.0])
+        )
+        np.testing.assert_allclose(pnl, [0.04, -0.05])
+
+
+class TestRunRecipeBacktest:
+    """Tests del backtest completo sobre un historial."""
+
+    def test_run_on_history(self):
+        market_data = make_market_data()
+
+        result = run_recipe_backtest(market_data, make_recipe())
+
+        assert result.pair == 'ETH/USDT'
+        assert result.candles == 600
+        assert 0 < result.evaluated_candles < 600
+        assert abs(result.operate_fraction + result.pause_fraction - 1.0) < 1e-12
+        assert result.thresholds['adx_threshold'] == 25.0
+        assert result.to_dict()['start'] == result.start.isoformat()
+
+    def test_missing_sentiment_never_blocks(self):
+        with_neutral = run_recipe_backtest(make_market_data(with_sentiment=False), make_recipe(sentiment=0.99))
+        without_filter = run_recipe_backtest(make_market_data(with_sentiment=False), make_recipe(sentiment=-1.0))
+        assert with_neutral.operate_fraction == without_filter.operate_fraction
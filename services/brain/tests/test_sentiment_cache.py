@@ -0,0 +1,83 @@
+"""
+Tests de la caché compartida de sentimiento.
+"""
+
+import threading
+import time
+
+from app.infrastructure.sentiment_cache import SentimentCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, start_day, end_day):
+        self.calls.append((start_day, end_day))
+        time.sleep(self.delay)
+        return {day: day / 1000 for day in range(start_day, end_day + 1)}
+
+
+class TestSentimentCache:
+    """Una carga por rango y ciclo, reutilizada por todos los pares."""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.loader = CountingLoader()
+        self.cache = SentimentCache(ttl=3600, clock=self.clock)
+
+    def test_same_range_is_loaded_once(self):
+        for _ in range(10):
+            daily = self.cache.get_daily(100, 140, self.loader)
+
+        assert self.loader.calls == [(100, 140)]
+        assert sorted(daily) == list(range(100, 141))
+
+    def test_sub_range_is_served_from_wider_entry(self):
+        self.cache.get_daily(100, 300, self.loader)
+
+        daily = self.cache.get_daily(260, 299, self.loader)
+
+        assert self.loader.calls == [(100, 300)]
+        assert sorted(daily) == list(range(260, 300))
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.get_daily(100, 140, self.loader)
+        self.clock.now = 3599
+        self.cache.get_daily(100, 140, self.loader)
+        self.clock.now = 3600
+        self.cache.get_daily(100, 140, self.loader)
+
+        assert len(self.loader.calls) == 2
+
+    def test_concurrent_requests_share_one_load(self):
+        loader = CountingLoader(delay=0.05)
+        cache = SentimentCache(ttl=3600)
+        threads = [threading.Thread(target=cache.get_daily, args=(100, 140, loader)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loader.calls == [(100, 140)]
+
+    def test_failed_load_is_not_cached(self):
+        def failing_loader(start_day, end_day):
+            raise RuntimeError("db caída")
+
+        try:
+            self.cache.get_daily(100, 140, failing_loader)
+        except RuntimeError:
+            pass
+        self.cache.get_daily(100, 140, self.loader)
+
+        assert self.loader.calls == [(100, 140)]
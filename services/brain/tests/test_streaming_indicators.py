@@ -0,0 +1,259 @@
+"""
+Tests de paridad del motor de indicadores incremental.
+
+Las referencias en pandas reproducen las fórmulas de pandas-ta 0.3.14b; si
+pandas-ta está instalado también se compara directamente contra él.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.indicator_pool import IndicatorProcessPool
+from app.infrastructure.streaming_indicators import (
+    INDICATOR_NAMES, StreamingIndicatorCache, StreamingIndicatorEngine, warm_indicator_series
+)
+
+TOLERANCE = 1e-8
+H4_MS = 4 * 3_600_000
+
+
+def make_candles(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = close * rng.uniform(0.001, 0.02, n)
+    high = close + spread * rng.uniform(0, 1, n)
+    low = close - spread * rng.uniform(0, 1, n)
+    timestamps = np.arange(n, dtype=np.int64) * H4_MS
+    return timestamps, high, low, close
+
+
+def run_engine(timestamps, high, low, close, engine=None):
+    engine = engine or StreamingIndicatorEngine()
+    rows = [engine.update(t, h, l, c) for t, h, l, c in zip(timestamps, high, low, close)]
+    return engine, {name: np.array([row[name] for row in rows]) for name in INDICATOR_NAMES}
+
+
+def _rma(series, length):
+    return series.ewm(alpha=1 / length, min_periods=length).mean()
+
+
+def _ema(series, length):
+    series = series.copy()
+    first = series.first_valid_index()
+    seed = series.loc[first:].iloc[:length].mean()
+    series.loc[:first + length - 2] = np.nan
+    series.loc[first + length - 1] = seed
+    return series.ewm(span=length, adjust=False).mean()
+
+
+def reference_indicators(high, low, close):
+    """Fórmulas de pandas-ta 0.3.14b escritas con pandas."""
+    high, low, close = pd.Series(high), pd.Series(low), pd.Series(close)
+    prev_close = close.shift(1)
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (prev_close - low).abs()], axis=1).max(axis=1)
+    true_range.iloc[0] = np.nan
+    up, down = high - high.shift(1), low.shift(1) - low
+    pos = up.where((up > down) & (up > 0), 0.0)
+    neg = down.where((down > up) & (down > 0), 0.0)
+    pos.iloc[0] = neg.iloc[0] = np.nan
+    k = 100 / _rma(true_range, 14)
+    dmp, dmn = k * _rma(pos, 14), k * _rma(neg, 14)
+    adx = _rma(100 * (dmp - dmn).abs() / (dmp + dmn), 14)
+
+    mid = close.rolling(20).mean()
+    std = close.rolling(20).std(ddof=0)
+    bb_width = ((mid + 2 * std) - (mid - 2 * std)) / mid
+
+    diff = close.diff()
+    gain, loss = _rma(diff.clip(lower=0), 14), _rma(diff.clip(upper=0), 14)
+    rsi = 100 * gain / (gain + loss.abs())
+
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(macd, 9)
+
+    return {
+        'ADX_14': adx, 'bb_width': bb_width, 'RSI_14': rsi,
+        'SMA_30': close.rolling(30).mean(), 'SMA_150': close.rolling(150).mean(),
+        'MACD_12_26_9': macd, 'MACDs_12_26_9': signal, 'MACDh_12_26_9': macd - signal,
+        'EMA_21': _ema(close, 21), 'EMA_50': _ema(close, 50),
+    }
+
+
+def assert_parity(actual, expected):
+    for name in INDICATOR_NAMES:
+        expected_values = np.asarray(expected[name], dtype=np.float64)
+        np.testing.assert_array_equal(np.isnan(actual[name]), np.isnan(expected_values), err_msg=name)
+        np.testing.assert_allclose(actual[name], expected_values, rtol=TOLERANCE, equal_nan=True, err_msg=name)
+
+
+class TestStreamingIndicatorEngine:
+    """Paridad con pandas-ta y serialización del estado."""
+
+    def test_matches_reference_formulas(self):
+        timestamps, high, low, close = make_candles()
+        _, actual = run_engine(timestamps, high, low, close)
+        assert_parity(actual, reference_indicators(high, low, close))
+
+    def test_matches_pandas_ta(self):
+        ta = pytest.importorskip('pandas_ta')
+        timestamps, high, low, close = make_candles()
+        _, actual = run_engine(timestamps, high, low, close)
+        h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+        bbands = ta.bbands(c, length=20, std=2)
+        macd = ta.macd(c)
+        expected = {
+            'ADX_14': ta.adx(h, l, c, length=14)['ADX_14'],
+            'bb_width': (bbands['BBU_20_2.0'] - bbands['BBL_20_2.0']) / bbands['BBM_20_2.0'],
+            'SMA_30': ta.sma(c, length=30), 'SMA_150': ta.sma(c, length=150),
+            'RSI_14': ta.rsi(c, length=14),
+            'MACD_12_26_9': macd['MACD_12_26_9'], 'MACDs_12_26_9': macd['MACDs_12_26_9'],
+            'MACDh_12_26_9': macd['MACDh_12_26_9'],
+            'EMA_21': ta.ema(c, length=21), 'EMA_50': ta.ema(c, length=50),
+        }
+        assert_parity(actual, expected)
+
+    def test_restored_state_continues_identically(self):
+        timestamps, high, low, close = make_candles()
+        _, full = run_engine(timestamps, high, low, close)
+
+        engine, _ = run_engine(timestamps[:400], high[:400], low[:400], close[:400])
+        restored = StreamingIndicatorEngine.from_dict(json.loads(json.dumps(engine.to_dict())))
+        _, tail = run_engine(timestamps[400:], high[400:], low[400:], close[400:], engine=restored)
+
+        for name in INDICATOR_NAMES:
+            np.testing.assert_allclose(tail[name], full[name][400:], rtol=1e-12, err_msg=name)
+
+
+class TestStreamingIndicatorCache:
+    """Reutilización del estado entre ciclos y reinicios."""
+
+    def test_only_new_candles_are_processed(self, monkeypatch):
+        timestamps, high, low, close = make_candles(300)
+        cache = StreamingIndicatorCache()
+        cache.get_indicators('ETH/USDT', '4h', timestamps[:-1], high[:-1], low[:-1], close[:-1])
+
+        calls = []
+        original = StreamingIndicatorEngine.update
+        monkeypatch.setattr(
+            StreamingIndicatorEngine, 'update',
+            lambda engine, *args: calls.append(args[0]) or original(engine, *args)
+        )
+        # La ventana avanza una vela: solo se procesa la nueva
+        columns = cache.get_indicators('ETH/USDT', '4h', timestamps[1:], high[1:], low[1:], close[1:])
+
+        assert calls == [int(timestamps[-1])]
+        _, full = run_engine(timestamps, high, low, close)
+        for name in INDICATOR_NAMES:
+            np.testing.assert_allclose(columns[name], full[name][1:], equal_nan=True, err_msg=name)
+
+    def test_rewarms_when_series_no_longer_continues_state(self):
+        timestamps, high, low, close = make_candles(300)
+        cache = StreamingIndicatorCache()
+        cache.get_indicators('ETH/USDT', '4h', timestamps[:100], high[:100], low[:100], close[:100])
+
+        # Parada más larga que el historial: la última vela vista ya no está
+        columns = cache.get_indicators('ETH/USDT', '4h', timestamps[150:], high[150:], low[150:], close[150:])
+
+        _, expected = run_engine(timestamps[150:], high[150:], low[150:], close[150:])
+        for name in INDICATOR_NAMES:
+            np.testing.assert_allclose(columns[name], expected[name], equal_nan=True, err_msg=name)
+
+    def test_state_file_survives_restart(self, tmp_path):
+        timestamps, high, low, close = make_candles(300)
+        state_file = str(tmp_path / 'indicators.json')
+        StreamingIndicatorCache(state_file=state_file).get_indicators(
+            'ETH/USDT', '4h', timestamps[:-1], high[:-1], low[:-1], close[:-1]
+        )
+
+        columns = StreamingIndicatorCache(state_file=state_file).get_indicators(
+            'ETH/USDT', '4h', timestamps, high, low, close
+        )
+
+        _, full = run_engine(timestamps, high, low, close)
+        for name in INDICATOR_NAMES:
+            assert columns[name][-1] == pytest.approx(full[name][-1], rel=1e-12)
+            # Las filas anteriores a la reanudación no se recalculan
+            assert np.isnan(columns[name][0])
+
+    def test_state_file_writes_are_throttled_until_flush(self, tmp_path):
+        timestamps, high, low, close = make_candles(300)
+        state_file = str(tmp_path / 'indicators.json')
+        cache = StreamingIndicatorCache(state_file=state_file, save_interval=3600)
+        cache.get_indicators('ETH/USDT', '4h', timestamps, high, low, close)
+        cache.get_indicators('BTC/USDT', '4h', timestamps, high, low, close)
+
+        with open(state_file) as f:
+            assert list(json.load(f)) == ['ETH/USDT|4h']
+
+        cache.flush()
+        with open(state_file) as f:
+            assert set(json.load(f)) == {'ETH/USDT|4h', 'BTC/USDT|4h'}
+
+
+class FakePool:
+    """Pool que ejecuta en el mismo proceso y registra las llamadas."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+
+    def warm_series(self, timestamps, high, low, close, max_rows):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return warm_indicator_series(timestamps, high, low, close, max_rows)
+
+
+class TestIndicatorPool:
+    """Calentamientos fuera del hilo que llama."""
+
+    def test_warm_series_matches_incremental_updates(self):
+        timestamps, high, low, close = make_candles(300)
+
+        engine, rows = warm_indicator_series(timestamps, high, low, close, 120)
+
+        reference, full = run_engine(timestamps, high, low, close)
+        assert rows.shape == (len(INDICATOR_NAMES), 120)
+        assert engine.to_dict() == reference.to_dict()
+        for i, name in enumerate(INDICATOR_NAMES):
+            np.testing.assert_allclose(rows[i], full[name][-120:], equal_nan=True, err_msg=name)
+
+    def test_only_long_warm_ups_go_to_the_pool(self):
+        timestamps, high, low, close = make_candles(300)
+        pool = FakePool()
+        cache = StreamingIndicatorCache(pool=pool, pool_min_candles=100)
+
+        cache.get_indicators('ETH/USDT', '4h', timestamps[:50], high[:50], low[:50], close[:50])
+        columns = cache.get_indicators('BTC/USDT', '4h', timestamps[:-1], high[:-1], low[:-1], close[:-1])
+        # Siguiente vela: actualización incremental en el hilo
+        columns = cache.get_indicators('BTC/USDT', '4h', timestamps, high, low, close)
+
+        assert pool.calls == 1
+        _, full = run_engine(timestamps, high, low, close)
+        for name in INDICATOR_NAMES:
+            np.testing.assert_allclose(columns[name], full[name], equal_nan=True, err_msg=name)
+
+    def test_pool_failure_falls_back_to_inline_warm_up(self):
+        timestamps, high, low, close = make_candles(300)
+        cache = StreamingIndicatorCache(pool=FakePool(error=RuntimeError("pool roto")))
+
+        columns = cache.get_indicators('ETH/USDT', '4h', timestamps, high, low, close)
+
+        _, full = run_engine(timestamps, high, low, close)
+        np.testing.assert_allclose(columns['ADX_14'], full['ADX_14'], equal_nan=True)
+
+    def test_process_pool_round_trip(self):
+        timestamps, high, low, close = make_candles(300)
+        pool = IndicatorProcessPool(workers=1)
+        try:
+            pool.warm_up()
+            engine, rows = pool.warm_series(timestamps, high, low, close, 300)
+        finally:
+            pool.close()
+
+        reference, full = run_engine(timestamps, high, low, close)
+        assert engine.to_dict() == reference.to_dict()
+        np.testing.assert_allclose(rows[INDICATOR_NAMES.index('ADX_14')], full['ADX_14'], equal_nan=True)
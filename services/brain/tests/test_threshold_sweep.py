@@ -0,0 +1,165 @@
+"""
+Tests del barrido paralelo de umbrales GRID.
+
+Cada combinación del barrido debe puntuar igual que el backtest de una receta
+con esos umbrales, y el barrido en paralelo debe dar el mismo ranking que el
+barrido en línea.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+
+from app.application.sweep_thresholds_use_case import SweepThresholdsUseCase
+from app.domain.entities import BotType, MarketData, ThresholdSweepResult, TradingRecipe
+from app.domain.interfaces import MarketDataRepository, RecipeRepository, ThresholdSweeper
+from app.infrastructure.candle_cache import timeframe_to_ms
+from app.infrastructure.recipe_backtest import run_recipe_backtest
+from app.infrastructure.recipe_repository import InMemoryRecipeRepository, write_recipes_file
+from app.infrastructure.threshold_sweep import (
+    ParallelThresholdSweeper, evaluate_combinations, rank_combinations, sweep_series, threshold_grid
+)
+
+SMALL_GRID = threshold_grid(np.array([20.0, 30.0]), np.array([0.01, 0.02, 0.03]), np.array([-0.2, 0.0]))
+
+
+def make_recipe(adx, volatility, sentiment):
+    return TradingRecipe(
+        pair='ETH/USDT',
+        name='Test',
+        conditions={'adx_threshold': adx, 'bollinger_bandwidth_threshold': volatility, 'sentiment_threshold': sentiment},
+        grid_config={},
+        description='Receta de test',
+        bot_type=BotType.GRID
+    )
+
+
+def make_market_data(n=600, seed=9):
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, n))) * 2000.0
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = close * rng.uniform(0.002, 0.02, n)
+    return MarketData(
+        pair='ETH/USDT',
+        timeframe='4h',
+        timestamps=np.arange(n, dtype=np.int64) * timeframe_to_ms('4h'),
+        columns={
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': np.ones(n),
+            'sentiment_promedio': rng.uniform(-0.6, 0.6, n)
+        }
+    )
+
+
+class TestThresholdGrid:
+    """Tests de la rejilla y la evaluación por bloques."""
+
+    def test_grid_is_cartesian_product(self):
+        assert SMALL_GRID.shape == (12, 3)
+        assert SMALL_GRID[0].tolist() == [20.0, 0.01, -0.2]
+        assert len({tuple(row) for row in SMALL_GRID}) == 12
+        assert len(threshold_grid()) >= 1000
+
+    def test_combinations_match_single_recipe_backtest(self):
+        market_data = make_market_data()
+        metrics = evaluate_combinations(sweep_series(market_data), SMALL_GRID, timeframe_to_ms('4h'))
+
+        for i, (adx, volatility, sentiment) in enumerate(SMALL_GRID):
+            result = run_recipe_backtest(market_data, make_recipe(adx, volatility, sentiment))
+            assert metrics['flips'][i] == result.flips
+            assert metrics['operate_fraction'][i] == result.operate_fraction
+            assert abs(metrics['pnl_proxy'][i] - result.pnl_proxy) < 1e-12
+
+    def test_ranking_orders_by_score_and_filters(self):
+        combinations = np.array([[20.0, 0.01, 0.0], [25.0, 0.01, 0.0], [30.0, 0.01, 0.0], [35.0, 0.01, 0.0]])
+        metrics = {
+            'pnl_proxy': np.array([1.0, 1.0, 2.0, 5.0]),
+            'flips': np.array([10, 0, 10, 10]),
+            'operate_fraction': np.array([0.5, 0.5, 0.5, 0.01]),
+            'flips_per_30d': np.zeros(4),
+            'avg_operate_run': np.ones(4)
+        }
+
+        ranking = rank_combinations(combinations, metrics, flip_cost=0.1, min_operate_fraction=0.1, top=2)
+
+        # La de mayor P&L opera demasiado poco; el coste de cambios iguala 2 y 3
+        assert [row['adx_threshold'] for row in ranking] == [25.0, 30.0]
+        assert ranking[0]['score'] == 1.0
+
+
+class TestParallelThresholdSweeper:
+    """Tests del barrido sobre memoria compartida."""
+
+    def test_parallel_matches_inline(self):
+        market_data = make_market_data()
+        inline = ParallelThresholdSweeper(workers=1, min_operate_fraction=0.0, combinations=SMALL_GRID)
+        parallel = ParallelThresholdSweeper(workers=2, min_operate_fraction=0.0, combinations=SMALL_GRID)
+        try:
+            expected = inline.sweep(market_data, top=12)
+            actual = parallel.sweep(market_data, top=12)
+            assert parallel.sweep(market_data, top=12).ranking == actual.ranking  # Pool reutilizado
+        finally:
+            parallel.close()
+
+        assert actual.combinations == 12
+        assert actual.ranking == expected.ranking
+
+
+class TestTunedRecipes:
+    """Tests de las recetas ajustadas y su archivo."""
+
+    def setup_method(self):
+        self.recipe_repo = Mock(spec=RecipeRepository)
+        self.recipe_repo.get_recipe = AsyncMock(return_value=make_recipe(30.0, 0.025, -0.2))
+        self.use_case = SweepThresholdsUseCase(
+            market_data_repo=Mock(spec=MarketDataRepository),
+            recipe_repo=self.recipe_repo,
+            sweeper=Mock(spec=ThresholdSweeper)
+        )
+        self.result = ThresholdSweepResult(
+            pair='ETH/USDT', timeframe='4h', candles=600, combinations=12, elapsed_seconds=0.1,
+            ranking=[{
+                'adx_threshold': 22.0, 'bollinger_bandwidth_threshold': 0.015, 'sentiment_threshold': 0.05,
+                'score': 0.3, 'pnl_proxy': 0.4, 'operate_fraction': 0.4, 'flips': 5,
+                'flips_per_30d': 1.5, 'avg_operate_run': 8.0
+            }]
+        )
+
+    def test_tuned_recipe_keeps_current_config(self):
+        recipe = asyncio.run(self.use_case.tuned_recipe(self.result))
+
+        assert recipe.conditions == {
+            'adx_threshold': 22.0, 'bollinger_bandwidth_threshold': 0.015, 'sentiment_threshold': 0.05
+        }
+        assert recipe.name == 'Test'
+        assert recipe.bot_type == BotType.GRID
+
+    def test_no_valid_combination(self):
+        self.result.ranking = []
+        assert asyncio.run(self.use_case.tuned_recipe(self.result)) is None
+
+    def test_recipes_file_overrides_master_thresholds(self, tmp_path):
+        recipe = asyncio.run(self.use_case.tuned_recipe(self.result))
+        path = tmp_path / 'recipes.json'
+        write_recipes_file(str(path), [recipe])
+        assert json.loads(path.read_text())['ETH/USDT']['conditions']['adx_threshold'] == 22.0
+
+        repo = InMemoryRecipeRepository(recipes_file=str(path))
+        loaded = asyncio.run(repo.get_recipe('ETH/USDT', BotType.GRID))
+        thresholds = loaded.get_thresholds()
+        assert (thresholds.adx_threshold, thresholds.volatility_threshold, thresholds.sentiment_threshold) == (
+            22.0, 0.015, 0.05
+        )
+        # Los demás pares y la receta TREND mantienen la receta maestra
+        btc = asyncio.run(repo.get_recipe('BTC/USDT', BotType.GRID))
+        assert btc.conditions['adx_threshold'] == 25
+        assert asyncio.run(repo.get_recipe('ETH/USDT', BotType.TREND)).conditions['adx_threshold'] == 30
+
+    def test_unreadable_recipes_file_keeps_masters(self, tmp_path):
+        repo = InMemoryRecipeRepository(recipes_file=str(tmp_path / 'missing.json'))
+        assert asyncio.run(repo.get_recipe('ETH/USDT', BotType.GRID)).conditions['adx_threshold'] == 30
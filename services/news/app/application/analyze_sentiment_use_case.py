@@ -25,6 +25,9 @@ class AnalyzeSentimentUseCase:
     """
     Caso de uso para analizar el sentimiento de las noticias.
     MEJORADO: Con retry logic y mejor manejo de errores de transacción.
+    
+    Cada puntuación guardada actualiza también los agregados diario y horario
+    de sentimiento que consume el brain.
     """
     
     def __init__(self,
@@ -32,6 +35,24 @@ class AnalyzeSentimentUseCase:
                  news_repository: NewsRepository):
         self.sentiment_analyzer = sentiment_analyzer
         self.news_repository = news_repository
+        self._rollups_ready = False
+    
+    def _ensure_rollups(self) -> None:
+        """
+        Construye los agregados de sentimiento desde el histórico la primera vez
+        (tabla vacía); a partir de ahí se mantienen noticia a noticia.
+        """
+        if self._rollups_ready:
+            return
+        try:
+            rebuilt = self._retry_operation(
+                lambda: self.news_repository.rebuild_sentiment_rollups(only_if_empty=True)
+            )
+            if rebuilt:
+                logger.info(f"📊 Agregados de sentimiento inicializados: {rebuilt} intervalos")
+            self._rollups_ready = True
+        except Exception as e:
+            logger.error(f"Error inicializando agregados de sentimiento: {e}")
     
     def _retry_operation(self, operation, max_retries: int = 3, delay: float = 1.0):
         """
@@ -106,6 +127,8 @@ class AnalyzeSentimentUseCase:
         try:
             logger.info("🧠 Iniciando análisis de sentimiento...")
             
+            self._ensure_rollups()
+            
             # Obtener noticias sin analizar con retry
             def get_unanalyzed():
                 return self.news_repository.find_unanalyzed(limit=500)
@@ -36,7 +36,15 @@ class NewsRepository(ABC):
     
     @abstractmethod
     def update_sentiment_analysis(self, news_id: int, analysis: SentimentAnalysis) -> News:
-        """Actualiza el análisis de sentimiento de una noticia."""
+        """
+        Actualiza el análisis de sentimiento de una noticia y, en la misma
+        operación, los agregados diario y horario de sentimiento.
+        """
+        pass
+    
+    @abstractmethod
+    def rebuild_sentiment_rollups(self, only_if_empty: bool = False) -> int:
+        """Reconstruye los agregados de sentimiento desde las noticias analizadas."""
         pass
 
 
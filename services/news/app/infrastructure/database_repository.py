@@ -2,19 +2,41 @@
 Repositorio de base de datos para noticias.
 Implementación concreta de la interfaz NewsRepository.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 from sqlalchemy.orm import Session
 from contextlib import contextmanager
 
 from app.domain.interfaces import NewsRepository
 from app.domain.entities import News, SentimentAnalysis, EmotionType, CategoryType
 from shared.database.models import Noticia as NoticiaModel
+from shared.database.models import SentimentRollup as SentimentRollupModel
+from shared.database.models.noticia import published_at_to_utc
 from shared.database.session import SessionLocal
 from shared.services.logging_config import get_logger
 
 
 logger = get_logger(__name__)
 
+# Granularidades de los agregados de sentimiento y cómo truncar una fecha a su intervalo
+ROLLUP_GRANULARITIES = {
+    'day': lambda moment: moment.replace(hour=0, minute=0, second=0, microsecond=0),
+    'hour': lambda moment: moment.replace(minute=0, second=0, microsecond=0),
+}
+
+
+def _add_to_breakdown(breakdown: Dict, key: Optional[str], score: float, sign: int) -> Dict:
+    """Devuelve una copia del desglose con la puntuación sumada (sign=1) o restada (sign=-1)."""
+    breakdown = {name: dict(values) for name, values in (breakdown or {}).items()}
+    if key is None:
+        return breakdown
+    entry = breakdown.setdefault(key, {'count': 0, 'sum': 0.0})
+    entry['count'] += sign
+    entry['sum'] += sign * score
+    if entry['count'] <= 0:
+        del breakdown[key]
+    return breakdown
+
 
 class SqlAlchemyNewsRepository(NewsRepository):
     """
@@ -86,6 +108,7 @@ class SqlAlchemyNewsRepository(NewsRepository):
             headline=entity.headline,
             url=entity.url,
             published_at=entity.published_at.isoformat(),
+            published_at_utc=published_at_to_utc(entity.published_at),
             sentiment_score=entity.sentiment_score,
             primary_emotion=entity.primary_emotion.value if entity.primary_emotion else None,
             news_category=entity.news_category.value if entity.news_category else None
@@ -182,9 +205,10 @@ class SqlAlchemyNewsRepository(NewsRepository):
         """
         with self._get_session() as session:
             try:
+                # Servida por el índice parcial ix_noticias_sentiment_pending
                 models = session.query(NoticiaModel).filter(
                     NoticiaModel.sentiment_score == None
-                ).limit(limit).all()
+                ).order_by(NoticiaModel.id).limit(limit).all()
                 
                 result = [self._model_to_entity(model) for model in models]
                 logger.debug(f"✅ Encontradas {len(result)} noticias sin analizar")
@@ -214,11 +238,18 @@ class SqlAlchemyNewsRepository(NewsRepository):
                 if not model:
                     raise ValueError(f"Noticia con ID {news_id} no encontrada")
                 
+                # Si la noticia ya estaba analizada, su aporte anterior sale de los agregados
+                if model.sentiment_score is not None:
+                    self._apply_to_rollups(session, model, sign=-1)
+                
                 # Actualizar campos de análisis
                 model.sentiment_score = analysis.sentiment_score  # type: ignore
                 model.primary_emotion = analysis.primary_emotion.value  # type: ignore
                 model.news_category = analysis.news_category.value  # type: ignore
                 
+                # Los agregados se actualizan en la misma transacción que la noticia
+                self._apply_to_rollups(session, model, sign=1)
+                
                 logger.debug(f"✅ Análisis actualizado para noticia ID: {news_id}")
                 return self._model_to_entity(model)
                 
@@ -226,6 +257,97 @@ class SqlAlchemyNewsRepository(NewsRepository):
                 logger.error(f"Error actualizando análisis de sentimiento: {e}")
                 raise
     
+    def rebuild_sentiment_rollups(self, only_if_empty: bool = False) -> int:
+        """
+        Reconstruye los agregados de sentimiento a partir de todas las noticias analizadas.
+        
+        Args:
+            only_if_empty: Si es True, no hace nada cuando ya existen agregados
+            
+        Returns:
+            Número de filas de agregados escritas
+        """
+        with self._get_session() as session:
+            try:
+                if only_if_empty and session.query(SentimentRollupModel.id).first() is not None:
+                    return 0
+                
+                rollups: Dict[Tuple[str, datetime], SentimentRollupModel] = {}
+                analyzed = session.query(NoticiaModel).filter(
+                    NoticiaModel.sentiment_score != None
+                ).yield_per(1000)
+                for model in analyzed:
+                    for granularity, bucket in self._rollup_buckets(model):
+                        rollup = rollups.get((granularity, bucket))
+                        if rollup is None:
+                            rollup = rollups[(granularity, bucket)] = self._new_rollup(granularity, bucket)
+                        self._accumulate(rollup, model, sign=1)
+                
+                session.query(SentimentRollupModel).delete(synchronize_session=False)
+                session.add_all(rollups.values())
+                
+                logger.info(f"📊 Agregados de sentimiento reconstruidos: {len(rollups)} intervalos")
+                return len(rollups)
+                
+            except Exception as e:
+                logger.error(f"Error reconstruyendo agregados de sentimiento: {e}")
+                raise
+    
+    @staticmethod
+    def _rollup_buckets(model: NoticiaModel) -> List[Tuple[str, datetime]]:
+        """Intervalos (granularidad, inicio) a los que aporta una noticia."""
+        published_at = model.published_at_utc or published_at_to_utc(model.published_at)
+        return [(granularity, truncate(published_at)) for granularity, truncate in ROLLUP_GRANULARITIES.items()]
+    
+    @staticmethod
+    def _new_rollup(granularity: str, bucket: datetime) -> SentimentRollupModel:
+        """Crea un agregado vacío."""
+        return SentimentRollupModel(
+            granularity=granularity,
+            bucket_start=bucket,
+            news_count=0,
+            sentiment_sum=0.0,
+            sentiment_mean=None,
+            category_breakdown={},
+            emotion_breakdown={}
+        )
+    
+    @staticmethod
+    def _accumulate(rollup: SentimentRollupModel, model: NoticiaModel, sign: int) -> None:
+        """Suma (sign=1) o resta (sign=-1) la puntuación de una noticia en un agregado."""
+        score = float(model.sentiment_score)  # type: ignore
+        rollup.news_count += sign  # type: ignore
+        rollup.sentiment_sum += sign * score  # type: ignore
+        rollup.sentiment_mean = (  # type: ignore
+            rollup.sentiment_sum / rollup.news_count if rollup.news_count > 0 else None
+        )
+        # Los JSON se reasignan para que SQLAlchemy detecte el cambio
+        rollup.category_breakdown = _add_to_breakdown(  # type: ignore
+            rollup.category_breakdown, model.news_category, score, sign
+        )
+        rollup.emotion_breakdown = _add_to_breakdown(  # type: ignore
+            rollup.emotion_breakdown, model.primary_emotion, score, sign
+        )
+    
+    def _apply_to_rollups(self, session: Session, model: NoticiaModel, sign: int) -> None:
+        """
+        Actualiza los agregados diario y horario de una noticia.
+        
+        Args:
+            session: Sesión de la transacción en curso
+            model: Noticia con su análisis de sentimiento
+            sign: 1 para sumar su puntuación, -1 para restarla
+        """
+        for granularity, bucket in self._rollup_buckets(model):
+            rollup = session.query(SentimentRollupModel).filter(
+                SentimentRollupModel.granularity == granularity,
+                SentimentRollupModel.bucket_start == bucket
+            ).with_for_update().first()
+            if rollup is None:
+                rollup = self._new_rollup(granularity, bucket)
+                session.add(rollup)
+            self._accumulate(rollup, model, sign)
+    
     def close(self):
         """Cierra la sesión de base de datos. Ya no es necesario con el nuevo enfoque."""
         logger.debug("✅ Repositorio cerrado (no hay sesión global que cerrar)")
@@ -7,7 +7,7 @@ from datetime import datetime
 from decimal import Decimal
 
 from app.domain.interfaces import GridRepository, ExchangeService, NotificationService, GridCalculator
-from app.domain.entities import GridConfig, GridOrder
+from app.domain.entities import GridConfig, GridOrder, OrderRequest
 from app.config import MIN_ORDER_VALUE_USDT
 from shared.services.logging_config import get_logger
 from app.infrastructure.notification_service import TelegramGridNotificationService
@@ -408,6 +408,7 @@ class ManageGridTransitionsUseCase:
                 actions.append(f"Canceladas {cancelled_orders} órdenes activas")
             else:
                 actions.append("No había órdenes activas para cancelar")
+            self.grid_repository.cancel_all_orders_for_pair(config.pair)
             
             # 3. Actualizar estado en BD (marcar como no running y PAUSAR_GRID)
             if config.id is not None:
@@ -585,7 +586,6 @@ class ManageGridTransitionsUseCase:
             if cancelled_existing > 0:
                 logger.info(f"🧹 Bot {config.pair}: {cancelled_existing} órdenes existentes canceladas antes de crear grilla inicial")
             
-            initial_orders = []
             pair = config.pair
             configured_capital = Decimal(config.total_capital)
             
@@ -712,120 +712,106 @@ class ManageGridTransitionsUseCase:
                 amount_sell_each = Decimal('0')
                 logger.warning(f"⚠️ Bot {pair}: No hay niveles superiores para órdenes de venta")
 
-            orders_created = 0
             capital_used = Decimal('0')
-            buy_orders_created = 0
-            sell_orders_created = 0
+            base_committed = Decimal('0')
+            order_requests: List[OrderRequest] = []
 
-            logger.info(f"🏗️ Bot {pair}: Iniciando creación de grilla con {len(lower_levels)} niveles de compra y {len(upper_levels)} niveles de venta")
+            logger.info(f"🏗️ Bot {pair}: Preparando grilla con {len(lower_levels)} niveles de compra y {len(upper_levels)} niveles de venta")
 
+            # 7b) Preparar la escalera completa; se coloca después en un solo lote.
+            # Las verificaciones de capital son acumuladas: nada se reserva hasta colocar.
             for idx, (buy_price, sell_price) in enumerate(zip(lower_levels, upper_levels)):
-                try:
-                    # 🔒 CONTROL DE LÍMITE: Verificar que no excedemos grid_levels
-                    if len(initial_orders) >= config.grid_levels:
-                        logger.warning(f"🚦 Bot {pair}: Límite de órdenes alcanzado ({len(initial_orders)}/{config.grid_levels}). Deteniendo creación de órdenes.")
-                        break
-                    
-                    logger.info(f"🔧 Bot {pair}: Procesando nivel {idx+1}/{len(lower_levels)} - Compra: ${buy_price:.4f}, Venta: ${sell_price:.4f}")
-                    
-                    # Verificar que no excedemos el capital asignado al bot
-                    order_value = buy_price * amount_per_order
-                    if capital_used + order_value > total_capital_for_orders:
-                        logger.warning(f"⚠️ Bot {pair}: Límite de capital asignado alcanzado en nivel {idx}. Capital usado: ${capital_used:.2f}")
-                        break
-                    
-                    # Verificar que el bot puede usar este capital
-                    capital_check = self.exchange_service.can_bot_use_capital(config, order_value, 'buy')
-                    if not capital_check['can_use']:
-                        logger.warning(f"⚠️ Bot {pair}: No puede usar ${order_value} USDT para orden de compra. Disponible: ${capital_check['available_balance']}")
-                        break
-                    
-                    # Validar que la orden cumple con el mínimo después de comisiones
-                    order_validation = self.exchange_service.validate_order_after_fees(
-                        pair=pair,
-                        side='buy',
-                        amount=amount_per_order,
-                        price=buy_price
-                    )
-                    
-                    if not order_validation['valid']:
-                        logger.warning(f"⚠️ Bot {pair}: Orden de compra no cumple mínimo después de comisiones: ${order_validation['net_value']:.2f} < ${order_validation['min_required']}")
-                        # Intentar ajustar la cantidad para cumplir con el mínimo
-                        min_amount = order_validation['min_required'] / buy_price
-                        if min_amount > amount_per_order:
-                            logger.info(f"🔧 Bot {pair}: Ajustando cantidad de compra de {amount_per_order} a {min_amount:.6f} {base_currency}")
-                            amount_per_order = min_amount.quantize(Decimal('0.000001'))
-                            order_value = buy_price * amount_per_order
-                            
-                            # Verificar nuevamente que no excedemos el capital
-                            if capital_used + order_value > total_capital_for_orders:
-                                logger.warning(f"⚠️ Bot {pair}: Ajuste de cantidad excede capital asignado")
-                                break
-                    
-                    # Crear orden BUY
-                    logger.info(f"📈 Bot {pair}: Creando orden de compra {amount_per_order} {base_currency} a ${buy_price:.4f}")
-                    buy_order = self.exchange_service.create_order(
-                        pair=pair,
-                        side='buy',
-                        amount=amount_per_order,
-                        price=buy_price,
-                        order_type='limit',
-                    )
-                    saved_buy_order = self.grid_repository.save_order(buy_order)
-                    initial_orders.append(saved_buy_order)
-                    capital_used += order_value
-                    orders_created += 1
-                    buy_orders_created += 1
-                    logger.info(f"✅ Bot {pair}: Orden de compra creada exitosamente (ID: {saved_buy_order.exchange_order_id})")
+                # 🔒 CONTROL DE LÍMITE: Verificar que no excedemos grid_levels
+                if len(order_requests) >= config.grid_levels:
+                    logger.warning(f"🚦 Bot {pair}: Límite de órdenes alcanzado ({len(order_requests)}/{config.grid_levels}). Deteniendo creación de órdenes.")
+                    break
+                
+                logger.debug(f"🔧 Bot {pair}: Nivel {idx+1}/{len(lower_levels)} - Compra: ${buy_price:.4f}, Venta: ${sell_price:.4f}")
+                
+                # Verificar que no excedemos el capital asignado al bot
+                order_value = buy_price * amount_per_order
+                if capital_used + order_value > total_capital_for_orders:
+                    logger.warning(f"⚠️ Bot {pair}: Límite de capital asignado alcanzado en nivel {idx}. Capital usado: ${capital_used:.2f}")
+                    break
+                
+                # Verificar que el bot puede usar este capital
+                capital_check = self.exchange_service.can_bot_use_capital(config, capital_used + order_value, 'buy')
+                if not capital_check['can_use']:
+                    logger.warning(f"⚠️ Bot {pair}: No puede usar ${capital_used + order_value} USDT para órdenes de compra. Disponible: ${capital_check['available_balance']}")
+                    break
+                
+                # Validar que la orden cumple con el mínimo después de comisiones
+                order_validation = self.exchange_service.validate_order_after_fees(
+                    pair=pair,
+                    side='buy',
+                    amount=amount_per_order,
+                    price=buy_price
+                )
+                
+                if not order_validation['valid']:
+                    logger.warning(f"⚠️ Bot {pair}: Orden de compra no cumple mínimo después de comisiones: ${order_validation['net_value']:.2f} < ${order_validation['min_required']}")
+                    # Intentar ajustar la cantidad para cumplir con el mínimo
+                    min_amount = order_validation['min_required'] / buy_price
+                    if min_amount > amount_per_order:
+                        logger.info(f"🔧 Bot {pair}: Ajustando cantidad de compra de {amount_per_order} a {min_amount:.6f} {base_currency}")
+                        amount_per_order = min_amount.quantize(Decimal('0.000001'))
+                        order_value = buy_price * amount_per_order
+                        
+                        # Verificar nuevamente que no excedemos el capital
+                        if capital_used + order_value > total_capital_for_orders:
+                            logger.warning(f"⚠️ Bot {pair}: Ajuste de cantidad excede capital asignado")
+                            break
+                
+                order_requests.append(OrderRequest(pair=pair, side='buy', amount=amount_per_order, price=buy_price, grid_level=idx))
+                capital_used += order_value
 
-                    # Crear orden SELL solo si tenemos cantidad suficiente
-                    if amount_sell_each > Decimal('0'):
-                        logger.info(f"📉 Bot {pair}: Verificando si puede vender {amount_sell_each} {base_currency}")
+                # Orden SELL solo si tenemos cantidad suficiente
+                if amount_sell_each > Decimal('0'):
+                    # Verificar que el bot puede vender esta cantidad
+                    sell_check = self.exchange_service.can_bot_use_capital(config, base_committed + amount_sell_each, 'sell')
+                    if sell_check['can_use']:
+                        # Validar que la orden de venta cumple con el mínimo después de comisiones
+                        sell_validation = self.exchange_service.validate_order_after_fees(
+                            pair=pair,
+                            side='sell',
+                            amount=amount_sell_each,
+                            price=sell_price
+                        )
                         
-                        # Verificar que el bot puede vender esta cantidad
-                        sell_check = self.exchange_service.can_bot_use_capital(config, amount_sell_each, 'sell')
-                        if sell_check['can_use']:
-                            # Validar que la orden de venta cumple con el mínimo después de comisiones
-                            sell_validation = self.exchange_service.validate_order_after_fees(
-                                pair=pair,
-                                side='sell',
-                                amount=amount_sell_each,
-                                price=sell_price
-                            )
-                            
-                            if not sell_validation['valid']:
-                                logger.warning(f"⚠️ Bot {pair}: Orden de venta no cumple mínimo después de comisiones: ${sell_validation['net_value']:.2f} < ${sell_validation['min_required']}")
-                                # Intentar ajustar la cantidad para cumplir con el mínimo
-                                min_amount = sell_validation['min_required'] / sell_price
-                                if min_amount > amount_sell_each:
-                                    logger.info(f"🔧 Bot {pair}: Ajustando cantidad de venta de {amount_sell_each} a {min_amount:.6f} {base_currency}")
-                                    amount_sell_each = min_amount.quantize(Decimal('0.000001'))
-                            
-                            logger.info(f"📉 Bot {pair}: Creando orden de venta {amount_sell_each} {base_currency} a ${sell_price:.4f}")
-                            sell_order = self.exchange_service.create_order(
-                                pair=pair,
-                                side='sell',
-                                amount=amount_sell_each,
-                                price=sell_price,
-                                order_type='limit',
-                            )
-                            saved_sell_order = self.grid_repository.save_order(sell_order)
-                            initial_orders.append(saved_sell_order)
-                            orders_created += 1
-                            sell_orders_created += 1
-                            logger.info(f"✅ Bot {pair}: Orden de venta creada exitosamente (ID: {saved_sell_order.exchange_order_id})")
-                        else:
-                            logger.warning(f"⚠️ Bot {pair}: No puede vender {amount_sell_each} {base_currency}. Disponible: {sell_check['available_balance']}")
+                        if not sell_validation['valid']:
+                            logger.warning(f"⚠️ Bot {pair}: Orden de venta no cumple mínimo después de comisiones: ${sell_validation['net_value']:.2f} < ${sell_validation['min_required']}")
+                            # Intentar ajustar la cantidad para cumplir con el mínimo
+                            min_amount = sell_validation['min_required'] / sell_price
+                            if min_amount > amount_sell_each:
+                                logger.info(f"🔧 Bot {pair}: Ajustando cantidad de venta de {amount_sell_each} a {min_amount:.6f} {base_currency}")
+                                amount_sell_each = min_amount.quantize(Decimal('0.000001'))
+                        
+                        order_requests.append(OrderRequest(pair=pair, side='sell', amount=amount_sell_each, price=sell_price, grid_level=idx))
+                        base_committed += amount_sell_each
                     else:
-                        logger.warning(f"⚠️ Bot {pair}: Cantidad de venta insuficiente ({amount_sell_each} {base_currency})")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Error creando órdenes para bot {pair} nivel {idx}: {e}")
-                    continue
+                        logger.warning(f"⚠️ Bot {pair}: No puede vender {base_committed + amount_sell_each} {base_currency}. Disponible: {sell_check['available_balance']}")
+                else:
+                    logger.warning(f"⚠️ Bot {pair}: Cantidad de venta insuficiente ({amount_sell_each} {base_currency})")
+
+            # 8) COLOCAR LA ESCALERA EN PARALELO (más cercanas al precio primero)
+            order_requests.sort(key=lambda request: abs(request.price - current_price))
+            logger.info(f"🚀 Bot {pair}: Colocando {len(order_requests)} órdenes en paralelo")
+            results = self.exchange_service.create_orders(order_requests)
+            
+            initial_orders = [result.order for result in results if result.order is not None]
+            for result in results:
+                if not result.success:
+                    request = result.request
+                    logger.error(f"❌ Bot {pair}: Orden {request.side} {request.amount} a ${request.price:.4f} "
+                                 f"no colocada tras {result.attempts} intentos: {result.error}")
+            self.grid_repository.save_order_batch(initial_orders, [])
+            
+            buy_orders_created = len([o for o in initial_orders if o.side == 'buy'])
+            sell_orders_created = len(initial_orders) - buy_orders_created
 
             logger.info(f"🎉 Bot {pair}: Grilla inicial completada - {buy_orders_created} órdenes de compra, {sell_orders_created} órdenes de venta")
-            logger.info(f"💰 Bot {pair}: Capital utilizado ${capital_used:.2f} de ${total_capital_for_orders:.2f} asignado")
-            logger.info(f"📊 Bot {pair}: Total de órdenes creadas: {len(initial_orders)}")
+            logger.info(f"💰 Bot {pair}: Capital comprometido ${capital_used:.2f} de ${total_capital_for_orders:.2f} asignado")
+            logger.info(f"📊 Bot {pair}: Total de órdenes creadas: {len(initial_orders)}/{len(order_requests)}")
             
             return initial_orders
             
@@ -844,6 +830,9 @@ class ManageGridTransitionsUseCase:
             int: Número de órdenes canceladas
         """
         try:
+            # Las órdenes de BD de una grilla anterior ya no están en el exchange
+            self.grid_repository.cancel_all_orders_for_pair(config.pair)
+            
             active_orders = self.exchange_service.get_active_orders_from_exchange(config.pair)
             if not active_orders:
                 return 0
@@ -3,13 +3,20 @@ Caso de uso para monitoreo en tiempo real de órdenes de Grid Trading.
 Optimizado para detectar fills inmediatamente y crear órdenes complementarias.
 """
 from typing import List, Dict, Any, Optional
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from decimal import Decimal
 import asyncio
+import queue
+import threading
+import time
 
-from app.domain.interfaces import GridRepository, ExchangeService, NotificationService, GridCalculator
-from app.domain.entities import GridConfig, GridOrder, GridTrade, GridStep
-from app.config import MIN_ORDER_VALUE_USDT, REALTIME_CACHE_EXPIRY_MINUTES
+from app.domain.interfaces import GridRepository, ExchangeService, NotificationService, GridCalculator, FillStream
+from app.domain.entities import GridConfig, GridOrder, GridTrade, GridStep, ExchangeSnapshot
+from app.config import (
+    MIN_ORDER_VALUE_USDT, REALTIME_CACHE_EXPIRY_MINUTES, REALTIME_RECONCILE_INTERVAL_SECONDS,
+    CAPITAL_LEDGER_RECONCILE_MINUTES, CAPITAL_LEDGER_DRIFT_ALERT_PERCENT
+)
 from shared.services.logging_config import get_logger
 from .risk_management_use_case import RiskManagementUseCase
 
@@ -20,8 +27,14 @@ class RealTimeGridMonitorUseCase:
     Caso de uso especializado para monitoreo en tiempo real de Grid Trading.
     
     Responsabilidades:
-    - Monitoreo continuo de órdenes activas (cada 5-10 segundos)
+    - Fills empujados por el stream de usuario (handle_fill_event), si está conectado
+    - Monitoreo REST de órdenes activas: cada ciclo sin stream, o como
+      reconciliación cada REALTIME_RECONCILE_INTERVAL_SECONDS con stream
     - Detección inmediata de órdenes completadas (fills)
+    - Un ExchangeSnapshot por par y ciclo compartido por inicialización,
+      riesgos, detección de fills y órdenes complementarias
+    - Registro de fills en el libro de capital y su reconciliación periódica
+    - Persistencia por lotes (una transacción por ciclo) de órdenes y trades
     - Creación automática de órdenes complementarias
     - Notificación de trades exitosos
     - Mantenimiento de grillas dinámicas
@@ -32,12 +45,14 @@ class RealTimeGridMonitorUseCase:
         grid_repository: GridRepository,
         exchange_service: ExchangeService,
         notification_service: NotificationService,
-        grid_calculator: GridCalculator
+        grid_calculator: GridCalculator,
+        fill_stream: Optional[FillStream] = None
     ):
         self.grid_repository = grid_repository
         self.exchange_service = exchange_service
         self.notification_service = notification_service
         self.grid_calculator = grid_calculator
+        self.fill_stream = fill_stream
         
         # Inicializar gestión de riesgos
         self.risk_management = RiskManagementUseCase(
@@ -56,6 +71,25 @@ class RealTimeGridMonitorUseCase:
         self._previous_active_orders = {}  # {pair: [orders]}
         self._last_fill_check = {}  # {pair: timestamp}
         
+        # ⚡ Fills ya procesados (stream y REST comparten la deduplicación)
+        self._processed_fills: "OrderedDict[str, None]" = OrderedDict()
+        self._max_processed_fills = 5000
+        # Fills del stream pendientes: el dispatcher encola, el monitor procesa
+        self._stream_fills: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._last_reconciliation: Optional[float] = None
+        self._force_reconciliation = False
+        
+        # 📸 Snapshots del exchange del ciclo actual {pair: ExchangeSnapshot}
+        self._cycle_snapshots: Dict[str, ExchangeSnapshot] = {}
+        self._snapshot_lock = threading.Lock()
+        
+        # 💾 Órdenes pendientes de guardar en BD {exchange_order_id: GridOrder}
+        self._pending_orders: "OrderedDict[str, GridOrder]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+        
+        # 📒 Última reconciliación del libro de capital por par (time.monotonic)
+        self._last_ledger_reconciliation: Dict[str, float] = {}
+        
         # 🔒 NUEVO: Estado de inicialización por bot
         self._bot_initialization_status = {}  # {pair: {'initialized': bool, 'initial_orders_count': int, 'first_initialization_completed': bool}}
         self._initialization_check_interval = 30  # segundos entre verificaciones de inicialización
@@ -77,6 +111,12 @@ class RealTimeGridMonitorUseCase:
         logger.debug("⚡ Ejecutando monitoreo en tiempo real...")
         
         try:
+            # Cada ciclo lee el exchange una sola vez por par
+            self._invalidate_snapshots()
+            
+            # 0. Fills empujados por el stream desde el último ciclo
+            stream = self._drain_stream_fills()
+            
             # 1. Obtener configuraciones activas (con cache)
             active_configs = self._get_cached_active_configs()
             
@@ -85,8 +125,8 @@ class RealTimeGridMonitorUseCase:
                 return {
                     'success': True,
                     'monitored_bots': 0,
-                    'fills_detected': 0,
-                    'orders_created': 0,
+                    'fills_detected': stream['fills'],
+                    'orders_created': stream['orders'],
                     'message': 'No hay bots activos'
                 }
             
@@ -103,27 +143,41 @@ class RealTimeGridMonitorUseCase:
                 return {
                     'success': True,
                     'monitored_bots': 0,
-                    'fills_detected': 0,
-                    'orders_created': 0,
+                    'fills_detected': stream['fills'],
+                    'orders_created': stream['orders'],
                     'message': 'Bots en proceso de inicialización'
                 }
             
             # 3. Monitorear solo bots listos
-            total_fills = 0
-            total_new_orders = 0
+            # Con el stream de usuario conectado, la detección REST de fills es
+            # solo una reconciliación periódica; los riesgos se revisan siempre
+            reconcile = not self._stream_covers_fills()
+            total_fills = stream['fills']
+            total_new_orders = stream['orders']
             total_trades = 0
             risk_events = 0
             
             for config in ready_bots:
                 try:
+                    snapshot = self._get_snapshot(config.pair)
+                    if snapshot is None:
+                        logger.warning(f"⚠️ Sin snapshot del exchange para {config.pair}, se omite este ciclo")
+                        continue
+                    self._reconcile_capital_ledger(config)
+                    
                     # Verificar eventos de riesgo primero
-                    risk_result = self.risk_management.check_and_handle_risk_events(config)
+                    risk_result = self.risk_management.check_and_handle_risk_events(config, snapshot)
                     if risk_result.get('events_handled'):
                         risk_events += len(risk_result['events_handled'])
                         logger.warning(f"🚨 Eventos de riesgo manejados para {config.pair}: {len(risk_result['events_handled'])} eventos")
+                        # Stop loss / trailing up cancelan y colocan órdenes
+                        self._invalidate_snapshots()
+                        self._cancel_pending_orders(config.pair)
                         continue  # Si hay eventos de riesgo, no continuar con monitoreo normal
                     
-                    result = self._monitor_bot_realtime(config)
+                    if not reconcile:
+                        continue
+                    result = self._monitor_bot_realtime(config, snapshot)
                     
                     total_fills += result.get('fills_detected', 0)
                     total_new_orders += result.get('new_orders_created', 0)
@@ -133,6 +187,9 @@ class RealTimeGridMonitorUseCase:
                     logger.error(f"❌ Error en monitoreo tiempo real para {config.pair}: {e}")
                     continue
             
+            if reconcile:
+                self._last_reconciliation = time.monotonic()
+            
             # 4. Log resumen solo si hubo actividad
             if total_fills > 0 or total_new_orders > 0 or risk_events > 0:
                 logger.info(f"⚡ RT Monitor: {len(ready_bots)} bots listos, {total_fills} fills, {total_new_orders} nuevas órdenes, {risk_events} eventos de riesgo")
@@ -144,7 +201,8 @@ class RealTimeGridMonitorUseCase:
                 'fills_detected': total_fills,
                 'orders_created': total_new_orders,
                 'trades_completed': total_trades,
-                'risk_events_handled': risk_events
+                'risk_events_handled': risk_events,
+                'reconciled': reconcile
             }
             
         except Exception as e:
@@ -153,6 +211,276 @@ class RealTimeGridMonitorUseCase:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            # Fills del stream llegados durante el ciclo: el scheduler no puede
+            # adelantar un ciclo mientras este sigue en curso (max_instances=1)
+            self._drain_stream_fills()
+            # Fills y complementarias del ciclo (REST y stream) en una sola escritura
+            self._flush_order_writes()
+
+    def _stream_covers_fills(self) -> bool:
+        """
+        True si este ciclo REST puede saltarse: el stream de usuario está
+        conectado y la última reconciliación es reciente.
+        """
+        if self.fill_stream is None or not self.fill_stream.is_connected():
+            return False
+        if self._force_reconciliation or self._last_reconciliation is None:
+            self._force_reconciliation = False
+            return False
+        return time.monotonic() - self._last_reconciliation < REALTIME_RECONCILE_INTERVAL_SECONDS
+
+    def _get_snapshot(self, pair: str) -> Optional[ExchangeSnapshot]:
+        """
+        Snapshot del exchange para el par en este ciclo (lo lee si no existe).
+        Los balances son de toda la cuenta: se leen una vez y los reutilizan
+        los demás pares del ciclo.
+        """
+        with self._snapshot_lock:
+            snapshot = self._cycle_snapshots.get(pair)
+            if snapshot is not None:
+                return snapshot
+            shared = next(iter(self._cycle_snapshots.values()), None)
+            snapshot = self.exchange_service.get_exchange_snapshot(
+                pair, shared.balances if shared is not None else None
+            )
+            if snapshot is not None:
+                self._cycle_snapshots[pair] = snapshot
+            return snapshot
+
+    def _invalidate_snapshots(self) -> None:
+        """
+        Descarta los snapshots del ciclo. Se llama al empezar cada ciclo y
+        tras colocar órdenes propias (cambian órdenes abiertas y balances,
+        y el USDT es compartido por todos los pares).
+        """
+        with self._snapshot_lock:
+            self._cycle_snapshots = {}
+
+    def _reconcile_capital_ledger(self, config: GridConfig) -> None:
+        """
+        Reconcilia el libro de capital del bot con el exchange cada
+        CAPITAL_LEDGER_RECONCILE_MINUTES y alerta si la deriva es alta.
+        """
+        pair = config.pair
+        last = self._last_ledger_reconciliation.get(pair)
+        if last is not None and time.monotonic() - last < CAPITAL_LEDGER_RECONCILE_MINUTES * 60:
+            return
+        
+        snapshot = self._get_snapshot(pair)
+        if snapshot is None:
+            return
+        report = self.exchange_service.reconcile_capital_ledger(config, snapshot)
+        if report is None:
+            return  # El bot aún no tiene cuenta en el libro
+        
+        self._last_ledger_reconciliation[pair] = time.monotonic()
+        if report['drift_percent'] >= CAPITAL_LEDGER_DRIFT_ALERT_PERCENT:
+            message = (f"⚠️ Deriva en el libro de capital de {pair}: ${report['drift_usdt']:.2f} "
+                       f"({report['drift_percent']:.2f}% del capital asignado). Corregida con el balance del exchange.")
+            logger.warning(message)
+            self.notification_service.send_notification(message)
+        else:
+            logger.debug(f"📒 Libro de capital {pair} reconciliado: deriva ${report['drift_usdt']:.2f}")
+
+    def request_reconciliation(self) -> None:
+        """Fuerza la reconciliación REST en el próximo ciclo (el stream se reconectó)."""
+        self._force_reconciliation = True
+        logger.info("🔄 Stream de usuario reconectado: reconciliación REST en el próximo ciclo")
+
+    def handle_fill_event(self, fill: Dict[str, Any]) -> None:
+        """
+        Recibe un fill empujado por el stream de usuario (hilo del dispatcher).
+        Solo lo encola: se procesa en el hilo del monitor al empezar el
+        siguiente ciclo (ver _drain_stream_fills), que el scheduler adelanta.
+        
+        Args:
+            fill: Orden completada (formato de get_order_status_from_exchange)
+        """
+        self._stream_fills.put(fill)
+
+    def _drain_stream_fills(self) -> Dict[str, int]:
+        """
+        Procesa los fills del stream encolados desde el último ciclo:
+        los registra y crea sus órdenes complementarias sin consultar el exchange.
+        
+        Returns:
+            Dict con fills procesados y órdenes complementarias creadas
+        """
+        fills = 0
+        orders = 0
+        while True:
+            try:
+                fill = self._stream_fills.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                comp_order = self._process_stream_fill(fill)
+            except Exception as e:
+                logger.error(f"❌ Error procesando fill del stream {fill.get('exchange_order_id')}: {e}")
+                continue
+            if comp_order is not False:
+                fills += 1
+            if comp_order:
+                orders += 1
+        return {'fills': fills, 'orders': orders}
+
+    def _process_stream_fill(self, fill: Dict[str, Any]):
+        """
+        Procesa un fill del stream.
+        
+        Returns:
+            Orden complementaria creada, None si no se pudo crear, o False si
+            el fill se ignoró (sin bot activo o ya procesado)
+        """
+        pair = fill.get('pair')
+        config = next((c for c in self._get_cached_active_configs() if c.pair == pair), None)
+        if config is None:
+            logger.debug(f"ℹ️ Fill de {pair} sin bot activo, ignorado")
+            return False
+        
+        if not self._mark_fill_processed(fill['exchange_order_id']):
+            return False
+        logger.info(f"[FILL] {pair}: Orden {fill['exchange_order_id']} {fill['side']} {fill['filled']} a ${fill['price']} ejecutada (stream)")
+        # El fill cambió los balances: el snapshot del ciclo ya no vale
+        self._invalidate_snapshots()
+        self.exchange_service.record_fill(fill)
+        self._queue_fill(fill, pair)
+        comp_order = self._create_complementary_order_from_dict(fill, config)
+        
+        if comp_order and fill.get('event_time'):
+            latency_ms = time.time() * 1000 - fill['event_time']
+            logger.info(f"⚡ [COMPLEMENTARIA] {pair}: creada {latency_ms:.0f} ms después del fill")
+        elif not comp_order:
+            logger.warning(f"[COMPLEMENTARIA] {pair}: No se pudo crear la orden complementaria")
+        return comp_order
+
+    def _queue_fill(self, fill: Dict[str, Any], pair: str) -> None:
+        """Encola la orden llenada para guardarla como 'filled' al final del ciclo."""
+        self._queue_order(GridOrder(
+            id=None,
+            exchange_order_id=fill['exchange_order_id'],
+            pair=pair,
+            side=fill['side'],
+            amount=fill['filled'],
+            price=fill['price'],
+            status='filled',
+            order_type=fill.get('type') or 'limit',
+            grid_level=None,
+            created_at=None,
+            filled_at=datetime.utcnow()
+        ))
+
+    def _queue_order(self, order: GridOrder) -> None:
+        """
+        Encola una orden para el siguiente lote. Si ya estaba encolada (una
+        complementaria que se llenó en el mismo ciclo) conserva su origen.
+        """
+        if not order.exchange_order_id:
+            return
+        with self._pending_lock:
+            previous = self._pending_orders.get(order.exchange_order_id)
+            if previous is not None and order.parent_order_id is None:
+                order.parent_order_id = previous.parent_order_id
+                order.parent_price = previous.parent_price
+            self._pending_orders[order.exchange_order_id] = order
+
+    def _cancel_pending_orders(self, pair: str) -> None:
+        """Marca como canceladas las órdenes abiertas encoladas de un par (evento de riesgo)."""
+        with self._pending_lock:
+            for order in self._pending_orders.values():
+                if order.pair == pair and order.status == 'open':
+                    order.status = 'cancelled'
+
+    def _flush_order_writes(self) -> int:
+        """
+        Guarda en una sola transacción las órdenes encoladas y los trades que
+        completan. Si la BD falla, el lote se reintenta en el siguiente ciclo.
+        
+        Returns:
+            Número de órdenes guardadas
+        """
+        with self._pending_lock:
+            if not self._pending_orders:
+                return 0
+            orders = list(self._pending_orders.values())
+            self._pending_orders = OrderedDict()
+        
+        try:
+            trades = self._build_trades(orders)
+            saved = self.grid_repository.save_order_batch(orders, trades)
+        except Exception as e:
+            logger.error(f"❌ Error guardando lote de órdenes: {e}")
+            saved = False
+        
+        if not saved:
+            logger.warning(f"⚠️ No se pudieron guardar {len(orders)} órdenes, se reintentará en el próximo ciclo")
+            with self._pending_lock:
+                for order in orders:
+                    # Lo encolado mientras tanto es más reciente
+                    self._pending_orders.setdefault(order.exchange_order_id, order)  # type: ignore
+            return 0
+        
+        logger.debug(f"💾 Guardadas {len(orders)} órdenes y {len(trades)} trades")
+        return len(orders)
+
+    def _build_trades(self, orders: List[GridOrder]) -> List[GridTrade]:
+        """
+        Crea un trade por cada complementaria llenada. El origen de las que se
+        colocaron en ciclos anteriores se lee de la BD en una sola consulta.
+        """
+        filled = [o for o in orders if o.status == 'filled']
+        unknown = [o.exchange_order_id for o in filled if o.parent_price is None and o.exchange_order_id]
+        stored = self.grid_repository.get_orders_by_exchange_ids(unknown) if unknown else {}
+        
+        trades = []
+        for order in filled:
+            if order.parent_price is None:
+                stored_order = stored.get(order.exchange_order_id or '')
+                if stored_order is None or stored_order.parent_price is None:
+                    continue  # Orden de la grilla inicial: no cierra ningún trade
+                order.parent_order_id = stored_order.parent_order_id
+                order.parent_price = stored_order.parent_price
+            trades.append(self._create_trade_from_fill(order))
+        return trades
+
+    def _create_trade_from_fill(self, order: GridOrder) -> GridTrade:
+        """Trade formado por una complementaria llenada y la orden que la originó."""
+        parent_price = order.parent_price or Decimal('0')
+        if order.side == 'sell':
+            buy_order_id, sell_order_id = order.parent_order_id or '', order.exchange_order_id or ''
+            buy_price, sell_price = parent_price, order.price
+        else:
+            buy_order_id, sell_order_id = order.exchange_order_id or '', order.parent_order_id or ''
+            buy_price, sell_price = order.price, parent_price
+        
+        profit = (sell_price - buy_price) * order.amount
+        profit_percent = profit / (buy_price * order.amount) * 100 if buy_price * order.amount > 0 else Decimal('0')
+        return GridTrade(
+            pair=order.pair,
+            buy_order_id=buy_order_id,
+            sell_order_id=sell_order_id,
+            buy_price=buy_price,
+            sell_price=sell_price,
+            amount=order.amount,
+            profit=profit,
+            profit_percent=profit_percent,
+            executed_at=order.filled_at or datetime.utcnow()
+        )
+
+    def _mark_fill_processed(self, order_id: Optional[str]) -> bool:
+        """
+        Registra un fill como procesado.
+        
+        Returns:
+            False si ya se había procesado (por el stream o por REST)
+        """
+        if not order_id or order_id in self._processed_fills:
+            return False
+        self._processed_fills[order_id] = None
+        if len(self._processed_fills) > self._max_processed_fills:
+            self._processed_fills.popitem(last=False)
+        return True
 
     def _get_cached_active_configs(self) -> List[GridConfig]:
         """
@@ -169,7 +497,7 @@ class RealTimeGridMonitorUseCase:
         
         return self._active_configs_cache
 
-    def _is_bot_ready_for_realtime(self, config: GridConfig) -> bool:
+    def _is_bot_ready_for_realtime(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> bool:
         """
         Verifica si un bot está listo para monitoreo en tiempo real.
         Un bot está listo cuando:
@@ -178,6 +506,7 @@ class RealTimeGridMonitorUseCase:
         
         Args:
             config: Configuración del bot
+            snapshot: Snapshot del ciclo (None = el del par en este ciclo)
             
         Returns:
             bool: True si el bot está listo para monitoreo en tiempo real
@@ -194,8 +523,10 @@ class RealTimeGridMonitorUseCase:
         
         try:
             # Obtener órdenes activas actuales
-            current_active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
-            total_active_orders = len(current_active_orders)
+            snapshot = snapshot or self._get_snapshot(pair)
+            if snapshot is None:
+                raise Exception("snapshot del exchange no disponible")
+            total_active_orders = len(snapshot.open_orders)
             
             # Verificar si ya completó la primera inicialización
             first_init_completed = self._bot_initialization_status.get(pair, {}).get('first_initialization_completed', False)
@@ -233,12 +564,13 @@ class RealTimeGridMonitorUseCase:
             logger.error(f"❌ Error verificando estado de inicialización para {pair}: {e}")
             return False
 
-    def _monitor_bot_realtime(self, config: GridConfig) -> Dict[str, Any]:
+    def _monitor_bot_realtime(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Any]:
         """
         Monitorea un bot individual en tiempo real usando métodos avanzados de detección de fills.
         
         Args:
             config: Configuración del bot
+            snapshot: Snapshot del ciclo (None = el del par en este ciclo)
             
         Returns:
             Dict con el resultado del monitoreo
@@ -248,14 +580,17 @@ class RealTimeGridMonitorUseCase:
         pair = config.pair
         fills_detected = []
         
-        # 1. Obtener órdenes activas actuales del exchange
-        current_active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
+        # 1. Órdenes activas actuales (del snapshot del ciclo)
+        snapshot = snapshot or self._get_snapshot(pair)
+        if snapshot is None:
+            return {'fills_detected': 0, 'new_orders_created': 0, 'trades_completed': 0}
+        current_active_orders = list(snapshot.open_orders)
         logger.debug(f"[EXCHANGE] {pair}: {len(current_active_orders)} órdenes activas")
         
         # 2. Detectar fills usando múltiples métodos
         fills_detected.extend(self._detect_fills_method_1(pair, current_active_orders))
-        fills_detected.extend(self._detect_fills_method_2(pair))
-        fills_detected.extend(self._detect_fills_method_3(pair))
+        fills_detected.extend(self._detect_fills_method_2(pair, snapshot))
+        fills_detected.extend(self._detect_fills_method_3(pair, snapshot))
         
         # 3. Actualizar tracking de órdenes para el próximo ciclo
         self._previous_active_orders[pair] = current_active_orders
@@ -267,11 +602,11 @@ class RealTimeGridMonitorUseCase:
         if fills_detected:
             logger.info(f"💰 {len(fills_detected)} fills detectados en {pair} usando métodos avanzados")
             
-            # Eliminar duplicados basados en exchange_order_id
+            # Eliminar duplicados y fills ya procesados por el stream de usuario
             unique_fills = {}
             for fill in fills_detected:
                 order_id = fill.get('exchange_order_id')
-                if order_id and order_id not in unique_fills:
+                if order_id not in unique_fills and self._mark_fill_processed(order_id):
                     unique_fills[order_id] = fill
             
             fills_detected = list(unique_fills.values())
@@ -279,9 +614,12 @@ class RealTimeGridMonitorUseCase:
             
             for fill in fills_detected:
                 logger.info(f"[FILL] {pair}: Orden {fill['exchange_order_id']} {fill['side']} {fill['filled']} a ${fill['price']} ejecutada")
+                self.exchange_service.record_fill(fill)
+                self._queue_fill(fill, pair)
                 
-                # Crear orden complementaria
-                comp_order = self._create_complementary_order_from_dict(fill, config)
+                # Crear orden complementaria con el snapshot del ciclo: cada orden colocada
+                # lo invalida, pero solo se relee cuando otro paso lo pida (_get_snapshot)
+                comp_order = self._create_complementary_order_from_dict(fill, config, snapshot)
                 if comp_order:
                     logger.info(f"[COMPLEMENTARIA] {pair}: Orden complementaria creada correctamente")
                     new_orders_created += 1
@@ -301,10 +639,12 @@ class RealTimeGridMonitorUseCase:
         """
         try:
             previous_orders = self._previous_active_orders.get(pair, [])
+            # Las que ya llegaron por el stream no necesitan fetch_order
+            previous_orders = [o for o in previous_orders if o.get('exchange_order_id') not in self._processed_fills]
             if not previous_orders:
                 return []
             
-            fills = self.exchange_service.detect_fills_by_comparison(pair, previous_orders)
+            fills = self.exchange_service.detect_fills_by_comparison(pair, previous_orders, current_orders)
             if fills:
                 logger.info(f"🔍 Método 1: {len(fills)} fills detectados por comparación en {pair}")
             
@@ -314,7 +654,7 @@ class RealTimeGridMonitorUseCase:
             logger.error(f"❌ Error en método 1 de detección de fills para {pair}: {e}")
             return []
 
-    def _detect_fills_method_2(self, pair: str) -> List[Dict[str, Any]]:
+    def _detect_fills_method_2(self, pair: str, snapshot: Optional[ExchangeSnapshot] = None) -> List[Dict[str, Any]]:
         """
         Método 2: Detección usando fetch_closed_orders.
         Obtiene órdenes cerradas recientemente del exchange.
@@ -322,13 +662,13 @@ class RealTimeGridMonitorUseCase:
         """
         try:
             # 🔒 SOLO DETECTAR FILLS DE ÓRDENES ACTIVAS ACTUALES
-            # Obtener órdenes activas actuales
-            current_active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
-            if not current_active_orders:
+            # Órdenes activas actuales (del snapshot del ciclo)
+            snapshot = snapshot or self._get_snapshot(pair)
+            if snapshot is None or not snapshot.open_orders:
                 return []
             
             # Crear set de IDs de órdenes activas para verificación rápida
-            active_order_ids = {order['exchange_order_id'] for order in current_active_orders}
+            active_order_ids = snapshot.open_order_ids
             
             # Obtener fills desde hace 2 minutos (ventana más corta para evitar históricos)
             since_timestamp = int((datetime.now().timestamp() - 120) * 1000)  # 2 minutos atrás
@@ -353,7 +693,7 @@ class RealTimeGridMonitorUseCase:
             logger.error(f"❌ Error en método 2 de detección de fills para {pair}: {e}")
             return []
 
-    def _detect_fills_method_3(self, pair: str) -> List[Dict[str, Any]]:
+    def _detect_fills_method_3(self, pair: str, snapshot: Optional[ExchangeSnapshot] = None) -> List[Dict[str, Any]]:
         """
         Método 3: Detección usando fetch_my_trades.
         Obtiene trades recientes para detectar fills.
@@ -361,13 +701,13 @@ class RealTimeGridMonitorUseCase:
         """
         try:
             # 🔒 SOLO DETECTAR FILLS DE ÓRDENES ACTIVAS ACTUALES
-            # Obtener órdenes activas actuales
-            current_active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
-            if not current_active_orders:
+            # Órdenes activas actuales (del snapshot del ciclo)
+            snapshot = snapshot or self._get_snapshot(pair)
+            if snapshot is None or not snapshot.open_orders:
                 return []
             
             # Crear set de IDs de órdenes activas para verificación rápida
-            active_order_ids = {order['exchange_order_id'] for order in current_active_orders}
+            active_order_ids = snapshot.open_order_ids
             
             # Obtener trades desde hace 2 minutos (ventana más corta)
             since_timestamp = int((datetime.now().timestamp() - 120) * 1000)  # 2 minutos atrás
@@ -397,28 +737,29 @@ class RealTimeGridMonitorUseCase:
             logger.error(f"❌ Error en método 3 de detección de fills para {pair}: {e}")
             return []
 
-    def _create_complementary_order_from_dict(self, filled_order: Dict[str, Any], config: GridConfig) -> Optional[GridOrder]:
+    def _create_complementary_order_from_dict(self, filled_order: Dict[str, Any], config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Optional[GridOrder]:
         """
         Crea una orden complementaria basada en una orden completada (dict).
         
         Args:
             filled_order: Orden completada como dict del exchange
             config: Configuración del bot
+            snapshot: Snapshot del ciclo; None = consultar el exchange (fills del stream)
             
         Returns:
             GridOrder creada o None si falla
         """
         try:
             # 🔒 VALIDACIÓN: Evitar crear órdenes complementarias durante la inicialización
-            # Verificar si el bot tiene órdenes iniciales suficientes
-            active_orders = self.exchange_service.get_active_orders_from_exchange(config.pair)
-            total_active_orders = len(active_orders)
-            
             # Verificar si el bot ha completado su primera inicialización
             first_init_completed = self._bot_initialization_status.get(config.pair, {}).get('first_initialization_completed', False)
             
             if not first_init_completed:
-                # Si no ha completado la primera inicialización, verificar que tenga todas las órdenes iniciales
+                # Solo entonces hace falta consultar las órdenes activas (evita un REST por fill)
+                if snapshot is not None:
+                    total_active_orders = len(snapshot.open_orders)
+                else:
+                    total_active_orders = len(self.exchange_service.get_active_orders_from_exchange(config.pair))
                 if total_active_orders < config.grid_levels:
                     logger.info(f"🚫 Bot {config.pair}: Solo {total_active_orders}/{config.grid_levels} órdenes activas. "
                                f"Esperando a completar primera inicialización antes de crear órdenes complementarias.")
@@ -442,9 +783,10 @@ class RealTimeGridMonitorUseCase:
             # Calcular precio complementario
             complementary_price = self._calculate_complementary_price(executed_price, config, complementary_side)
             
-            # Validar que el bot puede usar el capital
+            # Validar que el bot puede usar el capital (USDT para compras, base para ventas)
+            required = filled_amount if complementary_side == 'sell' else filled_amount * complementary_price
             capital_check = self.exchange_service.can_bot_use_capital(
-                config, filled_amount, complementary_side
+                config, required, complementary_side, snapshot
             )
             
             if not capital_check['can_use']:
@@ -462,6 +804,12 @@ class RealTimeGridMonitorUseCase:
             
             if complementary_order:
                 logger.info(f"✅ Orden complementaria creada: {complementary_side} {filled_amount} a ${complementary_price}")
+                self._invalidate_snapshots()
+                
+                # Al llenarse formará un trade con la orden que la originó
+                complementary_order.parent_order_id = filled_order.get('exchange_order_id')
+                complementary_order.parent_price = executed_price
+                self._queue_order(complementary_order)
                 
                 # 📱 Acumular notificación en lugar de enviar inmediatamente
                 notification = {
@@ -5,7 +5,7 @@ from typing import Dict, Any, Optional, List
 from decimal import Decimal
 
 from app.domain.interfaces import GridRepository, ExchangeService, NotificationService, GridCalculator
-from app.domain.entities import GridConfig, GridOrder
+from app.domain.entities import GridConfig, GridOrder, ExchangeSnapshot
 from shared.services.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -34,20 +34,25 @@ class RiskManagementUseCase:
         self.grid_calculator = grid_calculator
         logger.info("✅ RiskManagementUseCase inicializado.")
 
-    def check_and_handle_risk_events(self, config: GridConfig) -> Dict[str, Any]:
+    def check_and_handle_risk_events(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Any]:
         """
         Verifica y maneja eventos de riesgo para un bot específico.
         
         Args:
             config: Configuración del bot
+            snapshot: Snapshot del ciclo (precio y órdenes abiertas); None = consultar el exchange
             
         Returns:
             Dict con información de eventos de riesgo manejados
         """
         try:
             pair = config.pair
-            current_price = self.exchange_service.get_current_price(pair)
-            active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
+            if snapshot is not None:
+                current_price = snapshot.price
+                active_orders = list(snapshot.open_orders)
+            else:
+                current_price = self.exchange_service.get_current_price(pair)
+                active_orders = self.exchange_service.get_active_orders_from_exchange(pair)
             
             events_handled = []
             
@@ -204,6 +209,7 @@ class RiskManagementUseCase:
                     except Exception as e:
                         logger.error(f"❌ Error cancelando orden {order.get('id')} para {pair}: {e}")
                         continue
+            self.grid_repository.cancel_all_orders_for_pair(pair)
             actions.append(f"Canceladas {cancelled_orders} órdenes activas para {pair}")
             
             # 2. Liquidar posiciones
@@ -274,6 +280,7 @@ class RiskManagementUseCase:
                     except Exception as e:
                         logger.error(f"❌ Error cancelando orden {order.get('id')} para {pair}: {e}")
                         continue
+            self.grid_repository.cancel_all_orders_for_pair(pair)
             
             actions.append(f"Canceladas {cancelled_orders} órdenes activas para {pair}")
             
@@ -16,10 +16,33 @@ PRICE_RANGE_PERCENT_DEFAULT = 10.0
 STOP_LOSS_PERCENT_DEFAULT = 5.0
 
 # Configuración de monitoreo
-MONITORING_INTERVAL_HOURS = 1  # Gestión de transiciones cada hora
+MONITORING_INTERVAL_HOURS = 1  # Resumen periódico cada hora
+DECISION_DEBOUNCE_SECONDS = 2  # Agrupa los cambios de decisión de un mismo ciclo del Cerebro
 REALTIME_MONITOR_INTERVAL_SECONDS = 10  # Monitor tiempo real cada 10 segundos
 ORDER_CHECK_TIMEOUT_SECONDS = 30
 REALTIME_CACHE_EXPIRY_MINUTES = 5  # Cache de configuraciones activas
 
+# Stream de usuario de Binance (executionReport por WebSocket)
+# Con el stream conectado los fills llegan al instante y el sondeo REST
+# queda como reconciliación de seguridad cada REALTIME_RECONCILE_INTERVAL_SECONDS
+USER_DATA_STREAM_ENABLED = True
+USER_DATA_STREAM_KEEPALIVE_MINUTES = 30  # Binance caduca el listenKey a los 60 minutos
+USER_DATA_STREAM_URLS = {
+    'production': 'wss://stream.binance.com:9443/ws',
+    'sandbox': 'wss://stream.testnet.binance.vision/ws'
+}
+REALTIME_RECONCILE_INTERVAL_SECONDS = 120
+
+# Libro de capital local por bot (can_bot_use_capital sin fetch_balance)
+CAPITAL_LEDGER_RECONCILE_MINUTES = 10  # Reconciliación con el balance real del exchange
+CAPITAL_LEDGER_DRIFT_ALERT_PERCENT = 1.0  # Alerta si la deriva supera este % del capital asignado
+
+# Colocación concurrente de órdenes (grilla inicial)
+# Una grilla de 30 niveles sale en una sola ronda; el gateway compartido
+# aplica los límites de peso y de órdenes de Binance
+ORDER_PLACEMENT_MAX_WORKERS = 30
+ORDER_PLACEMENT_MAX_ATTEMPTS = 3
+ORDER_PLACEMENT_RETRY_DELAY_SECONDS = 1.0
+
 # Configuración de exchange
 EXCHANGE_NAME = 'binance'  # Se puede cambiar en el futuro 
\ No newline at end of file
@@ -3,7 +3,7 @@ Entidades del dominio para el servicio Grid.
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 
 @dataclass
@@ -41,6 +41,8 @@ class GridOrder:
     grid_level: Optional[int]
     created_at: Optional[datetime]
     filled_at: Optional[datetime]
+    parent_order_id: Optional[str] = None  # Orden llenada que originó esta complementaria
+    parent_price: Optional[Decimal] = None  # Precio de ejecución de esa orden
     
 @dataclass
 class GridBotState:
@@ -93,4 +95,49 @@ class GridStep:
     sell_level_price: Decimal
     active_order_id: Optional[str]
     active_side: Optional[str]  # 'buy' o 'sell'
-    last_filled_side: Optional[str] = None 
\ No newline at end of file
+    last_filled_side: Optional[str] = None 
+
+@dataclass(frozen=True)
+class ExchangeSnapshot:
+    """Estado del exchange para un par, leído una sola vez por ciclo.
+
+    Se comparte entre verificación de inicialización, riesgos, detección de
+    fills y creación de órdenes; colocar una orden propia lo invalida.
+    """
+    pair: str
+    open_orders: Tuple[Dict[str, Any], ...]  # formato de get_active_orders_from_exchange
+    balances: Dict[str, Decimal]  # saldo libre por moneda (toda la cuenta)
+    price: Decimal  # último precio del ticker
+    taken_at: datetime
+
+    @property
+    def open_order_ids(self) -> set:
+        """IDs del exchange de las órdenes abiertas."""
+        return {order['exchange_order_id'] for order in self.open_orders}
+
+    def free_balance(self, currency: str) -> Decimal:
+        """Saldo libre de una moneda (0 si no hay)."""
+        return self.balances.get(currency, Decimal('0'))
+
+@dataclass
+class OrderRequest:
+    """Orden a colocar por el pipeline de colocación concurrente."""
+    pair: str
+    side: str  # 'buy' o 'sell'
+    amount: Decimal
+    price: Decimal
+    order_type: str = 'limit'
+    grid_level: Optional[int] = None
+    client_order_id: Optional[str] = None  # Idempotencia en reintentos (newClientOrderId)
+
+@dataclass
+class OrderPlacementResult:
+    """Resultado de colocar una OrderRequest."""
+    request: OrderRequest
+    order: Optional[GridOrder]
+    error: Optional[str]
+    attempts: int
+
+    @property
+    def success(self) -> bool:
+        return self.order is not None
@@ -2,11 +2,11 @@
 Define las interfaces (contratos) para la capa de aplicación del servicio Grid.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 from datetime import datetime
 
-from .entities import GridConfig, GridOrder, GridBotState, GridTrade
+from .entities import GridConfig, GridOrder, GridBotState, GridTrade, ExchangeSnapshot, OrderRequest, OrderPlacementResult
 from shared.services.logging_config import get_logger
 logger = get_logger(__name__)
 
@@ -69,6 +69,19 @@ class GridRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_orders_by_exchange_ids(self, exchange_order_ids: List[str]) -> Dict[str, GridOrder]:
+        """Obtiene las órdenes guardadas con esos IDs del exchange, indexadas por ID."""
+        pass
+
+    @abstractmethod
+    def save_order_batch(self, orders: List[GridOrder], trades: List[GridTrade]) -> bool:
+        """
+        Guarda órdenes (alta o cambio de estado por exchange_order_id) y trades
+        en una sola transacción. Retorna False si no se pudo guardar.
+        """
+        pass
+
     # --- Nuevos métodos para escalones Grid ---
     @abstractmethod
     def get_grid_steps(self, pair: str):
@@ -86,8 +99,8 @@ class GridRepository(ABC):
         pass
 
     @abstractmethod
-    def get_trades_by_pair(self, pair: str, limit: int = 100) -> List[GridTrade]:
-        """Obtiene los trades completados para un par específico."""
+    def get_trades_by_pair(self, pair: str, limit: int = 100, since: Optional[datetime] = None) -> List[GridTrade]:
+        """Obtiene los trades completados para un par (más recientes primero, opcionalmente desde una fecha)."""
         pass
 
     @abstractmethod
@@ -114,10 +127,20 @@ class ExchangeService(ABC):
         pass
 
     @abstractmethod
-    def create_order(self, pair: str, side: str, amount: Decimal, price: Decimal, order_type: str = 'limit') -> GridOrder:
+    def create_order(self, pair: str, side: str, amount: Decimal, price: Decimal, order_type: str = 'limit',
+                     client_order_id: Optional[str] = None) -> GridOrder:
         """Crea una orden en el exchange."""
         pass
 
+    @abstractmethod
+    def create_orders(self, requests: List[OrderRequest]) -> List[OrderPlacementResult]:
+        """
+        Coloca varias órdenes en paralelo respetando los límites del exchange.
+        Reintenta los fallos transitorios y devuelve un resultado por orden
+        (en el mismo orden que `requests`).
+        """
+        pass
+
     @abstractmethod
     def cancel_order(self, pair: str, order_id: str) -> bool:
         """Cancela una orden en el exchange."""
@@ -179,15 +202,25 @@ class ExchangeService(ABC):
         pass
 
     @abstractmethod
-    def get_bot_allocated_balance(self, config: GridConfig) -> Dict[str, Decimal]:
+    def get_bot_allocated_balance(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Decimal]:
         """Obtiene el balance asignado específicamente para un bot, respetando el aislamiento de capital."""
         pass
 
     @abstractmethod
-    def can_bot_use_capital(self, config: GridConfig, required_amount: Decimal, side: str) -> Dict[str, Any]:
+    def can_bot_use_capital(self, config: GridConfig, required_amount: Decimal, side: str, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Any]:
         """Verifica si un bot puede usar una cantidad específica de capital sin exceder su asignación."""
         pass
 
+    @abstractmethod
+    def record_fill(self, fill: Dict[str, Any]) -> None:
+        """Registra un fill en el libro de capital local de los bots."""
+        pass
+
+    @abstractmethod
+    def reconcile_capital_ledger(self, config: GridConfig, snapshot: ExchangeSnapshot) -> Optional[Dict[str, Any]]:
+        """Reconcilia el libro de capital de un bot con el exchange y reporta la deriva."""
+        pass
+
     @abstractmethod
     def validate_order_after_fees(self, pair: str, side: str, amount: Decimal, price: Decimal) -> Dict[str, Any]:
         """Valida que una orden cumpla con el mínimo NOTIONAL después de las comisiones."""
@@ -219,10 +252,49 @@ class ExchangeService(ABC):
         pass
 
     @abstractmethod
-    def detect_fills_by_comparison(self, pair: str, previous_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def detect_fills_by_comparison(self, pair: str, previous_orders: List[Dict[str, Any]], current_orders: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Detecta fills comparando órdenes activas anteriores con las actuales."""
         pass
 
+    @abstractmethod
+    def get_exchange_snapshot(self, pair: str, balances: Optional[Dict[str, Decimal]] = None) -> Optional[ExchangeSnapshot]:
+        """Lee órdenes abiertas, balances y precio de un par en una sola pasada (None si falla)."""
+        pass
+
+class FillStream(ABC):
+    """
+    Interfaz para una fuente de fills en tiempo real (empujados por el exchange).
+
+    Los fills llegan con el mismo formato de dict que get_order_status_from_exchange.
+    """
+
+    @abstractmethod
+    def subscribe(
+        self,
+        on_fill: Callable[[Dict[str, Any]], None],
+        on_resync: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Registra los callbacks del stream.
+        on_resync se llama tras una reconexión: pudieron perderse fills y hay que reconciliar por REST.
+        """
+        pass
+
+    @abstractmethod
+    def start(self) -> None:
+        """Conecta el stream en segundo plano."""
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Desconecta el stream."""
+        pass
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Indica si el stream está conectado y entregando eventos."""
+        pass
+
 class NotificationService(ABC):
     """Interfaz para servicios de notificación."""
 
@@ -0,0 +1,395 @@
+"""
+Libro de capital local por bot.
+
+Lleva, por par, el capital libre y el reservado en órdenes abiertas:
+
+- USDT libre y USDT reservado en compras abiertas
+- Moneda base libre y base reservada en ventas abiertas
+
+Se actualiza con nuestras propias órdenes (colocar, cancelar) y con los
+fills (stream o REST). Así `can_bot_use_capital` es una consulta local en
+lugar de fetch_balance + fetch_ticker, y cada bot solo ve su propio USDT.
+
+Los fills se aplican por diferencia con lo ya llenado de cada orden: si un
+mismo fill llega por el stream y por REST, solo cuenta una vez.
+
+Periódicamente se reconcilia con el exchange (`reconcile`). Lo que no
+cuadra se corrige y se reporta como deriva.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Set
+
+from shared.services.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ZERO = Decimal('0')
+MAX_COMPLETED_ORDERS = 1000  # IDs de órdenes cerradas recordados por bot
+
+
+@dataclass
+class LedgerOrder:
+    """Orden abierta registrada en el libro."""
+    order_id: str
+    side: str  # 'buy' o 'sell'
+    amount: Decimal
+    price: Decimal  # precio de reserva (límite o precio de referencia en market)
+    filled: Decimal = ZERO
+
+    @property
+    def remaining(self) -> Decimal:
+        return max(self.amount - self.filled, ZERO)
+
+
+@dataclass
+class BotCapitalAccount:
+    """Capital de un bot (un par)."""
+    pair: str
+    allocated_capital: Decimal
+    quote_free: Decimal = ZERO
+    quote_reserved: Decimal = ZERO
+    base_free: Decimal = ZERO
+    base_reserved: Decimal = ZERO
+    last_price: Decimal = ZERO
+    orders: Dict[str, LedgerOrder] = field(default_factory=dict)
+    completed: "OrderedDict[str, None]" = field(default_factory=OrderedDict)
+    reconciled_at_ms: int = 0
+
+    @property
+    def total_value_usdt(self) -> Decimal:
+        return self.quote_free + self.quote_reserved + (self.base_free + self.base_reserved) * self.last_price
+
+
+class CapitalLedger:
+    """
+    Libro de capital en memoria de todos los bots (seguro entre hilos).
+    """
+
+    def __init__(self):
+        self._accounts: Dict[str, BotCapitalAccount] = {}
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Cuentas
+    # ------------------------------------------------------------------
+
+    def is_tracking(self, pair: str) -> bool:
+        """True si el bot ya tiene cuenta en el libro."""
+        return pair in self._accounts
+
+    def open_account(
+        self,
+        pair: str,
+        allocated_capital: Decimal,
+        open_orders: Iterable[Dict[str, Any]],
+        base_free: Decimal,
+        account_quote_free: Decimal,
+        price: Decimal
+    ) -> Dict[str, Any]:
+        """
+        Crea la cuenta de un bot a partir del estado del exchange.
+
+        El USDT libre del bot es su capital asignado menos lo que ya tiene
+        comprometido (compras abiertas y base a precio actual), sin superar
+        el USDT de la cuenta que no está asignado a otros bots.
+
+        Args:
+            pair: Par del bot
+            allocated_capital: Capital asignado (USDT)
+            open_orders: Órdenes abiertas del par (formato de get_active_orders_from_exchange)
+            base_free: Moneda base libre en la cuenta
+            account_quote_free: USDT libre de toda la cuenta
+            price: Precio actual
+        """
+        with self._lock:
+            account = BotCapitalAccount(pair=pair, allocated_capital=allocated_capital, last_price=price)
+            for order in open_orders:
+                self._add_order(account, order)
+            account.base_free = base_free
+            committed = account.quote_reserved + (account.base_free + account.base_reserved) * price
+            account.quote_free = max(min(allocated_capital - committed, self._unassigned_quote(account_quote_free, pair)), ZERO)
+            account.reconciled_at_ms = int(time.time() * 1000)
+            self._accounts[pair] = account
+            logger.info(f"📒 Libro de capital {pair}: ${account.quote_free:.2f} libres, "
+                        f"${account.quote_reserved:.2f} en compras, {account.base_free} base libre, "
+                        f"{account.base_reserved} base en ventas")
+            return self.get_account(pair)
+
+    def forget(self, pair: str) -> None:
+        """Elimina la cuenta de un bot (bot pausado: se recrea al volver a operar)."""
+        with self._lock:
+            self._accounts.pop(pair, None)
+
+    def reset(self) -> None:
+        """Elimina todas las cuentas (cambio de modo, cancelación global)."""
+        with self._lock:
+            self._accounts.clear()
+
+    def get_account(self, pair: str) -> Optional[Dict[str, Any]]:
+        """Copia del estado de la cuenta de un bot (None si no existe)."""
+        with self._lock:
+            account = self._accounts.get(pair)
+            if account is None:
+                return None
+            return {
+                'pair': pair,
+                'allocated_capital': account.allocated_capital,
+                'quote_free': account.quote_free,
+                'quote_reserved': account.quote_reserved,
+                'base_free': account.base_free,
+                'base_reserved': account.base_reserved,
+                'last_price': account.last_price,
+                'open_orders': len(account.orders),
+                'total_value_usdt': account.total_value_usdt
+            }
+
+    def available(self, pair: str, side: str) -> Decimal:
+        """
+        Capital libre del bot para un lado: USDT para 'buy', base para 'sell'.
+        """
+        with self._lock:
+            account = self._accounts.get(pair)
+            if account is None:
+                return ZERO
+            return account.quote_free if side == 'buy' else account.base_free
+
+    def order_ids(self, pair: str) -> Set[str]:
+        """IDs de las órdenes abiertas registradas para el bot."""
+        with self._lock:
+            account = self._accounts.get(pair)
+            return set(account.orders) if account else set()
+
+    # ------------------------------------------------------------------
+    # Eventos propios
+    # ------------------------------------------------------------------
+
+    def record_order(self, pair: str, order_id: str, side: str, amount: Decimal, price: Decimal) -> None:
+        """Reserva capital para una orden que acabamos de colocar."""
+        with self._lock:
+            account = self._accounts.get(pair)
+            if account is None or order_id in account.orders:
+                return
+            order = LedgerOrder(order_id=order_id, side=side, amount=amount, price=price)
+            account.orders[order_id] = order
+            if side == 'buy':
+                account.quote_free -= amount * price
+                account.quote_reserved += amount * price
+            else:
+                account.base_free -= amount
+                account.base_reserved += amount
+
+    def record_cancel(self, pair: str, order_id: str) -> None:
+        """Libera lo que quedaba reservado de una orden cancelada."""
+        with self._lock:
+            account = self._accounts.get(pair)
+            order = account.orders.get(order_id) if account else None
+            if order is None:
+                return
+            self._close_order(account, order_id)
+            self._release(account, order)
+
+    def record_fill(
+        self,
+        pair: str,
+        order_id: str,
+        side: str,
+        filled: Decimal,
+        price: Decimal,
+        fee_rate: Decimal,
+        timestamp_ms: int = 0
+    ) -> bool:
+        """
+        Aplica un fill (total llenado de la orden hasta ahora).
+
+        Args:
+            filled: Cantidad total llenada de la orden (no el incremento)
+            price: Precio medio de ejecución
+            fee_rate: Comisión (en base para compras, en USDT para ventas)
+            timestamp_ms: Hora del fill; si es anterior a la última
+                reconciliación y la orden ya no está en el libro, el
+                balance del exchange ya lo incluía
+
+        Returns:
+            True si cambió el libro
+        """
+        with self._lock:
+            account = self._accounts.get(pair)
+            if account is None:
+                return False
+            if order_id in account.completed:
+                return False
+            order = account.orders.get(order_id)
+            if order is None:
+                if timestamp_ms and timestamp_ms <= account.reconciled_at_ms:
+                    return False
+                # Orden que no colocamos nosotros: se acredita sin reserva previa
+                logger.warning(f"⚠️ Libro de capital {pair}: fill de orden desconocida {order_id}")
+                order = LedgerOrder(order_id=order_id, side=side, amount=filled, price=price)
+                if side == 'buy':
+                    account.quote_reserved += filled * price
+                    account.quote_free -= filled * price
+                else:
+                    account.base_reserved += filled
+                    account.base_free -= filled
+                account.orders[order_id] = order
+            self._apply_fill(account, order, filled, price, fee_rate)
+            if price > 0:
+                account.last_price = price
+            if order.remaining <= 0:
+                self._close_order(account, order_id)
+            return True
+
+    # ------------------------------------------------------------------
+    # Reconciliación
+    # ------------------------------------------------------------------
+
+    def reconcile(
+        self,
+        pair: str,
+        open_orders: Iterable[Dict[str, Any]],
+        closed_orders: Dict[str, Dict[str, Any]],
+        base_free: Decimal,
+        account_quote_free: Decimal,
+        price: Decimal,
+        fee_rate: Decimal
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ajusta la cuenta de un bot al estado real del exchange.
+
+        Args:
+            open_orders: Órdenes abiertas del par en el exchange
+            closed_orders: Estado final de las órdenes del libro que no están
+                en open_orders ({order_id: orden de get_order_status_from_exchange});
+                las que no aparecen aquí se conservan
+            base_free: Moneda base libre en el exchange
+            account_quote_free: USDT libre de toda la cuenta
+            price: Precio actual
+            fee_rate: Comisión para fills no registrados
+
+        Returns:
+            Reporte de deriva en USDT o None si el bot no tiene cuenta
+        """
+        with self._lock:
+            account = self._accounts.get(pair)
+            if account is None:
+                return None
+            account.last_price = price
+            missed_fills = ZERO
+            exchange_orders = {order['exchange_order_id']: order for order in open_orders}
+
+            # 1. Órdenes del libro que ya no están abiertas: fills o cancelaciones perdidas
+            for order_id in list(account.orders):
+                if order_id in exchange_orders:
+                    continue
+                final = closed_orders.get(order_id)
+                if not final or final.get('status') == 'open':
+                    # Sin estado final (o colocada después del snapshot): se conserva
+                    continue
+                order = account.orders[order_id]
+                self._close_order(account, order_id)
+                final_filled = Decimal(str(final.get('filled') or 0))
+                if final_filled > order.filled:
+                    missed_fills += (final_filled - order.filled) * order.price
+                    fill_price = Decimal(str(final.get('average') or final.get('price') or order.price))
+                    self._apply_fill(account, order, final_filled, fill_price, fee_rate)
+                self._release(account, order)
+
+            # 2. Órdenes abiertas: fills parciales perdidos y órdenes que no colocamos
+            unknown_orders = ZERO
+            for order_id, exchange_order in exchange_orders.items():
+                order = account.orders.get(order_id)
+                if order is None:
+                    added = self._add_order(account, exchange_order)
+                    if added.side == 'buy':
+                        account.quote_free -= added.remaining * added.price
+                    unknown_orders += added.remaining * added.price
+                    continue
+                exchange_filled = Decimal(str(exchange_order.get('filled') or 0))
+                if exchange_filled > order.filled:
+                    missed_fills += (exchange_filled - order.filled) * order.price
+                    self._apply_fill(account, order, exchange_filled, order.price, fee_rate)
+
+            # 3. La base libre del exchange manda (un bot por moneda base)
+            base_drift = base_free - account.base_free
+            account.base_free = base_free
+
+            # 4. El USDT libre del bot no puede superar el USDT no asignado de la cuenta
+            quote_cap = self._unassigned_quote(account_quote_free, pair)
+            quote_drift = ZERO
+            if account.quote_free > quote_cap:
+                quote_drift = account.quote_free - max(quote_cap, ZERO)
+                account.quote_free = max(quote_cap, ZERO)
+
+            account.reconciled_at_ms = int(time.time() * 1000)
+            drift_usdt = abs(base_drift) * price + quote_drift + missed_fills + unknown_orders
+            drift_percent = drift_usdt / account.allocated_capital * 100 if account.allocated_capital > 0 else ZERO
+            return {
+                'pair': pair,
+                'drift_usdt': drift_usdt,
+                'drift_percent': drift_percent,
+                'base_drift': base_drift,
+                'quote_drift': quote_drift,
+                'missed_fills_usdt': missed_fills,
+                'unknown_orders_usdt': unknown_orders
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _unassigned_quote(self, account_quote_free: Decimal, pair: str) -> Decimal:
+        """USDT libre de la cuenta que no pertenece a otros bots."""
+        others = sum((a.quote_free for p, a in self._accounts.items() if p != pair), ZERO)
+        return account_quote_free - others
+
+    def _close_order(self, account: BotCapitalAccount, order_id: str) -> None:
+        """Saca una orden del libro y recuerda su ID (fills repetidos se ignoran)."""
+        account.orders.pop(order_id, None)
+        account.completed[order_id] = None
+        if len(account.completed) > MAX_COMPLETED_ORDERS:
+            account.completed.popitem(last=False)
+
+    def _add_order(self, account: BotCapitalAccount, order: Dict[str, Any]) -> LedgerOrder:
+        """Registra una orden abierta del exchange y su reserva."""
+        ledger_order = LedgerOrder(
+            order_id=order['exchange_order_id'],
+            side=order['side'],
+            amount=Decimal(str(order['amount'])),
+            price=Decimal(str(order['price'])),
+            filled=Decimal(str(order.get('filled') or 0))
+        )
+        account.orders[ledger_order.order_id] = ledger_order
+        if ledger_order.side == 'buy':
+            account.quote_reserved += ledger_order.remaining * ledger_order.price
+        else:
+            account.base_reserved += ledger_order.remaining
+        return ledger_order
+
+    def _apply_fill(self, account: BotCapitalAccount, order: LedgerOrder, filled: Decimal, price: Decimal, fee_rate: Decimal) -> None:
+        """Mueve el incremento llenado de reservado a lo recibido."""
+        delta = min(filled, order.amount) - order.filled
+        if delta <= 0:
+            return
+        order.filled += delta
+        if order.side == 'buy':
+            account.quote_reserved -= delta * order.price
+            # Market / mejor precio: la diferencia con la reserva vuelve al libre
+            account.quote_free += delta * (order.price - price)
+            account.base_free += delta * (Decimal('1') - fee_rate)
+        else:
+            account.base_reserved -= delta
+            account.quote_free += delta * price * (Decimal('1') - fee_rate)
+
+    def _release(self, account: BotCapitalAccount, order: LedgerOrder) -> None:
+        """Devuelve al libre lo que quedaba reservado de una orden."""
+        if order.side == 'buy':
+            account.quote_reserved -= order.remaining * order.price
+            account.quote_free += order.remaining * order.price
+        else:
+            account.base_reserved -= order.remaining
+            account.base_free += order.remaining
+        order.amount = order.filled
@@ -1,56 +1,55 @@
 """
 Repositorio de base de datos para el servicio Grid.
 """
-from typing import List, Optional, Tuple, Dict, Any
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from sqlalchemy.exc import OperationalError, DisconnectionError
+from sqlalchemy import and_, case, func, text
 
 from app.domain.interfaces import GridRepository
 from app.domain.entities import GridConfig, GridOrder, GridBotState, GridStep, GridTrade
-from shared.database.models import GridBotConfig, GridBotState as GridBotStateModel, EstrategiaStatus
-from shared.database.session import get_db_session, health_check
+from shared.database.models import (
+    GridBotConfig, GridBotState as GridBotStateModel, EstrategiaStatus,
+    GridOrder as GridOrderModel, GridTrade as GridTradeModel
+)
+from shared.database.session import SessionLocal
 from shared.services.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 class DatabaseGridRepository(GridRepository):
-    """Implementación del repositorio de grid usando SQLAlchemy con manejo robusto de conexiones."""
+    """
+    Implementación del repositorio de grid usando SQLAlchemy.
+    
+    Cada llamada abre su propia sesión corta: el monitor en tiempo real, las
+    transiciones y las consultas de Telegram corren en hilos distintos y una
+    Session de SQLAlchemy no se puede compartir entre hilos.
+    """
 
-    def __init__(self, db_session: Session):
-        self.db = db_session
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
         logger.info("✅ DatabaseGridRepository inicializado.")
 
         # --- Almacenamiento temporal de GridStep en memoria ---
         # Clave: pair, Valor: List[GridStep]
         self._grid_steps_store: Dict[str, List[GridStep]] = {}
 
-    def _ensure_connection(self):
-        """
-        Verifica y restaura la conexión si es necesario.
-        """
-        if self.db is None:
-            from shared.database.session import get_db_with_retry
-            self.db = get_db_with_retry()
-            return
-            
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Sesión para una sola llamada: rollback si falla y cierre siempre (pool_pre_ping repone conexiones caídas)."""
+        db = self._session_factory()
         try:
-            # Verificar que la conexión está activa
-            from sqlalchemy import text
-            self.db.execute(text("SELECT 1"))
-        except (OperationalError, DisconnectionError) as e:
-            logger.warning(f"⚠️ Conexión perdida, intentando restaurar: {e}")
-            # La sesión actual está corrupta, crear una nueva
+            yield db
+        except Exception:
             try:
-                self.db.close()
-            except:
-                pass
-            # Obtener nueva sesión con reintentos
-            from shared.database.session import get_db_with_retry
-            self.db = get_db_with_retry()
-            logger.info("✅ Conexión restaurada")
+                db.rollback()
+            except Exception as rollback_error:
+                logger.warning(f"⚠️ Error en rollback: {rollback_error}")
+            raise
+        finally:
+            db.close()
 
     def get_active_configs(self) -> List[GridConfig]:
         """
@@ -58,28 +57,23 @@ class DatabaseGridRepository(GridRepository):
         CONFIA en el caso de uso de transiciones para gestionar is_running correctamente.
         """
         try:
-            self._ensure_connection()
-            
-            if self.db is None:
-                logger.error("❌ No se pudo obtener conexión a la base de datos")
-                return []
-            
-            configs = self.db.query(GridBotConfig).filter(
-                and_(
-                    GridBotConfig.is_active == True,
-                    GridBotConfig.is_configured == True,
-                    GridBotConfig.is_running == True  # El caso de uso ya gestionó las transiciones
-                )
-            ).all()
+            with self._session() as db:
+                configs = db.query(GridBotConfig).filter(
+                    and_(
+                        GridBotConfig.is_active == True,
+                        GridBotConfig.is_configured == True,
+                        GridBotConfig.is_running == True  # El caso de uso ya gestionó las transiciones
+                    )
+                ).all()
             
-            active_configs = []
-            for config in configs:
-                # SOLO convertir a entidad, sin validar decisiones
-                # El is_running=True ya garantiza que debe monitorearse
-                active_configs.append(self._map_config_to_entity(config))
+                active_configs = []
+                for config in configs:
+                    # SOLO convertir a entidad, sin validar decisiones
+                    # El is_running=True ya garantiza que debe monitorearse
+                    active_configs.append(self._map_config_to_entity(config))
             
-            logger.info(f"📊 Encontradas {len(active_configs)} configuraciones ejecutándose")
-            return active_configs
+                logger.info(f"📊 Encontradas {len(active_configs)} configuraciones ejecutándose")
+                return active_configs
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo configuraciones activas: {e}")
@@ -94,45 +88,40 @@ class DatabaseGridRepository(GridRepository):
             List[Tuple[GridConfig, current_decision, previous_state]]
         """
         try:
-            self._ensure_connection()
-            
-            if self.db is None:
-                logger.error("❌ No se pudo obtener conexión a la base de datos")
-                return []
-            
-            configs = self.db.query(GridBotConfig).filter(
-                and_(
-                    GridBotConfig.is_active == True,
-                    GridBotConfig.is_configured == True
-                )
-            ).all()
-            
-            configs_with_decisions = []
-            for config in configs:
-                # Obtener decisión actual del Cerebro (SOLO consulta, sin lógica)
-                estrategia = self.db.query(EstrategiaStatus).filter(
+            with self._session() as db:
+                configs = db.query(GridBotConfig).filter(
                     and_(
-                        EstrategiaStatus.par == config.pair,
-                        EstrategiaStatus.estrategia == "GRID"
+                        GridBotConfig.is_active == True,
+                        GridBotConfig.is_configured == True
                     )
-                ).order_by(EstrategiaStatus.timestamp.desc()).first()
+                ).all()
+            
+                configs_with_decisions = []
+                for config in configs:
+                    # Obtener decisión actual del Cerebro (SOLO consulta, sin lógica)
+                    estrategia = db.query(EstrategiaStatus).filter(
+                        and_(
+                            EstrategiaStatus.par == config.pair,
+                            EstrategiaStatus.estrategia == "GRID"
+                        )
+                    ).order_by(EstrategiaStatus.timestamp.desc()).first()
                 
-                if estrategia:
-                    current_decision = estrategia.decision
-                    previous_state = getattr(config, 'last_decision', 'NO_DECISION')
+                    if estrategia:
+                        current_decision = estrategia.decision
+                        previous_state = getattr(config, 'last_decision', 'NO_DECISION')
                     
-                    grid_config = self._map_config_to_entity(config)
-                    configs_with_decisions.append((grid_config, current_decision, previous_state))
-                else:
-                    # Si no hay estrategia, incluir con decisión vacía
-                    current_decision = "NO_STRATEGY"
-                    previous_state = getattr(config, 'last_decision', 'NO_DECISION')
+                        grid_config = self._map_config_to_entity(config)
+                        configs_with_decisions.append((grid_config, current_decision, previous_state))
+                    else:
+                        # Si no hay estrategia, incluir con decisión vacía
+                        current_decision = "NO_STRATEGY"
+                        previous_state = getattr(config, 'last_decision', 'NO_DECISION')
                     
-                    grid_config = self._map_config_to_entity(config)
-                    configs_with_decisions.append((grid_config, current_decision, previous_state))
+                        grid_config = self._map_config_to_entity(config)
+                        configs_with_decisions.append((grid_config, current_decision, previous_state))
             
-            logger.info(f"📋 Consultadas {len(configs_with_decisions)} configuraciones con decisiones")
-            return configs_with_decisions
+                logger.info(f"📋 Consultadas {len(configs_with_decisions)} configuraciones con decisiones")
+                return configs_with_decisions
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo configuraciones con decisiones: {e}")
@@ -141,26 +130,21 @@ class DatabaseGridRepository(GridRepository):
     def get_config_by_pair(self, pair: str) -> Optional[GridConfig]:
         """Obtiene la configuración para un par específico. SOLO consulta datos."""
         try:
-            self._ensure_connection()
-            
-            if self.db is None:
-                logger.error("❌ No se pudo obtener conexión a la base de datos")
-                return None
-            
-            config = self.db.query(GridBotConfig).filter(
-                and_(
-                    GridBotConfig.pair == pair,
-                    GridBotConfig.is_active == True,
-                    GridBotConfig.is_configured == True
-                )
-            ).first()
+            with self._session() as db:
+                config = db.query(GridBotConfig).filter(
+                    and_(
+                        GridBotConfig.pair == pair,
+                        GridBotConfig.is_active == True,
+                        GridBotConfig.is_configured == True
+                    )
+                ).first()
             
-            if config:
-                # SOLO retornar la configuración sin validar estrategias
-                # Las validaciones de decisiones son responsabilidad de los casos de uso
-                return self._map_config_to_entity(config)
+                if config:
+                    # SOLO retornar la configuración sin validar estrategias
+                    # Las validaciones de decisiones son responsabilidad de los casos de uso
+                    return self._map_config_to_entity(config)
             
-            return None
+                return None
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo configuración para {pair}: {e}")
@@ -169,36 +153,24 @@ class DatabaseGridRepository(GridRepository):
     def update_config_status(self, config_id: int, is_running: bool, last_decision: str) -> None:
         """Actualiza el estado de una configuración."""
         try:
-            self._ensure_connection()
-            
-            if self.db is None:
-                logger.error("❌ No se pudo obtener conexión a la base de datos")
-                return
-            
-            config = self.db.query(GridBotConfig).filter(GridBotConfig.id == config_id).first()
-            if config:
-                config.is_running = is_running  # type: ignore
-                config.last_decision = last_decision  # type: ignore
-                config.last_decision_timestamp = datetime.utcnow()  # type: ignore
-                config.updated_at = datetime.utcnow()  # type: ignore
-                self.db.commit()
-                logger.info(f"✅ Estado actualizado para config {config_id}: running={is_running}, decision={last_decision}")
-            else:
-                logger.warning(f"⚠️ No se encontró configuración con ID {config_id}")
+            with self._session() as db:
+                config = db.query(GridBotConfig).filter(GridBotConfig.id == config_id).first()
+                if config:
+                    config.is_running = is_running  # type: ignore
+                    config.last_decision = last_decision  # type: ignore
+                    config.last_decision_timestamp = datetime.utcnow()  # type: ignore
+                    config.updated_at = datetime.utcnow()  # type: ignore
+                    db.commit()
+                    logger.info(f"✅ Estado actualizado para config {config_id}: running={is_running}, decision={last_decision}")
+                else:
+                    logger.warning(f"⚠️ No se encontró configuración con ID {config_id}")
                 
         except Exception as e:
             logger.error(f"❌ Error actualizando estado de config {config_id}: {e}")
-            if self.db is not None:
-                try:
-                    self.db.rollback()
-                except Exception as rollback_error:
-                    logger.warning(f"⚠️ Error en rollback: {rollback_error}")
 
     def get_bot_state(self, pair: str) -> Optional[GridBotState]:
         """Obtiene el estado completo de un bot para un par."""
         try:
-            self._ensure_connection()
-            
             # Por ahora retornamos None ya que el modelo GridBotState no está completamente implementado
             # En una implementación completa, aquí consultaríamos la tabla de estado del bot
             logger.info(f"📊 Consultando estado del bot para {pair}")
@@ -211,8 +183,6 @@ class DatabaseGridRepository(GridRepository):
     def save_bot_state(self, bot_state: GridBotState) -> None:
         """Guarda el estado completo de un bot."""
         try:
-            self._ensure_connection()
-            
             # Por ahora solo loggeamos ya que el modelo completo no está implementado
             logger.info(f"💾 Guardando estado del bot {bot_state.pair}")
             # En una implementación completa, aquí guardaríamos en la tabla grid_bot_state
@@ -221,41 +191,112 @@ class DatabaseGridRepository(GridRepository):
             logger.error(f"❌ Error guardando estado del bot {bot_state.pair}: {e}")
 
     def get_active_orders(self, pair: str) -> List[GridOrder]:
-        """Obtiene las órdenes activas para un par."""
+        """Obtiene las órdenes activas para un par (índice pair + status)."""
         try:
-            self._ensure_connection()
+            with self._session() as db:
+                orders = db.query(GridOrderModel).filter(
+                    and_(
+                        GridOrderModel.pair == pair,
+                        GridOrderModel.status == 'open'
+                    )
+                ).order_by(GridOrderModel.price).all()
             
-            # Por ahora retornamos lista vacía ya que no tenemos tabla de órdenes implementada
-            # En una implementación completa, aquí consultaríamos la tabla de órdenes
-            logger.info(f"📋 Consultando órdenes activas para {pair}")
-            return []
+                logger.debug(f"📋 {len(orders)} órdenes activas en BD para {pair}")
+                return [self._map_order_to_entity(order) for order in orders]
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo órdenes activas para {pair}: {e}")
             return []
 
+    def get_orders_by_exchange_ids(self, exchange_order_ids: List[str]) -> Dict[str, GridOrder]:
+        """Obtiene las órdenes guardadas con esos IDs del exchange, indexadas por ID."""
+        if not exchange_order_ids:
+            return {}
+        try:
+            with self._session() as db:
+                orders = db.query(GridOrderModel).filter(
+                    GridOrderModel.exchange_order_id.in_(exchange_order_ids)
+                ).all()
+                return {str(order.exchange_order_id): self._map_order_to_entity(order) for order in orders}
+            
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo órdenes {exchange_order_ids}: {e}")
+            return {}
+
     def save_order(self, order: GridOrder) -> GridOrder:
         """Guarda una orden de grid trading."""
+        if self.save_order_batch([order], []):
+            logger.info(f"💾 Orden guardada: {order.side} {order.amount} {order.pair} a ${order.price}")
+        return order
+
+    def save_order_batch(self, orders: List[GridOrder], trades: List[GridTrade]) -> bool:
+        """
+        Guarda órdenes y trades en una sola transacción.
+        Las órdenes ya guardadas (mismo exchange_order_id) solo cambian de estado.
+        """
+        if not orders and not trades:
+            return True
         try:
-            self._ensure_connection()
-            
-            # Por ahora solo loggeamos ya que no tenemos tabla de órdenes implementada
-            logger.info(f"💾 Guardando orden {order.side} {order.amount} {order.pair} a ${order.price}")
-            # En una implementación completa, aquí guardaríamos en la tabla de órdenes
-            return order
+            with self._session() as db:
+                order_ids = [order.exchange_order_id for order in orders if order.exchange_order_id]
+                existing = {}
+                if order_ids:
+                    existing = {
+                        str(row.exchange_order_id): row
+                        for row in db.query(GridOrderModel).filter(
+                            GridOrderModel.exchange_order_id.in_(order_ids)
+                        ).all()
+                    }
+            
+                for order in orders:
+                    if not order.exchange_order_id:
+                        logger.warning(f"⚠️ Orden {order.side} {order.pair} sin ID del exchange, no se guarda")
+                        continue
+                    row = existing.get(order.exchange_order_id)
+                    if row is None:
+                        row = GridOrderModel(
+                            exchange_order_id=order.exchange_order_id,
+                            pair=order.pair,
+                            side=order.side,
+                            amount=float(order.amount),
+                            price=float(order.price),
+                            order_type=order.order_type,
+                            grid_level=order.grid_level,
+                            created_at=order.created_at or datetime.utcnow()
+                        )
+                        db.add(row)
+                        existing[order.exchange_order_id] = row
+                    row.status = order.status  # type: ignore
+                    if order.filled_at is not None:
+                        row.filled_at = order.filled_at  # type: ignore
+                    if order.parent_order_id is not None:
+                        row.parent_order_id = order.parent_order_id  # type: ignore
+                        row.parent_price = float(order.parent_price) if order.parent_price is not None else None  # type: ignore
+            
+                for trade in trades:
+                    db.add(self._map_trade_to_model(trade))
+            
+                db.commit()
+                logger.debug(f"💾 Lote guardado: {len(orders)} órdenes, {len(trades)} trades")
+                return True
             
         except Exception as e:
-            logger.error(f"❌ Error guardando orden: {e}")
-            return order
+            logger.error(f"❌ Error guardando lote de {len(orders)} órdenes y {len(trades)} trades: {e}")
+            return False
 
     def update_order_status(self, order_id: str, status: str, filled_at: Optional[datetime] = None) -> None:
-        """Actualiza el estado de una orden."""
+        """Actualiza el estado de una orden (order_id = ID del exchange)."""
         try:
-            self._ensure_connection()
-            
-            # Por ahora solo loggeamos ya que no tenemos tabla de órdenes implementada
-            logger.info(f"🔄 Actualizando orden {order_id} a estado {status}")
-            # En una implementación completa, aquí actualizaríamos en la tabla de órdenes
+            with self._session() as db:
+                order = db.query(GridOrderModel).filter(GridOrderModel.exchange_order_id == order_id).first()
+                if order:
+                    order.status = status  # type: ignore
+                    if filled_at is not None:
+                        order.filled_at = filled_at  # type: ignore
+                    db.commit()
+                    logger.info(f"🔄 Orden {order_id} actualizada a estado {status}")
+                else:
+                    logger.warning(f"⚠️ No se encontró orden con ID {order_id}")
             
         except Exception as e:
             logger.error(f"❌ Error actualizando estado de orden {order_id}: {e}")
@@ -266,12 +307,17 @@ class DatabaseGridRepository(GridRepository):
         Retorna el número de órdenes canceladas.
         """
         try:
-            self._ensure_connection()
+            with self._session() as db:
+                cancelled = db.query(GridOrderModel).filter(
+                    and_(
+                        GridOrderModel.pair == pair,
+                        GridOrderModel.status == 'open'
+                    )
+                ).update({'status': 'cancelled', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+                db.commit()
             
-            # Por ahora solo loggeamos ya que no tenemos tabla de órdenes implementada
-            logger.info(f"❌ Cancelando todas las órdenes para {pair}")
-            # En una implementación completa, aquí actualizaríamos en la tabla de órdenes
-            return 0
+                logger.info(f"❌ {cancelled} órdenes marcadas como canceladas en BD para {pair}")
+                return cancelled
             
         except Exception as e:
             logger.error(f"❌ Error cancelando órdenes para {pair}: {e}")
@@ -285,7 +331,8 @@ class DatabaseGridRepository(GridRepository):
             bool: True si la conexión está saludable
         """
         try:
-            self._ensure_connection()
+            with self._session() as db:
+                db.execute(text("SELECT 1"))
             return True
         except Exception as e:
             logger.error(f"❌ Health check falló: {e}")
@@ -311,7 +358,53 @@ class DatabaseGridRepository(GridRepository):
             last_decision_timestamp=config.last_decision_timestamp,  # type: ignore
             created_at=config.created_at,  # type: ignore
             updated_at=config.updated_at  # type: ignore
-        ) 
+        )
+
+    def _map_order_to_entity(self, order: GridOrderModel) -> GridOrder:
+        """Convierte una orden de BD a entidad de dominio."""
+        return GridOrder(
+            id=str(order.id),
+            exchange_order_id=order.exchange_order_id,  # type: ignore
+            pair=order.pair,  # type: ignore
+            side=order.side,  # type: ignore
+            amount=Decimal(str(order.amount)),
+            price=Decimal(str(order.price)),
+            status=order.status,  # type: ignore
+            order_type=order.order_type,  # type: ignore
+            grid_level=order.grid_level,  # type: ignore
+            created_at=order.created_at,  # type: ignore
+            filled_at=order.filled_at,  # type: ignore
+            parent_order_id=order.parent_order_id,  # type: ignore
+            parent_price=Decimal(str(order.parent_price)) if order.parent_price is not None else None
+        )
+
+    def _map_trade_to_entity(self, trade: GridTradeModel) -> GridTrade:
+        """Convierte un trade de BD a entidad de dominio."""
+        return GridTrade(
+            pair=trade.pair,  # type: ignore
+            buy_order_id=trade.buy_order_id,  # type: ignore
+            sell_order_id=trade.sell_order_id,  # type: ignore
+            buy_price=Decimal(str(trade.buy_price)),
+            sell_price=Decimal(str(trade.sell_price)),
+            amount=Decimal(str(trade.amount)),
+            profit=Decimal(str(trade.profit)),
+            profit_percent=Decimal(str(trade.profit_percent)),
+            executed_at=trade.executed_at  # type: ignore
+        )
+
+    def _map_trade_to_model(self, trade: GridTrade) -> GridTradeModel:
+        """Convierte un trade de dominio a modelo de BD."""
+        return GridTradeModel(
+            pair=trade.pair,
+            buy_order_id=trade.buy_order_id,
+            sell_order_id=trade.sell_order_id,
+            buy_price=float(trade.buy_price),
+            sell_price=float(trade.sell_price),
+            amount=float(trade.amount),
+            profit=float(trade.profit),
+            profit_percent=float(trade.profit_percent),
+            executed_at=trade.executed_at
+        )
 
     # ------------------------------------------------------------------
     # Implementación de métodos para gestión de GridStep
@@ -332,33 +425,20 @@ class DatabaseGridRepository(GridRepository):
 
     def save_trade(self, trade: GridTrade) -> GridTrade:
         """Guarda un trade completado."""
-        try:
-            # Por ahora almacenamos en memoria, en producción sería en BD
-            if not hasattr(self, '_trades_store'):
-                self._trades_store = {}
-            
-            pair = trade.pair
-            if pair not in self._trades_store:
-                self._trades_store[pair] = []
-            
-            self._trades_store[pair].append(trade)
+        if self.save_order_batch([], [trade]):
             logger.info(f"💾 Trade guardado: {trade.pair} - Profit: ${trade.profit:.4f}")
-            return trade
-            
-        except Exception as e:
-            logger.error(f"❌ Error guardando trade: {e}")
-            return trade
+        return trade
 
-    def get_trades_by_pair(self, pair: str, limit: int = 100) -> List[GridTrade]:
-        """Obtiene los trades completados para un par específico."""
+    def get_trades_by_pair(self, pair: str, limit: int = 100, since: Optional[datetime] = None) -> List[GridTrade]:
+        """Obtiene los trades completados para un par (índice pair + executed_at)."""
         try:
-            if not hasattr(self, '_trades_store'):
-                self._trades_store = {}
-            
-            trades = self._trades_store.get(pair, [])
-            # Ordenar por fecha de ejecución (más recientes primero)
-            trades.sort(key=lambda x: x.executed_at, reverse=True)
-            return trades[:limit]
+            with self._session() as db:
+                query = db.query(GridTradeModel).filter(GridTradeModel.pair == pair)
+                if since is not None:
+                    query = query.filter(GridTradeModel.executed_at >= since)
+                # Más recientes primero
+                trades = query.order_by(GridTradeModel.executed_at.desc()).limit(limit).all()
+                return [self._map_trade_to_entity(trade) for trade in trades]
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo trades para {pair}: {e}")
@@ -367,81 +447,62 @@ class DatabaseGridRepository(GridRepository):
     def get_total_profit_by_pair(self, pair: str) -> Decimal:
         """Calcula el P&L total basado en trades reales para un par."""
         try:
-            trades = self.get_trades_by_pair(pair)
-            total_profit = sum(trade.profit for trade in trades)
-            # Asegurar que el resultado sea Decimal
-            if isinstance(total_profit, (int, float)):
+            with self._session() as db:
+                total_profit = db.query(
+                    func.coalesce(func.sum(GridTradeModel.profit), 0)
+                ).filter(GridTradeModel.pair == pair).scalar()
                 total_profit = Decimal(str(total_profit))
-            logger.debug(f"📊 P&L total para {pair}: ${total_profit:.4f} (basado en {len(trades)} trades)")
-            return total_profit
+                logger.debug(f"📊 P&L total para {pair}: ${total_profit:.4f}")
+                return total_profit
             
         except Exception as e:
             logger.error(f"❌ Error calculando P&L total para {pair}: {e}")
             return Decimal('0')
 
     def get_trades_summary_by_pair(self, pair: str) -> Dict[str, Any]:
-        """Obtiene un resumen de trades para un par específico."""
+        """Obtiene un resumen de todos los trades de un par con una sola consulta agregada."""
+        empty_summary = {
+            'total_trades': 0,
+            'total_profit': Decimal('0'),
+            'total_profit_percent': Decimal('0'),
+            'winning_trades': 0,
+            'losing_trades': 0,
+            'avg_profit_per_trade': Decimal('0'),
+            'best_trade': Decimal('0'),
+            'worst_trade': Decimal('0'),
+            'win_rate': Decimal('0')
+        }
         try:
-            trades = self.get_trades_by_pair(pair)
-            
-            if not trades:
-                return {
-                    'total_trades': 0,
-                    'total_profit': Decimal('0'),
-                    'total_profit_percent': Decimal('0'),
-                    'winning_trades': 0,
-                    'losing_trades': 0,
-                    'avg_profit_per_trade': Decimal('0'),
-                    'best_trade': Decimal('0'),
-                    'worst_trade': Decimal('0'),
-                    'win_rate': Decimal('0')
-                }
+            with self._session() as db:
+                row = db.query(
+                    func.count(GridTradeModel.id),
+                    func.sum(GridTradeModel.profit),
+                    func.sum(GridTradeModel.buy_price * GridTradeModel.amount),
+                    func.sum(case((GridTradeModel.profit > 0, 1), else_=0)),
+                    func.sum(case((GridTradeModel.profit < 0, 1), else_=0)),
+                    func.max(GridTradeModel.profit),
+                    func.min(GridTradeModel.profit)
+                ).filter(GridTradeModel.pair == pair).one()
+            
+                total_trades, total_profit, total_invested, winning_trades, losing_trades, best_trade, worst_trade = row
+                if not total_trades:
+                    return empty_summary
             
-            total_profit = sum(trade.profit for trade in trades)
-            # Asegurar que total_profit sea Decimal
-            if isinstance(total_profit, (int, float)):
                 total_profit = Decimal(str(total_profit))
-                
-            winning_trades = [t for t in trades if t.profit > 0]
-            losing_trades = [t for t in trades if t.profit < 0]
-            
-            avg_profit_per_trade = total_profit / len(trades) if trades else Decimal('0')
-            best_trade = max(trade.profit for trade in trades) if trades else Decimal('0')
-            worst_trade = min(trade.profit for trade in trades) if trades else Decimal('0')
-            
-            # Calcular porcentaje promedio de ganancia
-            total_invested = sum(trade.buy_price * trade.amount for trade in trades)
-            if isinstance(total_invested, (int, float)):
                 total_invested = Decimal(str(total_invested))
-            total_profit_percent = (total_profit / total_invested * 100) if total_invested > 0 else Decimal('0')
             
-            # Calcular win rate
-            win_rate = (len(winning_trades) / len(trades) * 100) if trades else Decimal('0')
-            if isinstance(win_rate, (int, float)):
-                win_rate = Decimal(str(win_rate))
-            
-            return {
-                'total_trades': len(trades),
-                'total_profit': total_profit,
-                'total_profit_percent': total_profit_percent,
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'avg_profit_per_trade': avg_profit_per_trade,
-                'best_trade': best_trade,
-                'worst_trade': worst_trade,
-                'win_rate': win_rate
-            }
+                return {
+                    'total_trades': total_trades,
+                    'total_profit': total_profit,
+                    'total_profit_percent': (total_profit / total_invested * 100) if total_invested > 0 else Decimal('0'),
+                    'winning_trades': int(winning_trades),
+                    'losing_trades': int(losing_trades),
+                    'avg_profit_per_trade': total_profit / total_trades,
+                    'best_trade': Decimal(str(best_trade)),
+                    'worst_trade': Decimal(str(worst_trade)),
+                    'win_rate': Decimal(int(winning_trades)) / total_trades * 100
+                }
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo resumen de trades para {pair}: {e}")
-            return {
-                'total_trades': 0,
-                'total_profit': Decimal('0'),
-                'total_profit_percent': Decimal('0'),
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'avg_profit_per_trade': Decimal('0'),
-                'best_trade': Decimal('0'),
-                'worst_trade': Decimal('0'),
-                'win_rate': Decimal('0')
-            } 
\ No newline at end of file
+            return empty_summary
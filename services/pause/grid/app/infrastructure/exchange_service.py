@@ -1,15 +1,24 @@
 """
 Servicio de exchange para interactuar con Binance.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from decimal import Decimal, InvalidOperation, ConversionSyntax
 import ccxt
+import time
 import uuid
+from requests.adapters import HTTPAdapter
 
 from app.domain.interfaces import ExchangeService
-from app.domain.entities import GridOrder, GridConfig
-from app.config import MIN_ORDER_VALUE_USDT, EXCHANGE_NAME
+from app.domain.entities import GridOrder, GridConfig, ExchangeSnapshot, OrderRequest, OrderPlacementResult
+from app.config import (
+    MIN_ORDER_VALUE_USDT, EXCHANGE_NAME, ORDER_PLACEMENT_MAX_WORKERS,
+    ORDER_PLACEMENT_MAX_ATTEMPTS, ORDER_PLACEMENT_RETRY_DELAY_SECONDS
+)
+from app.infrastructure.capital_ledger import CapitalLedger
 from shared.config.settings import settings
+from shared.exchange import RequestLane, get_exchange_gateway
 from shared.services.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -22,6 +31,8 @@ class BinanceExchangeService(ExchangeService):
         # Modo actual: 'sandbox' o 'production'
         self.mode = getattr(settings, 'TRADING_MODE', 'sandbox')
         self.exchange = None
+        # Capital por bot llevado en local (ver can_bot_use_capital)
+        self.capital_ledger = CapitalLedger()
         self._initialize_exchange()
         logger.info(f"✅ BinanceExchangeService inicializado en modo {self.mode.upper()}.")
 
@@ -32,22 +43,29 @@ class BinanceExchangeService(ExchangeService):
             # Seleccionar credenciales según modo
             api_key = settings.PAPER_TRADING_API_KEY if sandbox else settings.BINANCE_API_KEY
             secret = settings.PAPER_TRADING_SECRET_KEY if sandbox else settings.BINANCE_API_SECRET
-            self.exchange = ccxt.binance({
-                'apiKey': api_key,
-                'secret': secret,
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'spot',
-                    'warnOnFetchOpenOrdersWithoutSymbol': False
-                }
-            })
-            
-            # Configurar modo sandbox explícitamente
+            def create_client():
+                client = ccxt.binance({
+                    'apiKey': api_key,
+                    'secret': secret,
+                    'options': {
+                        'defaultType': 'spot',
+                        'warnOnFetchOpenOrdersWithoutSymbol': False
+                    }
+                })
+                client.set_sandbox_mode(sandbox)
+                # Una conexión por hilo en la colocación concurrente de órdenes
+                client.session.mount('https://', HTTPAdapter(pool_maxsize=ORDER_PLACEMENT_MAX_WORKERS))
+                return client
+            
+            # Las peticiones pasan por el gateway compartido (presupuesto de peso
+            # de Binance); un gateway por modo, con sus propias credenciales
+            gateway = get_exchange_gateway('binance-sandbox' if sandbox else 'binance', create_client)
+            self.exchange = gateway.client()
+            # Otra cuenta: el libro de capital se vuelve a crear desde el exchange
+            self.capital_ledger.reset()
             if sandbox:
-                self.exchange.set_sandbox_mode(True)
                 logger.info("🧪 Modo SANDBOX activado para Binance")
             else:
-                self.exchange.set_sandbox_mode(False)
                 logger.info("🚀 Modo PRODUCCIÓN activado para Binance")
             
             mode_str = "SANDBOX" if sandbox else "PRODUCCIÓN"
@@ -89,7 +107,8 @@ class BinanceExchangeService(ExchangeService):
             logger.error(f"❌ Error obteniendo balance de {currency}: {e}")
             return Decimal('0')
 
-    def create_order(self, pair: str, side: str, amount: Decimal, price: Decimal, order_type: str = 'limit') -> GridOrder:
+    def create_order(self, pair: str, side: str, amount: Decimal, price: Decimal, order_type: str = 'limit',
+                     client_order_id: Optional[str] = None) -> GridOrder:
         """Crea una orden en el exchange."""
         try:
             if not self.exchange:
@@ -102,37 +121,154 @@ class BinanceExchangeService(ExchangeService):
             if order_value < min_order_value:
                 raise ValueError(f"Valor de orden ${order_value:.2f} menor al mínimo ${min_order_value} para {pair}")
             
+            # Con client_order_id, Binance rechaza un reenvío de la misma orden abierta
+            extra = {'params': {'newClientOrderId': client_order_id}} if client_order_id else {}
+            
             # Crear orden en el exchange
             order_result = self.exchange.create_order(
                 symbol=pair,
                 type=order_type,  # type: ignore
                 side=side,  # type: ignore
                 amount=float(amount),
-                price=float(price)
-            )
-            
-            # Crear entidad GridOrder
-            grid_order = GridOrder(
-                id=str(uuid.uuid4()),
-                exchange_order_id=order_result['id'],
-                pair=pair,
-                side=side,
-                amount=amount,
-                price=price,
-                status='open',
-                order_type='grid_buy' if side == 'buy' else 'grid_sell',
-                grid_level=None,
-                created_at=None,
-                filled_at=None
+                price=float(price),
+                **extra
             )
             
             logger.info(f"✅ Orden creada: {side} {amount} {pair} a ${price} (${order_value:.2f}) (ID: {order_result['id']})")
-            return grid_order
+            return self._register_created_order(order_result, pair, side, amount, price, order_type)
             
         except Exception as e:
             logger.error(f"❌ Error creando orden {side} {amount} {pair} a ${price}: {e}")
             raise
 
+    def _register_created_order(self, order_result: Dict[str, Any], pair: str, side: str, amount: Decimal,
+                                price: Decimal, order_type: str) -> GridOrder:
+        """Convierte la respuesta de ccxt en GridOrder y reserva su capital en el libro."""
+        grid_order = GridOrder(
+            id=str(uuid.uuid4()),
+            exchange_order_id=order_result['id'],
+            pair=pair,
+            side=side,
+            amount=amount,
+            price=price,
+            status='open',
+            order_type='grid_buy' if side == 'buy' else 'grid_sell',
+            grid_level=None,
+            created_at=None,
+            filled_at=None
+        )
+        
+        # Reservar capital en el libro; las órdenes market vuelven ya ejecutadas
+        order_id = str(order_result['id'])
+        self.capital_ledger.record_order(pair, order_id, side, amount, price)
+        if order_result.get('filled'):
+            self.record_fill({
+                'exchange_order_id': order_id,
+                'pair': pair,
+                'side': side,
+                'filled': Decimal(str(order_result['filled'])),
+                'price': Decimal(str(order_result.get('average') or price)),
+                'type': order_type,
+                'timestamp': order_result.get('timestamp') or 0
+            })
+        return grid_order
+
+    def create_orders(self, requests: List[OrderRequest]) -> List[OrderPlacementResult]:
+        """
+        Coloca varias órdenes en paralelo (hasta ORDER_PLACEMENT_MAX_WORKERS
+        a la vez). El gateway compartido las frena si se acercan a los límites
+        de peso o de órdenes de Binance.
+        
+        Los fallos de red se reintentan hasta ORDER_PLACEMENT_MAX_ATTEMPTS
+        veces; cada orden lleva un client_order_id, así que antes de
+        reenviarla se comprueba si llegó al exchange. Los rechazos (saldo,
+        mínimos, precio) no se reintentan.
+        
+        Returns:
+            Un resultado por orden, en el mismo orden que `requests`
+        """
+        if not requests:
+            return []
+        
+        started = time.monotonic()
+        # Mercados cargados una sola vez antes de lanzar los hilos (mínimos por par)
+        for pair in {request.pair for request in requests}:
+            self.get_minimum_order_value(pair)
+        for request in requests:
+            if not request.client_order_id:
+                request.client_order_id = f"grid-{uuid.uuid4().hex[:24]}"
+        
+        results = [OrderPlacementResult(request=request, order=None, error=None, attempts=0) for request in requests]
+        pending = list(range(len(requests)))
+        
+        for attempt in range(1, ORDER_PLACEMENT_MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                logger.warning(f"🔁 Reintentando {len(pending)} órdenes con fallo transitorio (intento {attempt}/{ORDER_PLACEMENT_MAX_ATTEMPTS})")
+                time.sleep(ORDER_PLACEMENT_RETRY_DELAY_SECONDS * (attempt - 1))
+            
+            with ThreadPoolExecutor(max_workers=min(ORDER_PLACEMENT_MAX_WORKERS, len(pending)),
+                                    thread_name_prefix='order-placement') as pool:
+                outcomes = list(pool.map(lambda index: self._place_request(requests[index], attempt > 1), pending))
+            
+            retry = []
+            for index, (order, error, retryable) in zip(pending, outcomes):
+                results[index].order = order
+                results[index].error = error
+                results[index].attempts = attempt
+                if order is None and retryable:
+                    retry.append(index)
+            if not retry:
+                break
+            pending = retry
+        
+        placed = sum(1 for result in results if result.success)
+        logger.info(f"⚡ {placed}/{len(requests)} órdenes colocadas en {time.monotonic() - started:.2f}s")
+        return results
+
+    def _place_request(self, request: OrderRequest, retrying: bool) -> Tuple[Optional[GridOrder], Optional[str], bool]:
+        """
+        Coloca una orden del lote.
+        
+        Returns:
+            (orden creada, error, si el error es transitorio)
+        """
+        if retrying:
+            # El intento anterior pudo llegar al exchange aunque no hubo respuesta
+            order = self._find_order_by_client_id(request)
+            if order is not None:
+                order.grid_level = request.grid_level
+                return order, None, False
+        try:
+            order = self.create_order(
+                pair=request.pair,
+                side=request.side,
+                amount=request.amount,
+                price=request.price,
+                order_type=request.order_type,
+                client_order_id=request.client_order_id
+            )
+            order.grid_level = request.grid_level
+            return order, None, False
+        except ccxt.NetworkError as e:
+            # Timeouts, 5xx y límites de peticiones
+            return None, str(e), True
+        except Exception as e:
+            return None, str(e), False
+
+    def _find_order_by_client_id(self, request: OrderRequest) -> Optional[GridOrder]:
+        """Busca en el exchange una orden del lote por su client_order_id."""
+        try:
+            order_result = self.exchange.fetch_order(None, request.pair, {'origClientOrderId': request.client_order_id})
+        except Exception as e:
+            logger.debug(f"🔍 Orden {request.client_order_id} no encontrada en {request.pair}: {e}")
+            return None
+        if not order_result or order_result.get('status') not in ('open', 'closed'):
+            return None
+        logger.info(f"🔍 Orden {request.client_order_id} ya estaba en el exchange (ID: {order_result['id']})")
+        return self._register_created_order(
+            order_result, request.pair, request.side, request.amount, request.price, request.order_type
+        )
+
     def cancel_order(self, pair: str, order_id: str) -> bool:
         """Cancela una orden en el exchange."""
         try:
@@ -140,6 +276,7 @@ class BinanceExchangeService(ExchangeService):
                 raise Exception("Exchange no inicializado")
             
             self.exchange.cancel_order(order_id, pair)
+            self.capital_ledger.record_cancel(pair, order_id)
             logger.info(f"✅ Orden cancelada: {order_id} en {pair}")
             return True
             
@@ -216,8 +353,6 @@ class BinanceExchangeService(ExchangeService):
         try:
             self.mode = 'sandbox'
             self._initialize_exchange()
-            if self.exchange:
-                self.exchange.set_sandbox_mode(True)
             logger.info("🧪 Cambiado a modo SANDBOX y activado set_sandbox_mode(True)")
         except Exception as e:
             logger.error(f"❌ Error cambiando a sandbox: {e}")
@@ -227,8 +362,6 @@ class BinanceExchangeService(ExchangeService):
         try:
             self.mode = 'production'
             self._initialize_exchange()
-            if self.exchange:
-                self.exchange.set_sandbox_mode(False)
             logger.info("🚀 Cambiado a modo PRODUCCIÓN y activado set_sandbox_mode(False)")
         except Exception as e:
             logger.error(f"❌ Error cambiando a producción: {e}")
@@ -246,14 +379,16 @@ class BinanceExchangeService(ExchangeService):
             if not self.exchange:
                 raise Exception("Exchange no inicializado")
             
-            open_orders = self.exchange.fetch_open_orders()
+            # Cancelación de emergencia: carril de riesgo
+            risk_exchange = self.exchange.with_lane(RequestLane.RISK)
+            open_orders = risk_exchange.fetch_open_orders()
             count = 0
             for order in open_orders:
                 try:
                     # Convertir id y symbol a str estándar
                     order_id = str(order['id'])
                     pair = str(order['symbol'])
-                    self.exchange.cancel_order(order_id, pair)
+                    risk_exchange.cancel_order(order_id, pair)
                     count += 1
                     logger.debug(f"✅ Orden cancelada: {order_id} en {pair}")
                 except Exception as order_error:
@@ -261,6 +396,7 @@ class BinanceExchangeService(ExchangeService):
                     continue
                     
             logger.info(f"✅ Canceladas {count} órdenes abiertas")
+            self.capital_ledger.reset()
             return count
         except Exception as e:
             logger.error(f"❌ Error cancelando todas las órdenes: {e}")
@@ -280,7 +416,9 @@ class BinanceExchangeService(ExchangeService):
             if not self.exchange:
                 raise Exception("Exchange no inicializado")
             
-            open_orders = self.exchange.fetch_open_orders()
+            # Con símbolo pesa 6 en lugar de 80; carril de riesgo (pausa del bot)
+            risk_exchange = self.exchange.with_lane(RequestLane.RISK)
+            open_orders = risk_exchange.fetch_open_orders(pair)
             count = 0
             
             for order in open_orders:
@@ -288,7 +426,7 @@ class BinanceExchangeService(ExchangeService):
                 if order_symbol == pair:
                     try:
                         order_id = str(order['id'])
-                        self.exchange.cancel_order(order_id, pair)
+                        risk_exchange.cancel_order(order_id, pair)
                         count += 1
                         logger.debug(f"✅ Orden cancelada: {order_id} en {pair}")
                     except Exception as order_error:
@@ -296,6 +434,8 @@ class BinanceExchangeService(ExchangeService):
                         continue
                     
             logger.info(f"✅ Canceladas {count} órdenes abiertas para {pair}")
+            # Bot pausado: su cuenta se recrea desde el exchange al volver a operar
+            self.capital_ledger.forget(pair)
             return count
         except Exception as e:
             logger.error(f"❌ Error cancelando órdenes para {pair}: {e}")
@@ -308,7 +448,9 @@ class BinanceExchangeService(ExchangeService):
             if not self.exchange:
                 raise Exception("Exchange no inicializado")
             
-            balances = self.exchange.fetch_balance()
+            # Liquidación: carril de riesgo
+            risk_exchange = self.exchange.with_lane(RequestLane.RISK)
+            balances = risk_exchange.fetch_balance()
             
             for currency, info in balances.items():
                 free = Decimal(str(info.get('free', 0)))
@@ -321,7 +463,7 @@ class BinanceExchangeService(ExchangeService):
                 
                 try:
                     # Obtener precio de mercado para venta
-                    ticker = self.exchange.fetch_ticker(pair)
+                    ticker = risk_exchange.fetch_ticker(pair)
                     price = Decimal(str(ticker['last']))
                     
                     # Calcular valor de la orden
@@ -336,7 +478,7 @@ class BinanceExchangeService(ExchangeService):
                         continue
                     
                     # Crear orden de mercado para vender toda la posición
-                    self.exchange.create_order(
+                    risk_exchange.create_order(
                         symbol=pair, 
                         type='market', 
                         side='sell', 
@@ -360,6 +502,8 @@ class BinanceExchangeService(ExchangeService):
                         logger.error(f"❌ Error vendiendo {free} {currency}: {error_msg}")
                         continue
             
+            # Liquidación total: los bots se recrean desde el exchange
+            self.capital_ledger.reset()
             return sold
             
         except Exception as e:
@@ -383,11 +527,12 @@ class BinanceExchangeService(ExchangeService):
                 raise Exception("Exchange no inicializado")
             
             pair = f"{currency}/USDT"
+            risk_exchange = self.exchange.with_lane(RequestLane.RISK)
             
             for attempt in range(max_retries):
                 try:
                     # Obtener precio actual
-                    ticker = self.exchange.fetch_ticker(pair)
+                    ticker = risk_exchange.fetch_ticker(pair)
                     price = Decimal(str(ticker['last']))
                     
                     # Calcular valor de la orden
@@ -402,7 +547,7 @@ class BinanceExchangeService(ExchangeService):
                         return False
                     
                     # Intentar vender
-                    self.exchange.create_order(
+                    risk_exchange.create_order(
                         symbol=pair,
                         type='market',
                         side='sell',
@@ -410,6 +555,7 @@ class BinanceExchangeService(ExchangeService):
                     )
                     
                     logger.info(f"✅ Vendida posición {amount} {currency} por ~${order_value:.2f} USDT")
+                    self.capital_ledger.forget(pair)
                     return True
                     
                 except Exception as e:
@@ -606,13 +752,14 @@ class BinanceExchangeService(ExchangeService):
                 'total_value_usdt': Decimal('0')
             }
 
-    def get_bot_allocated_balance(self, config: GridConfig) -> Dict[str, Decimal]:
+    def get_bot_allocated_balance(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Decimal]:
         """
         Obtiene el balance asignado específicamente para un bot, respetando el aislamiento de capital.
         MEJORADO: Prioriza USDT para operaciones de compra, pero usa balance real para ventas.
         
         Args:
             config: Configuración del bot con capital asignado
+            snapshot: Snapshot del ciclo; si se pasa, no se consulta el exchange
             
         Returns:
             Dict con balances asignados al bot específico
@@ -625,13 +772,18 @@ class BinanceExchangeService(ExchangeService):
             allocated_capital = Decimal(config.total_capital)
             base_currency, quote_currency = pair.split('/')
             
-            # Obtener balances totales de la cuenta
-            balances = self.exchange.fetch_balance()
-            total_base_balance = Decimal(str(balances.get(base_currency, {}).get('free', 0)))
-            total_quote_balance = Decimal(str(balances.get(quote_currency, {}).get('free', 0)))
-            
-            # Obtener precio actual
-            current_price = self.get_current_price(pair)
+            if snapshot is not None:
+                total_base_balance = snapshot.free_balance(base_currency)
+                total_quote_balance = snapshot.free_balance(quote_currency)
+                current_price = snapshot.price
+            else:
+                # Obtener balances totales de la cuenta
+                balances = self.exchange.fetch_balance()
+                total_base_balance = Decimal(str(balances.get(base_currency, {}).get('free', 0)))
+                total_quote_balance = Decimal(str(balances.get(quote_currency, {}).get('free', 0)))
+                
+                # Obtener precio actual
+                current_price = self.get_current_price(pair)
             
             # MEJORA: Usar balance real de la moneda base para ventas
             # Para operaciones de venta, siempre usar el balance real disponible
@@ -692,33 +844,38 @@ class BinanceExchangeService(ExchangeService):
                 'total_available_in_account': Decimal('0')
             }
 
-    def can_bot_use_capital(self, config: GridConfig, required_amount: Decimal, side: str) -> Dict[str, Any]:
+    def can_bot_use_capital(self, config: GridConfig, required_amount: Decimal, side: str, snapshot: Optional[ExchangeSnapshot] = None) -> Dict[str, Any]:
         """
         Verifica si un bot puede usar una cantidad específica de capital sin exceder su asignación.
+        Consulta el libro de capital local; solo la primera vez por bot se
+        lee el exchange para crear su cuenta.
         
         Args:
             config: Configuración del bot
-            required_amount: Cantidad requerida
+            required_amount: Cantidad requerida (USDT para 'buy', moneda base para 'sell')
             side: 'buy' (necesita USDT) o 'sell' (necesita base currency)
+            snapshot: Snapshot del ciclo para crear la cuenta sin consultar el exchange
             
         Returns:
             Dict con información de viabilidad
         """
         try:
-            bot_balance = self.get_bot_allocated_balance(config)
             pair = config.pair
             base_currency = pair.split('/')[0]
             
+            account = self.capital_ledger.get_account(pair) or self._open_capital_account(config, snapshot)
+            if account is None:
+                raise Exception("no se pudo crear la cuenta del libro de capital")
+            
+            available_balance = self.capital_ledger.available(pair, side)
             if side == 'buy':
                 # Para compra necesitamos USDT
-                available_balance = bot_balance['quote_balance']
                 currency_needed = 'USDT'
                 required_usdt = required_amount
             else:
                 # Para venta necesitamos la moneda base
-                available_balance = bot_balance['base_balance']
                 currency_needed = base_currency
-                required_usdt = required_amount * self.get_current_price(pair)
+                required_usdt = required_amount * account['last_price']
             
             can_use = available_balance >= required_amount
             remaining_after_use = available_balance - required_amount if can_use else available_balance
@@ -726,13 +883,13 @@ class BinanceExchangeService(ExchangeService):
             result = {
                 'can_use': can_use,
                 'bot_pair': pair,
-                'allocated_capital': bot_balance['allocated_capital'],
+                'allocated_capital': account['allocated_capital'],
                 'required_amount': required_amount,
                 'required_usdt': required_usdt,
                 'available_balance': available_balance,
                 'currency_needed': currency_needed,
                 'remaining_after_use': remaining_after_use,
-                'total_bot_value': bot_balance['total_value_usdt']
+                'total_bot_value': account['total_value_usdt']
             }
             
             if not can_use:
@@ -754,6 +911,83 @@ class BinanceExchangeService(ExchangeService):
                 'total_bot_value': Decimal('0')
             }
 
+    def _open_capital_account(self, config: GridConfig, snapshot: Optional[ExchangeSnapshot] = None) -> Optional[Dict[str, Any]]:
+        """Crea la cuenta de un bot en el libro de capital desde el exchange."""
+        pair = config.pair
+        snapshot = snapshot or self.get_exchange_snapshot(pair)
+        if snapshot is None:
+            return None
+        base_currency, quote_currency = pair.split('/')
+        return self.capital_ledger.open_account(
+            pair=pair,
+            allocated_capital=Decimal(str(config.total_capital)),
+            open_orders=snapshot.open_orders,
+            base_free=snapshot.free_balance(base_currency),
+            account_quote_free=snapshot.free_balance(quote_currency),
+            price=snapshot.price
+        )
+
+    def record_fill(self, fill: Dict[str, Any]) -> None:
+        """
+        Registra un fill (stream, REST o market inmediata) en el libro de capital.
+        
+        Args:
+            fill: Orden completada (formato de get_order_status_from_exchange)
+        """
+        try:
+            pair = fill['pair']
+            fees = self.get_trading_fees(pair)
+            fee_rate = fees['taker'] if fill.get('type') == 'market' else fees['maker']
+            self.capital_ledger.record_fill(
+                pair=pair,
+                order_id=str(fill['exchange_order_id']),
+                side=fill['side'],
+                filled=Decimal(str(fill['filled'])),
+                price=Decimal(str(fill.get('average') or fill['price'])),
+                fee_rate=fee_rate,
+                timestamp_ms=int(fill.get('timestamp') or 0)
+            )
+        except Exception as e:
+            logger.error(f"❌ Error registrando fill en el libro de capital: {e}")
+
+    def reconcile_capital_ledger(self, config: GridConfig, snapshot: ExchangeSnapshot) -> Optional[Dict[str, Any]]:
+        """
+        Reconcilia la cuenta de un bot del libro de capital con el exchange.
+        Solo consulta el estado final de las órdenes del libro que ya no están abiertas.
+        
+        Args:
+            config: Configuración del bot
+            snapshot: Snapshot actual del exchange para el par
+            
+        Returns:
+            Reporte de deriva o None si el bot aún no tiene cuenta
+        """
+        try:
+            pair = config.pair
+            if not self.capital_ledger.is_tracking(pair):
+                return None
+            
+            missing_ids = self.capital_ledger.order_ids(pair) - snapshot.open_order_ids
+            closed_orders = {}
+            for order_id in missing_ids:
+                status = self.get_order_status_from_exchange(pair, order_id)
+                if status:
+                    closed_orders[order_id] = status
+            
+            base_currency, quote_currency = pair.split('/')
+            return self.capital_ledger.reconcile(
+                pair=pair,
+                open_orders=snapshot.open_orders,
+                closed_orders=closed_orders,
+                base_free=snapshot.free_balance(base_currency),
+                account_quote_free=snapshot.free_balance(quote_currency),
+                price=snapshot.price,
+                fee_rate=self.get_trading_fees(pair)['maker']
+            )
+        except Exception as e:
+            logger.error(f"❌ Error reconciliando libro de capital para {config.pair}: {e}")
+            return None
+
     def get_active_orders_from_exchange(self, pair: str) -> List[Dict[str, Any]]:
         """
         Obtiene las órdenes activas directamente del exchange para un par específico.
@@ -780,26 +1014,7 @@ class BinanceExchangeService(ExchangeService):
             logger.debug(f"📋 Raw open orders from exchange for {pair}: {len(open_orders)} orders")
             
             # Formatear órdenes para consistencia
-            formatted_orders = []
-            for order in open_orders:
-                try:
-                    formatted_order = {
-                        'exchange_order_id': order['id'],
-                        'pair': order['symbol'],
-                        'side': order['side'],
-                        'amount': Decimal(str(order['amount'])),
-                        'price': Decimal(str(order['price'])),
-                        'status': order['status'],
-                        'filled': Decimal(str(order['filled'])),
-                        'remaining': Decimal(str(order['remaining'])),
-                        'timestamp': order['timestamp'],
-                        'type': order['type']
-                    }
-                    formatted_orders.append(formatted_order)
-                    logger.debug(f"   - Order {order['id']}: {order['side']} {order['amount']} @ {order['price']}")
-                except Exception as order_error:
-                    logger.warning(f"⚠️ Error formateando orden {order.get('id', 'unknown')}: {order_error}")
-                    continue
+            formatted_orders = self._format_open_orders(open_orders)
             
             # Solo log INFO si no hay órdenes (caso importante)
             if not formatted_orders:
@@ -820,6 +1035,71 @@ class BinanceExchangeService(ExchangeService):
             logger.error(f"❌ Error obteniendo órdenes activas del exchange para {pair}: {e}")
             return []
 
+    def _format_open_orders(self, open_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Convierte órdenes abiertas de ccxt al formato de get_active_orders_from_exchange."""
+        formatted_orders = []
+        for order in open_orders:
+            try:
+                formatted_order = {
+                    'exchange_order_id': order['id'],
+                    'pair': order['symbol'],
+                    'side': order['side'],
+                    'amount': Decimal(str(order['amount'])),
+                    'price': Decimal(str(order['price'])),
+                    'status': order['status'],
+                    'filled': Decimal(str(order['filled'])),
+                    'remaining': Decimal(str(order['remaining'])),
+                    'timestamp': order['timestamp'],
+                    'type': order['type']
+                }
+                formatted_orders.append(formatted_order)
+                logger.debug(f"   - Order {order['id']}: {order['side']} {order['amount']} @ {order['price']}")
+            except Exception as order_error:
+                logger.warning(f"⚠️ Error formateando orden {order.get('id', 'unknown')}: {order_error}")
+                continue
+        return formatted_orders
+
+    def get_exchange_snapshot(self, pair: str, balances: Optional[Dict[str, Decimal]] = None) -> Optional[ExchangeSnapshot]:
+        """
+        Lee el estado del exchange para un par en una sola pasada:
+        órdenes abiertas, balances libres y último precio.
+        
+        Args:
+            pair: Par de trading (ej: 'BTC/USDT')
+            balances: Balances libres ya leídos en este ciclo (son de toda la
+                cuenta, se comparten entre pares); None = consultar fetch_balance
+            
+        Returns:
+            ExchangeSnapshot inmutable o None si alguna consulta falla
+        """
+        try:
+            if not self.exchange:
+                raise Exception("Exchange no inicializado")
+            
+            open_orders = self._format_open_orders(self.exchange.fetch_open_orders(pair))
+            if balances is None:
+                raw_balances = self.exchange.fetch_balance()
+                balances = {
+                    currency: Decimal(str(values.get('free') or 0))
+                    for currency, values in raw_balances.items()
+                    if isinstance(values, dict) and 'free' in values
+                }
+            ticker = self.exchange.fetch_ticker(pair)
+            
+            snapshot = ExchangeSnapshot(
+                pair=pair,
+                open_orders=tuple(open_orders),
+                balances=dict(balances),
+                price=Decimal(str(ticker['last'])),
+                taken_at=datetime.now()
+            )
+            logger.debug(f"📸 Snapshot {pair}: {len(open_orders)} órdenes abiertas, precio ${snapshot.price}")
+            return snapshot
+            
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo snapshot del exchange para {pair}: {e}")
+            return None
+
     def get_real_balances_from_exchange(self, pair: str) -> Dict[str, Any]:
         """
         Obtiene los balances reales directamente del exchange para un par específico.
@@ -1080,7 +1360,7 @@ class BinanceExchangeService(ExchangeService):
             logger.error(f"❌ Error obteniendo trades recientes del exchange para {pair}: {e}")
             return []
 
-    def detect_fills_by_comparison(self, pair: str, previous_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def detect_fills_by_comparison(self, pair: str, previous_orders: List[Dict[str, Any]], current_orders: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         Detecta fills comparando órdenes activas anteriores con las actuales.
         Método eficaz para detectar órdenes que desaparecieron (se completaron).
@@ -1088,6 +1368,7 @@ class BinanceExchangeService(ExchangeService):
         Args:
             pair: Par de trading (ej: 'BTC/USDT')
             previous_orders: Lista de órdenes activas del ciclo anterior
+            current_orders: Órdenes activas ya leídas en este ciclo (None = consultarlas)
             
         Returns:
             Lista de órdenes que se completaron (fills detectados)
@@ -1097,7 +1378,8 @@ class BinanceExchangeService(ExchangeService):
                 raise Exception("Exchange no inicializado")
             
             # Obtener órdenes activas actuales
-            current_orders = self.get_active_orders_from_exchange(pair)
+            if current_orders is None:
+                current_orders = self.get_active_orders_from_exchange(pair)
             
             # Crear sets de IDs para comparación eficiente
             previous_ids = {order['exchange_order_id'] for order in previous_orders}
@@ -1,11 +1,17 @@
 """
 Scheduler híbrido para Grid Trading:
-- Monitor en tiempo real (cada 10 segundos): Detecta fills y crea órdenes complementarias
-- Gestión horaria: Transiciones de estado basadas en decisiones del Cerebro
+- Stream de usuario de Binance: fills al instante y órdenes complementarias
+- Monitor en tiempo real (cada 10 segundos): riesgos y, sin stream, detección de fills por REST
+- Transiciones de estado: al instante, con cada cambio de decisión publicado por el Cerebro
+- Gestión horaria: Limpieza de cache, pasada de seguridad de transiciones y resumen periódico
 """
+import threading
+from datetime import datetime, timedelta
+
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
 
 from app.application.manage_grid_transitions_use_case import ManageGridTransitionsUseCase
 from app.application.realtime_grid_monitor_use_case import RealTimeGridMonitorUseCase
@@ -14,7 +20,12 @@ from app.infrastructure.database_repository import DatabaseGridRepository
 from app.infrastructure.exchange_service import BinanceExchangeService
 from app.infrastructure.notification_service import TelegramGridNotificationService
 from app.infrastructure.grid_calculator import GridTradingCalculator
-from app.config import MONITORING_INTERVAL_HOURS, REALTIME_MONITOR_INTERVAL_SECONDS
+from app.infrastructure.user_data_stream import BinanceUserDataStream
+from app.config import (
+    MONITORING_INTERVAL_HOURS, REALTIME_MONITOR_INTERVAL_SECONDS, DECISION_DEBOUNCE_SECONDS,
+    USER_DATA_STREAM_ENABLED
+)
+from shared.database.decision_bus import DecisionChange, get_decision_bus
 from shared.services.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -28,14 +39,16 @@ class GridScheduler:
     - Crea órdenes complementarias al instante
     - Optimizado para aprovechar movimientos de corto plazo
     
-    ⏰ GESTIÓN HORARIA:
+    📡 CAMBIOS DE DECISIÓN (bus del Cerebro):
     - ManageGridTransitionsUseCase: Pausar/activar según Cerebro
-    - Sincronización de configuraciones activas
+    
+    ⏰ GESTIÓN HORARIA:
+    - Limpieza de cache, pasada de seguridad de transiciones y resumen periódico de trading
     """
     
-    def __init__(self, db_session: Session):
-        self.db_session = db_session
+    def __init__(self):
         self.scheduler = BackgroundScheduler(daemon=True)
+        self._transitions_lock = threading.Lock()
         
         # Inicializar dependencias
         self._initialize_services()
@@ -48,10 +61,14 @@ class GridScheduler:
     def _initialize_services(self):
         """Inicializa todos los servicios necesarios."""
         try:
-            self.grid_repository = DatabaseGridRepository(self.db_session)
+            self.grid_repository = DatabaseGridRepository()
             self.exchange_service = BinanceExchangeService()
             self.notification_service = TelegramGridNotificationService()
             self.grid_calculator = GridTradingCalculator()
+            self.user_data_stream = BinanceUserDataStream(
+                exchange_provider=lambda: self.exchange_service.exchange,
+                mode_provider=self.exchange_service.get_trading_mode
+            ) if USER_DATA_STREAM_ENABLED else None
             
             # Casos de uso especializados
             self.transition_use_case = ManageGridTransitionsUseCase(
@@ -66,8 +83,15 @@ class GridScheduler:
                 grid_repository=self.grid_repository,
                 exchange_service=self.exchange_service,
                 notification_service=self.notification_service,
-                grid_calculator=self.grid_calculator
+                grid_calculator=self.grid_calculator,
+                fill_stream=self.user_data_stream
             )
+            if self.user_data_stream is not None:
+                # Los fills del stream se encolan y adelantan el ciclo del monitor
+                self.user_data_stream.subscribe(
+                    self._on_stream_fill,
+                    on_resync=self.realtime_monitor_use_case.request_reconciliation
+                )
             
             # NUEVO: Estadísticas de trading para notificaciones
             self.trading_stats_use_case = TradingStatsUseCase(
@@ -138,40 +162,100 @@ class GridScheduler:
             logger.error(f"❌ Error en monitor tiempo real: {e}")
             # No enviar notificación por errores de tiempo real para evitar spam
 
+    def _on_stream_fill(self, fill: dict):
+        """
+        Recibe un fill del stream de usuario (hilo del dispatcher).
+        Lo encola en el monitor y adelanta su próximo ciclo, que lo procesa
+        en el hilo del job (sin compartir sesión de BD ni estado entre hilos).
+        """
+        self.realtime_monitor_use_case.handle_fill_event(fill)
+        try:
+            self.scheduler.modify_job('realtime_grid_monitor', next_run_time=datetime.now())
+        except JobLookupError:
+            pass  # El monitor aún no está agendado: el fill espera al primer ciclo
+
+    def _run_decision_transitions(self):
+        """
+        📡 TRANSICIONES SEGÚN EL CEREBRO:
+        1. Gestión de transiciones (pausar/activar según Cerebro)
+        2. Notificación de los cambios de decisión
+        """
+        with self._transitions_lock:
+            try:
+                logger.info("🔧 Gestionando transiciones de estado...")
+                transition_result = self.transition_use_case.execute()
+                
+                activations = transition_result.get('activations', 0)
+                pauses = transition_result.get('pauses', 0)
+                
+                if transition_result.get('success', False):
+                    logger.info(f"✅ Transiciones: {activations} activaciones, {pauses} pausas")
+                else:
+                    error = transition_result.get('error', 'Error desconocido')
+                    logger.error(f"❌ Error en transiciones: {error}")
+                
+                logger.info("📊 Verificando cambios de decisión...")
+                configs_with_decisions = self.trading_stats_use_case.get_decision_changes()
+                self.notification_service.send_decision_change_notification(configs_with_decisions)
+                
+            except Exception as e:
+                logger.error(f"❌ Error en transiciones por cambio de decisión: {e}")
+                self.notification_service.send_error_notification("Grid Decision Transitions", str(e))
+
+    def _on_decision_change(self, change: DecisionChange):
+        """Recibe un cambio de decisión del bus (hilo del listener)."""
+        if change.estrategia != 'GRID':
+            return
+        logger.info(f"📡 Cambio de decisión del Cerebro: {change.par} {change.previous_decision} → {change.decision}")
+        self._schedule_decision_transitions()
+
+    def _schedule_decision_transitions(self):
+        """
+        Agenda las transiciones en el pool del scheduler.
+        
+        Los cambios de un mismo ciclo del Cerebro llegan en ráfaga; el retardo
+        corto y `replace_existing` los agrupan en una sola ejecución.
+        """
+        self.scheduler.add_job(
+            func=self._run_decision_transitions,
+            trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=DECISION_DEBOUNCE_SECONDS)),
+            id='decision_transitions',
+            name='Decision Transitions',
+            replace_existing=True,
+            max_instances=3  # Las ejecuciones se serializan con _transitions_lock
+        )
+
+    def start_decision_listener(self):
+        """
+        Suscribe el scheduler a los cambios de decisión del Cerebro.
+        Es la vía rápida; la gestión horaria repasa las transiciones por seguridad.
+        """
+        bus = get_decision_bus()
+        bus.subscribe(self._on_decision_change, on_resync=self._schedule_decision_transitions)
+        bus.start()
+        logger.info("✅ Escuchando cambios de decisión del Cerebro")
+
     def _run_hourly_management(self):
         """
         ⏰ GESTIÓN HORARIA:
-        1. Gestión de transiciones (pausar/activar según Cerebro)
-        2. Limpieza de cache del monitor tiempo real
-        3. Sincronización de estados
+        1. Limpieza de cache del monitor tiempo real
+        2. Pasada de seguridad de transiciones (activaciones fallidas, bots
+           sin órdenes o configurados con la decisión ya vigente)
+        3. Resumen periódico de trading
         """
         try:
             logger.info("🔄 ========== GESTIÓN HORARIA DE GRID TRADING ==========")
             
-            # PASO 1: Gestionar transiciones de estado
-            logger.info("🔧 PASO 1: Gestionando transiciones de estado...")
-            transition_result = self.transition_use_case.execute()
-            
-            activations = transition_result.get('activations', 0)
-            pauses = transition_result.get('pauses', 0)
-            
-            if transition_result.get('success', False):
-                logger.info(f"✅ Transiciones: {activations} activaciones, {pauses} pausas")
-            else:
-                error = transition_result.get('error', 'Error desconocido')
-                logger.error(f"❌ Error en transiciones: {error}")
-            
-            # PASO 2: Limpiar cache del monitor tiempo real
-            logger.info("🧹 PASO 2: Limpiando cache del monitor tiempo real...")
+            # PASO 1: Limpiar cache del monitor tiempo real
+            logger.info("🧹 PASO 1: Limpiando cache del monitor tiempo real...")
             self.realtime_monitor_use_case.clear_cache()
             
-            # PASO 3: Verificar cambios de decisión y enviar notificaciones
-            logger.info("📊 PASO 3: Verificando cambios de decisión...")
-            configs_with_decisions = self.trading_stats_use_case.get_decision_changes()
-            self.notification_service.send_decision_change_notification(configs_with_decisions)
+            # PASO 2: Transiciones sin esperar a que el Cerebro cambie de decisión
+            logger.info("🔁 PASO 2: Agendando pasada de seguridad de transiciones...")
+            self._schedule_decision_transitions()
             
-            # PASO 4: Generar y enviar resumen periódico de trading
-            logger.info("📊 PASO 4: Generando resumen periódico de trading...")
+            # PASO 3: Generar y enviar resumen periódico de trading
+            logger.info("📊 PASO 3: Generando resumen periódico de trading...")
             trading_summary = self.trading_stats_use_case.generate_trading_summary()
             if 'timestamp' in trading_summary:
                 trading_summary['periodicity'] = 'Resumen cada 1 hora'
@@ -194,7 +278,9 @@ class GridScheduler:
             self.notification_service.send_error_notification("Grid Hourly Management", str(e))
 
     def start_realtime_monitor(self):
-        """Agendar el monitor en tiempo real tras la limpieza inicial."""
+        """Agendar el monitor en tiempo real (y el stream de usuario) tras la limpieza inicial."""
+        if self.user_data_stream is not None:
+            self.user_data_stream.start()
         self.scheduler.add_job(
             func=self._run_realtime_monitor,
             trigger=IntervalTrigger(seconds=REALTIME_MONITOR_INTERVAL_SECONDS),
@@ -231,6 +317,7 @@ class GridScheduler:
             self.realtime_monitor_use_case.reset_initialization_status()
             logger.info("🔄 Estado de inicialización reseteado para todos los bots")
             
+            self._run_decision_transitions()
             self._run_hourly_management()
             logger.info("✅ Gestión horaria inicial completada")
             
@@ -241,6 +328,9 @@ class GridScheduler:
     def stop(self):
         """Detiene el scheduler."""
         try:
+            get_decision_bus().close()
+            if self.user_data_stream is not None:
+                self.user_data_stream.stop()
             if self.scheduler.running:
                 self.scheduler.shutdown(wait=True)
                 logger.info("✅ Grid Scheduler detenido")
@@ -272,7 +362,11 @@ class GridScheduler:
                 "status": "running" if self.scheduler.running else "stopped",
                 "jobs": jobs,
                 "monitoring_interval_hours": MONITORING_INTERVAL_HOURS,
-                "realtime_interval_seconds": REALTIME_MONITOR_INTERVAL_SECONDS
+                "realtime_interval_seconds": REALTIME_MONITOR_INTERVAL_SECONDS,
+                "user_data_stream": {
+                    "connected": self.user_data_stream.is_connected(),
+                    **self.user_data_stream.stats
+                } if self.user_data_stream is not None else None
             }
             
         except Exception as e:
@@ -283,6 +377,7 @@ class GridScheduler:
         """Ejecuta manualmente la gestión horaria (útil para comandos de Telegram)."""
         try:
             logger.info("🔧 Ejecutando gestión horaria manual...")
+            self._run_decision_transitions()
             self._run_hourly_management()
             return {"success": True, "message": "Gestión horaria manual ejecutada"}
             
@@ -0,0 +1,253 @@
+"""
+Stream de datos de usuario de Binance (WebSocket).
+
+Binance empuja un `executionReport` por cada cambio de estado de nuestras
+órdenes; los fills llegan en milisegundos en lugar de esperar al siguiente
+sondeo REST.
+
+- El listenKey se crea por REST y se renueva cada USER_DATA_STREAM_KEEPALIVE_MINUTES.
+- El WebSocket corre en su propio hilo con un bucle asyncio (aiohttp).
+- Los fills se entregan en un hilo despachador aparte: crear la orden
+  complementaria (REST) nunca bloquea la lectura del socket.
+- Tras cada reconexión se llama a `on_resync`: durante el corte pudieron
+  perderse eventos y el monitor reconcilia por REST.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from app.config import USER_DATA_STREAM_KEEPALIVE_MINUTES, USER_DATA_STREAM_URLS
+from app.domain.interfaces import FillStream
+from shared.services.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Segundos entre comprobaciones de parada / renovación y espera máxima entre reconexiones
+RECEIVE_POLL_SECONDS = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+FillCallback = Callable[[Dict[str, Any]], None]
+ResyncCallback = Callable[[], None]
+
+_RESYNC = object()  # Marca en la cola del despachador
+
+
+def execution_report_to_fill(event: Dict[str, Any], symbol: Callable[[str], str]) -> Optional[Dict[str, Any]]:
+    """
+    Convierte un executionReport de Binance al formato de fill del monitor.
+
+    Args:
+        event: Evento crudo del stream
+        symbol: Traduce el id de mercado de Binance ('ETHUSDT') al par ('ETH/USDT')
+
+    Returns:
+        Fill (mismo formato que get_order_status_from_exchange) o None si la orden no se completó
+    """
+    if event.get('e') != 'executionReport' or event.get('X') != 'FILLED':
+        return None
+    filled = Decimal(str(event['z']))
+    cost = Decimal(str(event.get('Z', '0')))
+    price = Decimal(str(event['p']))
+    average = cost / filled if filled else price
+    return {
+        'exchange_order_id': str(event['i']),
+        'pair': symbol(event['s']),
+        'side': event['S'].lower(),
+        'amount': Decimal(str(event['q'])),
+        # Las órdenes de mercado no tienen precio límite: se usa el precio medio
+        'price': price if price > 0 else average,
+        'status': 'closed',
+        'filled': filled,
+        'remaining': Decimal(str(event['q'])) - filled,
+        'timestamp': int(event.get('T') or event.get('E') or 0),
+        'type': str(event.get('o', '')).lower(),
+        'cost': cost,
+        'average': average,
+        'event_time': int(event.get('E') or 0)
+    }
+
+
+class BinanceUserDataStream(FillStream):
+    """
+    Fills de Binance por WebSocket (user data stream).
+    """
+
+    def __init__(
+        self,
+        exchange_provider: Callable[[], Any],
+        mode_provider: Callable[[], str],
+        urls: Optional[Dict[str, str]] = None,
+        keepalive_seconds: float = USER_DATA_STREAM_KEEPALIVE_MINUTES * 60
+    ):
+        """
+        Args:
+            exchange_provider: Devuelve el cliente ccxt actual (crea y renueva el listenKey)
+            mode_provider: Devuelve el modo de trading ('sandbox' o 'production')
+            urls: URL base del WebSocket por modo
+            keepalive_seconds: Segundos entre renovaciones del listenKey
+        """
+        self._exchange_provider = exchange_provider
+        self._mode_provider = mode_provider
+        self._urls = urls or USER_DATA_STREAM_URLS
+        self._keepalive_seconds = keepalive_seconds
+        self._fill_callbacks: List[FillCallback] = []
+        self._resync_callbacks: List[ResyncCallback] = []
+        self._events: "queue.Queue[Any]" = queue.Queue()
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._symbols: Dict[str, str] = {}
+        self.stats = {'connections': 0, 'events': 0, 'fills': 0}
+
+    def subscribe(self, on_fill: FillCallback, on_resync: Optional[ResyncCallback] = None) -> None:
+        """Registra los callbacks (se ejecutan en el hilo despachador)."""
+        self._fill_callbacks.append(on_fill)
+        if on_resync is not None:
+            self._resync_callbacks.append(on_resync)
+
+    def start(self) -> None:
+        """Arranca el hilo del WebSocket y el despachador."""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=lambda: asyncio.run(self._run()), name="user-data-stream", daemon=True),
+            threading.Thread(target=self._dispatch_loop, name="user-data-dispatch", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("🔌 Stream de usuario de Binance iniciado")
+
+    def stop(self) -> None:
+        """Detiene los hilos y espera a que terminen."""
+        self._stop.set()
+        self._events.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self._connected.clear()
+        logger.info("🔌 Stream de usuario de Binance detenido")
+
+    def is_connected(self) -> bool:
+        """True mientras el WebSocket está abierto."""
+        return self._connected.is_set()
+
+    # ------------------------------------------------------------------
+    # WebSocket
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        """Conecta y reconecta el WebSocket hasta stop()."""
+        delay = 1.0
+        first = True
+        async with aiohttp.ClientSession() as session:
+            while not self._stop.is_set():
+                try:
+                    mode = self._mode_provider()
+                    listen_key = await asyncio.to_thread(self._create_listen_key)
+                    url = f"{self._urls[mode]}/{listen_key}"
+                    async with session.ws_connect(url, heartbeat=60) as ws:
+                        self._connected.set()
+                        self.stats['connections'] += 1
+                        logger.info(f"✅ Stream de usuario conectado ({mode})")
+                        if not first:
+                            # Pudieron perderse eventos durante el corte
+                            self._events.put(_RESYNC)
+                        first = False
+                        delay = 1.0
+                        await self._read(ws, listen_key, mode)
+                except Exception as e:
+                    logger.warning(f"⚠️ Stream de usuario desconectado: {e}")
+                finally:
+                    self._connected.clear()
+                if not self._stop.is_set():
+                    await self._sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse, listen_key: str, mode: str) -> None:
+        """
+        Lee eventos hasta que el socket se cierra, caduca el listenKey o cambia el modo.
+        """
+        next_keepalive = time.monotonic() + self._keepalive_seconds
+        while not self._stop.is_set():
+            if self._mode_provider() != mode:
+                logger.info("🔄 Modo de trading cambiado: reconectando stream de usuario")
+                return
+            if time.monotonic() >= next_keepalive:
+                await asyncio.to_thread(self._keepalive_listen_key, listen_key)
+                next_keepalive = time.monotonic() + self._keepalive_seconds
+            try:
+                msg = await ws.receive(timeout=RECEIVE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                continue
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    raise ConnectionError(f"socket cerrado ({msg.type.name})")
+                continue
+            event = json.loads(msg.data)
+            self.stats['events'] += 1
+            if event.get('e') == 'listenKeyExpired':
+                raise ConnectionError("listenKey caducado")
+            self._events.put(event)
+
+    async def _sleep(self, seconds: float) -> None:
+        """Espera interrumpible por stop()."""
+        end = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < end:
+            await asyncio.sleep(min(RECEIVE_POLL_SECONDS, end - time.monotonic()))
+
+    # ------------------------------------------------------------------
+    # listenKey (REST, peso 2)
+    # ------------------------------------------------------------------
+
+    def _create_listen_key(self) -> str:
+        """Crea (o recupera) el listenKey de la cuenta spot."""
+        response = self._exchange_provider().public_post_userdatastream()
+        return response['listenKey']
+
+    def _keepalive_listen_key(self, listen_key: str) -> None:
+        """Renueva el listenKey para que no caduque."""
+        try:
+            self._exchange_provider().public_put_userdatastream({'listenKey': listen_key})
+            logger.debug("🔑 listenKey renovado")
+        except Exception as e:
+            logger.warning(f"⚠️ Error renovando listenKey: {e}")
+
+    # ------------------------------------------------------------------
+    # Despachador
+    # ------------------------------------------------------------------
+
+    def _dispatch_loop(self) -> None:
+        """Entrega los eventos a los callbacks en orden."""
+        while True:
+            item = self._events.get()
+            if item is None and self._stop.is_set():
+                return
+            try:
+                if item is _RESYNC:
+                    for callback in self._resync_callbacks:
+                        callback()
+                elif item is not None:
+                    fill = execution_report_to_fill(item, self._symbol)
+                    if fill is None:
+                        continue
+                    self.stats['fills'] += 1
+                    for callback in self._fill_callbacks:
+                        callback(fill)
+            except Exception as e:
+                logger.error(f"❌ Error procesando evento del stream de usuario: {e}")
+
+    def _symbol(self, market_id: str) -> str:
+        """Traduce 'ETHUSDT' a 'ETH/USDT' con los mercados de ccxt."""
+        if market_id not in self._symbols:
+            exchange = self._exchange_provider()
+            exchange.load_markets()
+            self._symbols[market_id] = exchange.safe_symbol(market_id)
+        return self._symbols[market_id]
+
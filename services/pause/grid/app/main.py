@@ -36,12 +36,8 @@ async def lifespan(app: FastAPI):
         init_database()
         logger.info("🗄️ Base de datos inicializada.")
         
-                # Inicializar scheduler con sesión de base de datos
-        db = next(get_db())
-        if db is None:
-            raise Exception("No se pudo obtener sesión de base de datos")
-        
-        scheduler = GridScheduler(db)
+        # Inicializar scheduler (el repositorio abre una sesión por consulta)
+        scheduler = GridScheduler()
         scheduler._setup_jobs(include_realtime=False)  # Solo agenda la gestión horaria
         scheduler.start()
         
@@ -79,7 +75,8 @@ async def lifespan(app: FastAPI):
         # Enviar notificación de inicio básica
         features = [
             "🤖 Monitoreo automático de órdenes de grid",
-            f"⏰ Verificación cada {MONITORING_INTERVAL_HOURS} hora(s)",
+            "📡 Transiciones al instante con cada cambio de decisión del Cerebro",
+            f"⏰ Resumen cada {MONITORING_INTERVAL_HOURS} hora(s)",
             f"💰 Soporte para pares: {', '.join(SUPPORTED_PAIRS)}",
             "📊 Consulta directa a base de datos (sin Cerebro)",
             "🔄 Creación automática de órdenes complementarias",
@@ -147,6 +144,12 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"❌ Error activando monitor en tiempo real: {e}")
         
+        # 📡 Desde aquí las transiciones las disparan los cambios de decisión del Cerebro
+        try:
+            scheduler.start_decision_listener()
+        except Exception as e:
+            logger.error(f"❌ Error suscribiendo a cambios de decisión: {e}")
+        
         logger.info("✅ Servicio Grid Trading iniciado correctamente")
         for feature in features:
             logger.info(f"  {feature}")
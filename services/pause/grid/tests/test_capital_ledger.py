@@ -0,0 +1,150 @@
+"""
+Pruebas del libro de capital local por bot.
+"""
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock
+
+from app.application.realtime_grid_monitor_use_case import RealTimeGridMonitorUseCase
+from app.domain.entities import ExchangeSnapshot, GridConfig
+from app.domain.interfaces import ExchangeService, GridCalculator, GridRepository, NotificationService
+from app.infrastructure.capital_ledger import CapitalLedger
+
+FEE = Decimal('0.001')
+
+
+def open_order(order_id, side, price, amount='0.01', filled='0'):
+    return {'exchange_order_id': order_id, 'side': side, 'amount': Decimal(amount),
+            'price': Decimal(price), 'filled': Decimal(filled)}
+
+
+class TestCapitalLedger:
+    """Pruebas de reservas, fills y reconciliación."""
+
+    def setup_method(self):
+        self.ledger = CapitalLedger()
+        self.ledger.open_account(
+            pair='ETH/USDT',
+            allocated_capital=Decimal('500'),
+            open_orders=[open_order('b1', 'buy', '1900'), open_order('s1', 'sell', '2100')],
+            base_free=Decimal('0.1'),
+            account_quote_free=Decimal('1000'),
+            price=Decimal('2000')
+        )
+
+    def test_account_starts_from_exchange_state(self):
+        account = self.ledger.get_account('ETH/USDT')
+
+        assert account['quote_reserved'] == Decimal('19.00')
+        assert account['base_reserved'] == Decimal('0.01')
+        # 500 - 19 en compras - (0.1 + 0.01) ETH a 2000
+        assert account['quote_free'] == Decimal('261.00')
+
+    def test_bots_do_not_share_usdt(self):
+        self.ledger.open_account('BTC/USDT', Decimal('1000'), [], Decimal('0'), Decimal('1000'), Decimal('60000'))
+
+        # El USDT de la cuenta ya asignado a ETH no está disponible para BTC
+        assert self.ledger.available('BTC/USDT', 'buy') == Decimal('739.00')
+
+    def test_fill_reported_twice_counts_once(self):
+        self.ledger.record_order('ETH/USDT', 'b2', 'buy', Decimal('0.05'), Decimal('1950'))
+        assert self.ledger.available('ETH/USDT', 'buy') == Decimal('163.50')
+
+        assert self.ledger.record_fill('ETH/USDT', 'b2', 'buy', Decimal('0.02'), Decimal('1950'), FEE)
+        assert self.ledger.record_fill('ETH/USDT', 'b2', 'buy', Decimal('0.05'), Decimal('1950'), FEE)
+        # El mismo fill completo llega también por REST
+        assert not self.ledger.record_fill('ETH/USDT', 'b2', 'buy', Decimal('0.05'), Decimal('1950'), FEE)
+
+        account = self.ledger.get_account('ETH/USDT')
+        assert account['base_free'] == Decimal('0.1') + Decimal('0.05') * (1 - FEE)
+        assert account['quote_reserved'] == Decimal('19.00')
+        assert 'b2' not in self.ledger.order_ids('ETH/USDT')
+
+    def test_sell_fill_and_cancel_release_capital(self):
+        self.ledger.record_fill('ETH/USDT', 's1', 'sell', Decimal('0.01'), Decimal('2100'), FEE)
+        self.ledger.record_cancel('ETH/USDT', 'b1')
+
+        account = self.ledger.get_account('ETH/USDT')
+        assert account['quote_free'] == Decimal('261.00') + Decimal('21.00') * (1 - FEE) + Decimal('19.00')
+        assert account['quote_reserved'] == 0
+        assert account['base_reserved'] == 0
+
+    def test_reconcile_applies_missed_fills_and_reports_drift(self):
+        report = self.ledger.reconcile(
+            pair='ETH/USDT',
+            open_orders=[open_order('s1', 'sell', '2100')],
+            closed_orders={'b1': {'status': 'closed', 'filled': Decimal('0.01'), 'average': Decimal('1900')}},
+            base_free=Decimal('0.10999'),
+            account_quote_free=Decimal('1000'),
+            price=Decimal('2000'),
+            fee_rate=FEE
+        )
+
+        assert report['missed_fills_usdt'] == Decimal('19.00')
+        assert report['base_drift'] == 0
+        assert 'b1' not in self.ledger.order_ids('ETH/USDT')
+        assert self.ledger.available('ETH/USDT', 'sell') == Decimal('0.10999')
+
+    def test_reconcile_keeps_orders_without_final_status(self):
+        self.ledger.record_order('ETH/USDT', 'b2', 'buy', Decimal('0.01'), Decimal('1950'))
+
+        # b2 se colocó después del snapshot: fetch_order aún la da abierta
+        self.ledger.reconcile('ETH/USDT', [open_order('b1', 'buy', '1900'), open_order('s1', 'sell', '2100')],
+                              {'b2': {'status': 'open', 'filled': 0}}, Decimal('0.1'), Decimal('1000'),
+                              Decimal('2000'), FEE)
+
+        assert 'b2' in self.ledger.order_ids('ETH/USDT')
+
+    def test_late_fill_already_in_reconciled_balance_is_ignored(self):
+        self.ledger.reconcile('ETH/USDT', [open_order('s1', 'sell', '2100')],
+                              {'b1': {'status': 'closed', 'filled': Decimal('0.01'), 'average': Decimal('1900')}},
+                              Decimal('0.10999'), Decimal('1000'), Decimal('2000'), FEE)
+        fill_time = int(time.time() * 1000) - 5000
+
+        assert not self.ledger.record_fill('ETH/USDT', 'b1', 'buy', Decimal('0.01'), Decimal('1900'), FEE, fill_time)
+        assert self.ledger.available('ETH/USDT', 'sell') == Decimal('0.10999')
+
+
+class TestCapitalDriftAlert:
+    """Pruebas de la reconciliación periódica desde el monitor."""
+
+    def setup_method(self):
+        self.exchange = Mock(spec=ExchangeService)
+        self.notifications = Mock(spec=NotificationService)
+        self.config = GridConfig(
+            id=1, telegram_chat_id="123456", config_type="ETH", pair="ETH/USDT", total_capital=500.0,
+            grid_levels=5, price_range_percent=10.0, stop_loss_percent=5.0, enable_stop_loss=True,
+            enable_trailing_up=True, is_active=True, is_configured=True, is_running=True,
+            last_decision="running", last_decision_timestamp=datetime.now(),
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+        self.exchange.get_exchange_snapshot.return_value = ExchangeSnapshot(
+            pair='ETH/USDT', open_orders=(), balances={}, price=Decimal('2000'), taken_at=datetime.now()
+        )
+        self.monitor = RealTimeGridMonitorUseCase(
+            grid_repository=Mock(spec=GridRepository),
+            exchange_service=self.exchange,
+            notification_service=self.notifications,
+            grid_calculator=Mock(spec=GridCalculator)
+        )
+
+    def test_drift_above_threshold_sends_alert_once_per_interval(self):
+        self.exchange.reconcile_capital_ledger.return_value = {
+            'pair': 'ETH/USDT', 'drift_usdt': Decimal('25'), 'drift_percent': Decimal('5')
+        }
+
+        self.monitor._reconcile_capital_ledger(self.config)
+        self.monitor._reconcile_capital_ledger(self.config)
+
+        self.exchange.reconcile_capital_ledger.assert_called_once()
+        self.notifications.send_notification.assert_called_once()
+
+    def test_small_drift_is_not_alerted(self):
+        self.exchange.reconcile_capital_ledger.return_value = {
+            'pair': 'ETH/USDT', 'drift_usdt': Decimal('0.5'), 'drift_percent': Decimal('0.1')
+        }
+
+        self.monitor._reconcile_capital_ledger(self.config)
+
+        self.notifications.send_notification.assert_not_called()
@@ -0,0 +1,163 @@
+"""
+Pruebas del snapshot del exchange por ciclo en el monitor en tiempo real.
+
+Cuentan las peticiones REST que llegan a un cliente ccxt simulado.
+"""
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock
+
+from app.application.realtime_grid_monitor_use_case import RealTimeGridMonitorUseCase
+from app.domain.entities import GridConfig
+from app.domain.interfaces import GridCalculator, GridRepository, NotificationService
+from app.infrastructure.capital_ledger import CapitalLedger
+from app.infrastructure.exchange_service import BinanceExchangeService
+
+
+def ccxt_order(order_id, pair, side, price, amount='0.01', status='open'):
+    filled = float(amount) if status == 'closed' else 0.0
+    return {
+        'id': order_id, 'symbol': pair, 'side': side, 'amount': float(amount), 'price': float(price),
+        'status': status, 'filled': filled, 'remaining': float(amount) - filled,
+        'timestamp': 1700000000000, 'type': 'limit', 'cost': filled * float(price), 'average': float(price)
+    }
+
+
+class CountingClient:
+    """Cliente ccxt simulado que cuenta las peticiones por método."""
+
+    def __init__(self, open_orders):
+        self.open_orders = open_orders  # {pair: [orden ccxt]}
+        self.closed = {}
+        self.calls = Counter()
+
+    def fetch_open_orders(self, pair):
+        self.calls['fetch_open_orders'] += 1
+        return list(self.open_orders[pair])
+
+    def fetch_balance(self):
+        self.calls['fetch_balance'] += 1
+        return {'USDT': {'free': 1000.0}, 'ETH': {'free': 1.0}, 'BTC': {'free': 0.1},
+                'free': {'USDT': 1000.0}, 'info': {}}
+
+    def fetch_ticker(self, pair):
+        self.calls['fetch_ticker'] += 1
+        return {'last': 2000.0}
+
+    def fetch_closed_orders(self, symbol, since=None, limit=None):
+        self.calls['fetch_closed_orders'] += 1
+        return []
+
+    def fetch_my_trades(self, symbol, since=None, limit=None):
+        self.calls['fetch_my_trades'] += 1
+        return []
+
+    def fetch_order(self, order_id, pair):
+        self.calls['fetch_order'] += 1
+        return self.closed[order_id]
+
+    def create_order(self, symbol, type, side, amount, price):
+        self.calls['create_order'] += 1
+        order = ccxt_order(f"new-{self.calls['create_order']}", symbol, side, price, str(amount))
+        self.open_orders[symbol].append(order)
+        return order
+
+    def load_markets(self):
+        return {}
+
+    def market(self, pair):
+        return {}
+
+
+def grid_config(pair):
+    return GridConfig(
+        id=1, telegram_chat_id="123456", config_type=pair.split('/')[0], pair=pair, total_capital=500.0,
+        grid_levels=4, price_range_percent=10.0, stop_loss_percent=5.0, enable_stop_loss=True,
+        enable_trailing_up=True, is_active=True, is_configured=True, is_running=True,
+        last_decision="running", last_decision_timestamp=datetime.now(),
+        created_at=datetime.now(), updated_at=datetime.now()
+    )
+
+
+class TestExchangeSnapshot:
+    """Pruebas de las peticiones REST por par y ciclo."""
+
+    def setup_method(self):
+        self.pairs = ['ETH/USDT', 'BTC/USDT']
+        self.client = CountingClient({
+            pair: [ccxt_order(f"{pair}-{i}", pair, 'buy', 1900 - i * 10) for i in range(4)]
+            for pair in self.pairs
+        })
+        self.exchange = BinanceExchangeService.__new__(BinanceExchangeService)
+        self.exchange.exchange = self.client
+        self.exchange.mode = 'sandbox'
+        self.exchange.capital_ledger = CapitalLedger()
+
+        repository = Mock(spec=GridRepository)
+        repository.get_active_configs.return_value = [grid_config(pair) for pair in self.pairs]
+        calculator = Mock(spec=GridCalculator)
+        calculator.get_last_buy_price.return_value = None
+        calculator.get_highest_sell_price.return_value = None
+        self.monitor = RealTimeGridMonitorUseCase(
+            grid_repository=repository,
+            exchange_service=self.exchange,
+            notification_service=Mock(spec=NotificationService),
+            grid_calculator=calculator
+        )
+
+    def run_cycle(self):
+        self.client.calls.clear()
+        result = self.monitor.execute()
+        assert result['success'] is True
+        return self.client.calls
+
+    def test_cycle_reads_each_pair_once(self):
+        calls = self.run_cycle()
+
+        # Órdenes abiertas y ticker una vez por par; balances una vez por ciclo
+        assert calls['fetch_open_orders'] == 2
+        assert calls['fetch_ticker'] == 2
+        assert calls['fetch_balance'] == 1
+        assert calls['fetch_closed_orders'] == 2
+        assert calls['fetch_my_trades'] == 2
+
+    def test_own_order_invalidates_snapshot(self):
+        self.run_cycle()
+        filled = self.client.open_orders['ETH/USDT'].pop(0)
+        self.client.closed[filled['id']] = {**filled, 'status': 'closed', 'filled': filled['amount'], 'remaining': 0.0}
+
+        calls = self.run_cycle()
+
+        assert calls['create_order'] == 1
+        assert calls['fetch_order'] == 1
+        # Tras colocar la complementaria se vuelve a leer el exchange (BTC lo lee por primera vez)
+        assert calls['fetch_open_orders'] == 2
+        assert calls['fetch_balance'] == 2
+        snapshot = self.monitor._get_snapshot('ETH/USDT')
+        assert 'new-1' in snapshot.open_order_ids
+        assert self.client.calls['fetch_open_orders'] == 3
+
+    def test_several_fills_do_not_multiply_reads(self):
+        self.run_cycle()
+        for _ in range(3):
+            filled = self.client.open_orders['ETH/USDT'].pop(0)
+            self.client.closed[filled['id']] = {**filled, 'status': 'closed', 'filled': filled['amount'], 'remaining': 0.0}
+
+        calls = self.run_cycle()
+
+        assert calls['create_order'] == 3
+        # Las complementarias usan el snapshot del ciclo; solo BTC vuelve a leer
+        assert calls['fetch_open_orders'] == 2
+        assert calls['fetch_ticker'] == 2
+        assert calls['fetch_balance'] == 2
+
+    def test_snapshot_is_used_for_capital_checks(self):
+        snapshot = self.exchange.get_exchange_snapshot('ETH/USDT')
+        self.client.calls.clear()
+
+        check = self.exchange.can_bot_use_capital(grid_config('ETH/USDT'), Decimal('0.5'), 'sell', snapshot)
+
+        assert check['can_use'] is True
+        assert check['required_usdt'] == Decimal('1000.0')
+        assert sum(self.client.calls.values()) == 0
@@ -0,0 +1,229 @@
+"""
+Pruebas del registro persistente de órdenes y trades de grid.
+
+Usa SQLite en memoria con los modelos compartidos.
+"""
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.application.realtime_grid_monitor_use_case import RealTimeGridMonitorUseCase
+from app.domain.entities import GridConfig, GridOrder, GridTrade
+from app.domain.interfaces import ExchangeService, GridCalculator, NotificationService
+from app.infrastructure.database_repository import DatabaseGridRepository
+from shared.database.models import Base
+
+
+def grid_order(order_id, side, price, status='open', pair='ETH/USDT'):
+    return GridOrder(
+        id=None, exchange_order_id=order_id, pair=pair, side=side, amount=Decimal('0.01'),
+        price=Decimal(price), status=status, order_type=f'grid_{side}', grid_level=None,
+        created_at=None, filled_at=None
+    )
+
+
+def grid_trade(profit, executed_at, pair='ETH/USDT'):
+    return GridTrade(
+        pair=pair, buy_order_id='b', sell_order_id='s', buy_price=Decimal('2000'),
+        sell_price=Decimal('2000') + Decimal(profit) * 100, amount=Decimal('0.01'),
+        profit=Decimal(profit), profit_percent=Decimal(profit) / Decimal('0.2'), executed_at=executed_at
+    )
+
+
+def sqlite_engine():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class TestDatabaseGridRepository:
+    """Pruebas de órdenes y trades en BD."""
+
+    def setup_method(self):
+        self.engine = sqlite_engine()
+        self.Session = sessionmaker(bind=self.engine)
+        self.repository = DatabaseGridRepository(self.Session)
+
+    def test_tables_have_query_indexes(self):
+        inspector = inspect(self.engine)
+
+        order_indexes = {i['name']: i['column_names'] for i in inspector.get_indexes('grid_orders')}
+        trade_indexes = {i['name']: i['column_names'] for i in inspector.get_indexes('grid_trades')}
+
+        assert order_indexes['ix_grid_orders_pair_status'] == ['pair', 'status']
+        assert trade_indexes['ix_grid_trades_pair_executed_at'] == ['pair', 'executed_at']
+
+    def test_active_orders_and_cancellation(self):
+        self.repository.save_order(grid_order('1', 'buy', '1900'))
+        self.repository.save_order(grid_order('2', 'sell', '2100'))
+        self.repository.save_order(grid_order('3', 'buy', '60000', pair='BTC/USDT'))
+        self.repository.update_order_status('2', 'filled', datetime.utcnow())
+
+        assert [o.exchange_order_id for o in self.repository.get_active_orders('ETH/USDT')] == ['1']
+        assert self.repository.cancel_all_orders_for_pair('ETH/USDT') == 1
+        assert self.repository.get_active_orders('ETH/USDT') == []
+        assert len(self.repository.get_active_orders('BTC/USDT')) == 1
+
+    def test_batch_updates_existing_orders_and_keeps_origin(self):
+        complementary = grid_order('2', 'sell', '2100')
+        complementary.parent_order_id = '1'
+        complementary.parent_price = Decimal('1900')
+        assert self.repository.save_order_batch([grid_order('1', 'buy', '1900'), complementary], [])
+
+        # El fill llega sin origen: no debe borrarlo
+        assert self.repository.save_order_batch([grid_order('2', 'sell', '2100', status='filled')], [])
+
+        stored = self.repository.get_orders_by_exchange_ids(['2'])['2']
+        assert stored.status == 'filled'
+        assert stored.parent_order_id == '1'
+        assert stored.parent_price == Decimal('1900')
+
+    def test_recent_trades_and_summary(self):
+        now = datetime.utcnow()
+        self.repository.save_order_batch([], [
+            grid_trade('0.5', now - timedelta(hours=3)),
+            grid_trade('-0.2', now - timedelta(hours=1)),
+            grid_trade('0.3', now)
+        ])
+
+        recent = self.repository.get_trades_by_pair('ETH/USDT', limit=10, since=now - timedelta(hours=2))
+        summary = self.repository.get_trades_summary_by_pair('ETH/USDT')
+
+        assert [t.profit for t in recent] == [Decimal('0.3'), Decimal('-0.2')]
+        assert self.repository.get_total_profit_by_pair('ETH/USDT') == Decimal('0.6')
+        assert summary['total_trades'] == 3
+        assert summary['winning_trades'] == 2
+        assert summary['losing_trades'] == 1
+        assert summary['best_trade'] == Decimal('0.5')
+        assert self.repository.get_trades_summary_by_pair('BTC/USDT')['total_trades'] == 0
+
+    def test_state_survives_restart(self):
+        self.repository.save_order(grid_order('1', 'buy', '1900'))
+        self.repository.save_trade(grid_trade('0.5', datetime.utcnow()))
+
+        restarted = DatabaseGridRepository(self.Session)
+
+        assert len(restarted.get_active_orders('ETH/USDT')) == 1
+        assert len(restarted.get_trades_by_pair('ETH/USDT')) == 1
+
+    def test_failed_write_does_not_break_later_calls(self):
+        assert not self.repository.save_order_batch([grid_order('1', 'buy', '1900', pair=None)], [])
+
+        assert self.repository.save_order_batch([grid_order('2', 'buy', '1900')], [])
+        assert [o.exchange_order_id for o in self.repository.get_active_orders('ETH/USDT')] == ['2']
+
+    def test_threads_write_with_their_own_sessions(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'grid.db'}", connect_args={'check_same_thread': False})
+        Base.metadata.create_all(engine)
+        repository = DatabaseGridRepository(sessionmaker(bind=engine))
+        errors = []
+
+        def writer(worker):
+            try:
+                for i in range(10):
+                    assert repository.save_order_batch([grid_order(f'{worker}-{i}', 'buy', '1900')], [])
+                    repository.update_order_status(f'{worker}-{i}', 'filled', datetime.utcnow())
+            except AssertionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert repository.get_active_orders('ETH/USDT') == []
+        assert len(repository.get_orders_by_exchange_ids([f'{w}-{i}' for w in range(4) for i in range(10)])) == 40
+
+
+class TestMonitorOrderWrites:
+    """Pruebas de la escritura por lotes desde el monitor en tiempo real."""
+
+    def setup_method(self):
+        engine = sqlite_engine()
+        self.Session = sessionmaker(bind=engine)
+        self.repository = DatabaseGridRepository(self.Session)
+        self.exchange = Mock(spec=ExchangeService)
+        self.exchange.can_bot_use_capital.return_value = {'can_use': True}
+        self.exchange.create_order.side_effect = self.create_order
+        self.created = 0
+
+        self.config = GridConfig(
+            id=1, telegram_chat_id="123456", config_type="ETH", pair="ETH/USDT", total_capital=500.0,
+            grid_levels=10, price_range_percent=10.0, stop_loss_percent=5.0, enable_stop_loss=True,
+            enable_trailing_up=True, is_active=True, is_configured=True, is_running=True,
+            last_decision="running", last_decision_timestamp=datetime.now(),
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+        self.monitor = RealTimeGridMonitorUseCase(
+            grid_repository=self.repository,
+            exchange_service=self.exchange,
+            notification_service=Mock(spec=NotificationService),
+            grid_calculator=Mock(spec=GridCalculator)
+        )
+        self.monitor._active_configs_cache = [self.config]
+        self.monitor._cache_expiry = datetime.now() + timedelta(hours=1)
+        self.monitor._bot_initialization_status['ETH/USDT'] = {'first_initialization_completed': True}
+
+    def create_order(self, pair, side, amount, price, order_type):
+        self.created += 1
+        order = grid_order(f'comp-{self.created}', side, '0', pair=pair)
+        order.amount = amount
+        order.price = price
+        return order
+
+    def push_fill(self, fill):
+        """Fill del stream procesado en el hilo del monitor."""
+        self.monitor.handle_fill_event(fill)
+        self.monitor._drain_stream_fills()
+
+    def fill(self, order_id, side, price):
+        return {'exchange_order_id': order_id, 'pair': 'ETH/USDT', 'side': side,
+                'filled': Decimal('0.01'), 'price': Decimal(price), 'type': 'limit'}
+
+    def test_fills_are_written_once_per_cycle(self):
+        self.repository.save_order(grid_order('b1', 'buy', '2000'))
+        batches = []
+        save_order_batch = self.repository.save_order_batch
+        self.repository.save_order_batch = lambda orders, trades: batches.append(len(orders)) or save_order_batch(orders, trades)
+
+        self.push_fill(self.fill('b1', 'buy', '2000'))
+        # Nada se escribe hasta el final del ciclo
+        assert [o.exchange_order_id for o in self.repository.get_active_orders('ETH/USDT')] == ['b1']
+
+        assert self.monitor._flush_order_writes() == 2
+        assert batches == [2]
+        active = self.repository.get_active_orders('ETH/USDT')
+        assert [(o.exchange_order_id, o.side, o.parent_order_id) for o in active] == [('comp-1', 'sell', 'b1')]
+
+    def test_complementary_fill_records_trade_after_restart(self):
+        self.push_fill(self.fill('b1', 'buy', '2000'))
+        self.monitor._flush_order_writes()
+        sell_price = self.repository.get_active_orders('ETH/USDT')[0].price
+
+        # Otro proceso (reinicio) recibe el fill de la venta complementaria
+        self.monitor.grid_repository = DatabaseGridRepository(self.Session)
+        self.monitor._processed_fills.clear()
+        self.push_fill(self.fill('comp-1', 'sell', str(sell_price)))
+        self.monitor._flush_order_writes()
+
+        trades = self.monitor.grid_repository.get_trades_by_pair('ETH/USDT')
+        assert len(trades) == 1
+        assert (trades[0].buy_order_id, trades[0].sell_order_id) == ('b1', 'comp-1')
+        assert trades[0].profit == (sell_price - Decimal('2000')) * Decimal('0.01')
+        assert self.monitor.grid_repository.get_total_profit_by_pair('ETH/USDT') > 0
+
+    def test_failed_write_is_retried_next_cycle(self):
+        self.monitor.grid_repository = Mock(wraps=self.repository)
+        self.monitor.grid_repository.save_order_batch.side_effect = [False, True]
+
+        self.push_fill(self.fill('b1', 'buy', '2000'))
+
+        assert self.monitor._flush_order_writes() == 0
+        assert self.monitor._flush_order_writes() == 2
@@ -0,0 +1,175 @@
+"""
+Pruebas de la colocación concurrente de la grilla inicial.
+"""
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock
+
+import ccxt
+
+from app.application.manage_grid_transitions_use_case import ManageGridTransitionsUseCase
+from app.domain.entities import GridConfig, GridOrder, OrderPlacementResult, OrderRequest
+from app.domain.interfaces import ExchangeService, GridCalculator, GridRepository, NotificationService
+from app.infrastructure.capital_ledger import CapitalLedger
+from app.infrastructure.exchange_service import BinanceExchangeService
+from shared.exchange import ExchangeGateway
+
+LATENCY = 0.05
+
+
+class SlowClient:
+    """Cliente ccxt simulado con latencia fija por petición."""
+
+    def __init__(self):
+        self.enableRateLimit = True
+        self.last_response_headers = {}
+        self.markets = None
+        self.orders = {}  # {client_order_id: orden ccxt}
+        self.failures = {}  # {precio: [excepción, ...]} a lanzar en orden
+        self.lost_responses = set()  # Precios cuya primera orden llega pero sin respuesta
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def load_markets(self, reload=False):
+        self.markets = {'ETH/USDT': {'limits': {'cost': {'min': 10.0}}}}
+        return self.markets
+
+    def create_order(self, symbol, type, side, amount, price, params=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(LATENCY)
+        with self.lock:
+            self.in_flight -= 1
+            errors = self.failures.get(price)
+            if errors:
+                raise errors.pop(0)
+            client_id = params['newClientOrderId']
+            order = {'id': f"ex-{len(self.orders) + 1}", 'clientOrderId': client_id, 'status': 'open', 'filled': 0.0}
+            self.orders[client_id] = order
+            if price in self.lost_responses:
+                self.lost_responses.discard(price)
+                raise ccxt.RequestTimeout("read timeout")
+            return order
+
+    def fetch_order(self, id, symbol=None, params=None):
+        order = self.orders.get(params['origClientOrderId'])
+        if order is None:
+            raise ccxt.OrderNotFound("Order does not exist")
+        return order
+
+
+def ladder(count=30):
+    return [
+        OrderRequest(pair='ETH/USDT', side='buy' if i % 2 else 'sell', amount=Decimal('0.01'),
+                     price=Decimal(1900 + i * 10), grid_level=i // 2)
+        for i in range(count)
+    ]
+
+
+class TestCreateOrders:
+    """Pruebas del pipeline de colocación de BinanceExchangeService."""
+
+    def setup_method(self):
+        self.client = SlowClient()
+        self.exchange = BinanceExchangeService.__new__(BinanceExchangeService)
+        self.exchange.exchange = ExchangeGateway(self.client, budget_fraction=1.0).client()
+        self.exchange.mode = 'sandbox'
+        self.exchange.capital_ledger = CapitalLedger()
+
+    def test_full_grid_is_placed_in_about_one_round_trip(self):
+        start = time.monotonic()
+        results = self.exchange.create_orders(ladder(30))
+        elapsed = time.monotonic() - start
+
+        assert all(result.success for result in results)
+        assert elapsed < 30 * LATENCY / 3
+        assert self.client.max_in_flight > 10
+        # Un resultado por petición, en el mismo orden
+        assert [r.order.price for r in results] == [r.price for r in ladder(30)]
+        assert [r.order.grid_level for r in results] == [r.grid_level for r in ladder(30)]
+
+    def test_transient_failures_are_retried_without_duplicates(self):
+        self.client.failures[1900.0] = [ccxt.NetworkError("502 Bad Gateway")]
+        self.client.lost_responses.add(1910.0)
+
+        results = self.exchange.create_orders(ladder(4))
+
+        assert all(result.success for result in results)
+        assert [result.attempts for result in results] == [2, 2, 1, 1]
+        # La orden cuya respuesta se perdió no se envía dos veces
+        assert len(self.client.orders) == 4
+
+    def test_rejections_are_reported_per_order(self):
+        self.client.failures[1920.0] = [ccxt.InsufficientFunds("Account has insufficient balance")]
+
+        results = self.exchange.create_orders(ladder(4))
+
+        failed = [result for result in results if not result.success]
+        assert len(failed) == 1
+        assert failed[0].request.price == Decimal('1920')
+        assert failed[0].attempts == 1
+        assert 'insufficient balance' in failed[0].error
+
+
+class TestInitialGridPlacement:
+    """Pruebas de _create_initial_grid con el pipeline."""
+
+    def setup_method(self):
+        self.exchange = Mock(spec=ExchangeService)
+        self.exchange.cancel_all_orders_for_pair.return_value = 0
+        self.exchange.get_active_orders_from_exchange.return_value = []
+        self.exchange.get_bot_allocated_balance.return_value = {
+            'allocated_capital': Decimal('1000'), 'total_value_usdt': Decimal('1000')
+        }
+        self.exchange.can_bot_use_capital.return_value = {'can_use': True, 'available_balance': Decimal('1000')}
+        self.exchange.create_order.return_value = self.order('m1', 'buy', '2000')
+        self.exchange.get_order_status.return_value = {'filled': Decimal('0.25')}
+        self.exchange.calculate_net_amount_after_fees.return_value = Decimal('0.25')
+        self.exchange.validate_order_after_fees.return_value = {'valid': True}
+        self.exchange.create_orders.side_effect = lambda requests: [
+            OrderPlacementResult(request=r, order=None if r.price == Decimal('1990') else self.order(f"o{i}", r.side, r.price),
+                                 error='rejected' if r.price == Decimal('1990') else None, attempts=1)
+            for i, r in enumerate(requests)
+        ]
+        calculator = Mock(spec=GridCalculator)
+        calculator.calculate_grid_levels.return_value = [Decimal(p) for p in range(1950, 2051, 10) if p != 2000]
+        calculator.calculate_order_amount.return_value = Decimal('0.02')
+        self.repository = Mock(spec=GridRepository)
+        self.use_case = ManageGridTransitionsUseCase(
+            grid_repository=self.repository,
+            exchange_service=self.exchange,
+            notification_service=Mock(spec=NotificationService),
+            grid_calculator=calculator
+        )
+        self.config = GridConfig(
+            id=1, telegram_chat_id="123456", config_type="ETH", pair="ETH/USDT", total_capital=1000.0,
+            grid_levels=10, price_range_percent=5.0, stop_loss_percent=5.0, enable_stop_loss=True,
+            enable_trailing_up=True, is_active=True, is_configured=True, is_running=False,
+            last_decision="OPERAR_GRID", last_decision_timestamp=datetime.now(),
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+
+    @staticmethod
+    def order(order_id, side, price):
+        return GridOrder(id=None, exchange_order_id=order_id, pair='ETH/USDT', side=side, amount=Decimal('0.02'),
+                         price=Decimal(price), status='open', order_type=f'grid_{side}', grid_level=None,
+                         created_at=None, filled_at=None)
+
+    def test_ladder_is_placed_in_one_batch_nearest_first(self):
+        orders = self.use_case._create_initial_grid(self.config, Decimal('2000'))
+
+        self.exchange.create_orders.assert_called_once()
+        requests = self.exchange.create_orders.call_args[0][0]
+        assert len(requests) == 10
+        distances = [abs(r.price - Decimal('2000')) for r in requests]
+        assert distances == sorted(distances)
+        # Solo la compra de mercado pasa por create_order
+        self.exchange.create_order.assert_called_once()
+
+        # La orden rechazada no se guarda; el resto, en una sola escritura
+        assert len(orders) == 9
+        self.repository.save_order_batch.assert_called_once_with(orders, [])
@@ -0,0 +1,266 @@
+"""
+Pruebas para el stream de usuario de Binance (fills por WebSocket).
+
+Usan un servidor WebSocket local que imita el user data stream de Binance.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock
+
+from aiohttp import web
+
+from app.application.realtime_grid_monitor_use_case import RealTimeGridMonitorUseCase
+from app.domain.entities import ExchangeSnapshot, GridConfig
+from app.domain.interfaces import ExchangeService, FillStream, GridCalculator, GridRepository, NotificationService
+from app.infrastructure.user_data_stream import BinanceUserDataStream, execution_report_to_fill
+
+
+def execution_report(order_id, status='FILLED', side='BUY', price='2000.00', qty='0.01'):
+    return {
+        'e': 'executionReport', 'E': int(time.time() * 1000), 's': 'ETHUSDT', 'S': side, 'o': 'LIMIT',
+        'q': qty, 'p': price, 'X': status, 'i': order_id, 'z': qty if status == 'FILLED' else '0',
+        'Z': str(Decimal(qty) * Decimal(price)) if status == 'FILLED' else '0', 'T': int(time.time() * 1000)
+    }
+
+
+class FakeUserDataServer:
+    """Servidor WebSocket local con la ruta /ws/<listenKey> de Binance."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.sockets = []
+        self.connections = 0
+        self.port = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return f"http://127.0.0.1:{self.port}/ws"
+
+    def send(self, event):
+        asyncio.run_coroutine_threadsafe(self._broadcast(json.dumps(event)), self.loop).result(5)
+
+    def drop_connections(self):
+        asyncio.run_coroutine_threadsafe(self._close_all(), self.loop).result(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self.sockets.append(ws)
+        async for _ in ws:
+            pass
+        return ws
+
+    async def _broadcast(self, data):
+        for ws in self.sockets:
+            if not ws.closed:
+                await ws.send_str(data)
+
+    async def _close_all(self):
+        for ws in self.sockets:
+            await ws.close()
+        self.sockets.clear()
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/ws/{listen_key}', self._handler)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.run_forever()
+
+
+class FakeListenKeyExchange:
+    """Cliente ccxt mínimo: listenKey y símbolos."""
+
+    def __init__(self):
+        self.keepalives = 0
+
+    def public_post_userdatastream(self):
+        return {'listenKey': 'test-key'}
+
+    def public_put_userdatastream(self, params):
+        self.keepalives += 1
+        return {}
+
+    def load_markets(self):
+        return {}
+
+    def safe_symbol(self, market_id):
+        return {'ETHUSDT': 'ETH/USDT'}[market_id]
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestExecutionReport:
+    """Pruebas de la conversión de executionReport a fill."""
+
+    def test_filled_report_becomes_fill(self):
+        fill = execution_report_to_fill(execution_report(42), lambda market_id: 'ETH/USDT')
+
+        assert fill['exchange_order_id'] == '42'
+        assert fill['pair'] == 'ETH/USDT'
+        assert fill['side'] == 'buy'
+        assert fill['filled'] == Decimal('0.01')
+        assert fill['price'] == Decimal('2000.00')
+        assert fill['status'] == 'closed'
+
+    def test_other_statuses_are_ignored(self):
+        assert execution_report_to_fill(execution_report(42, status='NEW'), lambda m: m) is None
+        assert execution_report_to_fill({'e': 'outboundAccountPosition'}, lambda m: m) is None
+
+
+class TestBinanceUserDataStream:
+    """Pruebas del stream contra el servidor local."""
+
+    def setup_method(self):
+        self.server = FakeUserDataServer()
+        url = self.server.start()
+        self.exchange = FakeListenKeyExchange()
+        self.stream = BinanceUserDataStream(
+            exchange_provider=lambda: self.exchange,
+            mode_provider=lambda: 'sandbox',
+            urls={'sandbox': url},
+            keepalive_seconds=0.2
+        )
+        self.fills = []
+        self.resyncs = []
+        self.stream.subscribe(self.fills.append, on_resync=lambda: self.resyncs.append(True))
+        self.stream.start()
+        assert wait_for(self.stream.is_connected)
+
+    def teardown_method(self):
+        self.stream.stop()
+        self.server.stop()
+
+    def test_fill_is_delivered_well_under_a_second(self):
+        self.server.send(execution_report(1, status='NEW'))
+        sent = time.monotonic()
+        self.server.send(execution_report(1))
+
+        assert wait_for(lambda: self.fills)
+        assert time.monotonic() - sent < 0.5
+        assert [fill['exchange_order_id'] for fill in self.fills] == ['1']
+
+    def test_listen_key_is_kept_alive(self):
+        assert wait_for(lambda: self.exchange.keepalives >= 1)
+
+    def test_reconnect_requests_reconciliation(self):
+        self.server.drop_connections()
+
+        assert wait_for(lambda: self.server.connections == 2 and self.stream.is_connected())
+        assert wait_for(lambda: self.resyncs == [True])
+        self.server.send(execution_report(2))
+        assert wait_for(lambda: self.fills)
+
+
+class TestMonitorWithFillStream:
+    """Pruebas del monitor con fills empujados por el stream."""
+
+    def setup_method(self):
+        self.repository = Mock(spec=GridRepository)
+        self.exchange = Mock(spec=ExchangeService)
+        self.stream = Mock(spec=FillStream)
+        self.stream.is_connected.return_value = True
+        self.config = GridConfig(
+            id=1, telegram_chat_id="123456", config_type="ETH", pair="ETH/USDT", total_capital=1000.0,
+            grid_levels=5, price_range_percent=10.0, stop_loss_percent=5.0, enable_stop_loss=True,
+            enable_trailing_up=True, is_active=True, is_configured=True, is_running=True,
+            last_decision="running", last_decision_timestamp=datetime.now(),
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+        self.repository.get_active_configs.return_value = [self.config]
+        self.exchange.can_bot_use_capital.return_value = {'can_use': True}
+        self.exchange.reconcile_capital_ledger.return_value = None
+        self.exchange.create_order.return_value = Mock()
+        self.exchange.get_active_orders_from_exchange.return_value = [{'exchange_order_id': '1'}] * 30
+        self.exchange.get_exchange_snapshot.return_value = ExchangeSnapshot(
+            pair='ETH/USDT', open_orders=(), balances={}, price=Decimal('2000'), taken_at=datetime.now()
+        )
+        self.monitor = RealTimeGridMonitorUseCase(
+            grid_repository=self.repository,
+            exchange_service=self.exchange,
+            notification_service=Mock(spec=NotificationService),
+            grid_calculator=Mock(spec=GridCalculator),
+            fill_stream=self.stream
+        )
+        self.monitor.force_bot_ready('ETH/USDT')
+        self.exchange.get_active_orders_from_exchange.reset_mock()
+
+    def test_stream_fill_creates_complementary_order_once(self):
+        fill = execution_report_to_fill(execution_report(7), lambda market_id: 'ETH/USDT')
+
+        self.monitor.handle_fill_event(fill)
+        self.monitor.handle_fill_event(fill)
+        # El dispatcher solo encola: nada se procesa fuera del hilo del monitor
+        self.exchange.create_order.assert_not_called()
+
+        assert self.monitor._drain_stream_fills() == {'fills': 1, 'orders': 1}
+
+        self.exchange.create_order.assert_called_once()
+        assert self.exchange.create_order.call_args.kwargs['side'] == 'sell'
+        # Bot ya inicializado: no se consultan las órdenes activas por cada fill
+        self.exchange.get_active_orders_from_exchange.assert_not_called()
+
+    def test_rest_reconciliation_skips_fills_seen_by_stream(self):
+        fill = execution_report_to_fill(execution_report(7), lambda market_id: 'ETH/USDT')
+        self.monitor.handle_fill_event(fill)
+        self.monitor._drain_stream_fills()
+        self.exchange.get_filled_orders_from_exchange.return_value = []
+        self.exchange.get_recent_trades_from_exchange.return_value = []
+        self.monitor._previous_active_orders['ETH/USDT'] = [{'exchange_order_id': '7', 'side': 'buy'}]
+
+        result = self.monitor._monitor_bot_realtime(self.config)
+
+        assert result['fills_detected'] == 0
+        self.exchange.detect_fills_by_comparison.assert_not_called()
+        self.exchange.create_order.assert_called_once()
+
+    def test_fill_arriving_mid_cycle_is_processed_before_the_cycle_ends(self):
+        fill = execution_report_to_fill(execution_report(7), lambda market_id: 'ETH/USDT')
+        self.monitor.risk_management = Mock()
+        # El fill llega mientras el ciclo revisa los riesgos
+        self.monitor.risk_management.check_and_handle_risk_events.side_effect = \
+            lambda config, snapshot: self.monitor.handle_fill_event(fill) or {}
+
+        self.monitor.execute()
+
+        self.exchange.create_order.assert_called_once()
+        assert self.monitor._stream_fills.empty()
+
+    def test_rest_detection_only_reconciles_while_stream_is_connected(self):
+        self.monitor.risk_management = Mock()
+        self.monitor.risk_management.check_and_handle_risk_events.return_value = {}
+        self.monitor._monitor_bot_realtime = Mock(return_value={})
+
+        assert self.monitor.execute()['reconciled'] is True
+        assert self.monitor.execute()['reconciled'] is False
+        self.monitor.request_reconciliation()
+        assert self.monitor.execute()['reconciled'] is True
+
+        self.stream.is_connected.return_value = False
+        assert self.monitor.execute()['reconciled'] is True
+        # Los riesgos se revisan en todos los ciclos
+        assert self.monitor.risk_management.check_and_handle_risk_events.call_count == 4
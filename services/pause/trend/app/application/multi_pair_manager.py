@@ -158,6 +158,32 @@ class MultiPairManager:
         
         return results
     
+    async def execute_cycle_for_pair(self, pair: str) -> Optional[bool]:
+        """
+        Ejecuta un ciclo solo para un par (ej: tras un cambio de decisión del cerebro).
+        
+        Args:
+            pair: Par con o sin separador ("BTC/USDT" o "BTCUSDT")
+            
+        Returns:
+            Resultado del ciclo, o None si no hay un bot activo para el par
+        """
+        normalized = pair.replace('/', '')
+        for symbol, bot_instance in self.bot_instances.items():
+            if symbol.replace('/', '') != normalized or not bot_instance.is_active:
+                continue
+            
+            try:
+                logger.debug(f"🔄 Ejecutando ciclo para {symbol}")
+                success = await bot_instance.cycle_use_case.execute_cycle()
+                bot_instance.last_cycle_time = datetime.utcnow()
+                return success
+            except Exception as e:
+                logger.error(f"❌ Error en ciclo para {symbol}: {str(e)}")
+                return False
+        
+        return None
+    
     async def check_trailing_stop_for_all_pairs(self) -> Dict[str, bool]:
         """Verifica trailing stop para todos los pares activos."""
         results = {}
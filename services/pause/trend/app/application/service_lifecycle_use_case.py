@@ -3,7 +3,7 @@
 import asyncio
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Set
 
 from ..domain.entities import TrendBotConfig
 from ..domain.interfaces import (
@@ -12,6 +12,7 @@ from ..domain.interfaces import (
 )
 from .trend_bot_cycle_use_case import TrendBotCycleUseCase
 from .multi_pair_manager import MultiPairManager
+from shared.database.decision_bus import DecisionChange, get_decision_bus
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,13 @@ class ServiceLifecycleUseCase:
         self.trailing_stop_task: Optional[asyncio.Task] = None
         self.config_reload_task: Optional[asyncio.Task] = None
         
+        # Pares con cambios de decisión pendientes de procesar (None = todos)
+        self._decision_events: asyncio.Queue = asyncio.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Una sola suscripción por instancia, aunque el servicio se reinicie
+        self._decision_bus = get_decision_bus()
+        self._decision_bus.subscribe(self._on_decision_change_threadsafe, on_resync=self._on_resync_threadsafe)
+        
     async def start(self) -> None:
         """Inicia el servicio y sus tareas programadas."""
         if self.is_running:
@@ -74,8 +82,10 @@ class ServiceLifecycleUseCase:
                 }
             )
             
-            # Iniciar tarea principal
+            # Iniciar tarea principal: los ciclos los disparan los cambios de decisión del cerebro
+            self._loop = asyncio.get_running_loop()
             self.cycle_task = asyncio.create_task(self._main_cycle_loop())
+            self._decision_bus.start()
             
             # Iniciar tarea de monitoreo de trailing stop
             self.trailing_stop_task = asyncio.create_task(self._trailing_stop_monitor_loop())
@@ -98,6 +108,7 @@ class ServiceLifecycleUseCase:
             
         logger.info("🛑 Deteniendo servicio Trend Following Bot...")
         self.is_running = False
+        self._decision_bus.close()
         
         # Cancelar tarea principal
         if self.cycle_task:
@@ -131,16 +142,55 @@ class ServiceLifecycleUseCase:
         
         logger.info("✅ Servicio detenido exitosamente")
     
+    def _on_decision_change_threadsafe(self, change: DecisionChange) -> None:
+        """Callback del bus (hilo del listener): pasa el cambio al event loop."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._on_decision_change, change)
+    
+    def _on_resync_threadsafe(self) -> None:
+        """Callback de resincronización del bus: pide un ciclo de todos los pares."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._decision_events.put_nowait, None)
+    
+    def _on_decision_change(self, change: DecisionChange) -> None:
+        """Encola el par de un cambio de decisión TREND (en el hilo del event loop)."""
+        if change.estrategia != "TREND":
+            return
+        logger.info(f"📡 Cambio de decisión del cerebro: {change.par} {change.previous_decision} → {change.decision}")
+        self._decision_events.put_nowait(change.par)
+    
     async def _main_cycle_loop(self) -> None:
-        """Loop principal del servicio para todos los pares."""
-        cycle_interval_hours = 1  # Ciclo cada 1 hora
+        """
+        Loop principal: ejecuta el ciclo de un par cuando el cerebro cambia su
+        decisión, y de todos los pares al iniciar, tras reconectar con el bus o
+        si pasa el intervalo de seguridad sin cambios (reintenta ciclos fallidos
+        y recoge pares añadidos después).
+        """
+        safety_interval_minutes = 60  # Ciclo completo de seguridad cada hora
         
-        logger.info(f"🔄 Iniciando loop principal multi-pair con intervalo de {cycle_interval_hours} hora(s)")
+        logger.info("🔄 Iniciando loop principal multi-pair (dirigido por cambios de decisión)")
         
         while self.is_running:
             try:
-                # Ejecutar ciclo para todos los pares activos
-                results = await self.multi_pair_manager.execute_cycle_for_all_pairs()
+                try:
+                    first = await asyncio.wait_for(self._decision_events.get(), timeout=safety_interval_minutes * 60)
+                except asyncio.TimeoutError:
+                    logger.debug("⏰ Sin cambios de decisión: ciclo de seguridad para todos los pares")
+                    first = None
+                
+                # Agrupar los cambios que llegan en ráfaga en un mismo ciclo del cerebro
+                pairs: Set[Optional[str]] = {first}
+                while not self._decision_events.empty():
+                    pairs.add(self._decision_events.get_nowait())
+                
+                if None in pairs:
+                    results = await self.multi_pair_manager.execute_cycle_for_all_pairs()
+                else:
+                    results = {}
+                    for pair in pairs:
+                        success = await self.multi_pair_manager.execute_cycle_for_pair(pair)
+                        if success is not None:
+                            results[pair] = success
                 
                 successful_pairs = [pair for pair, success in results.items() if success]
                 failed_pairs = [pair for pair, success in results.items() if not success]
@@ -159,11 +209,6 @@ class ServiceLifecycleUseCase:
                     f"Error crítico en loop principal: {str(e)}",
                     {"timestamp": datetime.utcnow().isoformat()}
                 )
-            
-            # Esperar hasta el próximo ciclo
-            if self.is_running:
-                logger.debug(f"⏰ Esperando {cycle_interval_hours} hora(s) hasta el próximo ciclo")
-                await asyncio.sleep(cycle_interval_hours * 3600)
     
     async def _trailing_stop_monitor_loop(self) -> None:
         """Loop de monitoreo de trailing stop cada 5-10 minutos para todos los pares."""
@@ -5,6 +5,7 @@ from decimal import Decimal
 from typing import Dict, Any, Optional
 import ccxt
 
+from shared.exchange import RequestLane, get_exchange_gateway
 from ..domain.entities import TradingResult
 from ..domain.interfaces import IExchangeService
 from ..config import get_config
@@ -34,22 +35,24 @@ class ExchangeService(IExchangeService):
             api_key = self.config.paper_trading_api_key if sandbox else self.config.binance_api_key
             secret = self.config.paper_trading_secret_key if sandbox else self.config.binance_api_secret
             
-            self.exchange = ccxt.binance({
-                'apiKey': api_key,
-                'secret': secret,
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'spot',
-                    'warnOnFetchOpenOrdersWithoutSymbol': False
-                }
-            })
-            
-            # Configurar modo sandbox explícitamente
+            def create_client():
+                client = ccxt.binance({
+                    'apiKey': api_key,
+                    'secret': secret,
+                    'options': {
+                        'defaultType': 'spot',
+                        'warnOnFetchOpenOrdersWithoutSymbol': False
+                    }
+                })
+                client.set_sandbox_mode(sandbox)
+                return client
+            
+            # Las peticiones pasan por el gateway compartido (presupuesto de peso de Binance)
+            gateway = get_exchange_gateway('binance-sandbox' if sandbox else 'binance', create_client)
+            self.exchange = gateway.client()
             if sandbox:
-                self.exchange.set_sandbox_mode(True)
                 logger.info("🧪 Modo SANDBOX activado para Binance")
             else:
-                self.exchange.set_sandbox_mode(False)
                 logger.info("🚀 Modo PRODUCCIÓN activado para Binance")
             
             # Cargar mercados
@@ -168,7 +171,8 @@ class ExchangeService(IExchangeService):
         try:
             logger.info(f"Ejecutando orden de venta: {quantity} {symbol}")
             
-            order = self.exchange.create_market_sell_order(
+            # Las salidas (stop-loss, trailing) tienen prioridad sobre el resto de peticiones
+            order = self.exchange.with_lane(RequestLane.RISK).create_market_sell_order(
                 symbol, 
                 float(quantity)
             )
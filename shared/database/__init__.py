@@ -5,7 +5,8 @@ from .session import SessionLocal, init_database, get_db
 from . import models
 
 # Mantener compatibilidad con imports directos del modelo anterior
-from .models import Base, Noticia, GridBotConfig, GridBotState, HypeEvent, EstrategiaStatus, HypeScan, HypeMention
+from .models import Base, Noticia, GridBotConfig, GridBotState, HypeEvent, EstrategiaStatus, HypeScan, HypeMention, SentimentRollup, DecisionHistory
 
 __all__ = ['SessionLocal', 'init_database', 'get_db', 'models', 'Base', 
-           'Noticia', 'GridBotConfig', 'GridBotState', 'HypeEvent', 'EstrategiaStatus', 'HypeScan', 'HypeMention'] 
\ No newline at end of file
+           'Noticia', 'GridBotConfig', 'GridBotState', 'HypeEvent', 'EstrategiaStatus', 'HypeScan', 'HypeMention',
+           'SentimentRollup', 'DecisionHistory'] 
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Bus de cambios de decisión del cerebro.
+
+El brain publica un `DecisionChange` cada vez que la decisión vigente de un par
+y estrategia cambia en `estrategia_status`; los bots (grid, trend) se
+suscriben y reaccionan al instante en lugar de consultar la tabla
+periódicamente.
+
+- PostgreSQL: LISTEN/NOTIFY. La notificación se emite dentro de la transacción
+  que guarda la decisión, así que solo llega si el commit se completa.
+- SQLite: brain, grid y trend son procesos distintos que comparten el archivo;
+  `PollingDecisionBus` lee `estrategia_status` cada `SQLITE_POLL_SECONDS` y
+  publica las diferencias.
+- Tests: bus en memoria dentro del proceso, entregado tras el commit.
+"""
+import json
+import logging
+import select
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DECISION_CHANNEL = "decision_changes"
+
+# Segundos entre comprobaciones de parada del listener y espera máxima entre reconexiones
+LISTEN_POLL_SECONDS = 5.0
+RECONNECT_MAX_DELAY = 60.0
+
+# Segundos entre lecturas de estrategia_status en SQLite (sin LISTEN/NOTIFY)
+SQLITE_POLL_SECONDS = 60.0
+
+ChangeCallback = Callable[['DecisionChange'], None]
+ResyncCallback = Callable[[], None]
+
+
+@dataclass(frozen=True)
+class DecisionChange:
+    """Cambio de la decisión vigente de un par y estrategia."""
+    par: str
+    estrategia: str
+    decision: str
+    previous_decision: Optional[str]
+    timestamp: str  # ISO 8601 (UTC)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'DecisionChange':
+        return cls(**json.loads(payload))
+
+
+class DecisionBus:
+    """
+    Bus en memoria (un único proceso).
+
+    Los callbacks se ejecutan en el hilo que hace el commit (en PostgreSQL, en
+    el hilo del listener), así que deben ser rápidos: los consumidores los usan
+    para encolar o agendar el trabajo real.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[ChangeCallback, Optional[ResyncCallback]]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, on_change: ChangeCallback, on_resync: Optional[ResyncCallback] = None) -> None:
+        """
+        Registra un consumidor.
+
+        Args:
+            on_change: Se llama con cada cambio de decisión
+            on_resync: Se llama al iniciar el bus y tras cada reconexión, cuando
+                pudieron perderse cambios; el consumidor relee el estado completo
+        """
+        with self._lock:
+            self._subscribers.append((on_change, on_resync))
+
+    def publish(self, session: Session, changes: Sequence[DecisionChange]) -> None:
+        """
+        Publica cambios como parte de la transacción de `session`.
+
+        Se entregan cuando la transacción hace commit; si se revierte no se
+        entrega nada.
+
+        Args:
+            session: Sesión con la transacción que guarda las decisiones
+            changes: Cambios a publicar
+        """
+        if changes:
+            pending = list(changes)
+            event.listen(session, 'after_commit', lambda _session: self._dispatch(pending), once=True)
+
+    def start(self) -> None:
+        """Inicia el bus; los consumidores hacen su sincronización inicial."""
+        self._resync()
+
+    def close(self) -> None:
+        """Detiene el bus."""
+
+    def _dispatch(self, changes: Sequence[DecisionChange]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for change in changes:
+            for on_change, _ in subscribers:
+                try:
+                    on_change(change)
+                except Exception as e:
+                    logger.error(f"❌ Error en consumidor de decisiones ({change.par} {change.estrategia}): {e}")
+
+    def _resync(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for _, on_resync in subscribers:
+            if on_resync is None:
+                continue
+            try:
+                on_resync()
+            except Exception as e:
+                logger.error(f"❌ Error resincronizando consumidor de decisiones: {e}")
+
+
+class PostgresDecisionBus(DecisionBus):
+    """
+    Bus sobre LISTEN/NOTIFY de PostgreSQL (entre procesos).
+
+    El listener usa una conexión dedicada en autocommit, en un hilo propio, y
+    se reconecta con espera exponencial si la conexión cae.
+    """
+
+    def __init__(self, engine: Engine, channel: str = DECISION_CHANNEL):
+        super().__init__()
+        self._engine = engine
+        self._channel = channel
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, session: Session, changes: Sequence[DecisionChange]) -> None:
+        if changes:
+            # NOTIFY es transaccional: PostgreSQL lo entrega al hacer commit
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                [{'channel': self._channel, 'payload': change.to_json()} for change in changes]
+            )
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._listen_loop, name="decision-bus-listener", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=LISTEN_POLL_SECONDS * 2)
+            self._thread = None
+
+    def _listen_loop(self) -> None:
+        delay = 1.0
+        while not self._stop_event.is_set():
+            connection = None
+            try:
+                connection = self._engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                # El ping de checkout del pool deja una transacción abierta
+                dbapi_connection.rollback()
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self._channel}")
+                logger.info(f"📡 Escuchando cambios de decisión en '{self._channel}'")
+
+                # Pudieron perderse notificaciones mientras no había conexión
+                self._resync()
+                delay = 1.0
+
+                while not self._stop_event.is_set():
+                    readable, _, _ = select.select([dbapi_connection], [], [], LISTEN_POLL_SECONDS)
+                    if not readable:
+                        continue
+                    dbapi_connection.poll()
+                    changes = []
+                    while dbapi_connection.notifies:
+                        notification = dbapi_connection.notifies.pop(0)
+                        try:
+                            changes.append(DecisionChange.from_json(notification.payload))
+                        except (TypeError, ValueError) as e:
+                            logger.warning(f"⚠️ Notificación de decisión inválida: {e}")
+                    self._dispatch(changes)
+
+            except Exception as e:
+                logger.error(f"❌ Listener de decisiones desconectado: {e}. Reintentando en {delay:.0f}s")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            finally:
+                if connection is not None:
+                    try:
+                        # La conexión queda en autocommit con LISTEN: no se devuelve al pool
+                        connection.invalidate()
+                    except Exception:
+                        pass
+
+
+class PollingDecisionBus(DecisionBus):
+    """
+    Bus entre procesos para SQLite: un hilo lee las decisiones vigentes de
+    `estrategia_status` periódicamente y publica las que cambiaron.
+
+    La primera lectura (y cualquiera tras un error) dispara la resincronización
+    de los consumidores en lugar de publicar cambios.
+    """
+
+    def __init__(self, engine: Engine, poll_seconds: float = SQLITE_POLL_SECONDS):
+        super().__init__()
+        self._engine = engine
+        self._poll_seconds = poll_seconds
+        self._decisions: Optional[Dict[Tuple[str, str], str]] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="decision-bus-poller", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_seconds)
+            self._thread = None
+
+    def poll(self) -> None:
+        """Lee las decisiones vigentes y publica las que cambiaron desde la última lectura."""
+        with self._engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT par, estrategia, decision, timestamp FROM estrategia_status")
+            ).all()
+
+        current = {(row.par, row.estrategia): row.decision for row in rows}
+        previous, self._decisions = self._decisions, current
+        if previous is None:
+            self._resync()
+            return
+
+        changes = [
+            DecisionChange(
+                par=row.par,
+                estrategia=row.estrategia,
+                decision=row.decision,
+                previous_decision=previous.get((row.par, row.estrategia)),
+                timestamp=str(row.timestamp) if row.timestamp is not None else ''
+            )
+            for row in rows
+            if previous.get((row.par, row.estrategia)) != row.decision
+        ]
+        self._dispatch(changes)
+
+    def _poll_loop(self) -> None:
+        logger.info(f"📡 Leyendo cambios de decisión de estrategia_status cada {self._poll_seconds:.0f}s")
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                # Pudieron perderse cambios: la próxima lectura resincroniza
+                logger.error(f"❌ Error leyendo decisiones: {e}")
+                self._decisions = None
+            self._stop_event.wait(self._poll_seconds)
+
+
+_bus: Optional[DecisionBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_decision_bus() -> DecisionBus:
+    """
+    Obtiene el bus de decisiones del proceso según la base de datos configurada.
+
+    Returns:
+        PostgresDecisionBus en PostgreSQL, PollingDecisionBus en otro caso
+    """
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            from shared.database.session import engine
+            if engine.dialect.name == 'postgresql':
+                _bus = PostgresDecisionBus(engine)
+            else:
+                _bus = PollingDecisionBus(engine)
+        return _bus
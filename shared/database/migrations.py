@@ -0,0 +1,136 @@
+"""
+Migraciones de esquema de la base de datos compartida.
+
+`create_all` solo crea tablas nuevas; los cambios sobre tablas existentes
+(columnas, índices y sus backfills) se aplican aquí. Cada migración es
+idempotente y se ejecuta desde `init_database` al iniciar cada servicio.
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Aplica todas las migraciones pendientes.
+
+    Args:
+        engine: Engine de SQLAlchemy
+    """
+    migrate_noticias_published_at_utc(engine)
+    migrate_estrategia_status_unique_key(engine)
+
+
+def migrate_noticias_published_at_utc(engine: Engine) -> int:
+    """
+    Añade `noticias.published_at_utc` (DateTime indexado), lo rellena a partir
+    del `published_at` textual y crea los índices de la tabla que falten
+    (incluido el parcial `sentiment_score IS NULL`).
+
+    Args:
+        engine: Engine de SQLAlchemy
+
+    Returns:
+        Número de filas rellenadas
+    """
+    from shared.database.models.noticia import Noticia, published_at_to_utc
+
+    inspector = inspect(engine)
+    if not inspector.has_table(Noticia.__tablename__):
+        return 0
+
+    columns = {column['name'] for column in inspector.get_columns(Noticia.__tablename__)}
+    if 'published_at_utc' not in columns:
+        column_type = Noticia.__table__.c.published_at_utc.type.compile(dialect=engine.dialect)
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE noticias ADD COLUMN published_at_utc {column_type}"))
+            logger.info("🛠️ Columna noticias.published_at_utc añadida")
+        except Exception:
+            # Otro servicio pudo aplicar la migración a la vez
+            columns = {column['name'] for column in inspect(engine).get_columns(Noticia.__tablename__)}
+            if 'published_at_utc' not in columns:
+                raise
+
+    # Backfill por lotes, recorriendo la clave primaria
+    backfilled = 0
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(text(
+                "SELECT id, published_at FROM noticias "
+                "WHERE published_at_utc IS NULL AND id > :last_id ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE}).fetchall()
+            if not rows:
+                break
+            updates = []
+            for news_id, published_at in rows:
+                try:
+                    updates.append({'id': news_id, 'published_at_utc': published_at_to_utc(published_at)})
+                except (TypeError, ValueError):
+                    logger.warning(f"⚠️ published_at inválido en noticia {news_id}: {published_at!r}")
+            if updates:
+                connection.execute(
+                    text("UPDATE noticias SET published_at_utc = :published_at_utc WHERE id = :id"),
+                    updates
+                )
+            backfilled += len(updates)
+            last_id = rows[-1][0]
+
+    if backfilled:
+        logger.info(f"🛠️ noticias.published_at_utc rellenado en {backfilled} filas")
+
+    for index in Noticia.__table__.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo crear el índice {index.name}: {e}")
+
+    return backfilled
+
+
+def migrate_estrategia_status_unique_key(engine: Engine) -> int:
+    """
+    Crea el índice único (par, estrategia) de `estrategia_status`, eliminando
+    antes los duplicados (se conserva la fila más reciente de cada clave).
+
+    Args:
+        engine: Engine de SQLAlchemy
+
+    Returns:
+        Número de filas duplicadas eliminadas
+    """
+    from shared.database.models.estrategia_status import EstrategiaStatus
+
+    inspector = inspect(engine)
+    if not inspector.has_table(EstrategiaStatus.__tablename__):
+        return 0
+    index_names = {index['name'] for index in inspector.get_indexes(EstrategiaStatus.__tablename__)}
+    if 'uq_estrategia_status_par_estrategia' in index_names:
+        return 0
+
+    with engine.begin() as connection:
+        removed = connection.execute(text(
+            "DELETE FROM estrategia_status WHERE id NOT IN ("
+            "  SELECT MAX(id) FROM estrategia_status AS latest"
+            "  WHERE latest.timestamp = ("
+            "    SELECT MAX(timestamp) FROM estrategia_status AS same"
+            "    WHERE same.par = latest.par AND same.estrategia = latest.estrategia"
+            "  )"
+            "  GROUP BY par, estrategia"
+            ")"
+        )).rowcount
+    if removed:
+        logger.info(f"🛠️ estrategia_status: {removed} decisiones duplicadas eliminadas")
+
+    for index in EstrategiaStatus.__table__.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo crear el índice {index.name}: {e}")
+
+    return removed
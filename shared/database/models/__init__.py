@@ -9,10 +9,14 @@ from .base import Base
 from .noticia import Noticia
 from .grid_bot_config import GridBotConfig
 from .grid_bot_state import GridBotState
+from .grid_order import GridOrder
+from .grid_trade import GridTrade
 from .trend_bot_config import TrendBotConfig
 from .hype_event import HypeEvent
 from .estrategia_status import EstrategiaStatus
 from .hype_scan import HypeScan, HypeMention
+from .sentiment_rollup import SentimentRollup
+from .decision_history import DecisionHistory
 
 # Exportar todo para compatibilidad con imports existentes
 __all__ = [
@@ -20,9 +24,13 @@ __all__ = [
     'Noticia',
     'GridBotConfig', 
     'GridBotState',
+    'GridOrder',
+    'GridTrade',
     'TrendBotConfig',
     'HypeEvent',
     'EstrategiaStatus',
     'HypeScan',
-    'HypeMention'
+    'HypeMention',
+    'SentimentRollup',
+    'DecisionHistory'
 ] 
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Modelo para el historial de decisiones del cerebro de trading.
+Tabla de solo inserción: cada ciclo de análisis añade una fila por par y estrategia.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from datetime import datetime
+from .base import Base
+
+
+class DecisionHistory(Base):
+    """
+    Historial compacto de decisiones (solo inserción).
+
+    `estrategia_status` guarda únicamente la decisión vigente; aquí se conserva
+    la serie temporal con los indicadores que la produjeron. La razón y los
+    umbrales no se guardan: la razón se deriva de los indicadores y los
+    umbrales de la receta vigente.
+    """
+    __tablename__ = "decision_history"
+    __table_args__ = (
+        # Lecturas por par y estrategia en orden temporal (paginación keyset)
+        Index('ix_decision_history_par_estrategia_timestamp', 'par', 'estrategia', 'timestamp'),
+        # Retención por antigüedad
+        Index('ix_decision_history_timestamp', 'timestamp'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    par = Column(String, nullable=False)  # Ej: "ETH/USDT"
+    estrategia = Column(String, nullable=False)  # Ej: "GRID"
+    decision = Column(String, nullable=False)  # Ej: "OPERAR_GRID"
+
+    # Indicadores utilizados para la decisión
+    adx_actual = Column(Float, nullable=True)
+    volatilidad_actual = Column(Float, nullable=True)
+    sentiment_promedio = Column(Float, nullable=True)
+    sma30_actual = Column(Float, nullable=True)
+    sma150_actual = Column(Float, nullable=True)
+    sentiment_7d_avg = Column(Float, nullable=True)
+
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Convierte el objeto a diccionario para logging y API responses"""
+        return {
+            'id': self.id,
+            'par': self.par,
+            'estrategia': self.estrategia,
+            'decision': self.decision,
+            'adx_actual': self.adx_actual,
+            'volatilidad_actual': self.volatilidad_actual,
+            'sentiment_promedio': self.sentiment_promedio,
+            'sma30_actual': self.sma30_actual,
+            'sma150_actual': self.sma150_actual,
+            'sentiment_7d_avg': self.sentiment_7d_avg,
+            'timestamp': self.timestamp.isoformat() if self.timestamp is not None else None
+        }
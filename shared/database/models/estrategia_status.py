@@ -2,7 +2,7 @@
 Modelo para almacenar el estado de las estrategias de trading.
 Registra decisiones del cerebro de trading y sus indicadores.
 """
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, Index
 from datetime import datetime
 from .base import Base
 
@@ -10,8 +10,13 @@ from .base import Base
 class EstrategiaStatus(Base):
     """
     Modelo para almacenar el estado de las estrategias de trading.
+    Una única fila (la decisión vigente) por par y estrategia.
     """
     __tablename__ = "estrategia_status"
+    __table_args__ = (
+        # Clave de los upserts del brain (INSERT ... ON CONFLICT (par, estrategia))
+        Index('uq_estrategia_status_par_estrategia', 'par', 'estrategia', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     par = Column(String, nullable=False, index=True)  # Ej: "ETH/USDT"
@@ -0,0 +1,39 @@
+"""
+Modelo para las órdenes colocadas por los bots de grid trading.
+Permite conocer las órdenes activas y los fills sin consultar al exchange.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from datetime import datetime
+from .base import Base
+
+
+class GridOrder(Base):
+    """
+    Orden de grid trading (una fila por orden del exchange).
+
+    Las órdenes complementarias guardan la orden que las originó y su precio
+    de ejecución: al llenarse, ambas forman un trade completo.
+    """
+    __tablename__ = "grid_orders"
+    __table_args__ = (
+        # Órdenes activas por par
+        Index('ix_grid_orders_pair_status', 'pair', 'status'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    exchange_order_id = Column(String, nullable=False, unique=True)
+    pair = Column(String, nullable=False)  # Ej: "ETH/USDT"
+    side = Column(String, nullable=False)  # 'buy' o 'sell'
+    amount = Column(Float, nullable=False)
+    price = Column(Float, nullable=False)
+    status = Column(String, nullable=False, default='open')  # 'open', 'filled', 'cancelled'
+    order_type = Column(String, nullable=True)  # 'grid_buy', 'grid_sell', 'market'...
+    grid_level = Column(Integer, nullable=True)
+
+    # Orden llenada que originó esta complementaria
+    parent_order_id = Column(String, nullable=True)
+    parent_price = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    filled_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
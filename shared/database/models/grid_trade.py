@@ -0,0 +1,30 @@
+"""
+Modelo para los trades completados por los bots de grid trading.
+Tabla de solo inserción: cada fill de una orden complementaria añade una fila.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from datetime import datetime
+from .base import Base
+
+
+class GridTrade(Base):
+    """
+    Trade de grid completado (compra + venta del mismo escalón).
+    Base del P&L por par.
+    """
+    __tablename__ = "grid_trades"
+    __table_args__ = (
+        # Trades recientes y P&L por par
+        Index('ix_grid_trades_pair_executed_at', 'pair', 'executed_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    pair = Column(String, nullable=False)
+    buy_order_id = Column(String, nullable=False)
+    sell_order_id = Column(String, nullable=False)
+    buy_price = Column(Float, nullable=False)
+    sell_price = Column(Float, nullable=False)
+    amount = Column(Float, nullable=False)
+    profit = Column(Float, nullable=False)
+    profit_percent = Column(Float, nullable=False)
+    executed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
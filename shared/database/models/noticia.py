@@ -2,22 +2,44 @@
 Modelo para noticias y análisis de sentimientos.
 Utilizado por el servicio de noticias y consultado por otros servicios.
 """
-from sqlalchemy import Column, Integer, String, Text, Float
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Index, text
 from .base import Base
 
 
+def published_at_to_utc(published_at) -> datetime:
+    """
+    Convierte published_at (str ISO 8601 o datetime) a datetime UTC sin zona horaria.
+    Las fechas sin zona horaria se interpretan como UTC.
+    """
+    if isinstance(published_at, str):
+        published_at = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+    if published_at.tzinfo is not None:
+        published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return published_at
+
+
 class Noticia(Base):
     """
     Modelo para almacenar noticias recopiladas y su análisis de sentimientos.
     Utilizado por el servicio de noticias y consultado por otros servicios.
     """
     __tablename__ = "noticias"
+    __table_args__ = (
+        # Índice parcial: solo contiene las noticias pendientes de analizar
+        Index(
+            'ix_noticias_sentiment_pending', 'id',
+            postgresql_where=text('sentiment_score IS NULL'),
+            sqlite_where=text('sentiment_score IS NULL')
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String, nullable=False)
     headline = Column(Text, nullable=False)
     url = Column(String, unique=True, index=True)
-    published_at = Column(String, nullable=False)
+    published_at = Column(String, nullable=False)  # ISO 8601 original
+    published_at_utc = Column(DateTime, nullable=True, index=True)  # published_at en UTC, para consultas por rango
     sentiment_score = Column(Float, nullable=True)  # Se llenará en fases futuras
     primary_emotion = Column(String, nullable=True)  # Emoción principal: Euforia, Optimismo, etc.
-    news_category = Column(String, nullable=True)    # Categoría: Regulación, Tecnología/Adopción, etc. 
\ No newline at end of file
+    news_category = Column(String, nullable=True)    # Categoría: Regulación, Tecnología/Adopción, etc.
@@ -0,0 +1,31 @@
+"""
+Modelo para los agregados de sentimiento por día y por hora.
+Mantenido por el servicio de noticias y consultado por el brain.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, UniqueConstraint
+from datetime import datetime
+from .base import Base
+
+
+class SentimentRollup(Base):
+    """
+    Agregado incremental del sentimiento de las noticias en un intervalo.
+
+    Cada fila cubre un día o una hora UTC (`granularity` = 'day' | 'hour') y
+    guarda la suma y el número de puntuaciones, más el desglose por categoría
+    y por emoción como {"<valor>": {"count": n, "sum": s}}.
+    """
+    __tablename__ = "sentiment_rollups"
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', name='uq_sentiment_rollups_granularity_bucket'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(8), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)  # Inicio del intervalo en UTC
+    news_count = Column(Integer, nullable=False, default=0)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    sentiment_mean = Column(Float, nullable=True)
+    category_breakdown = Column(JSON, nullable=False, default=dict)
+    emotion_breakdown = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
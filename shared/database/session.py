@@ -111,12 +111,15 @@ def get_db_with_retry(max_retries=3, retry_delay=1):
 
 def init_database():
     """
-    Inicializa la base de datos creando todas las tablas definidas en los modelos.
+    Inicializa la base de datos creando todas las tablas definidas en los modelos
+    y aplicando las migraciones pendientes sobre las tablas existentes.
     Esta función debe ser llamada al iniciar cada servicio para asegurar que las tablas existan.
     """
     try:
         from shared.database.models import Base
+        from shared.database.migrations import run_migrations
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         logger.info("✅ Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"❌ Error inicializando base de datos: {e}")
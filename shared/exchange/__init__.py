@@ -0,0 +1,18 @@
+"""
+Acceso compartido a Binance para todos los microservicios.
+"""
+from .gateway import (
+    ExchangeGateway,
+    GatewayClient,
+    RequestLane,
+    get_exchange_gateway,
+    request_weight,
+)
+
+__all__ = [
+    'ExchangeGateway',
+    'GatewayClient',
+    'RequestLane',
+    'get_exchange_gateway',
+    'request_weight',
+]
@@ -0,0 +1,502 @@
+"""
+Gateway compartido de peticiones a Binance.
+
+Todos los servicios (brain, grid, trend) envuelven su cliente ccxt con un
+`ExchangeGateway` para respetar el límite de peso por IP de Binance
+(REQUEST_WEIGHT, 6000 por minuto en spot) en lugar de depender del limitador
+de ccxt, que no conoce el peso real de cada endpoint ni lo que consumen los
+demás servicios que salen por la misma IP.
+
+- Tabla de pesos por método de ccxt (`fetch_open_orders()` sin símbolo pesa
+  80, con símbolo 6).
+- Cubo de tokens con el presupuesto de peso por minuto (por defecto, el 80 %
+  del límite para dejar margen al resto de procesos).
+- Carriles de prioridad: las llamadas de riesgo (stop-loss, cancelaciones de
+  emergencia) pasan primero y pueden usar todo el presupuesto; las de
+  estadísticas esperan y nunca bajan el cubo de su reserva.
+- Realimentación con la cabecera `X-MBX-USED-WEIGHT-1M`: si Binance ya contó
+  más peso para la IP (incluido el de otros servicios), el cubo baja; nunca sube.
+- Un 429/418 bloquea todas las llamadas durante el `Retry-After` de su respuesta.
+- Límite de órdenes nuevas por cuenta (ORDERS, 100 cada 10 s): las llamadas
+  create_*/edit_* esperan un hueco en la ventana deslizante.
+"""
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límite de peso por minuto de la API spot de Binance
+BINANCE_WEIGHT_LIMIT = 6000
+
+# Límite de órdenes nuevas por cuenta de la API spot de Binance (por ventana)
+BINANCE_ORDER_LIMIT = 100
+BINANCE_ORDER_INTERVAL_SECONDS = 10.0
+
+# Métodos de ccxt que cuentan para el límite de órdenes (las cancelaciones no)
+ORDER_PREFIXES = ('create_', 'edit_')
+
+# Bloqueo por defecto tras un 429/418 sin cabecera Retry-After (segundos)
+DEFAULT_BAN_SECONDS = 60.0
+
+# Excepciones de ccxt que indican límite excedido (429) o IP bloqueada (418)
+RATE_LIMIT_ERRORS = ('RateLimitExceeded', 'DDoSProtection')
+
+# Mensaje de Binance en un 418: "IP banned until 1564213591000"
+BANNED_UNTIL_PATTERN = re.compile(r'banned until (\d{13})')
+
+# Métodos de ccxt que hacen una petición y pasan por el gateway
+REQUEST_PREFIXES = ('fetch_', 'create_', 'cancel_', 'edit_', 'load_markets')
+
+# Peso de los métodos no listados
+DEFAULT_WEIGHT = 5
+
+
+class RequestLane(IntEnum):
+    """Carriles de prioridad (menor valor = mayor prioridad)."""
+    RISK = 0         # Stop-loss, cancelaciones de emergencia
+    TRADING = 1      # Órdenes y balances de la operativa normal
+    MARKET_DATA = 2  # Velas, tickers y libro de órdenes para análisis
+    STATS = 3        # Historial de órdenes y trades para informes
+
+
+# Fracción del presupuesto que cada carril deja libre para los de mayor prioridad
+LANE_RESERVE: Dict[RequestLane, float] = {
+    RequestLane.RISK: 0.0,
+    RequestLane.TRADING: 0.10,
+    RequestLane.MARKET_DATA: 0.25,
+    RequestLane.STATS: 0.50,
+}
+
+# Carril por defecto de cada método (el resto, MARKET_DATA)
+DEFAULT_LANES: Dict[str, RequestLane] = {
+    'create_order': RequestLane.TRADING,
+    'create_market_buy_order': RequestLane.TRADING,
+    'create_market_sell_order': RequestLane.TRADING,
+    'create_limit_buy_order': RequestLane.TRADING,
+    'create_limit_sell_order': RequestLane.TRADING,
+    'cancel_order': RequestLane.TRADING,
+    'cancel_all_orders': RequestLane.TRADING,
+    'fetch_balance': RequestLane.TRADING,
+    'fetch_order': RequestLane.TRADING,
+    'fetch_open_orders': RequestLane.TRADING,
+    'fetch_closed_orders': RequestLane.STATS,
+    'fetch_orders': RequestLane.STATS,
+    'fetch_my_trades': RequestLane.STATS,
+}
+
+
+def _symbols_weight(symbols: Any) -> int:
+    """Peso de /ticker/24hr según el número de símbolos."""
+    if not symbols:
+        return 80
+    count = len(symbols)
+    if count <= 20:
+        return 2
+    if count <= 100:
+        return 40
+    return 80
+
+
+def _order_book_weight(limit: Optional[int]) -> int:
+    """Peso de /depth según la profundidad pedida."""
+    limit = limit or 100
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+# Peso de cada método de ccxt en la API spot de Binance. Cada función recibe
+# los argumentos posicionales y con nombre de la llamada.
+ENDPOINT_WEIGHTS: Dict[str, Callable[[Tuple[Any, ...], Dict[str, Any]], int]] = {
+    'load_markets': lambda args, kwargs: 20,
+    'fetch_time': lambda args, kwargs: 1,
+    'fetch_ticker': lambda args, kwargs: 2,
+    'fetch_tickers': lambda args, kwargs: _symbols_weight(args[0] if args else kwargs.get('symbols')),
+    'fetch_ohlcv': lambda args, kwargs: 2,
+    'fetch_trades': lambda args, kwargs: 25,
+    'fetch_order_book': lambda args, kwargs: _order_book_weight(args[1] if len(args) > 1 else kwargs.get('limit')),
+    'fetch_balance': lambda args, kwargs: 20,
+    'fetch_order': lambda args, kwargs: 4,
+    'fetch_open_orders': lambda args, kwargs: 6 if (args[0] if args else kwargs.get('symbol')) else 80,
+    'fetch_closed_orders': lambda args, kwargs: 20,
+    'fetch_orders': lambda args, kwargs: 20,
+    'fetch_my_trades': lambda args, kwargs: 20,
+    'create_order': lambda args, kwargs: 1,
+    'create_market_buy_order': lambda args, kwargs: 1,
+    'create_market_sell_order': lambda args, kwargs: 1,
+    'create_limit_buy_order': lambda args, kwargs: 1,
+    'create_limit_sell_order': lambda args, kwargs: 1,
+    'cancel_order': lambda args, kwargs: 1,
+    'cancel_all_orders': lambda args, kwargs: 1,
+}
+
+
+def request_weight(method: str, args: Tuple[Any, ...] = (), kwargs: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Peso de una llamada de ccxt en Binance.
+
+    Args:
+        method: Nombre del método de ccxt (ej: 'fetch_open_orders')
+        args: Argumentos posicionales de la llamada
+        kwargs: Argumentos con nombre de la llamada
+
+    Returns:
+        Peso de la petición
+    """
+    weight = ENDPOINT_WEIGHTS.get(method)
+    return weight(args, kwargs or {}) if weight else DEFAULT_WEIGHT
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """Indica si la excepción de ccxt es un 429/418."""
+    return any(cls.__name__ in RATE_LIMIT_ERRORS for cls in type(error).__mro__)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Segundos de bloqueo indicados por la respuesta del propio 429/418.
+
+    Se leen de la excepción (o de su respuesta) y no de
+    `last_response_headers`, que comparten todos los hilos del cliente.
+    """
+    for source in (error, getattr(error, 'response', None)):
+        headers = getattr(source, 'headers', None) or {}
+        for key, value in dict(headers).items():
+            if key.lower() == 'retry-after':
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    break
+    match = BANNED_UNTIL_PATTERN.search(str(error))
+    if match:
+        return max(0.0, int(match.group(1)) / 1000 - time.time())
+    return None
+
+
+class ExchangeGateway:
+    """
+    Cubo de tokens de peso compartido por todas las llamadas de un cliente ccxt.
+
+    Es seguro entre hilos: los servicios llaman a ccxt desde hilos
+    (asyncio.to_thread) y todos comparten el mismo presupuesto.
+    """
+
+    def __init__(
+        self,
+        exchange: Any,
+        weight_limit: int = BINANCE_WEIGHT_LIMIT,
+        budget_fraction: float = 0.8,
+        clock: Callable[[], float] = time.monotonic,
+        order_limit: int = BINANCE_ORDER_LIMIT,
+        order_interval: float = BINANCE_ORDER_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            exchange: Cliente ccxt (se desactiva su limitador propio)
+            weight_limit: Límite de peso por minuto de Binance
+            budget_fraction: Fracción del límite que puede usar este proceso
+                (se aplica también al límite de órdenes)
+            clock: Reloj monótono en segundos (inyectable en pruebas)
+            order_limit: Órdenes nuevas por ventana permitidas por Binance
+            order_interval: Duración de la ventana de órdenes en segundos
+        """
+        self.exchange = exchange
+        # El gateway sustituye al limitador de ccxt: con ambos se espera dos veces
+        self.exchange.enableRateLimit = False
+        self.capacity = weight_limit * budget_fraction
+        self.refill_per_second = self.capacity / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self.order_capacity = max(1, int(order_limit * budget_fraction))
+        self.order_interval = order_interval
+        self._order_times: deque = deque()
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.stats: Dict[str, Any] = {
+            'requests': 0,
+            'weight': 0,
+            'waited_seconds': 0.0,
+            'rate_limited': 0,
+            'used_weight_1m': None,
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def client(self, lane: Optional[RequestLane] = None) -> 'GatewayClient':
+        """
+        Cliente con la misma interfaz que ccxt cuyas peticiones pasan por el gateway.
+
+        Args:
+            lane: Carril de todas sus llamadas (por defecto, el de cada método)
+
+        Returns:
+            Proxy del cliente ccxt
+        """
+        return GatewayClient(self, lane)
+
+    def call(self, method: str, *args: Any, lane: Optional[RequestLane] = None, **kwargs: Any) -> Any:
+        """
+        Ejecuta un método de ccxt respetando el presupuesto de peso.
+
+        Args:
+            method: Nombre del método de ccxt
+            *args: Argumentos posicionales
+            lane: Carril de prioridad (por defecto, DEFAULT_LANES)
+            **kwargs: Argumentos con nombre
+
+        Returns:
+            Resultado de ccxt
+        """
+        if method == 'load_markets' and self._markets_cached(args, kwargs):
+            # ccxt devuelve los mercados en memoria sin hacer la petición
+            return self.exchange.load_markets(*args, **kwargs)
+
+        lane = DEFAULT_LANES.get(method, RequestLane.MARKET_DATA) if lane is None else lane
+        weight = request_weight(method, args, kwargs)
+        self.acquire(weight, lane)
+        if method.startswith(ORDER_PREFIXES):
+            # Tras la espera de peso: el hueco se fecha justo antes de enviar
+            self.acquire_order_slot()
+        with self._condition:
+            self._in_flight += weight
+        try:
+            result = getattr(self.exchange, method)(*args, **kwargs)
+        except Exception as e:
+            if _is_rate_limit_error(e):
+                self._on_rate_limited(e)
+            raise
+        finally:
+            self._release(weight)
+        self._sync_used_weight()
+        return result
+
+    def acquire(self, weight: int, lane: RequestLane = RequestLane.MARKET_DATA) -> None:
+        """
+        Espera hasta que haya peso disponible para el carril.
+
+        Se atiende primero al carril de mayor prioridad (y, dentro del carril,
+        por orden de llegada); cada carril solo consume por encima de su reserva.
+
+        Args:
+            weight: Peso de la petición
+            lane: Carril de prioridad
+        """
+        needed = self._needed(weight, lane)
+        ticket = (int(lane), next(self._sequence))
+        start = self._clock()
+
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    now = self._clock()
+                    if self._waiters[0] == ticket and now >= self._blocked_until and self._tokens >= needed:
+                        break
+                    if now < self._blocked_until:
+                        wait = self._blocked_until - now
+                    elif self._waiters[0] == ticket:
+                        wait = (needed - self._tokens) / self.refill_per_second
+                    else:
+                        wait = 0.5  # Se despierta con notify_all cuando avanza la cola
+                    self._condition.wait(timeout=max(wait, 0.001))
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+            self._consume(weight)
+            self.stats['waited_seconds'] += self._clock() - start
+
+    def acquire_order_slot(self) -> None:
+        """
+        Espera hasta que se pueda enviar una orden nueva sin superar el límite
+        de órdenes de la ventana (`order_capacity` cada `order_interval` s).
+        """
+        start = self._clock()
+        with self._condition:
+            while True:
+                now = self._clock()
+                while self._order_times and now - self._order_times[0] >= self.order_interval:
+                    self._order_times.popleft()
+                if now >= self._blocked_until and len(self._order_times) < self.order_capacity:
+                    break
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    wait = self._order_times[0] + self.order_interval - now
+                self._condition.wait(timeout=max(wait, 0.001))
+            self._order_times.append(now)
+            self.stats['waited_seconds'] += self._clock() - start
+
+    def try_acquire(self, weight: int, lane: RequestLane = RequestLane.MARKET_DATA) -> bool:
+        """
+        Reserva peso sin esperar (ej: estadísticas que pueden saltarse un ciclo).
+
+        Args:
+            weight: Peso de la petición
+            lane: Carril de prioridad
+
+        Returns:
+            True si se reservó el peso; False si habría que esperar
+        """
+        needed = self._needed(weight, lane)
+        with self._condition:
+            self._refill()
+            if self._waiters and self._waiters[0][0] <= int(lane):
+                return False
+            if self._clock() < self._blocked_until or self._tokens < needed:
+                return False
+            self._consume(weight)
+            return True
+
+    @property
+    def available(self) -> float:
+        """Peso disponible ahora mismo."""
+        with self._condition:
+            self._refill()
+            return self._tokens
+
+    # ------------------------------------------------------------------
+    # Implementación
+    # ------------------------------------------------------------------
+
+    def _markets_cached(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> bool:
+        """Indica si load_markets se resolverá con los mercados ya cargados."""
+        reload = args[0] if args else kwargs.get('reload', False)
+        return bool(getattr(self.exchange, 'markets', None)) and not reload
+
+    def _needed(self, weight: int, lane: RequestLane) -> float:
+        """Tokens necesarios para que el carril consuma sin invadir su reserva."""
+        # Una petición más pesada que el presupuesto libre del carril esperaría siempre
+        return min(weight + self.capacity * LANE_RESERVE[lane], self.capacity)
+
+    def _consume(self, weight: int) -> None:
+        """Descuenta el peso de una petición (con el lock tomado)."""
+        self._tokens -= weight
+        self.stats['requests'] += 1
+        self.stats['weight'] += weight
+
+    def _refill(self) -> None:
+        """Repone tokens según el tiempo transcurrido (con el lock tomado)."""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def _release(self, weight: int) -> None:
+        """Marca una petición como terminada."""
+        with self._condition:
+            self._in_flight -= weight
+
+    def _sync_used_weight(self) -> None:
+        """
+        Ajusta el cubo al peso que Binance ya contó en el minuto en curso.
+
+        La cabecera incluye el peso de todos los procesos que salen por la
+        misma IP; las peticiones en vuelo aún no están contadas en ella.
+        `last_response_headers` lo comparten todos los hilos y puede ser de
+        una respuesta anterior, así que solo se usa para bajar el cubo.
+        """
+        used = self._header_int('x-mbx-used-weight-1m') or self._header_int('x-mbx-used-weight')
+        if used is None:
+            return
+        with self._condition:
+            self.stats['used_weight_1m'] = used
+            self._refill()
+            self._tokens = min(self._tokens, self.capacity - used - self._in_flight)
+            self._condition.notify_all()
+
+    def _on_rate_limited(self, error: Exception) -> None:
+        """Bloquea todas las llamadas tras un 429/418."""
+        retry_after = _retry_after_seconds(error)
+        ban_seconds = retry_after if retry_after is not None else DEFAULT_BAN_SECONDS
+        with self._condition:
+            self.stats['rate_limited'] += 1
+            self._blocked_until = max(self._blocked_until, self._clock() + ban_seconds)
+            self._tokens = 0.0
+            self._updated = self._clock()
+            self._condition.notify_all()
+        logger.warning(f"🚦 Límite de Binance alcanzado, peticiones en pausa {ban_seconds:.0f}s: {error}")
+
+    def _header_int(self, name: str) -> Optional[int]:
+        """Lee una cabecera numérica de la última respuesta de ccxt."""
+        headers = getattr(self.exchange, 'last_response_headers', None) or {}
+        for key, value in headers.items():
+            if key.lower() == name:
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return None
+        return None
+
+
+class GatewayClient:
+    """
+    Proxy de un cliente ccxt: las peticiones (fetch_*, create_*, cancel_*,
+    edit_*, load_markets) pasan por el gateway y el resto de atributos
+    (market, amount_to_precision, milliseconds...) se leen del cliente.
+    """
+
+    def __init__(self, gateway: ExchangeGateway, lane: Optional[RequestLane] = None):
+        self._gateway = gateway
+        self._lane = lane
+
+    @property
+    def gateway(self) -> ExchangeGateway:
+        return self._gateway
+
+    def with_lane(self, lane: RequestLane) -> 'GatewayClient':
+        """Mismo cliente con todas sus llamadas en `lane`."""
+        return GatewayClient(self._gateway, lane)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._gateway.exchange, name)
+        if callable(attribute) and name.startswith(REQUEST_PREFIXES):
+            def request(*args: Any, **kwargs: Any) -> Any:
+                return self._gateway.call(name, *args, lane=self._lane, **kwargs)
+            return request
+        return attribute
+
+
+_gateways: Dict[str, ExchangeGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_exchange_gateway(name: str, factory: Callable[[], Any], **options: Any) -> ExchangeGateway:
+    """
+    Gateway único por nombre dentro del proceso.
+
+    Los componentes de un servicio que usan la misma cuenta comparten así un
+    único presupuesto de peso.
+
+    Args:
+        name: Identificador (ej: 'binance', 'binance-sandbox')
+        factory: Crea el cliente ccxt la primera vez
+        **options: Argumentos de ExchangeGateway
+
+    Returns:
+        Gateway compartido
+    """
+    with _gateways_lock:
+        gateway = _gateways.get(name)
+        if gateway is None:
+            gateway = ExchangeGateway(factory(), **options)
+            _gateways[name] = gateway
+        return gateway